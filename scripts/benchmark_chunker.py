@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+File: benchmark_chunker.py
+Purpose: Compare the previous character-based RAG chunker with the sentence/token-budget chunker
+Main functionality: Chunks synthetic Japanese, English and mixed manuals (or given text files) with
+                    both chunkers and reports chunks per MB, token sizes, inputs over the embedding
+                    model limit, mid-sentence cuts, embedding request count and throughput
+Dependencies: src.utils.text_chunker (no API access needed; --counter vertex uses the local tokenizer)
+
+Metrics per chunker:
+    chunks/MB      chunks per MB of UTF-8 input
+    tokens avg/max chunk size as counted by the selected counter
+    over limit     chunks above the model input limit (truncated by the API)
+    mid-sentence   share of chunk starts and ends within a page that fall inside a sentence
+    calls          embedding requests (previous: fixed 100 per request; new: item and token budget)
+    rejected       previous requests above the per-request token limit
+    MB/s           chunking throughput (and the time ratio of a 4x larger input, ~4 when linear)
+
+Usage:
+    python scripts/benchmark_chunker.py [--pages 400] [--chunk-tokens 1000] [--overlap 50]
+        [--counter estimate|vertex] [--file manual.txt ...] [--calibrate]
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.text_chunker import SentenceChunker, estimate_tokens, split_sentences, token_batches
+
+# Mirrors rag_processor.SECTION_MARKER (importing the processor needs the Gemini client)
+SECTION_MARKER = re.compile(r'^\[(?:Page (\d+)|Sheet: ([^\]\n]+))\]\n', re.MULTILINE)
+SENTENCE_ENDINGS = ('。', '！', '？', '!', '?', '.', '」', '）', ')')
+
+MODEL_INPUT_LIMIT = 2048
+REQUEST_TOKEN_LIMIT = 20000
+REQUEST_ITEM_LIMIT = 250
+
+JA_SUBJECTS = ['安全カバー', '油圧ポンプ', '搬送ユニット', '制御盤', '締付ボルト', 'センサー', '冷却ファン', '作業台']
+JA_ACTIONS = ['を取り外してください', 'の摩耗を点検します', 'をトルク 25 N·m で締め付けます',
+              'が正しく取り付けられていることを確認してください', 'の表示ランプが緑色に点灯するまで待ちます',
+              'を清掃し、異物がないことを確認します']
+JA_NOTES = ['作業前に必ず電源を遮断すること', '保護手袋と保護メガネを着用してください',
+            '異常がある場合は作業を中止し、管理者に報告してください']
+EN_WORDS = ['check', 'the', 'pump', 'pressure', 'before', 'starting', 'remove', 'cover', 'bolt', 'torque',
+            'inspect', 'sensor', 'alignment', 'unit', 'replace', 'filter', 'every', 'hours', 'operation']
+
+
+def japanese_page(rng):
+    lines = []
+    for _ in range(rng.randint(6, 24)):
+        step = ''.join(
+            f"{rng.choice(JA_SUBJECTS)}{rng.choice(JA_ACTIONS)}{rng.choice('。。。！')}"
+            for _ in range(rng.randint(2, 5))
+        )
+        if rng.random() < 0.3:
+            step += f"\n※{rng.choice(JA_NOTES)}。"
+        lines.append(step)
+    if rng.random() < 0.4:
+        lines.append('\n'.join(
+            f"{rng.choice(JA_SUBJECTS)} | 点検周期 {rng.randint(1, 12)} か月 | 部品番号 A-{rng.randint(1000, 9999)}"
+            for _ in range(rng.randint(5, 15))
+        ))
+    return '\n\n'.join(lines)
+
+
+def english_page(rng):
+    paragraphs = []
+    for _ in range(rng.randint(6, 24)):
+        sentences = []
+        for _ in range(rng.randint(3, 7)):
+            words = [rng.choice(EN_WORDS) for _ in range(rng.randint(6, 18))]
+            sentences.append(' '.join(words).capitalize() + rng.choice('...!'))
+        paragraphs.append(' '.join(sentences))
+    return '\n\n'.join(paragraphs)
+
+
+def generate_document(kind, pages, seed):
+    rng = random.Random(seed)
+    parts = []
+    for page in range(1, pages + 1):
+        if kind == 'japanese' or (kind == 'mixed' and rng.random() < 0.7):
+            body = japanese_page(rng)
+        else:
+            body = english_page(rng)
+        # Extracted PDF text wraps lines at a fixed width
+        if kind != 'english' and rng.random() < 0.5:
+            body = re.sub(r'([^\n]{38})', '\\1\n', body)
+        parts.append(f"[Page {page}]\n{body}")
+    return '\n\n'.join(parts)
+
+
+def sections(text):
+    matches = list(SECTION_MARKER.finditer(text))
+    if not matches:
+        return [text]
+    bodies = [text[:matches[0].start()]] if text[:matches[0].start()].strip() else []
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        bodies.append(text[match.end():end])
+    return bodies
+
+
+def legacy_chunk_text(text, chunk_size, overlap):
+    """The previous RAGProcessor.chunk_text (4 characters per token, blank-line paragraphs)"""
+    target_chars = chunk_size * 4
+    overlap_chars = overlap * 4
+    chunks, current, current_length = [], [], 0
+    for para in re.split(r'\n\n+', text):
+        para = para.strip()
+        if not para:
+            continue
+        if current_length + len(para) > target_chars and current:
+            chunk_text = '\n\n'.join(current)
+            chunks.append(chunk_text)
+            overlap_text = chunk_text[-overlap_chars:] if len(chunk_text) > overlap_chars else chunk_text
+            current, current_length = [overlap_text, para], len(overlap_text) + len(para)
+        else:
+            current.append(para)
+            current_length += len(para)
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
+
+
+def run(name, text, chunk, counter, fixed_batches):
+    bodies = sections(text)
+    started = time.perf_counter()
+    per_section = [chunk(body) for body in bodies]
+    seconds = time.perf_counter() - started
+    chunks = [c for section_chunks in per_section for c in section_chunks]
+
+    mb = len(text.encode('utf-8')) / 1024 / 1024
+    tokens = [counter(c) for c in chunks]
+    if fixed_batches:
+        batches = [(i, min(i + 100, len(chunks))) for i in range(0, len(chunks), 100)]
+    else:
+        batches = list(token_batches(tokens, REQUEST_ITEM_LIMIT, REQUEST_TOKEN_LIMIT * 9 // 10))
+    rejected = sum(1 for start, end in batches if sum(tokens[start:end]) > REQUEST_TOKEN_LIMIT)
+    # Boundaries placed by the chunker: every chunk end but the section's last,
+    # every chunk start but the section's first
+    cuts, mid_sentence = 0, 0
+    for body, section_chunks in zip(bodies, per_section):
+        starts = {start + len(body[start:end]) - len(body[start:end].lstrip()) for start, end in split_sentences(body)}
+        for c in section_chunks[:-1]:
+            cuts += 1
+            mid_sentence += not c.rstrip().endswith(SENTENCE_ENDINGS)
+        position = 0
+        for c in section_chunks[1:]:
+            position = body.find(c[:40], position + 1)
+            cuts += 1
+            mid_sentence += position not in starts
+
+    print(f"  {name:<10} {len(chunks) / mb:>9.0f} {sum(tokens) / max(len(chunks), 1):>7.0f} / {max(tokens or [0]):>5} "
+          f"{sum(t > MODEL_INPUT_LIMIT for t in tokens):>10} {mid_sentence / max(cuts, 1):>12.1%} "
+          f"{len(batches):>6} {rejected:>8} {mb / seconds:>8.1f}")
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RAG chunker benchmark')
+    parser.add_argument('--pages', type=int, default=400, help='Pages per synthetic document')
+    parser.add_argument('--chunk-tokens', type=int, default=1000)
+    parser.add_argument('--overlap', type=int, default=50)
+    parser.add_argument('--counter', choices=['estimate', 'vertex'], default='estimate',
+                        help='Token counter used for chunking and for the reported sizes')
+    parser.add_argument('--file', action='append', default=[], help='Text file to chunk (repeatable)')
+    parser.add_argument('--calibrate', action='store_true',
+                        help='Compare the per-script estimate with the local tokenizer sentence by sentence')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    counter = estimate_tokens
+    if args.counter == 'vertex' or args.calibrate:
+        os.environ['RAG_TOKEN_COUNTER'] = 'vertex'
+        from src.utils.text_chunker import get_token_counter
+        counter = get_token_counter()
+        if counter is estimate_tokens:
+            sys.exit('Local tokenizer unavailable (pip install "google-cloud-aiplatform[tokenization]")')
+
+    documents = [(os.path.basename(path), open(path, encoding='utf-8').read()) for path in args.file]
+    if not documents:
+        documents = [(kind, generate_document(kind, args.pages, args.seed)) for kind in ('japanese', 'english', 'mixed')]
+
+    if args.calibrate:
+        for name, text in documents:
+            ratios = sorted(
+                estimate_tokens(text[s:e]) / counter(text[s:e])
+                for s, e in split_sentences(text) if counter(text[s:e]) >= 5
+            )
+            print(f"{name}: estimate / tokenizer over {len(ratios)} sentences: "
+                  f"p10 {ratios[len(ratios) // 10]:.2f}  median {ratios[len(ratios) // 2]:.2f}  "
+                  f"p90 {ratios[len(ratios) * 9 // 10]:.2f}")
+        return
+
+    chunker = SentenceChunker(args.chunk_tokens, args.overlap, counter)
+    for name, text in documents:
+        print(f"\n{name}: {len(text.encode('utf-8')) / 1024 / 1024:.2f} MB, {len(text)} characters "
+              f"(chunk budget {args.chunk_tokens} tokens, overlap {args.overlap})")
+        print(f"  {'chunker':<10} {'chunks/MB':>9} {'tokens avg/max':>15} {'over limit':>10} {'mid-sentence':>12} "
+              f"{'calls':>6} {'rejected':>8} {'MB/s':>8}")
+        run('previous', text, lambda body: legacy_chunk_text(body, args.chunk_tokens, args.overlap),
+            counter, fixed_batches=True)
+        seconds = run('sentence', text, lambda body: [c['text'] for c in chunker.chunk(body)],
+                      counter, fixed_batches=False)
+
+        started = time.perf_counter()
+        for body in sections(text * 4):
+            chunker.chunk(body)
+        print(f"  4x input takes {(time.perf_counter() - started) / seconds:.1f}x as long")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+File: benchmark_hls_ladder.py
+Purpose: Compare single-pass HLS ladder generation with the per-variant ffmpeg path
+Main functionality: Renders a synthetic test clip, runs HLSGenerator.generate_hls in both
+                    modes and reports wall time, ffmpeg CPU-seconds and keyframe alignment
+Dependencies: FFmpeg/FFprobe on PATH, src.services.hls_generator
+
+Usage:
+    python scripts/benchmark_hls_ladder.py [--duration 60] [--levels 360p,720p,1080p] [--runs 1]
+"""
+
+import os
+import sys
+import time
+import resource
+import argparse
+import subprocess
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.hls_generator import HLSGenerator
+
+
+def make_test_clip(path, duration):
+    """Render a 1080p30 clip with moving test pattern and a sine tone."""
+    cmd = [
+        'ffmpeg', '-y', '-v', 'error',
+        '-f', 'lavfi', '-i', f'testsrc2=size=1920x1080:rate=30:duration={duration}',
+        '-f', 'lavfi', '-i', f'sine=frequency=440:sample_rate=48000:duration={duration}',
+        '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac', '-shortest', path
+    ]
+    subprocess.run(cmd, check=True)
+
+
+def children_cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def keyframe_times(playlist_path):
+    """Presentation times of video keyframes across all segments of one variant."""
+    cmd = [
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0', '-skip_frame', 'nokey',
+        '-show_entries', 'frame=pts_time', '-of', 'csv=p=0', playlist_path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    return [round(float(line), 3) for line in result.stdout.split() if line.strip()]
+
+
+def run_mode(generator, clip, levels, single_pass, runs, work_dir):
+    wall_total = 0.0
+    cpu_total = 0.0
+    result = None
+    for _ in range(runs):
+        output_dir = tempfile.mkdtemp(prefix='hls_bench_', dir=work_dir)
+        cpu_before = children_cpu_seconds()
+        start = time.perf_counter()
+        result = generator.generate_hls(clip, output_dir, quality_levels=levels, single_pass=single_pass)
+        wall_total += time.perf_counter() - start
+        cpu_total += children_cpu_seconds() - cpu_before
+        if not result['success']:
+            print(f"Generation failed: {result.get('error')}")
+            sys.exit(1)
+    return wall_total / runs, cpu_total / runs, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=int, default=60, help='Test clip length in seconds')
+    parser.add_argument('--levels', default='360p,720p,1080p', help='Comma-separated quality levels')
+    parser.add_argument('--runs', type=int, default=1)
+    args = parser.parse_args()
+
+    levels = [level.strip() for level in args.levels.split(',') if level.strip()]
+    generator = HLSGenerator()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        clip = os.path.join(tmp_dir, 'clip.mp4')
+        print(f"Rendering {args.duration}s 1080p30 test clip...")
+        make_test_clip(clip, args.duration)
+
+        per_wall, per_cpu, _ = run_mode(generator, clip, levels, False, args.runs, tmp_dir)
+        single_wall, single_cpu, single_result = run_mode(generator, clip, levels, True, args.runs, tmp_dir)
+
+        print(f"Levels: {', '.join(levels)}  (preset={generator.x264_preset}, runs={args.runs})")
+        print(f"Per-variant (1 decode per level): {per_wall:8.1f} s wall  {per_cpu:8.1f} CPU-s")
+        print(f"Single pass (split filter):       {single_wall:8.1f} s wall  {single_cpu:8.1f} CPU-s")
+        print(f"Speedup:                          {per_wall / single_wall:8.2f}x wall  "
+              f"{per_cpu / single_cpu:8.2f}x CPU")
+
+        # GOP alignment: every rendition must place keyframes at the same times
+        output_dir = single_result['output_dir']
+        keyframes = {
+            variant['quality']: keyframe_times(os.path.join(output_dir, variant['playlist']))
+            for variant in single_result['variants']
+        }
+        reference = next(iter(keyframes.values()))
+        aligned = all(times == reference for times in keyframes.values())
+        print(f"Keyframes aligned across renditions: {aligned}  ({len(reference)} keyframes per variant)")
+
+
+if __name__ == '__main__':
+    main()
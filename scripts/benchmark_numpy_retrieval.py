@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+File: benchmark_numpy_retrieval.py
+Purpose: Measure the embedded NumPy retrieval backend at increasing tenant sizes
+Main functionality: Builds synthetic company snapshots (10k / 100k / 1M chunks by default) and
+                    times snapshot build, exact vector top-k, BM25 and RRF hybrid search
+Dependencies: numpy, src.services.numpy_retrieval (no database or search cluster needed)
+
+Usage:
+    python scripts/benchmark_numpy_retrieval.py [--sizes 10000,100000,1000000] [--queries 50]
+        [--top-k 10] [--block-rows 4096] [--resident-mb 128] [--dir /tmp/rag_numpy_bench]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.numpy_retrieval import NumpyRetrievalBackend
+
+DIMS = 768
+VOCABULARY = [f"term{i}" for i in range(20000)] + list('安全点検作業手順確認設定交換清掃締付工具部品')
+
+
+def synthetic_rows(count, seed):
+    """Chunks with clustered vectors and ~40 Zipf-distributed terms each"""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((256, DIMS)).astype(np.float32)
+    term_weights = 1.0 / np.arange(1, len(VOCABULARY) + 1)
+    term_weights /= term_weights.sum()
+    block = 10000
+    for start in range(0, count, block):
+        size = min(block, count - start)
+        topics = rng.integers(0, len(centroids), size)
+        vectors = centroids[topics] + rng.standard_normal((size, DIMS)).astype(np.float32)
+        terms = rng.choice(len(VOCABULARY), size=(size, 40), p=term_weights)
+        for offset in range(size):
+            chunk_id = start + offset + 1
+            text = ' '.join(VOCABULARY[t] for t in terms[offset])
+            yield chunk_id, chunk_id // 50, chunk_id % 50, text, {'page': chunk_id % 300}, vectors[offset]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def time_queries(func, queries):
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        func(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return percentile(latencies, 0.5), percentile(latencies, 0.95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='NumPy retrieval backend benchmark')
+    parser.add_argument('--sizes', default='10000,100000,1000000')
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--block-rows', type=int, default=4096)
+    parser.add_argument('--resident-mb', type=int, default=128,
+                        help='Float32 in-memory matrix up to this size, memory-mapped float16 above')
+    parser.add_argument('--dir', default=None, help='Snapshot directory (default: a temporary directory)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    directory = args.dir or tempfile.mkdtemp(prefix='rag_numpy_bench_')
+    backend = NumpyRetrievalBackend(directory=directory)
+    backend.block_rows = args.block_rows
+    backend.resident_bytes = args.resident_mb * 1024 * 1024
+    rng = np.random.default_rng(args.seed + 1)
+
+    print(f"{'chunks':>9} {'matrix':>8} {'build s':>8} {'disk MB':>8} {'vector p50/p95 ms':>18} "
+          f"{'bm25 p50/p95 ms':>16} {'hybrid p50/p95 ms':>18}")
+    try:
+        for company_id, size in enumerate(int(value) for value in args.sizes.split(',')):
+            started = time.perf_counter()
+            version = backend.build_company(company_id, rows=synthetic_rows(size, args.seed), count=size)
+            build_seconds = time.perf_counter() - started
+            snapshot_dir = os.path.join(directory, f"company_{company_id}", version)
+            disk_mb = sum(
+                os.path.getsize(os.path.join(snapshot_dir, name)) for name in os.listdir(snapshot_dir)
+            ) / 1024 / 1024
+
+            queries = [
+                (' '.join(f"term{int(t)}" for t in rng.integers(0, 2000, 3)),
+                 rng.standard_normal(DIMS).astype(np.float32).tolist())
+                for _ in range(args.queries)
+            ]
+            # First search maps the snapshot; later ones measure the warm path
+            backend.hybrid_search(queries[0][0], queries[0][1], company_id, top_k=args.top_k)
+
+            snapshot = backend.snapshot(company_id)
+            vector = time_queries(lambda q: snapshot.vector_top_k(q[1], args.top_k, backend.block_rows), queries)
+            bm25 = time_queries(lambda q: snapshot.bm25_top_k(q[0], args.top_k), queries)
+            hybrid = time_queries(
+                lambda q: backend.hybrid_search(q[0], q[1], company_id, top_k=args.top_k), queries
+            )
+            print(f"{size:>9} {'float32' if snapshot.resident else 'mmap f16':>8} {build_seconds:>8.1f} {disk_mb:>8.1f} "
+                  f"{vector[0]:>8.1f} / {vector[1]:>7.1f} {bm25[0]:>7.1f} / {bm25[1]:>6.1f} "
+                  f"{hybrid[0]:>8.1f} / {hybrid[1]:>7.1f}")
+    finally:
+        if not args.dir:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+File: benchmark_rag_search.py
+Purpose: Measure latency and recall@k of RAG search modes against a fixed local corpus
+Main functionality: Loads a deterministic multi-tenant corpus (generated from a seed or read from
+                    JSONL) into a throwaway index and compares the previous hybrid query
+                    (unfiltered kNN + boosts), pre-filtered kNN and RRF hybrid search
+Dependencies: numpy, ElasticSearch (ELASTICSEARCH_URL), src.services.elasticsearch_service;
+              --engine exact needs no cluster (src.services.numpy_retrieval)
+
+Metrics per mode:
+    recall@k   share of the exact (brute-force cosine, same company) top-k found
+    hit@k      share of queries whose source chunk is in the top-k
+    foreign@k  share of returned chunks that belong to another company
+    p50/p95    search latency in milliseconds
+
+--engine exact evaluates the same query semantics in process with exact search:
+the legacy query adds unfiltered kNN hits to the company-filtered BM25 hits as
+ElasticSearch does, filtered kNN and RRF hybrid run on the embedded NumPy
+backend. It isolates the effect of the tenant filter and of RRF; HNSW
+approximation (num_candidates) and cluster latency need --engine es.
+
+Usage:
+    python scripts/benchmark_rag_search.py [--docs 20000] [--companies 20] [--queries 200]
+        [--top-k 10] [--num-candidates 50,100,200] [--server] [--corpus corpus.jsonl] [--keep]
+        [--engine es|exact]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.numpy_retrieval import NumpyRetrievalBackend
+
+DIMS = 768
+FILLER = ['the', 'check', 'before', 'after', 'unit', 'set', 'level', 'each', 'step', 'part']
+
+
+def generate_corpus(docs, companies, topics, seed):
+    """Clustered embeddings with topic vocabulary, skewed company sizes"""
+    rng = np.random.default_rng(seed)
+    centroids = rng.standard_normal((topics, DIMS)).astype(np.float32)
+    sizes = rng.zipf(1.5, companies).astype(np.float64)
+    company_ids = rng.choice(np.arange(1, companies + 1), size=docs, p=sizes / sizes.sum())
+
+    corpus = []
+    for doc_id in range(1, docs + 1):
+        topic = int(rng.integers(topics))
+        vector = centroids[topic] + 0.8 * rng.standard_normal(DIMS).astype(np.float32)
+        vector /= np.linalg.norm(vector)
+        words = [f"t{topic}w{int(w)}" for w in rng.integers(0, 40, 12)]
+        words += [FILLER[int(w)] for w in rng.integers(0, len(FILLER), 8)]
+        rng.shuffle(words)
+        corpus.append({
+            'chunk_id': doc_id,
+            'material_id': int(company_ids[doc_id - 1]) * 1000 + topic,
+            'company_id': int(company_ids[doc_id - 1]),
+            'text': ' '.join(words),
+            'embedding': vector
+        })
+    return corpus
+
+
+def load_corpus(path):
+    corpus = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            row = json.loads(line)
+            row['embedding'] = np.asarray(row['embedding'], dtype=np.float32)
+            corpus.append(row)
+    return corpus
+
+
+def save_corpus(path, corpus):
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in corpus:
+            f.write(json.dumps(dict(row, embedding=[round(float(x), 6) for x in row['embedding']])) + '\n')
+
+
+def make_queries(corpus, count, seed):
+    """Queries derived from random chunks: a few of their words and a perturbed vector"""
+    rng = np.random.default_rng(seed + 1)
+    queries = []
+    for index in rng.choice(len(corpus), size=min(count, len(corpus)), replace=False):
+        doc = corpus[int(index)]
+        words = doc['text'].split()
+        vector = doc['embedding'] + 0.5 * rng.standard_normal(DIMS).astype(np.float32) / np.sqrt(DIMS)
+        queries.append({
+            'source_id': doc['chunk_id'],
+            'company_id': doc['company_id'],
+            'text': ' '.join(rng.choice(words, size=3, replace=False)),
+            'embedding': vector / np.linalg.norm(vector)
+        })
+    return queries
+
+
+def exact_top_k(corpus, queries, k):
+    """Brute-force cosine ground truth within each query's company"""
+    by_company = {}
+    for row in corpus:
+        by_company.setdefault(row['company_id'], []).append(row)
+    truth = []
+    for query in queries:
+        rows = by_company[query['company_id']]
+        matrix = np.stack([row['embedding'] for row in rows])
+        scores = matrix @ query['embedding']
+        truth.append({rows[i]['chunk_id'] for i in np.argsort(-scores)[:k]})
+    return truth
+
+
+def legacy_hybrid(service, query, k):
+    """The previous hybrid query: tenant filter on BM25 only, unfiltered kNN, fixed boosts"""
+    response = service.client.search(index=service.index_name, body={
+        "query": {
+            "bool": {
+                "must": [{"term": {"company_id": query['company_id']}}],
+                "should": [{"multi_match": {"query": query['text'], "fields": ["chunk_text"],
+                                            "type": "best_fields", "boost": 0.3}}]
+            }
+        },
+        "knn": {"field": "embedding", "query_vector": query['embedding'].tolist(),
+                "k": k, "num_candidates": k * 10, "boost": 0.7},
+        "_source": ["chunk_id"],
+        "size": k
+    })
+    return [hit['_source']['chunk_id'] for hit in response['hits']['hits']]
+
+
+class ExactEngine:
+    """
+    In-process stand-in for the cluster with exact search
+
+    The legacy query is evaluated with ElasticSearch semantics: the top-level
+    knn clause is not restricted by the query's company filter, every company
+    document matches the filter (constant score 1) plus 0.3 x BM25, and kNN
+    hits add 0.7 x their (1 + cosine) / 2 score.
+    """
+
+    def __init__(self, corpus, directory):
+        self.backend = NumpyRetrievalBackend(directory=directory)
+        self.backend.embedding_dimension = DIMS
+        by_company = {}
+        for row in corpus:
+            by_company.setdefault(row['company_id'], []).append(row)
+        for company_id, rows in by_company.items():
+            self.backend.build_company(company_id, rows=(
+                (row['chunk_id'], row['material_id'], 0, row['text'], {}, row['embedding']) for row in rows
+            ), count=len(rows))
+        self.matrix = np.stack([row['embedding'] for row in corpus])
+        self.chunk_ids = [row['chunk_id'] for row in corpus]
+        self.owners = [row['company_id'] for row in corpus]
+
+    def legacy_hybrid(self, query, k):
+        snapshot = self.backend.snapshot(query['company_id'])
+        scores = {}
+        rows, bm25 = snapshot.bm25_top_k(query['text'], k * 10)
+        for row, score in zip(rows, bm25):
+            scores[int(snapshot.chunk_ids[row])] = 1.0 + 0.3 * float(score)
+        similarities = self.matrix @ query['embedding']
+        nearest = np.argpartition(-similarities, k)[:k]
+        for index in nearest[np.argsort(-similarities[nearest])]:
+            chunk_id = self.chunk_ids[index]
+            base = scores.get(chunk_id, 1.0 if self.owners[index] == query['company_id'] else 0.0)
+            scores[chunk_id] = base + 0.7 * (1.0 + float(similarities[index])) / 2.0
+        return sorted(scores, key=scores.get, reverse=True)[:k]
+
+    def filtered_knn(self, query, k):
+        return [hit['chunk_id'] for hit in self.backend.vector_search(
+            query['embedding'].tolist(), query['company_id'], top_k=k, min_score=0)]
+
+    def hybrid(self, query, k):
+        return [hit['chunk_id'] for hit in self.backend.hybrid_search(
+            query['text'], query['embedding'].tolist(), query['company_id'], top_k=k)]
+
+
+def run_mode(name, search, queries, truth, k, owners):
+    latencies = []
+    recall = 0.0
+    hits = 0
+    foreign = 0
+    returned = 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        ids = search(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+        recall += len(expected & set(ids[:k])) / len(expected)
+        hits += query['source_id'] in ids[:k]
+        foreign += sum(owners[chunk_id] != query['company_id'] for chunk_id in ids[:k])
+        returned += len(ids[:k])
+    latencies.sort()
+    print(f"  {name:<34} recall@{k} {recall / len(queries):6.3f}   hit@{k} {hits / len(queries):6.3f}   "
+          f"foreign@{k} {foreign / max(returned, 1):6.3f}   "
+          f"p50 {latencies[len(latencies) // 2]:7.1f} ms   p95 {latencies[int(len(latencies) * 0.95) - 1]:7.1f} ms")
+
+
+def run_exact(corpus, queries, truth, k, owners):
+    directory = tempfile.mkdtemp(prefix='rag_search_bench_')
+    try:
+        started = time.perf_counter()
+        engine = ExactEngine(corpus, directory)
+        print(f"Built exact engine in {time.perf_counter() - started:.1f} s")
+        print(f"\nMode results (k={k}, exact search)")
+        run_mode('legacy hybrid (unfiltered kNN)', lambda q: engine.legacy_hybrid(q, k), queries, truth, k, owners)
+        run_mode('filtered kNN', lambda q: engine.filtered_knn(q, k), queries, truth, k, owners)
+        run_mode('hybrid RRF', lambda q: engine.hybrid(q, k), queries, truth, k, owners)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='RAG search benchmark')
+    parser.add_argument('--docs', type=int, default=20000)
+    parser.add_argument('--companies', type=int, default=20)
+    parser.add_argument('--topics', type=int, default=200)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--num-candidates', default='50,100,200')
+    parser.add_argument('--server', action='store_true', help='Also run server-side RRF (ES 8.16+, licensed)')
+    parser.add_argument('--corpus', help='JSONL corpus; generated from --seed and written here if missing')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep', action='store_true', help='Keep the benchmark index')
+    parser.add_argument('--engine', choices=['es', 'exact'], default='es',
+                        help='es: throwaway index on ELASTICSEARCH_URL; exact: in-process exact search')
+    args = parser.parse_args()
+
+    if args.corpus and os.path.exists(args.corpus):
+        corpus = load_corpus(args.corpus)
+    else:
+        corpus = generate_corpus(args.docs, args.companies, args.topics, args.seed)
+        if args.corpus:
+            save_corpus(args.corpus, corpus)
+    queries = make_queries(corpus, args.queries, args.seed)
+    k = args.top_k
+    truth = exact_top_k(corpus, queries, k)
+    owners = {row['chunk_id']: row['company_id'] for row in corpus}
+    print(f"Corpus: {len(corpus)} chunks, {len({row['company_id'] for row in corpus})} companies, "
+          f"{len(queries)} queries")
+
+    if args.engine == 'exact':
+        run_exact(corpus, queries, truth, k, owners)
+        return
+
+    from src.services.elasticsearch_service import ElasticSearchService
+    service = ElasticSearchService(index_name=f"rag_benchmark_{int(time.time())}")
+    index = service.create_versioned_index(bulk_load=True)
+    try:
+        started = time.perf_counter()
+        result = service.bulk_index_chunks(
+            (service.build_chunk_document(row['chunk_id'], row['material_id'], row['company_id'],
+                                          row['text'], 0, row['embedding'].tolist())
+             for row in corpus),
+            index=index
+        )
+        service.swap_aliases({service.index_name: index})
+        service.client.indices.forcemerge(index=index, max_num_segments=1)
+        print(f"Indexed {result['indexed']} chunks into {index} in {time.perf_counter() - started:.1f} s "
+              f"(vector index type {service.layout.vector_index_type}, {service.layout.shards} shards)")
+
+        # Warm up caches and the HNSW graph
+        for query in queries[:20]:
+            service.vector_search(query['embedding'].tolist(), query['company_id'], top_k=k, min_score=0)
+
+        print(f"\nMode results (k={k})")
+        run_mode('legacy hybrid (unfiltered kNN)', lambda q: legacy_hybrid(service, q, k), queries, truth, k, owners)
+        for num_candidates in [int(value) for value in args.num_candidates.split(',')]:
+            run_mode(f'filtered kNN (nc={num_candidates})', lambda q: [
+                hit['chunk_id'] for hit in service.vector_search(
+                    q['embedding'].tolist(), q['company_id'], top_k=k, min_score=0,
+                    num_candidates=num_candidates)
+            ], queries, truth, k, owners)
+            run_mode(f'hybrid RRF client (nc={num_candidates})', lambda q: [
+                hit['chunk_id'] for hit in service.hybrid_search(
+                    q['text'], q['embedding'].tolist(), q['company_id'], top_k=k,
+                    num_candidates=num_candidates, fusion='client')
+            ], queries, truth, k, owners)
+            if args.server:
+                run_mode(f'hybrid RRF server (nc={num_candidates})', lambda q: [
+                    hit['chunk_id'] for hit in service.hybrid_search(
+                        q['text'], q['embedding'].tolist(), q['company_id'], top_k=k,
+                        num_candidates=num_candidates, fusion='server')
+                ], queries, truth, k, owners)
+        print("\nrecall@k measures the vector ranking against exact search; for hybrid modes "
+              "hit@k (source chunk retrieved) is the relevant figure.")
+    finally:
+        if not args.keep:
+            service.client.indices.delete(index=index, ignore_unavailable=True)
+
+
+if __name__ == '__main__':
+    main()
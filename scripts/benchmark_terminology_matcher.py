@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+File: benchmark_terminology_matcher.py
+Purpose: Measure term extraction throughput of the naive substring scan vs the Aho-Corasick matcher
+Main functionality: Builds a synthetic dictionary and manual text, times both matchers and
+                    TerminologyDatabase.extract_terms_from_text end to end
+Dependencies: src.utils.term_matcher, src.services.terminology_db
+
+Usage:
+    python scripts/benchmark_terminology_matcher.py [--terms 10000] [--chars 100000] [--runs 5]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.utils.term_matcher import AhoCorasickMatcher
+from src.services.terminology_db import TerminologyDatabase
+
+KATAKANA = [chr(code) for code in range(0x30A1, 0x30F7)]
+KANJI = list('加工溶接測定検査安全品質管理生産材料組立切削研削旋盤工具部品寸法公差硬度鋼板圧入締付')
+ASCII = list('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
+FILLER = list('のをにはでがとしてするされるいますこれそれ、。') + [' ', '\n']
+
+
+def make_terms(count, rng):
+    """Generate unique synthetic technical terms (katakana, kanji and ASCII codes)."""
+    terms = set()
+    while len(terms) < count:
+        alphabet = rng.choice((KATAKANA, KANJI, ASCII))
+        terms.add(''.join(rng.choice(alphabet) for _ in range(rng.randint(2, 8))))
+    return sorted(terms)
+
+
+def make_text(length, terms, rng, term_ratio=0.05):
+    """Generate manual-like text where roughly term_ratio of the tokens are dictionary terms."""
+    parts = []
+    size = 0
+    while size < length:
+        if rng.random() < term_ratio:
+            token = rng.choice(terms)
+        else:
+            token = ''.join(rng.choice(FILLER + KANJI) for _ in range(rng.randint(1, 6)))
+        parts.append(token)
+        size += len(token)
+    return ''.join(parts)[:length]
+
+
+def naive_find(text, terms):
+    """Baseline: the previous O(terms x text) substring scan."""
+    text_lower = text.lower()
+    return {index for index, term in enumerate(terms) if term.lower() in text_lower}
+
+
+def time_call(func, runs):
+    best = None
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Terminology matcher benchmark')
+    parser.add_argument('--terms', type=int, default=10000)
+    parser.add_argument('--chars', type=int, default=100000)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    terms = make_terms(args.terms, rng)
+    text = make_text(args.chars, terms, rng)
+    chars_mb = len(text) / 1_000_000
+
+    print(f"Dictionary: {len(terms)} terms, text: {len(text)} chars, best of {args.runs} runs")
+
+    start = time.perf_counter()
+    matcher = AhoCorasickMatcher((term, index) for index, term in enumerate(terms))
+    build_time = time.perf_counter() - start
+    print(f"Automaton build:          {build_time * 1000:8.1f} ms")
+
+    naive_time, naive_result = time_call(lambda: naive_find(text, terms), args.runs)
+    ac_time, ac_result = time_call(lambda: matcher.find_all(text), args.runs)
+
+    if naive_result != ac_result:
+        print(f"MISMATCH: naive found {len(naive_result)}, automaton found {len(ac_result)}")
+        sys.exit(1)
+
+    print(f"Naive substring scan:     {naive_time * 1000:8.1f} ms  ({chars_mb / naive_time:6.2f} M chars/s)")
+    print(f"Aho-Corasick scan:        {ac_time * 1000:8.1f} ms  ({chars_mb / ac_time:6.2f} M chars/s)")
+    print(f"Speedup:                  {naive_time / ac_time:8.1f}x  ({len(ac_result)} distinct terms found)")
+
+    # End to end through TerminologyDatabase (matcher cached, batched usage update)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = TerminologyDatabase(os.path.join(tmp_dir, 'terminology.db'))
+        with db._connection() as conn:
+            conn.executemany(
+                'INSERT OR IGNORE INTO terms (term, definition, category) VALUES (?, ?, ?)',
+                [(term, f'definition of {term}', 'benchmark') for term in terms]
+            )
+        db._invalidate_matcher()
+
+        start = time.perf_counter()
+        first = db.extract_terms_from_text(text)
+        cold_time = time.perf_counter() - start
+        warm_time, _ = time_call(lambda: db.extract_terms_from_text(text), args.runs)
+        db.close()
+
+    print(f"extract_terms_from_text:  {cold_time * 1000:8.1f} ms cold (incl. build), "
+          f"{warm_time * 1000:.1f} ms warm  ({len(first)} terms)")
+
+
+if __name__ == '__main__':
+    main()
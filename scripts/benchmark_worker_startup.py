@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+File: benchmark_worker_startup.py
+Purpose: Compare Celery worker bootstrap through the web app with the lightweight worker app
+Main functionality: Imports each bootstrap in a fresh interpreter and reports cold start time,
+                    resident memory and loaded modules; times the per-task app context handling
+Dependencies: the worker's requirements (celery for the task modules, Flask, SQLAlchemy)
+
+Bootstraps:
+    web         previous worker: task modules, then src.core.app on the first task
+    worker      task modules and the worker app context pushed at process start
+    web-app     src.core.app alone (no celery needed)
+    worker-app  worker app alone (no celery needed)
+
+Usage:
+    python scripts/benchmark_worker_startup.py [--runs 5] [--tasks 10000]
+        [--bootstrap web,worker,web-app,worker-app]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+TASK_MODULES = ['src.workers.celery_app', 'src.workers.rag_tasks', 'src.workers.manual_tasks',
+                'src.workers.maintenance_tasks', 'src.workers.transcoding_tasks']
+
+BOOTSTRAPS = {
+    'web': TASK_MODULES + ['src.core.app'],
+    'worker': TASK_MODULES + ['src.workers.worker_app'],
+    'web-app': ['src.core.app'],
+    'worker-app': ['src.workers.worker_app'],
+}
+
+# Runs in the child interpreter: import the modules, start the app context, report
+CHILD = r'''
+import sys, json, time, importlib
+started = time.perf_counter()
+baseline = len(sys.modules)
+try:
+    for name in sys.argv[1:]:
+        importlib.import_module(name)
+    if sys.argv[-1] == 'src.core.app':
+        sys.modules['src.core.app'].app.app_context().push()
+    else:
+        sys.modules['src.workers.worker_app'].push_worker_app_context()
+    error = None
+except Exception as e:
+    error = f"{type(e).__name__}: {e}"
+seconds = time.perf_counter() - started
+rss_kb = 0
+with open('/proc/self/status') as status:
+    for line in status:
+        if line.startswith('VmRSS:'):
+            rss_kb = int(line.split()[1])
+print(json.dumps({'seconds': seconds, 'rss_kb': rss_kb, 'modules': len(sys.modules) - baseline, 'error': error}))
+'''
+
+
+def measure(modules, runs):
+    samples = []
+    for _ in range(runs):
+        process = subprocess.run(
+            [sys.executable, '-c', CHILD] + modules, cwd=ROOT, capture_output=True, text=True,
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.getenv('PYTHONPATH')])))
+        )
+        output = process.stdout.strip().splitlines()
+        if not output or not output[-1].startswith('{'):
+            return {'error': (process.stderr.strip().splitlines() or ['no output'])[-1]}
+        result = json.loads(output[-1])
+        if result['error']:
+            return result
+        samples.append(result)
+    samples.sort(key=lambda sample: sample['seconds'])
+    return samples[len(samples) // 2]
+
+
+def time_task_contexts(tasks):
+    """Per-task cost of pushing a new context (previous prerun) vs reusing the process context"""
+    from src.workers.worker_app import get_worker_app, push_worker_app_context, worker_app_context
+    app = get_worker_app()
+
+    started = time.perf_counter()
+    contexts = []
+    for _ in range(tasks):
+        context = app.app_context()
+        context.push()
+        contexts.append(context)
+    push_seconds = time.perf_counter() - started
+    for context in reversed(contexts):
+        context.pop()
+
+    push_worker_app_context()
+    started = time.perf_counter()
+    for _ in range(tasks):
+        push_worker_app_context()
+        with worker_app_context():
+            pass
+    reuse_seconds = time.perf_counter() - started
+
+    print(f"\nPer-task app context over {tasks} tasks:")
+    print(f"  push per task (previous, never popped) {push_seconds / tasks * 1e6:>8.1f} us, "
+          f"{len(contexts)} contexts left on the stack")
+    print(f"  process context reused                 {reuse_seconds / tasks * 1e6:>8.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Celery worker bootstrap benchmark')
+    parser.add_argument('--runs', type=int, default=5, help='Cold starts per bootstrap (median reported)')
+    parser.add_argument('--tasks', type=int, default=10000, help='Tasks for the context timing')
+    parser.add_argument('--bootstrap', default='web,worker,web-app,worker-app')
+    args = parser.parse_args()
+
+    print(f"{'bootstrap':<11} {'cold start s':>12} {'RSS MB':>8} {'modules':>8}")
+    for name in args.bootstrap.split(','):
+        result = measure(BOOTSTRAPS[name], args.runs)
+        if result['error']:
+            print(f"{name:<11} failed: {result['error']}")
+            continue
+        print(f"{name:<11} {result['seconds']:>12.2f} {result['rss_kb'] / 1024:>8.1f} {result['modules']:>8}")
+
+    time_task_contexts(args.tasks)
+
+
+if __name__ == '__main__':
+    main()
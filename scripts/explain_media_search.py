@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+File: explain_media_search.py
+Purpose: Verify that media library tag and text search use indexes
+Main functionality: Seeds a throwaway company with N media rows (default 100k) inside a
+                    transaction, runs EXPLAIN ANALYZE on MediaManager.build_media_query for
+                    tag and text filters, checks the plans and rolls everything back
+Dependencies: PostgreSQL with pg_trgm (scripts/migrate_add_media_search_indexes.py), Flask app context
+
+Usage:
+    python scripts/explain_media_search.py [--rows 100000]
+"""
+
+import os
+import sys
+import uuid
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.app import app
+from src.models.models import db, Company, User
+from src.services.media_manager import MediaManager
+
+# Plans must reference these indexes (and not fall back to a sequential scan of media)
+EXPECTED = {
+    'tag': 'idx_media_tags_company_tag',
+    'search': '_trgm',
+}
+
+
+def seed(company_id, user_id, rows):
+    """Insert rows media and ~3 tags per media with generate_series"""
+    db.session.execute(db.text("""
+        INSERT INTO media (company_id, uploaded_by, media_type, filename, original_filename,
+                           gcs_uri, gcs_bucket, gcs_path, title, description, tags,
+                           is_active, is_public, usage_count, created_at, updated_at)
+        SELECT :company_id, :user_id,
+               CASE WHEN i % 5 = 0 THEN 'video' ELSE 'image' END,
+               'frame_' || i || '.png', 'frame_' || i || '.png',
+               'gs://explain/' || :run || '/' || i, 'explain', :run || '/' || i,
+               'Assembly step ' || i || ' ' || md5(i::text),
+               'Captured frame ' || md5((i * 7)::text),
+               '["line-' || (i % 50) || '", "station-' || (i % 400) || '", "part-' || (i % 5000) || '"]',
+               TRUE, FALSE, 0, now() - (i || ' seconds')::interval, now()
+        FROM generate_series(1, :rows) AS i
+    """), {'company_id': company_id, 'user_id': user_id, 'rows': rows, 'run': uuid.uuid4().hex})
+
+    db.session.execute(db.text("""
+        INSERT INTO media_tags (media_id, company_id, tag)
+        SELECT m.id, m.company_id, t.tag
+        FROM media m, json_array_elements_text(m.tags::json) AS t(tag)
+        WHERE m.company_id = :company_id
+    """), {'company_id': company_id})
+
+    # Own uncommitted rows are counted by ANALYZE; statistics roll back with the transaction
+    db.session.execute(db.text("ANALYZE media"))
+    db.session.execute(db.text("ANALYZE media_tags"))
+
+
+def explain(query):
+    sql = str(query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+    rows = db.session.execute(db.text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")).fetchall()
+    return '\n'.join(row[0] for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            print(f"PostgreSQL required (current: {db.engine.dialect.name})")
+            sys.exit(2)
+
+        run = uuid.uuid4().hex[:8]
+        company = Company(name=f'explain-{run}', company_code=f'explain-{run}', password_hash='-')
+        db.session.add(company)
+        db.session.flush()
+        user = User(username='explain', email=f'explain-{run}@example.invalid',
+                    company_id=company.id, password_hash='-')
+        db.session.add(user)
+        db.session.flush()
+
+        failed = False
+        try:
+            print(f"Seeding {args.rows} media rows...")
+            seed(company.id, user.id, args.rows)
+
+            manager = MediaManager()
+            cases = [
+                ('tag', manager.build_media_query(company.id, tags=['part-42'])),
+                ('tag', manager.build_media_query(company.id, tags=['line-3', 'station-203'])),
+                ('search', manager.build_media_query(company.id, search_query='md5miss')),
+                ('search', manager.build_media_query(company.id, search_query='step 4242 ')),
+            ]
+            for kind, query in cases:
+                plan = explain(query.order_by(db.text('created_at DESC')).limit(20))
+                ok = EXPECTED[kind] in plan and 'Seq Scan on media ' not in plan
+                failed = failed or not ok
+                print("=" * 80)
+                print(f"[{'OK' if ok else 'FAIL'}] {kind}: expects {EXPECTED[kind]}")
+                print(plan)
+        finally:
+            db.session.rollback()
+
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
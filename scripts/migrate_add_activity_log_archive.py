@@ -0,0 +1,51 @@
+"""
+File: migrate_add_activity_log_archive.py
+Purpose: Database migration for activity log retention
+Main functionality: Creates activity_logs_archive table and the created_at index on activity_logs
+Dependencies: SQLAlchemy, Flask app context
+"""
+
+import sys
+import os
+
+# Add project root to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.app import app
+from src.models.models import db, ActivityLog, ActivityLogArchive
+from sqlalchemy import inspect
+
+
+def migrate_add_activity_log_archive():
+    """
+    Create activity_logs_archive and add idx_activity_created to activity_logs
+    
+    Safe to run multiple times.
+    """
+    print("=" * 80)
+    print("DATABASE MIGRATION: Activity Log Archive")
+    print("=" * 80)
+    
+    with app.app_context():
+        engine = db.engine
+        inspector = inspect(engine)
+        
+        if 'activity_logs_archive' in inspector.get_table_names():
+            print("[SKIP] 'activity_logs_archive' table already exists")
+        else:
+            print("[CREATE] 'activity_logs_archive' table")
+            ActivityLogArchive.__table__.create(engine, checkfirst=True)
+        
+        existing_indexes = {idx['name'] for idx in inspector.get_indexes('activity_logs')}
+        for index in ActivityLog.__table__.indexes:
+            if index.name in existing_indexes:
+                print(f"[SKIP] Index '{index.name}' already exists")
+                continue
+            print(f"[CREATE] Index '{index.name}' on activity_logs")
+            index.create(engine)
+        
+        print("[OK] Migration completed")
+
+
+if __name__ == '__main__':
+    migrate_add_activity_log_archive()
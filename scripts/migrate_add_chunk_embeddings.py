@@ -0,0 +1,114 @@
+"""
+File: migrate_add_chunk_embeddings.py
+Purpose: Database migration for persisted RAG chunk embeddings
+Main functionality: Adds reference_chunks embedding/text_hash columns and backfills embeddings
+                    from the documents already in ElasticSearch (no embedding model calls)
+Dependencies: SQLAlchemy, Flask app context, ElasticSearch service
+"""
+
+import sys
+import os
+
+# Add project root to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.app import app
+from src.models.models import db, ReferenceChunk
+from sqlalchemy import inspect
+
+NEW_COLUMNS = ['text_hash', 'embedding', 'embedding_dtype', 'embedding_scale', 'embedding_model']
+
+BACKFILL_BATCH_SIZE = 500
+
+# Model that produced the embeddings currently in ElasticSearch (RAGProcessor.embedding_model)
+INDEXED_EMBEDDING_MODEL = 'text-embedding-004'
+
+
+def backfill_embeddings_from_elasticsearch():
+    """Copy embeddings of indexed chunks from ElasticSearch into reference_chunks"""
+    from src.services.elasticsearch_service import elasticsearch_service
+
+    last_id = 0
+    copied = 0
+    missing = 0
+    while True:
+        chunks = ReferenceChunk.query.filter(
+            ReferenceChunk.id > last_id,
+            ReferenceChunk.embedding.is_(None)
+        ).order_by(ReferenceChunk.id).limit(BACKFILL_BATCH_SIZE).all()
+        if not chunks:
+            break
+
+        # Search rather than mget: routed indices reject id lookups without routing
+        layout = elasticsearch_service.layout
+        response = elasticsearch_service.client.search(
+            index=[elasticsearch_service.index_name] + [
+                layout.tenant_alias(company_id) for company_id in sorted(layout.dedicated_companies())
+            ],
+            query={"terms": {"chunk_id": [chunk.id for chunk in chunks]}},
+            source_includes=['embedding'],
+            size=len(chunks)
+        )
+        embeddings = {
+            hit['_id']: hit['_source'].get('embedding')
+            for hit in response['hits']['hits']
+        }
+
+        for chunk in chunks:
+            embedding = embeddings.get(f"chunk_{chunk.id}")
+            if embedding:
+                chunk.set_embedding(embedding, model=INDEXED_EMBEDDING_MODEL)
+                copied += 1
+            else:
+                missing += 1
+        db.session.commit()
+
+        last_id = chunks[-1].id
+        print(f"  ... up to chunk {last_id}: {copied} copied, {missing} not in index")
+
+    return copied, missing
+
+
+def migrate_add_chunk_embeddings():
+    """
+    Add embedding columns to reference_chunks and backfill them
+
+    Safe to run multiple times.
+    """
+    print("=" * 80)
+    print("DATABASE MIGRATION: Persisted Chunk Embeddings")
+    print("=" * 80)
+
+    with app.app_context():
+        engine = db.engine
+        inspector = inspect(engine)
+
+        existing_columns = [col['name'] for col in inspector.get_columns('reference_chunks')]
+        for name in NEW_COLUMNS:
+            if name in existing_columns:
+                print(f"[SKIP] 'reference_chunks.{name}' already exists")
+                continue
+            column_type = ReferenceChunk.__table__.c[name].type.compile(dialect=engine.dialect)
+            print(f"[ALTER] Adding 'reference_chunks.{name}' ({column_type})")
+            db.session.execute(db.text(f"ALTER TABLE reference_chunks ADD COLUMN {name} {column_type}"))
+        db.session.execute(db.text(
+            "CREATE INDEX IF NOT EXISTS idx_reference_chunks_material "
+            "ON reference_chunks (material_id, chunk_index)"
+        ))
+        db.session.commit()
+
+        print("[BACKFILL] Embeddings from ElasticSearch")
+        try:
+            copied, missing = backfill_embeddings_from_elasticsearch()
+            print(f"[OK] {copied} embeddings copied, {missing} chunks not found in the index")
+            if missing:
+                print("     Chunks not found must be reprocessed before the index can be rebuilt")
+        except Exception as e:
+            db.session.rollback()
+            print(f"[WARN] Backfill failed (rerun when ElasticSearch is reachable): {e}")
+
+        print("[OK] Migration completed")
+
+
+if __name__ == '__main__':
+    migrate_add_chunk_embeddings()
@@ -0,0 +1,54 @@
+"""
+File: migrate_add_content_blobs.py
+Purpose: Database migration for content-hash upload deduplication
+Main functionality: Creates content_blobs table, adds uploaded_files.content_hash with index
+Dependencies: SQLAlchemy, Flask app context
+"""
+
+import sys
+import os
+
+# Add project root to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.app import app
+from src.models.models import db, ContentBlob
+from sqlalchemy import inspect
+
+
+def migrate_add_content_blobs():
+    """
+    Create content_blobs and add uploaded_files.content_hash
+    
+    Safe to run multiple times.
+    """
+    print("=" * 80)
+    print("DATABASE MIGRATION: Content-Hash Deduplication")
+    print("=" * 80)
+    
+    with app.app_context():
+        engine = db.engine
+        inspector = inspect(engine)
+        
+        if ContentBlob.__tablename__ in inspector.get_table_names():
+            print(f"[SKIP] '{ContentBlob.__tablename__}' table already exists")
+        else:
+            print(f"[CREATE] '{ContentBlob.__tablename__}' table")
+            ContentBlob.__table__.create(engine, checkfirst=True)
+        
+        existing_columns = [col['name'] for col in inspector.get_columns('uploaded_files')]
+        if 'content_hash' in existing_columns:
+            print("[SKIP] 'uploaded_files.content_hash' already exists")
+        else:
+            print("[ALTER] Adding 'uploaded_files.content_hash'")
+            db.session.execute(db.text("ALTER TABLE uploaded_files ADD COLUMN content_hash VARCHAR(64)"))
+            db.session.execute(db.text(
+                "CREATE INDEX IF NOT EXISTS ix_uploaded_files_content_hash ON uploaded_files (content_hash)"
+            ))
+            db.session.commit()
+        
+        print("[OK] Migration completed")
+
+
+if __name__ == '__main__':
+    migrate_add_content_blobs()
@@ -0,0 +1,100 @@
+"""
+File: migrate_add_media_search_indexes.py
+Purpose: Database migration for indexed media library search
+Main functionality: Creates media_tags and backfills it from media.tags; on PostgreSQL enables
+                    pg_trgm and adds trigram GIN indexes on media title/description/filename
+Dependencies: SQLAlchemy, Flask app context
+"""
+
+import sys
+import os
+
+# Add project root to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.app import app
+from src.models.models import db, Media, MediaTag
+from sqlalchemy import inspect
+
+TRIGRAM_INDEXES = {
+    'idx_media_title_trgm': 'title',
+    'idx_media_description_trgm': 'description',
+    'idx_media_filename_trgm': 'filename',
+}
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_media_tags():
+    """Insert media_tags rows for every media row (skips media that already have rows)"""
+    last_id = 0
+    inserted = 0
+    while True:
+        rows = db.session.query(Media.id, Media.company_id, Media.tags).filter(
+            Media.id > last_id,
+            ~Media.tag_rows.any()
+        ).order_by(Media.id).limit(BACKFILL_BATCH_SIZE).all()
+        if not rows:
+            break
+
+        values = []
+        for media_id, company_id, raw_tags in rows:
+            tags = Media.parse_tags(raw_tags)
+            if not isinstance(tags, list):
+                continue
+            for tag in dict.fromkeys(str(t).strip() for t in tags):
+                if tag:
+                    values.append({'media_id': media_id, 'company_id': company_id, 'tag': tag})
+        if values:
+            db.session.execute(MediaTag.__table__.insert(), values)
+        db.session.commit()
+
+        inserted += len(values)
+        last_id = rows[-1][0]
+    return inserted
+
+
+def migrate_add_media_search_indexes():
+    """
+    Create media_tags, backfill it and add trigram indexes (PostgreSQL)
+
+    Safe to run multiple times.
+    """
+    print("=" * 80)
+    print("DATABASE MIGRATION: Media Library Search Indexes")
+    print("=" * 80)
+
+    with app.app_context():
+        engine = db.engine
+        inspector = inspect(engine)
+
+        if MediaTag.__tablename__ in inspector.get_table_names():
+            print(f"[SKIP] '{MediaTag.__tablename__}' table already exists")
+        else:
+            print(f"[CREATE] '{MediaTag.__tablename__}' table")
+            MediaTag.__table__.create(engine, checkfirst=True)
+
+        print("[BACKFILL] media.tags -> media_tags")
+        inserted = backfill_media_tags()
+        print(f"[OK] {inserted} tag rows inserted")
+
+        if engine.dialect.name != 'postgresql':
+            print(f"[SKIP] Trigram indexes require PostgreSQL (current: {engine.dialect.name})")
+        else:
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+            with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                conn.execute(db.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                for index_name, column in TRIGRAM_INDEXES.items():
+                    print(f"[CREATE] {index_name}")
+                    conn.execute(db.text(
+                        f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {index_name} "
+                        f"ON media USING gin ({column} gin_trgm_ops)"
+                    ))
+                conn.execute(db.text("ANALYZE media"))
+                conn.execute(db.text("ANALYZE media_tags"))
+
+        print("[OK] Migration completed")
+
+
+if __name__ == '__main__':
+    migrate_add_media_search_indexes()
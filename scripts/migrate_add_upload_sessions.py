@@ -0,0 +1,45 @@
+"""
+File: migrate_add_upload_sessions.py
+Purpose: Database migration for resumable chunked uploads
+Main functionality: Creates upload_sessions and upload_session_chunks tables
+Dependencies: SQLAlchemy, Flask app context
+"""
+
+import sys
+import os
+
+# Add project root to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.app import app
+from src.models.models import db, UploadSession, UploadSessionChunk
+from sqlalchemy import inspect
+
+
+def migrate_add_upload_sessions():
+    """
+    Create upload_sessions and upload_session_chunks
+    
+    Safe to run multiple times.
+    """
+    print("=" * 80)
+    print("DATABASE MIGRATION: Resumable Upload Sessions")
+    print("=" * 80)
+    
+    with app.app_context():
+        engine = db.engine
+        existing_tables = inspect(engine).get_table_names()
+        
+        for model in (UploadSession, UploadSessionChunk):
+            table_name = model.__tablename__
+            if table_name in existing_tables:
+                print(f"[SKIP] '{table_name}' table already exists")
+                continue
+            print(f"[CREATE] '{table_name}' table")
+            model.__table__.create(engine, checkfirst=True)
+        
+        print("[OK] Migration completed")
+
+
+if __name__ == '__main__':
+    migrate_add_upload_sessions()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+File: rebuild_rag_index.py
+Purpose: Rebuild / migrate the RAG ElasticSearch indices from stored chunk embeddings
+Main functionality: Bulk-loads every active material into new versioned indices (shared routed
+                    index + dedicated indices for large tenants) and swaps all aliases at once
+                    (no downtime, no embedding model calls); reports the live layout;
+                    reconciles orphaned or missing documents with ReferenceChunk
+Dependencies: Flask app context, src.services.rag_index_service
+
+Usage:
+    python scripts/rebuild_rag_index.py --status      # live indices and mapping versions
+    python scripts/rebuild_rag_index.py --plan        # tenants that would get a dedicated index
+    python scripts/rebuild_rag_index.py --sweep [--dry-run] [--company 12]   # orphan sweep
+    python scripts/rebuild_rag_index.py [--delete-old] [--allow-missing]
+
+Migrating an existing single-index deployment: run scripts/migrate_add_chunk_embeddings.py,
+then this script; keep the old index (no --delete-old) until the new layout is verified.
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.app import app
+from src.services.elasticsearch_service import elasticsearch_service
+from src.services.es_index_layout import MAPPING_VERSION
+from src.services.rag_index_service import rag_index_service
+
+
+def print_status():
+    rows = elasticsearch_service.layout.status()
+    if not rows:
+        print("No RAG index exists yet")
+        return
+    print(f"{'ALIAS':<32} {'INDEX':<52} {'MAPPING':>7} {'DOCS':>10}")
+    for row in rows:
+        flag = '' if row['mapping_version'] == MAPPING_VERSION else '  (outdated)'
+        print(f"{row['alias']:<32} {row['index']:<52} {'v' + str(row['mapping_version']):>7} "
+              f"{row['documents']:>10}{flag}")
+
+
+def print_plan():
+    plan = rag_index_service.plan_layout()
+    threshold = elasticsearch_service.layout.dedicated_threshold
+    print(f"Dedicated index threshold: {threshold} chunks")
+    for company_id, count in sorted(plan['company_counts'].items(), key=lambda item: -item[1]):
+        if company_id in plan['promoted']:
+            target = 'dedicated (new)'
+        elif company_id in plan['dedicated']:
+            target = 'dedicated'
+        else:
+            target = 'shared'
+        print(f"  company {company_id:<8} {count:>10} chunks -> {target}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--delete-old', action='store_true', help='Delete the previous index after the swap')
+    parser.add_argument('--allow-missing', action='store_true',
+                        help='Swap even if some chunks have no stored embedding')
+    parser.add_argument('--status', action='store_true', help='Show the live indices and exit')
+    parser.add_argument('--plan', action='store_true', help='Show the layout a rebuild would produce and exit')
+    parser.add_argument('--sweep', action='store_true',
+                        help='Delete orphaned documents and reindex materials with missing ones, then exit')
+    parser.add_argument('--dry-run', action='store_true', help='With --sweep: only count')
+    parser.add_argument('--company', type=int, action='append', help='With --sweep: only this company (repeatable)')
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.status:
+            print_status()
+            return
+        if args.plan:
+            print_plan()
+            return
+        if args.sweep:
+            stats = rag_index_service.sweep_orphans(company_ids=args.company, dry_run=args.dry_run)
+            print('  '.join(f"{key}: {value}" for key, value in stats.items()))
+            return
+        result = rag_index_service.rebuild_index(delete_old=args.delete_old, allow_missing=args.allow_missing)
+
+    print(f"New index:    {result['new_index']}")
+    for company_id, index in result['tenant_indices'].items():
+        marker = ' (new)' if company_id in result['promoted'] else ''
+        print(f"Tenant index: {index}{marker}")
+    print(f"Old indices:  {', '.join(result['old_indices']) or '-'}")
+    print(f"Indexed:      {result['indexed']}  (failed {result['failed']}, skipped {result['skipped']})")
+    print(f"Elapsed:      {result['elapsed_seconds']} s")
+
+
+if __name__ == '__main__':
+    main()
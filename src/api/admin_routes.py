@@ -8,10 +8,9 @@ Dependencies: Flask, models, auth
 from flask import Blueprint, request, jsonify, session, g
 from src.models.models import db, Company, User, ActivityLog
 from src.middleware.auth import require_super_admin, log_activity
+from src.services.activity_log_service import parse_activity_log_filters, stream_activity_logs
 from datetime import datetime
 from sqlalchemy import or_, func
-import csv
-from io import StringIO
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
@@ -668,75 +667,27 @@ def get_activity_logs():
 @log_activity('export_activity_logs', 'Exported activity logs to CSV', 'activity_log')
 def export_activity_logs():
     """
-    Export activity logs as CSV
-    Uses same filter params as list endpoint
+    Export activity logs as a streamed CSV or NDJSON download
+    Uses same filter params as list endpoint, plus:
+        - format: csv (default) or ndjson
+        - limit: Maximum rows (default: 10000, 0 for no limit)
+        - include_archive: Also export archived rows (true/false)
     """
-    company_id = request.args.get('company_id', type=int)
-    user_id = request.args.get('user_id', type=int)
-    action_type = request.args.get('action_type', '').strip()
-    start_date = request.args.get('start_date', '').strip()
-    end_date = request.args.get('end_date', '').strip()
-    result_status = request.args.get('result_status', '').strip()
-    limit = request.args.get('limit', 10000, type=int)  # Max 10k records
-    
-    query = ActivityLog.query
+    filters = parse_activity_log_filters(request.args)
+    export_format = request.args.get('format', 'csv').strip().lower()
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'Invalid format. Must be csv or ndjson'}), 400
+    limit = request.args.get('limit', 10000, type=int)
+    include_archive = request.args.get('include_archive', 'false').lower() == 'true'
     
-    # Apply same filters
-    if company_id:
-        query = query.filter(ActivityLog.company_id == company_id)
-    if user_id:
-        query = query.filter(ActivityLog.user_id == user_id)
-    if action_type:
-        query = query.filter(ActivityLog.action_type == action_type)
-    if result_status:
-        query = query.filter(ActivityLog.result_status == result_status)
-    if start_date:
-        try:
-            start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-            query = query.filter(ActivityLog.created_at >= start_dt)
-        except ValueError:
-            pass
-    if end_date:
-        try:
-            end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-            query = query.filter(ActivityLog.created_at <= end_dt)
-        except ValueError:
-            pass
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    extension = 'csv' if export_format == 'csv' else 'ndjson'
     
-    logs = query.order_by(ActivityLog.created_at.desc()).limit(limit).all()
-    
-    # Create CSV
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    # Header
-    writer.writerow([
-        'ID', 'Timestamp', 'User ID', 'Company ID', 'Action Type',
-        'Action Detail', 'Resource Type', 'Resource ID', 'Result Status', 'Error Message'
-    ])
-    
-    # Data
-    for log in logs:
-        writer.writerow([
-            log.id,
-            log.created_at.isoformat() if log.created_at else '',
-            log.user_id or '',
-            log.company_id or '',
-            log.action_type or '',
-            log.action_detail or '',
-            log.resource_type or '',
-            log.resource_id or '',
-            log.result_status or '',
-            log.error_message or ''
-        ])
-    
-    output.seek(0)
-    
-    from flask import Response
+    from flask import Response, stream_with_context
     return Response(
-        output.getvalue(),
-        mimetype='text/csv',
+        stream_with_context(stream_activity_logs(filters, export_format, limit, include_archive)),
+        mimetype=mimetype,
         headers={
-            'Content-Disposition': f'attachment; filename=activity_logs_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.csv'
+            'Content-Disposition': f'attachment; filename=activity_logs_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.{extension}'
         }
     )
@@ -6,11 +6,12 @@ Dependencies: Flask, models, auth
 """
 
 from flask import Blueprint, request, jsonify, session, g
-from src.models.models import db, Company, User, ManualTemplate, ActivityLog
+from src.models.models import db, Company, User, ManualTemplate
 from src.middleware.auth import require_company_admin, log_activity
+from src.services.company_stats_service import company_stats_service
 from flask_login import current_user
 from datetime import datetime
-from sqlalchemy import or_, func
+from sqlalchemy import or_
 import json
 import logging
 
@@ -627,75 +628,11 @@ def get_company_dashboard():
         if not company:
             return jsonify({'error': 'Company not found'}), 404
         
-        # Calculate statistics
-        from src.models.models import Manual, ReferenceMaterial
-        from datetime import datetime, timedelta
+        # Statistics come from one aggregate query (cached per company)
+        stats = company_stats_service.get_dashboard_stats(company_id)
         
-        today = datetime.utcnow().date()
-        today_start = datetime.combine(today, datetime.min.time())
-        
-        stats = {
-            'total_users': User.query.filter_by(company_id=company_id, is_active=True).count(),
-            'active_users': User.query.filter(
-                User.company_id == company_id,
-                User.is_active == True,
-                User.last_login >= datetime.utcnow() - timedelta(days=30)
-            ).count(),
-            'total_manuals': Manual.query.filter_by(company_id=company_id).count(),
-            'total_templates': ManualTemplate.query.filter(
-                (ManualTemplate.company_id == company_id) | (ManualTemplate.company_id == None),
-                ManualTemplate.is_active == True
-            ).count(),
-            'manuals_today': Manual.query.filter(
-                Manual.company_id == company_id,
-                Manual.created_at >= today_start
-            ).count(),
-            'materials_today': ReferenceMaterial.query.filter(
-                ReferenceMaterial.company_id == company_id,
-                ReferenceMaterial.uploaded_at >= today_start
-            ).count()
-        }
-        
-        # Get PDFs and translations created today (if those models exist)
-        try:
-            from src.models.models import PDFExport
-            stats['pdfs_today'] = PDFExport.query.filter(
-                PDFExport.company_id == company_id,
-                PDFExport.created_at >= today_start
-            ).count()
-        except:
-            stats['pdfs_today'] = 0
-        
-        try:
-            from src.models.models import ManualTranslation
-            stats['translations_today'] = ManualTranslation.query.filter(
-                ManualTranslation.company_id == company_id,
-                ManualTranslation.created_at >= today_start
-            ).count()
-        except:
-            stats['translations_today'] = 0
-        
-        # Get recent activity logs
-        recent_activity = ActivityLog.query.filter_by(
-            company_id=company_id
-        ).order_by(
-            ActivityLog.created_at.desc()
-        ).limit(20).all()
-        
-        activity_list = []
-        for log in recent_activity:
-            # Get user info if available
-            user = User.query.get(log.user_id) if log.user_id else None
-            
-            activity_list.append({
-                'id': log.id,
-                'user_id': log.user_id,
-                'username': user.username if user else 'System',
-                'action_type': log.action_type,
-                'action_detail': log.action_detail or '',
-                'resource_type': log.resource_type or '',
-                'created_at': log.created_at.isoformat() if log.created_at else None
-            })
+        # Recent activity with usernames resolved by a single JOIN
+        activity_list = company_stats_service.get_recent_activity(company_id, limit=20)
         
         return jsonify({
             'success': True,
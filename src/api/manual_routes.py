@@ -13,8 +13,8 @@ from flask_login import current_user
 from werkzeug.utils import secure_filename
 from src.models.models import db, Manual, ManualTemplate, ReferenceMaterial, ProcessingJob, User, Company
 from src.middleware.auth import require_role_enhanced, log_activity
-from src.services.elasticsearch_service import elasticsearch_service
 from src.services.rag_processor import rag_processor
+from src.services.rag_search_service import rag_search_service
 from src.infrastructure.file_manager import FileManager
 from datetime import datetime
 import logging
@@ -141,6 +141,10 @@ def upload_video_file():
             logger.error("file_manager.save_file returned None or empty result")
             return jsonify({'error': 'Failed to upload file'}), 500
         
+        # Reuse the stored copy when the same video was uploaded before
+        from src.services.content_store_service import content_store_service
+        result = content_store_service.deduplicate(file_manager, company_id, result)
+        
         # Construct GCS URI for compatibility
         # If using GCS backend, it will already be in the result
         # If using local, construct a file:// URI
@@ -159,6 +163,8 @@ def upload_video_file():
             'uri': gcs_uri,  # For compatibility
             'file_name': filename,
             'file_size': file_size,
+            'file_hash': result.get('file_hash'),
+            'deduplicated': result.get('deduplicated', False),
             'content_type': file.content_type or 'video/mp4'
         }
         
@@ -512,25 +518,10 @@ def generate_manual_with_rag():
                 
                 logger.info(f"Performing RAG search for: {rag_query}")
                 
-                # Generate query embedding using Gemini
-                from src.services.gemini_service import GeminiUnifiedService
-                gemini_service = GeminiUnifiedService()
-                
-                import asyncio
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    query_embedding = loop.run_until_complete(
-                        gemini_service.generate_embedding(rag_query)
-                    )
-                finally:
-                    loop.close()
-                
-                # Use hybrid search (vector + keyword)
-                search_results = elasticsearch_service.hybrid_search(
-                    query_text=rag_query,
-                    query_embedding=query_embedding,
+                # Hybrid search (vector + keyword); query embedding and results are cached
+                search_results = rag_search_service.search(
                     company_id=company_id,
+                    query_text=rag_query,
                     top_k=max_results
                 )
                 
@@ -354,6 +354,105 @@ def update_material(material_id):
         return jsonify({'error': f'Update failed: {str(e)}'}), 500
 
 
+@material_bp.route('/<int:material_id>/file', methods=['PUT'])
+@require_role_enhanced(['admin', 'user'])
+@log_activity('revise_material', 'Uploaded revised material file', 'material', 'material_id')
+def revise_material_file(material_id):
+    """
+    Replace a material's file with a revised version and reprocess it
+    
+    Reprocessing diffs the new chunks against the stored ones, so only
+    added or changed chunks are embedded and indexed.
+    
+    Content-Type: multipart/form-data
+    Body:
+        - file: Revised file (required, same file type as the original)
+    """
+    try:
+        company_id = current_user.company_id
+        
+        material = ReferenceMaterial.query.filter_by(
+            id=material_id,
+            company_id=company_id,
+            is_active=True
+        ).first()
+        
+        if not material:
+            return jsonify({'error': 'Material not found'}), 404
+        
+        # A pending material already has a processing task queued
+        if material.processing_status in ('pending', 'processing'):
+            return jsonify({'error': 'Material is currently being processed'}), 409
+        
+        if 'file' not in request.files or request.files['file'].filename == '':
+            return jsonify({'error': 'No file provided'}), 400
+        
+        file = request.files['file']
+        original_filename = secure_filename(file.filename)
+        if not allowed_file(original_filename) or get_file_type(original_filename) != material.file_type:
+            return jsonify({'error': f'File must be of type {material.file_type}'}), 400
+        
+        file.seek(0, os.SEEK_END)
+        file_size = file.tell()
+        file.seek(0)
+        
+        if file_size > MAX_FILE_SIZE:
+            return jsonify({'error': f'File size exceeds maximum of {MAX_FILE_SIZE / (1024**2)}MB'}), 400
+        
+        timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+        stored_filename = f"{timestamp}_{original_filename}"
+        s3_key = s3_manager.get_material_path(company_id, material.id, stored_filename)
+        
+        content_type, _ = mimetypes.guess_type(original_filename)
+        previous_file_path = material.file_path
+        material.file_path = s3_manager.upload_file(file, s3_key, content_type or 'application/octet-stream')
+        material.original_filename = original_filename
+        material.stored_filename = stored_filename
+        material.file_size = file_size
+        material.processing_status = 'pending'
+        material.processing_progress = 0
+        material.error_message = None
+        
+        job = ProcessingJob(
+            job_type='rag_index',
+            job_status='pending',
+            company_id=company_id,
+            user_id=current_user.id,
+            resource_type='reference_material',
+            resource_id=material.id
+        )
+        
+        db.session.add(job)
+        db.session.commit()
+        
+        # The revision is committed; the previous object is no longer referenced
+        if previous_file_path and previous_file_path != material.file_path:
+            try:
+                previous_key = previous_file_path.replace(f's3://{s3_manager.bucket_name}/', '').replace(
+                    f'file://{s3_manager.local_storage_path}{os.sep}', ''
+                )
+                if s3_manager.validate_company_access(company_id, previous_key):
+                    s3_manager.delete_file(previous_key)
+            except Exception as e:
+                print(f"Warning: Failed to delete previous file {previous_file_path}: {e}")
+        
+        try:
+            from src.workers.rag_tasks import process_material_task
+            process_material_task.delay(material.id, job.id)
+        except Exception as e:
+            print(f"Warning: Failed to trigger async task: {e}")
+        
+        return jsonify({
+            'material': material.to_dict(),
+            'job_id': job.id,
+            'message': 'Revised file uploaded. Reprocessing started.'
+        }), 202
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Revision failed: {str(e)}'}), 500
+
+
 @material_bp.route('/<int:material_id>', methods=['DELETE'])
 @require_role_enhanced(['admin', 'user'])
 @log_activity('delete_material', 'Deleted reference material', 'material', 'material_id')
@@ -361,7 +460,9 @@ def delete_material(material_id):
     """
     Delete material (soft delete)
     
-    Also removes from ElasticSearch index
+    Searches exclude the material as soon as this commits; its documents are
+    removed from the search index by a background task (and by the periodic
+    orphan sweep if that task cannot be queued).
     """
     try:
         company_id = current_user.company_id
@@ -377,13 +478,6 @@ def delete_material(material_id):
         # Soft delete
         material.is_active = False
         
-        # Remove from ElasticSearch
-        try:
-            from src.services.elasticsearch_service import elasticsearch_service
-            elasticsearch_service.delete_material_chunks(material_id, company_id)
-        except Exception as e:
-            print(f"Warning: Failed to delete from ElasticSearch: {e}")
-        
         # Optional: Delete from S3 (commented out for safety)
         # s3_key = material.file_path.replace(f's3://{s3_manager.bucket_name}/', '')
         # if s3_manager.validate_company_access(company_id, s3_key):
@@ -391,6 +485,13 @@ def delete_material(material_id):
         
         db.session.commit()
         
+        # Remove from the search index in the background
+        try:
+            from src.workers.rag_tasks import purge_material_vectors_task
+            purge_material_vectors_task.delay(material_id, company_id)
+        except Exception as e:
+            print(f"Warning: Failed to queue search index purge: {e}")
+        
         return jsonify({'message': 'Material deleted successfully'}), 200
     
     except Exception as e:
@@ -15,6 +15,8 @@ from werkzeug.utils import secure_filename
 
 from src.models.models import db, Media, Company, User
 from src.services.media_manager import MediaManager
+from src.services.media_proxy import media_proxy
+from src.services.company_stats_service import company_stats_service
 from src.middleware.auth import require_role_enhanced
 
 logger = logging.getLogger(__name__)
@@ -98,10 +100,12 @@ def upload_media():
       - title: Media title (optional)
       - description: Description (optional)
       - tags: JSON array of tags (optional)
+      - transcode: 'true' to optimize/HLS-package a video in the background (optional)
     
     Response: {
       "success": true,
-      "media": {...}
+      "media": {...},
+      "transcode_job_id": 34   (videos with transcode=true)
     }
     """
     try:
@@ -153,13 +157,22 @@ def upload_media():
         if not media:
             return jsonify({'error': 'Failed to upload media'}), 500
         
+        transcode_job = None
+        if media_type == 'video' and request.form.get('transcode', '').lower() in ('1', 'true'):
+            from src.services.transcoding_service import transcoding_service
+            transcode_job = transcoding_service.enqueue(
+                company_id, user_id, 'media', media.id, media.gcs_uri, media.original_filename,
+                folder=f"company_{company_id}/media/video"
+            )
+        
         # Get media dict with signed URL
         media_dict = media.to_dict()
         media_dict['signed_url'] = manager.get_signed_url(media.gcs_uri)
         
         return jsonify({
             'success': True,
-            'media': media_dict
+            'media': media_dict,
+            'transcode_job_id': transcode_job.id if transcode_job else None
         }), 201
         
     except Exception as e:
@@ -378,32 +391,8 @@ def get_media_stats():
         if not company_id:
             return jsonify({'error': 'User not authenticated'}), 401
         
-        # Get stats
-        total_media = Media.query.filter_by(
-            company_id=company_id,
-            is_active=True
-        ).count()
-        
-        images_count = Media.query.filter_by(
-            company_id=company_id,
-            media_type='image',
-            is_active=True
-        ).count()
-        
-        videos_count = Media.query.filter_by(
-            company_id=company_id,
-            media_type='video',
-            is_active=True
-        ).count()
-        
-        # Calculate total size
-        media_list = Media.query.filter_by(
-            company_id=company_id,
-            is_active=True
-        ).all()
-        
-        total_size_bytes = sum(m.file_size or 0 for m in media_list)
-        total_size_mb = total_size_bytes / (1024 * 1024)
+        # Aggregate counters in one query (cached per company)
+        stats = company_stats_service.get_media_stats(company_id)
         
         # Get recent uploads
         recent = Media.query.filter_by(
@@ -413,16 +402,17 @@ def get_media_stats():
         
         manager = MediaManager()
         recent_uploads = []
-        for media in recent:
+        signed_urls = manager.get_signed_urls([media.gcs_uri for media in recent])
+        for media, signed_url in zip(recent, signed_urls):
             media_dict = media.to_dict()
-            media_dict['signed_url'] = manager.get_signed_url(media.gcs_uri)
+            media_dict['signed_url'] = signed_url
             recent_uploads.append(media_dict)
         
         return jsonify({
-            'total_media': total_media,
-            'images': images_count,
-            'videos': videos_count,
-            'total_size_mb': round(total_size_mb, 2),
+            'total_media': stats['total_media'],
+            'images': stats['images'],
+            'videos': stats['videos'],
+            'total_size_mb': stats['total_size_mb'],
             'recent_uploads': recent_uploads
         }), 200
         
@@ -437,10 +427,12 @@ def proxy_media(media_id):
     """
     Proxy media file to avoid CORS issues
     
-    This endpoint fetches the media from GCS and returns it with proper CORS headers,
+    This endpoint streams the media from GCS with proper CORS headers,
     allowing the frontend to use it in Canvas and other contexts that require CORS.
+    Range and If-None-Match are honored; recently proxied objects are served
+    from a bounded local disk cache (see MediaProxy).
     
-    Response: Binary file data with appropriate Content-Type
+    Response: Binary file data with appropriate Content-Type (200/206/304)
     """
     try:
         # CRITICAL: Tenant isolation
@@ -454,32 +446,15 @@ def proxy_media(media_id):
         if not media:
             return jsonify({'error': 'Media not found or access denied'}), 404
         
-        # Get signed URL
-        signed_url = manager.get_signed_url(media.gcs_uri)
-        
-        if not signed_url:
-            return jsonify({'error': 'Failed to generate signed URL'}), 500
-        
-        # Fetch file from GCS
-        import requests
-        response = requests.get(signed_url, stream=True)
-        
-        if response.status_code != 200:
-            return jsonify({'error': 'Failed to fetch media from storage'}), 500
-        
-        # Return file with proper CORS headers
-        from flask import Response
-        
         # Determine content type
         content_type = media.mime_type or 'application/octet-stream'
         
-        return Response(
-            response.content,
-            mimetype=content_type,
-            headers={
-                'Access-Control-Allow-Origin': '*',
-                'Cache-Control': 'public, max-age=3600'
-            }
+        # Signed URL is only generated on a cache miss
+        return media_proxy.serve(
+            media.gcs_uri,
+            lambda: manager.get_signed_url(media.gcs_uri),
+            content_type,
+            extra_headers={'Access-Control-Allow-Origin': '*'}
         )
         
     except Exception as e:
@@ -495,25 +495,15 @@ def test_rag_search():
     }
     """
     try:
-        from src.services.elasticsearch_service import elasticsearch_service
-        from src.services.rag_processor import RAGProcessor
+        from src.services.rag_search_service import rag_search_service
         
         data = request.json or {}
         query = data.get('query', 'test search')
         company_id = data.get('company_id', 1)
         max_results = data.get('max_results', 5)
         
-        # Generate query embedding using RAG processor
-        rag_processor = RAGProcessor()
-        query_embedding = rag_processor.generate_embedding(query)
-        
-        # Perform hybrid search
-        results = elasticsearch_service.hybrid_search(
-            query_text=query,
-            query_embedding=query_embedding,
-            company_id=company_id,
-            top_k=max_results
-        )
+        # Same path as manual generation: cached embedding, soft-deleted materials excluded
+        results = rag_search_service.search(company_id, query, top_k=max_results)
         
         return jsonify({
             'query': query,
@@ -0,0 +1,159 @@
+"""
+File: upload_routes.py
+Purpose: Resumable chunked upload API for large video files
+Main functionality: Create session, PUT chunks, query offset, finalize, abort
+Dependencies: Flask, UploadSessionService, authentication middleware
+"""
+
+import logging
+from flask import Blueprint, request, jsonify
+from flask_login import current_user
+
+from src.middleware.auth import require_role_enhanced, log_activity
+from src.services.upload_session_service import upload_session_service, UploadSessionError
+
+logger = logging.getLogger(__name__)
+
+upload_bp = Blueprint('upload_api', __name__, url_prefix='/api/uploads')
+
+
+def _error_response(error: UploadSessionError):
+    return jsonify({'success': False, 'error': str(error)}), error.status_code
+
+
+@upload_bp.route('/sessions', methods=['POST'])
+@require_role_enhanced(['admin', 'user'])
+def create_upload_session():
+    """
+    Start a resumable upload
+
+    Request JSON: {
+      "filename": "line3_training.mp4",
+      "total_size": 5368709120,
+      "mime_type": "video/mp4",       (optional)
+      "chunk_size": 16777216          (optional, bytes)
+    }
+
+    Response: {
+      "success": true,
+      "session": {"session_id": "...", "chunk_size": 16777216, "total_chunks": 320, ...}
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        upload_session = upload_session_service.create_session(
+            company_id=current_user.company_id,
+            user_id=current_user.id,
+            filename=data.get('filename', ''),
+            total_size=int(data.get('total_size') or 0),
+            mime_type=data.get('mime_type'),
+            chunk_size=int(data['chunk_size']) if data.get('chunk_size') else None
+        )
+    except UploadSessionError as e:
+        return _error_response(e)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'total_size and chunk_size must be integers'}), 400
+
+    return jsonify({'success': True, 'session': upload_session.to_dict()}), 201
+
+
+@upload_bp.route('/sessions/<session_id>', methods=['GET'])
+@require_role_enhanced(['admin', 'user'])
+def get_upload_session(session_id):
+    """
+    Query upload progress (used to resume after a network failure)
+
+    Response: {
+      "success": true,
+      "session": {..., "offset": 33554432, "received_chunks": [0, 1, 3], "missing_chunks": [2, 4, ...]}
+    }
+    """
+    try:
+        upload_session = upload_session_service.get_session(session_id, current_user.company_id)
+        return jsonify({'success': True, 'session': upload_session_service.get_status(upload_session)})
+    except UploadSessionError as e:
+        return _error_response(e)
+
+
+@upload_bp.route('/sessions/<session_id>/chunks/<int:chunk_index>', methods=['PUT'])
+@require_role_enhanced(['admin', 'user'])
+def put_upload_chunk(session_id, chunk_index):
+    """
+    Upload one chunk (raw request body); chunks may be sent in parallel and in any order
+
+    Headers:
+      - X-Chunk-SHA256: Hex SHA-256 of the chunk (optional, verified when present)
+
+    Chunk N covers bytes [N * chunk_size, min((N + 1) * chunk_size, total_size)).
+
+    Response: {"success": true, "chunk": {"chunk_index": 3, "offset": 50331648, "size": 16777216, "sha256": "..."}}
+    """
+    try:
+        upload_session = upload_session_service.get_session(session_id, current_user.company_id)
+        chunk = upload_session_service.store_chunk(
+            upload_session, chunk_index, request.stream,
+            expected_sha256=request.headers.get('X-Chunk-SHA256')
+        )
+        return jsonify({'success': True, 'chunk': chunk})
+    except UploadSessionError as e:
+        return _error_response(e)
+    except Exception as e:
+        logger.error(f"Chunk upload failed: session={session_id} chunk={chunk_index}: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': f'Chunk upload failed: {str(e)}'}), 500
+
+
+@upload_bp.route('/sessions/<session_id>/complete', methods=['POST'])
+@require_role_enhanced(['admin', 'user'])
+@log_activity('upload_video', 'Completed resumable video upload', 'uploaded_file')
+def complete_upload_session(session_id):
+    """
+    Compose all chunks into the final file and register it
+
+    Request JSON: {"transcode": true}   (optional)
+
+    Response: {
+      "success": true,
+      "file": {"id": 12, "file_path": "company_1/videos/...", "gcs_uri": "gs://...", "file_size": 5368709120},
+      "transcode_job_id": 34       (when transcoding was requested; poll /api/jobs/<id>)
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        upload_session = upload_session_service.get_session(session_id, current_user.company_id)
+        uploaded_file = upload_session_service.finalize(upload_session, transcode=bool(data.get('transcode')))
+    except UploadSessionError as e:
+        return _error_response(e)
+    except Exception as e:
+        logger.error(f"Upload finalize failed: session={session_id}: {e}", exc_info=True)
+        return jsonify({'success': False, 'error': f'Upload finalize failed: {str(e)}'}), 500
+
+    metadata = uploaded_file.get_metadata()
+    return jsonify({
+        'success': True,
+        'file': {
+            'id': uploaded_file.id,
+            'original_filename': uploaded_file.original_filename,
+            'stored_filename': uploaded_file.stored_filename,
+            'file_path': uploaded_file.file_path,
+            'gcs_uri': metadata.get('gcs_uri'),
+            'file_size': uploaded_file.file_size,
+            'mime_type': uploaded_file.mime_type
+        },
+        'transcode_job_id': metadata.get('transcode', {}).get('job_id')
+    })
+
+
+@upload_bp.route('/sessions/<session_id>', methods=['DELETE'])
+@require_role_enhanced(['admin', 'user'])
+def abort_upload_session(session_id):
+    """
+    Cancel an unfinished upload and delete its chunks
+
+    Response: {"success": true}
+    """
+    try:
+        upload_session = upload_session_service.get_session(session_id, current_user.company_id)
+        upload_session_service.abort(upload_session)
+        return jsonify({'success': True})
+    except UploadSessionError as e:
+        return _error_response(e)
@@ -338,9 +338,12 @@ try:
     werkzeug.formparser.MultiPartParser.parse = bypass_413_parse
     
     # デフォルトストリームファクトリも大容量対応
+    # メモリ上に保持するのは UPLOAD_SPOOL_MAX_MEMORY_MB まで、超過分は一時ファイルへ
+    upload_spool_max_memory = int(os.getenv('UPLOAD_SPOOL_MAX_MEMORY_MB', '16')) * 1024 * 1024
+    
     def large_stream_factory(total_content_length=None, content_type=None, filename=None, content_length=None):
         import tempfile
-        return tempfile.SpooledTemporaryFile(max_size=10*1024*1024*1024, mode='w+b')
+        return tempfile.SpooledTemporaryFile(max_size=upload_spool_max_memory, mode='w+b')
     
     werkzeug.formparser.default_stream_factory = large_stream_factory
     
@@ -405,6 +408,10 @@ if HAS_AUTH_SYSTEM:
     db.init_app(app)
     auth_manager = AuthManager(app)
     app.auth_manager = auth_manager  # アプリケーションにauth_managerを設定
+    
+    # Activity logs are buffered and written by a background thread
+    from src.services.activity_log_writer import activity_log_writer
+    activity_log_writer.init_app(app)
 
 # リクエストサイズログ用ミドルウェア
 @app.before_request
@@ -959,6 +966,9 @@ def health():
                 logger.error(f"Database health check failed: {db_error}")
                 status["database"] = f"ERROR: {str(db_error)}"
                 status["status"] = "DEGRADED"
+            
+            from src.services.activity_log_writer import activity_log_writer
+            status["activity_log"] = activity_log_writer.get_stats()
         else:
             status["database"] = "DISABLED"
             
@@ -1812,6 +1822,14 @@ if HAS_AUTH_SYSTEM:
     except Exception as e:
         logger.warning(f"Failed to register media routes: {e}")
     
+    # Resumable Upload APIエンドポイント登録
+    try:
+        from src.api.upload_routes import upload_bp
+        app.register_blueprint(upload_bp)
+        logger.info("Resumable upload routes registered successfully")
+    except Exception as e:
+        logger.warning(f"Failed to register upload routes: {e}")
+    
     # UI Routes for Admin and Company Dashboards
     try:
         from src.routes.ui_routes import super_admin_ui_bp, company_ui_bp, ui_bp
@@ -2275,25 +2293,28 @@ if HAS_AUTH_SYSTEM:
     @app.route('/api/super-admin/activity-logs/export', methods=['GET'])
     @require_super_admin
     def api_export_activity_logs():
-        """Activity Logsエクスポート"""
+        """Activity Logsエクスポート（CSV/NDJSONをストリーミング出力）"""
         try:
-            logs = ActivityLog.query.order_by(ActivityLog.created_at.desc()).limit(1000).all()
+            from flask import stream_with_context
+            from src.services.activity_log_service import parse_activity_log_filters, stream_activity_logs
             
-            result = {
-                'success': True,
-                'logs': [{
-                    'id': log.id,
-                    'company_id': log.company_id,
-                    'user_id': log.user_id,
-                    'action_type': log.action_type,
-                    'description': log.description,
-                    'created_at': log.created_at.isoformat() if log.created_at else None
-                } for log in logs]
-            }
+            filters = parse_activity_log_filters(request.args)
+            export_format = request.args.get('format', 'csv').strip().lower()
+            if export_format not in ('csv', 'ndjson'):
+                return jsonify({'success': False, 'error': 'Invalid format. Must be csv or ndjson'}), 400
+            limit = request.args.get('limit', 10000, type=int)
+            include_archive = request.args.get('include_archive', 'false').lower() == 'true'
             
-            response = jsonify(result)
-            response.headers['Content-Disposition'] = f'attachment; filename=activity_logs_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
-            return response
+            mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+            extension = 'csv' if export_format == 'csv' else 'ndjson'
+            
+            return Response(
+                stream_with_context(stream_activity_logs(filters, export_format, limit, include_archive)),
+                mimetype=mimetype,
+                headers={
+                    'Content-Disposition': f'attachment; filename=activity_logs_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
+                }
+            )
         except Exception as e:
             logger.error(f"Activity logs export error: {e}")
             return jsonify({'success': False, 'error': str(e)}), 500
@@ -2970,11 +2991,18 @@ def api_upload_file():
     """
     File upload API endpoint
     Supports video file uploads for manual generation
+    
+    The multipart body is parsed incrementally and the 'file' part is piped
+    straight into storage (GCS resumable session or local file), so memory
+    use per upload is bounded by the read and chunk sizes. request.form and
+    request.files must not be touched here, as that would buffer the body.
     """
+    from src.infrastructure.streaming_upload import (
+        stream_multipart_upload, UploadRejectedError, UploadTooLargeError
+    )
+    
     logger.info("=== API Upload Processing Started ===")
-    logger.info(f"Request method: {request.method}")
-    logger.info(f"Request files keys: {list(request.files.keys())}")
-    logger.info(f"Request form keys: {list(request.form.keys())}")
+    logger.info(f"Request method: {request.method}, content_length: {request.content_length}")
     
     try:
         # Authentication check
@@ -2985,75 +3013,117 @@ def api_upload_file():
                 'error': 'Authentication required'
             }), 401
         
-        # Check if file is in request
-        if 'file' not in request.files:
-            logger.error("'file' key not found in request.files")
+        boundary = request.mimetype_params.get('boundary')
+        if request.mimetype != 'multipart/form-data' or not boundary:
             return jsonify({
                 'success': False,
-                'error': 'No file provided'
+                'error': 'multipart/form-data request required'
             }), 400
         
-        file = request.files['file']
-        logger.info(f"Received file: filename={file.filename}, content_type={file.content_type}")
-        
-        if file.filename == '':
-            logger.error("Empty filename")
+        max_size = app.config.get('MAX_CONTENT_LENGTH')
+        if max_size and request.content_length and request.content_length > max_size:
             return jsonify({
                 'success': False,
-                'error': 'No file selected'
-            }), 400
+                'error': f'File too large. Maximum size: {max_size / (1024 ** 3):.1f} GB'
+            }), 413
         
-        # Get optional parameters
-        role = request.form.get('role', 'user')
-        description = request.form.get('description', '')
+        file_manager = get_file_manager()
+        logger.info(f"File manager obtained: {type(file_manager)}")
         
-        # Validate file type
-        if not allowed_file(file.filename):
+        def open_upload(field_name, filename, content_type):
+            if field_name != 'file':
+                return None
+            if not filename:
+                raise UploadRejectedError('No file selected')
+            # Validate file type before any bytes are stored
+            if not allowed_file(filename):
+                raise UploadRejectedError(
+                    f'File type not allowed. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}'
+                )
+            logger.info(f"Streaming file: filename={filename}, content_type={content_type}")
+            return file_manager.open_upload_stream(filename, 'video', max_size=max_size)
+        
+        try:
+            form, files = stream_multipart_upload(request.stream, boundary, open_upload)
+        except UploadTooLargeError as e:
+            return jsonify({'success': False, 'error': str(e)}), 413
+        except UploadRejectedError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        if 'file' not in files:
+            logger.error("'file' part not found in request")
             return jsonify({
                 'success': False,
-                'error': f'File type not allowed. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}'
+                'error': 'No file provided'
             }), 400
         
-        logger.info(f"File type validation passed: {file.filename}")
+        file_info = files['file']
+        original_filename = file_info['original_filename']
+        mime_type = file_info.get('content_type')
+        logger.info(f"File saved successfully: {file_info}")
         
-        # Save file using file manager
-        file_manager = get_file_manager()
-        logger.info(f"File manager obtained: {type(file_manager)}")
+        # Resolve to the shared content-addressed object (drops duplicate copies)
+        if HAS_AUTH_SYSTEM and current_user.is_authenticated:
+            from src.services.content_store_service import content_store_service
+            file_info = content_store_service.deduplicate(file_manager, current_user.company_id, file_info)
         
-        file_info = file_manager.save_file(file, file.filename, 'video')
-        logger.info(f"File saved successfully: {file_info}")
+        # Get optional parameters
+        role = form.get('role', 'user')
+        description = form.get('description', '')
         
         # Record in database if authentication is enabled
         uploaded_file_record = None
         if HAS_AUTH_SYSTEM and current_user.is_authenticated:
             logger.info("Recording upload in database")
             uploaded_file_record = UploadedFile(
-                original_filename=file.filename,
+                original_filename=original_filename,
                 stored_filename=file_info['filename'],
                 file_type='video',
                 file_path=file_info['file_path'],
                 file_size=file_info.get('file_size'),
-                mime_type=file.content_type,
+                mime_type=mime_type,
                 company_id=current_user.company_id,
-                uploaded_by=current_user.id
+                uploaded_by=current_user.id,
+                content_hash=file_info.get('file_hash')
             )
+            metadata = {
+                'storage_type': file_info.get('storage_type', 'local'),
+                'sha256': file_info.get('file_hash'),
+                'deduplicated': file_info.get('deduplicated', False),
+                'upload_timestamp': datetime.now(JST).isoformat()
+            }
+            if file_info.get('gcs_uri'):
+                metadata['gcs_uri'] = file_info['gcs_uri']
+            uploaded_file_record.set_metadata(metadata)
             db.session.add(uploaded_file_record)
             db.session.commit()
             logger.info(f"Upload recorded with ID: {uploaded_file_record.id}")
         
+        # Optimization/HLS runs on the transcoding queue; the original stays playable meanwhile
+        transcode_job = None
+        if uploaded_file_record and form.get('transcode', '').lower() in ('1', 'true'):
+            from src.services.transcoding_service import transcoding_service
+            transcode_job = transcoding_service.enqueue(
+                current_user.company_id, current_user.id, 'uploaded_file', uploaded_file_record.id,
+                file_info['file_path'], original_filename
+            )
+        
         # Prepare response
         response_data = {
             'success': True,
             'message': 'File uploaded successfully',
             'file': {
                 'id': uploaded_file_record.id if uploaded_file_record else None,
-                'original_filename': file.filename,
+                'original_filename': original_filename,
                 'stored_filename': file_info['filename'],
                 'file_path': file_info['file_path'],
                 'file_size': file_info.get('file_size'),
-                'mime_type': file.content_type,
+                'file_hash': file_info.get('file_hash'),
+                'deduplicated': file_info.get('deduplicated', False),
+                'mime_type': mime_type,
                 'uploaded_at': uploaded_file_record.uploaded_at.isoformat() if uploaded_file_record else None
-            }
+            },
+            'transcode_job_id': transcode_job.id if transcode_job else None
         }
         
         logger.info("Upload completed successfully")
@@ -8,17 +8,61 @@ import uuid
 import shutil
 import threading
 from pathlib import Path
-from typing import Optional, Dict, Any, BinaryIO, List
+from typing import Optional, Dict, Any, BinaryIO, Callable, List, Tuple
 from abc import ABC, abstractmethod
 import json
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
+import requests
 from werkzeug.utils import secure_filename
+import google.auth
+from google.auth.transport.requests import AuthorizedSession
 from google.cloud import storage as gcs
+from google.cloud.storage.retry import DEFAULT_RETRY
 from src.utils.path_normalization import fix_mp4_extension
+from src.infrastructure.streaming_upload import (
+    StreamingUpload, LocalStreamingUpload, GCSStreamingUpload
+)
 import logging
 logger = logging.getLogger(__name__)
 
+# Maximum number of source objects per GCS compose request
+GCS_COMPOSE_MAX_SOURCES = 32
+
+# Concurrent object uploads for bulk uploads (HLS segments)
+STORAGE_UPLOAD_WORKERS = int(os.getenv('STORAGE_UPLOAD_WORKERS', '8'))
+
+
+def build_unique_filename(filename: str) -> Tuple[str, str]:
+    """
+    保存用のユニークなファイル名を生成（拡張子を保持）
+    
+    Args:
+        filename: 元のファイル名
+        
+    Returns:
+        (ユニークファイル名, 小文字の拡張子)
+    """
+    # ファイル名を安全に処理（拡張子を保持）
+    secure_name = secure_filename(filename)
+    
+    # 拡張子を元のファイル名から取得
+    original_ext = ''
+    if '.' in filename:
+        original_ext = '.' + filename.rsplit('.', 1)[1].lower()
+    
+    # secure_filenameが空の場合や拡張子が失われた場合の対処
+    if not secure_name or secure_name == original_ext.lstrip('.'):
+        # ファイル名の本体部分がない場合、generic nameを使用
+        secure_name = f"file{original_ext}"
+    elif original_ext and not secure_name.lower().endswith(original_ext):
+        # 拡張子が失われた場合、追加
+        secure_name += original_ext
+    
+    return f"{uuid.uuid4()}_{secure_name}", original_ext
+
+
 class StorageBackend(ABC):
     """ストレージバックエンドの抽象基底クラス"""
     
@@ -41,6 +85,92 @@ class StorageBackend(ABC):
     def file_exists(self, file_path: str) -> bool:
         """ファイルの存在確認"""
         pass
+    
+    def open_upload_stream(self, filename: str, folder: str = None, company_id: int = None,
+                           max_size: int = None) -> StreamingUpload:
+        """
+        ストリーミング書き込み用のアップロードを開始
+        
+        Args:
+            filename: 元のファイル名
+            folder: 保存先フォルダ
+            company_id: 企業ID
+            max_size: 最大バイト数（超過時は UploadTooLargeError）
+            
+        Returns:
+            StreamingUpload（write() で書き込み、commit() で save_file と同じ形式の結果を返す）
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support streaming uploads")
+    
+    def open_object_stream(self, object_path: str, max_size: int = None) -> StreamingUpload:
+        """
+        指定パスへのストリーミング書き込みを開始（ファイル名の変換なし）
+        
+        Args:
+            object_path: 保存先パス（バックエンドのルートからの相対パス）
+            max_size: 最大バイト数
+            
+        Returns:
+            StreamingUpload
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support streaming uploads")
+    
+    def read_bytes(self, file_path: str) -> Optional[bytes]:
+        """
+        小さなオブジェクト（マニフェスト等）の内容を取得
+        
+        Args:
+            file_path: ファイルパス
+            
+        Returns:
+            内容（存在しない場合は None）
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support read_bytes")
+    
+    def move_file(self, source_path: str, destination_path: str) -> bool:
+        """
+        オブジェクトを別パスへ移動（同一ストレージ内）
+        
+        Args:
+            source_path: 移動元パス
+            destination_path: 移動先パス
+            
+        Returns:
+            成功した場合 True
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support move_file")
+    
+    def compose_files(self, source_paths: List[str], filename: str, folder: str = None) -> Dict[str, Any]:
+        """
+        複数のオブジェクトを順に連結して1つのファイルを作成
+        
+        Args:
+            source_paths: 連結するオブジェクトのパス（順序どおり）
+            filename: 元のファイル名（保存名の生成に使用）
+            folder: 保存先フォルダ
+            
+        Returns:
+            save_file と同じ形式の結果
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support composing files")
+    
+    def upload_files(self, files: List[Tuple[str, str]], max_workers: int = None) -> List[Dict[str, Any]]:
+        """
+        ローカルファイルを指定パスへ一括アップロード（ファイル名の変換なし）
+        
+        Args:
+            files: (ローカルパス, 保存先パス) のリスト
+            max_workers: 並列数（順次実行のバックエンドでは無視）
+            
+        Returns:
+            各ファイルの file_path / file_size（files と同じ順序）
+        """
+        results = []
+        for local_path, object_path in files:
+            upload = self.open_object_stream(object_path)
+            with open(local_path, 'rb') as f:
+                results.append(upload.copy_from(f))
+        return results
 
 class LocalStorageBackend(StorageBackend):
     """ローカルストレージバックエンド"""
@@ -51,23 +181,7 @@ class LocalStorageBackend(StorageBackend):
     
     def save_file(self, file_obj: BinaryIO, filename: str, folder: str = None, company_id: int = None) -> Dict[str, Any]:
         """ローカルファイル保存"""
-        # ファイル名を安全に処理（拡張子を保持）
-        secure_name = secure_filename(filename)
-        
-        # 拡張子を元のファイル名から取得
-        original_ext = ''
-        if '.' in filename:
-            original_ext = '.' + filename.rsplit('.', 1)[1].lower()
-        
-        # secure_filenameが空の場合や拡張子が失われた場合の対処
-        if not secure_name or secure_name == original_ext.lstrip('.'):
-            # ファイル名の本体部分がない場合、generic nameを使用
-            secure_name = f"file{original_ext}"
-        elif original_ext and not secure_name.lower().endswith(original_ext):
-            # 拡張子が失われた場合、追加
-            secure_name += original_ext
-        
-        unique_filename = f"{uuid.uuid4()}_{secure_name}"
+        unique_filename, original_ext = build_unique_filename(filename)
         
         # フォルダ構造作成
         if folder:
@@ -96,6 +210,57 @@ class LocalStorageBackend(StorageBackend):
             'storage_type': 'local'
         }
     
+    def open_upload_stream(self, filename: str, folder: str = None, company_id: int = None,
+                           max_size: int = None) -> StreamingUpload:
+        """ローカルファイルへのストリーミング保存"""
+        unique_filename, _ = build_unique_filename(filename)
+        upload = self.open_object_stream(f"{folder}/{unique_filename}" if folder else unique_filename, max_size)
+        upload.result['original_filename'] = filename
+        return upload
+    
+    def open_object_stream(self, object_path: str, max_size: int = None) -> StreamingUpload:
+        """ローカルファイルへのストリーミング保存（パス指定）"""
+        file_path = self.base_path / object_path
+        return LocalStreamingUpload(file_path, {
+            'file_path': object_path,
+            'full_path': str(file_path),
+            'filename': file_path.name,
+            'storage_type': 'local'
+        }, max_size=max_size)
+    
+    def read_bytes(self, file_path: str) -> Optional[bytes]:
+        """ローカルファイルの内容を取得"""
+        full_path = self.base_path / file_path
+        if not full_path.exists():
+            return None
+        return full_path.read_bytes()
+    
+    def move_file(self, source_path: str, destination_path: str) -> bool:
+        """ローカルファイルの移動"""
+        try:
+            destination = self.base_path / destination_path
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self.base_path / source_path, destination)
+            return True
+        except Exception as e:
+            logger.error(f"Error moving file {source_path} -> {destination_path}: {e}")
+            return False
+    
+    def compose_files(self, source_paths: List[str], filename: str, folder: str = None) -> Dict[str, Any]:
+        """ローカルファイルの連結"""
+        unique_filename, _ = build_unique_filename(filename)
+        upload = self.open_object_stream(f"{folder}/{unique_filename}" if folder else unique_filename)
+        upload.result['original_filename'] = filename
+        try:
+            for source_path in source_paths:
+                with open(self.base_path / source_path, 'rb') as f:
+                    for data in iter(lambda: f.read(1024 * 1024), b''):
+                        upload.write(data)
+            return upload.commit()
+        except Exception:
+            upload.abort()
+            raise
+    
     def delete_file(self, file_path: str) -> bool:
         """ローカルファイル削除"""
         try:
@@ -208,28 +373,26 @@ class GCSStorageBackend(StorageBackend):
             logger.warning("GCP credentials file could not be resolved; Client init may fail")
 
         # クライアント初期化 (失敗時は例外を握りつぶさず上位でログ)
-        self.client = gcs.Client()
+        self.client = self._create_client()
         self.bucket = self.client.bucket(bucket_name)
     
+    @staticmethod
+    def _create_client() -> gcs.Client:
+        """
+        HTTPコネクションプールを並列アップロード数に合わせたGCSクライアントを作成
+        
+        既定のセッションはプール10本のため、それを超える並列数ではスレッドが接続を使い捨てる。
+        認証済みセッションを自前で作り、公開されている _http 引数で渡す。
+        """
+        credentials, project = google.auth.default(scopes=gcs.Client.SCOPE)
+        pool_size = max(STORAGE_UPLOAD_WORKERS, requests.adapters.DEFAULT_POOLSIZE)
+        http = AuthorizedSession(credentials)
+        http.mount('https://', requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size))
+        return gcs.Client(project=project, credentials=credentials, _http=http)
+    
     def save_file(self, file_obj: BinaryIO, filename: str, folder: str = None, company_id: int = None) -> Dict[str, Any]:
         """GCSファイル保存（company_idベースのフォルダ構造、CDN対応キャッシュヘッダー設定）"""
-        # ファイル名を安全に処理（拡張子を保持）
-        secure_name = secure_filename(filename)
-        
-        # 拡張子を元のファイル名から取得
-        original_ext = ''
-        if '.' in filename:
-            original_ext = '.' + filename.rsplit('.', 1)[1].lower()
-        
-        # secure_filenameが空の場合や拡張子が失われた場合の対処
-        if not secure_name or secure_name == original_ext.lstrip('.'):
-            # ファイル名の本体部分がない場合、generic nameを使用
-            secure_name = f"file{original_ext}"
-        elif original_ext and not secure_name.lower().endswith(original_ext):
-            # 拡張子が失われた場合、追加
-            secure_name += original_ext
-        
-        unique_filename = f"{uuid.uuid4()}_{secure_name}"
+        unique_filename, original_ext = build_unique_filename(filename)
         
         # Folder structure enforces tenant isolation at root level
         # For multi-tenancy: folder should already be in format "company_{id}/videos"
@@ -240,22 +403,106 @@ class GCSStorageBackend(StorageBackend):
             blob_name = unique_filename
         
         blob = self.bucket.blob(blob_name)
+        self._apply_cache_headers(blob, original_ext)
         
-        # Set cache headers for CDN optimization
-        if original_ext in ['.mp4', '.ts', '.m3u8', '.webm', '.mov']:
-            # Video files: cache for 24 hours
-            blob.cache_control = 'public, max-age=86400'
-            blob.content_type = self._get_content_type(original_ext)
-        elif original_ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp']:
-            # Image files: cache for 7 days
-            blob.cache_control = 'public, max-age=604800'
-            blob.content_type = self._get_content_type(original_ext)
-        
+        # 重複排除用のSHA256（アップロード前にローカルで計算）
+        file_obj.seek(0)
+        sha256_hash = hashlib.sha256()
+        for chunk in iter(lambda: file_obj.read(1024 * 1024), b""):
+            sha256_hash.update(chunk)
         file_obj.seek(0)
         
         # ファイルアップロード
         blob.upload_from_file(file_obj)
         
+        return {
+            'file_path': blob_name,
+            'filename': unique_filename,
+            'original_filename': filename,
+            'file_size': blob.size,
+            'file_hash': sha256_hash.hexdigest(),
+            'gcs_uri': f"gs://{self.bucket_name}/{blob_name}",
+            'storage_type': 'gcs',
+            'cdn_url': self._get_cdn_url(blob_name) if self.cdn_domain else None
+        }
+    
+    def open_upload_stream(self, filename: str, folder: str = None, company_id: int = None,
+                           max_size: int = None) -> StreamingUpload:
+        """GCSへのストリーミング保存（resumable upload セッションへ固定サイズのチャンクで送信）"""
+        unique_filename, _ = build_unique_filename(filename)
+        upload = self.open_object_stream(f"{folder}/{unique_filename}" if folder else unique_filename, max_size)
+        upload.result['original_filename'] = filename
+        return upload
+    
+    def open_object_stream(self, object_path: str, max_size: int = None) -> StreamingUpload:
+        """GCSへのストリーミング保存（パス指定）"""
+        blob = self.bucket.blob(object_path)
+        self._apply_cache_headers(blob, os.path.splitext(object_path)[1].lower())
+        
+        return GCSStreamingUpload(blob, {
+            'file_path': object_path,
+            'filename': os.path.basename(object_path),
+            'gcs_uri': f"gs://{self.bucket_name}/{object_path}",
+            'storage_type': 'gcs',
+            'cdn_url': self._get_cdn_url(object_path) if self.cdn_domain else None
+        }, max_size=max_size)
+    
+    def read_bytes(self, file_path: str) -> Optional[bytes]:
+        """GCSオブジェクトの内容を取得"""
+        from google.api_core.exceptions import NotFound
+        try:
+            return self.bucket.blob(file_path).download_as_bytes()
+        except NotFound:
+            return None
+    
+    def move_file(self, source_path: str, destination_path: str) -> bool:
+        """GCSオブジェクトの移動（ストレージ側でのコピーと削除）"""
+        try:
+            self.bucket.rename_blob(self.bucket.blob(source_path), destination_path)
+            return True
+        except Exception as e:
+            logger.error(f"Error moving GCS object {source_path} -> {destination_path}: {e}")
+            return False
+    
+    def compose_files(self, source_paths: List[str], filename: str, folder: str = None) -> Dict[str, Any]:
+        """
+        GCS compose によるオブジェクト連結（データはWebノードを経由しない）
+        
+        compose は1回あたり最大32オブジェクトのため、超える場合は中間オブジェクトを
+        段階的に作成してから最終オブジェクトを作成する。
+        """
+        unique_filename, original_ext = build_unique_filename(filename)
+        blob_name = f"{folder}/{unique_filename}" if folder else unique_filename
+        
+        sources = [self.bucket.blob(path) for path in source_paths]
+        intermediates = []
+        level = 0
+        try:
+            while len(sources) > GCS_COMPOSE_MAX_SOURCES:
+                next_sources = []
+                for start in range(0, len(sources), GCS_COMPOSE_MAX_SOURCES):
+                    group = sources[start:start + GCS_COMPOSE_MAX_SOURCES]
+                    if len(group) == 1:
+                        next_sources.append(group[0])
+                        continue
+                    intermediate = self.bucket.blob(f"{blob_name}.compose_{level}_{start // GCS_COMPOSE_MAX_SOURCES}")
+                    intermediate.compose(group)
+                    intermediates.append(intermediate)
+                    next_sources.append(intermediate)
+                sources = next_sources
+                level += 1
+            
+            blob = self.bucket.blob(blob_name)
+            self._apply_cache_headers(blob, original_ext)
+            blob.compose(sources)
+        finally:
+            for intermediate in intermediates:
+                try:
+                    intermediate.delete()
+                except Exception as e:
+                    logger.warning(f"Failed to delete intermediate compose object {intermediate.name}: {e}")
+        
+        blob.reload()
         return {
             'file_path': blob_name,
             'filename': unique_filename,
@@ -266,6 +513,42 @@ class GCSStorageBackend(StorageBackend):
             'cdn_url': self._get_cdn_url(blob_name) if self.cdn_domain else None
         }
     
+    def upload_files(self, files: List[Tuple[str, str]], max_workers: int = None) -> List[Dict[str, Any]]:
+        """
+        GCSへの並列一括アップロード
+        
+        共有クライアントのHTTPセッション（_create_client でプールを並列数に合わせて作成）を
+        全スレッドで再利用し、一時的なエラーは DEFAULT_RETRY で再試行する。
+        上書きしても同じ内容になるため、条件なしで再試行して問題ない。
+        """
+        max_workers = max(1, min(max_workers or STORAGE_UPLOAD_WORKERS, len(files) or 1))
+        
+        def upload(item):
+            local_path, object_path = item
+            blob = self.bucket.blob(object_path)
+            self._apply_cache_headers(blob, Path(local_path).suffix.lower())
+            blob.upload_from_filename(local_path, content_type=blob.content_type, retry=DEFAULT_RETRY)
+            return {
+                'file_path': object_path,
+                'gcs_uri': f"gs://{self.bucket_name}/{object_path}",
+                'file_size': os.path.getsize(local_path),
+                'storage_type': 'gcs'
+            }
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gcs-upload') as executor:
+            return list(executor.map(upload, files))
+    
+    def _apply_cache_headers(self, blob, extension: str):
+        """Set cache headers for CDN optimization"""
+        if extension in ['.mp4', '.ts', '.m3u8', '.webm', '.mov']:
+            # Video files: cache for 24 hours
+            blob.cache_control = 'public, max-age=86400'
+            blob.content_type = self._get_content_type(extension)
+        elif extension in ['.jpg', '.jpeg', '.png', '.gif', '.webp']:
+            # Image files: cache for 7 days
+            blob.cache_control = 'public, max-age=604800'
+            blob.content_type = self._get_content_type(extension)
+    
     def _get_content_type(self, extension: str) -> str:
         """Get content type based on file extension"""
         content_types = {
@@ -315,13 +598,9 @@ class GCSStorageBackend(StorageBackend):
         if self.cdn_domain:
             return self._get_cdn_url(file_path)
         
-        # Fallback to signed URL
-        blob = self.bucket.blob(file_path)
-        return blob.generate_signed_url(
-            version="v4",
-            expiration=expires_in,
-            method="GET"
-        )
+        # Fallback to signed URL (reused from the shared cache while it has enough lifetime left)
+        from src.infrastructure.signed_url_cache import get_signed_url_cache
+        return get_signed_url_cache().get_url(self.bucket.blob(file_path), expires_in, method="GET")
     
     def file_exists(self, file_path: str) -> bool:
         """GCSファイル存在確認"""
@@ -459,6 +738,121 @@ class FileManager:
         result['file_type'] = file_type
         return result
     
+    def open_upload_stream(self, filename: str, file_type: str = None, folder: str = None,
+                           company_id: int = None, max_size: int = None) -> StreamingUpload:
+        """
+        ストリーミングアップロードを開始（リクエスト全体をメモリ・一時ファイルに保持しない）
+        
+        Args:
+            filename: 元のファイル名
+            file_type: ファイルタイプ（folder 未指定時のフォルダ名）
+            folder: 保存先フォルダ
+            company_id: 企業ID
+            max_size: 最大バイト数
+            
+        Returns:
+            StreamingUpload
+        """
+        if file_type and not folder:
+            folder = file_type
+        
+        upload = self.backend.open_upload_stream(filename, folder, company_id, max_size=max_size)
+        upload.result['file_type'] = file_type
+        return upload
+    
+    def open_object_stream(self, object_path: str, max_size: int = None) -> StreamingUpload:
+        """指定パスへのストリーミング書き込み（チャンク保存など内部オブジェクト用）"""
+        return self.backend.open_object_stream(object_path, max_size=max_size)
+    
+    def move_file(self, source_path: str, destination_path: str) -> bool:
+        """ストレージ内でのファイル移動"""
+        return self.backend.move_file(source_path, destination_path)
+    
+    def get_storage_uri(self, file_path: str) -> str:
+        """ファイルパスからストレージURI（GCSは gs://、ローカルは絶対パス）を取得"""
+        if isinstance(self.backend, GCSStorageBackend):
+            return f"gs://{self.backend.bucket_name}/{file_path}"
+        if isinstance(self.backend, LocalStorageBackend):
+            return str(self.backend.base_path / file_path)
+        return file_path
+    
+    def derived_prefix(self, content_hash: str, folder: str = None) -> str:
+        """
+        コンテンツハッシュに紐づく派生成果物（最適化MP4、HLS、解析結果など）の保存先
+        
+        Args:
+            content_hash: 元動画のSHA256
+            folder: 元動画の保存フォルダ
+            
+        Returns:
+            派生成果物のプレフィックス
+        """
+        return f"{folder}/derived/{content_hash}" if folder else f"derived/{content_hash}"
+    
+    def get_derived_artifact(self, content_hash: str, name: str, folder: str = None) -> Optional[Dict[str, Any]]:
+        """
+        コンテンツハッシュで派生成果物（JSON）を取得
+        
+        同じ動画が再アップロードされた場合に、最適化・HLSの結果を再利用するために使う
+        （現在の利用箇所は save_video_with_optimization のみ）。
+        
+        Args:
+            content_hash: 元動画のSHA256
+            name: 成果物名（例: 'manifest'）
+            folder: 元動画の保存フォルダ
+            
+        Returns:
+            成果物の内容（未作成の場合は None）
+        """
+        try:
+            data = self.backend.read_bytes(f"{self.derived_prefix(content_hash, folder)}/{name}.json")
+        except NotImplementedError:
+            return None
+        except Exception as e:
+            logger.warning(f"Failed to read derived artifact {name} for {content_hash}: {e}")
+            return None
+        return json.loads(data) if data else None
+    
+    def put_derived_artifact(self, content_hash: str, name: str, data: Dict[str, Any], folder: str = None) -> str:
+        """
+        コンテンツハッシュをキーに派生成果物（JSON）を保存
+        
+        Args:
+            content_hash: 元動画のSHA256
+            name: 成果物名
+            data: 保存する内容
+            folder: 元動画の保存フォルダ
+            
+        Returns:
+            保存先パス
+        """
+        object_path = f"{self.derived_prefix(content_hash, folder)}/{name}.json"
+        upload = self.backend.open_object_stream(object_path)
+        upload.write(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        upload.commit()
+        return object_path
+    
+    def compose_files(self, source_paths: List[str], filename: str,
+                      file_type: str = None, folder: str = None) -> Dict[str, Any]:
+        """
+        複数オブジェクトを連結して1ファイルを作成（GCSではストレージ側で連結）
+        
+        Args:
+            source_paths: 連結するオブジェクトのパス（順序どおり）
+            filename: 元のファイル名
+            file_type: ファイルタイプ
+            folder: 保存先フォルダ
+            
+        Returns:
+            save_file と同じ形式の結果
+        """
+        if file_type and not folder:
+            folder = file_type
+        
+        result = self.backend.compose_files(source_paths, filename, folder)
+        result['file_type'] = file_type
+        return result
+    
     async def upload_base64_image(self, image_base64: str, filename: str, 
                                    folder: str = 'keyframes', company_id: int = None) -> str:
         """
@@ -568,7 +962,8 @@ class FileManager:
         filename: str,
         folder: str = None,
         company_id: int = None,
-        generate_hls: bool = None
+        generate_hls: bool = None,
+        on_rendition: Optional[Callable[[str, Dict[str, Any]], None]] = None
     ) -> Dict[str, Any]:
         """
         Save video file with automatic optimization and HLS generation
@@ -586,6 +981,9 @@ class FileManager:
             folder: Target folder in storage
             company_id: Company ID for multi-tenant isolation
             generate_hls: Override HLS generation setting
+            on_rendition: Called as on_rendition(name, info) as soon as each
+                rendition ('mp4', 'hls') is in storage, so callers can publish
+                it before the remaining renditions finish
             
         Returns:
             Dictionary with upload results including optimized and HLS URLs
@@ -605,14 +1003,31 @@ class FileManager:
             original_ext = Path(filename).suffix
             temp_original = temp_dir / f"original{original_ext}"
             file_obj.seek(0)
+            sha256_hash = hashlib.sha256()
             with open(temp_original, 'wb') as f:
-                shutil.copyfileobj(file_obj, f)
+                for chunk in iter(lambda: file_obj.read(1024 * 1024), b""):
+                    sha256_hash.update(chunk)
+                    f.write(chunk)
+            content_hash = sha256_hash.hexdigest()
+            
+            logger.info(f"Video saved to temp: {temp_original} ({os.path.getsize(temp_original)} bytes, sha256={content_hash})")
             
-            logger.info(f"Video saved to temp: {temp_original} ({os.path.getsize(temp_original)} bytes)")
+            # Same content already processed with the same settings: reuse its renditions
+            manifest_name = f"manifest_{self.video_quality}_{'hls' if should_generate_hls else 'mp4'}"
+            cached = self.get_derived_artifact(content_hash, manifest_name, folder)
+            if cached and cached.get('success'):
+                logger.info(f"Reusing derived artifacts for {content_hash} ({manifest_name})")
+                cached.update({'original_filename': filename, 'deduplicated': True})
+                if on_rendition:
+                    for name in ('mp4', 'hls'):
+                        if cached.get(name):
+                            on_rendition(name, cached[name])
+                return cached
             
             result = {
                 'success': True,
                 'original_filename': filename,
+                'content_hash': content_hash,
                 'optimization_enabled': self.enable_video_optimization,
                 'hls_enabled': should_generate_hls
             }
@@ -632,7 +1047,7 @@ class FileManager:
                 if opt_result['success']:
                     optimized_path = temp_optimized
                     result['optimization'] = opt_result
-                    logger.info(f"Video optimized: {opt_result['compression_ratio']} reduction")
+                    logger.info(f"Video optimized ({opt_result.get('mode')}): {opt_result['compression_ratio']} reduction")
                 else:
                     logger.warning(f"Optimization failed: {opt_result.get('error')}")
                     logger.warning("Using original video")
@@ -647,6 +1062,8 @@ class FileManager:
             
             result['mp4'] = upload_result
             logger.info(f"Optimized video uploaded: {upload_result['file_path']}")
+            if on_rendition:
+                on_rendition('mp4', upload_result)
             
             # Step 3: Generate and upload HLS
             if should_generate_hls and self.hls_generator:
@@ -666,18 +1083,35 @@ class FileManager:
                 )
                 
                 if hls_result['success']:
-                    # Upload HLS files
-                    hls_uploads = self._upload_hls_files(hls_dir, folder, company_id)
-                    result['hls'] = {
-                        'master_playlist': hls_uploads.get('master_playlist'),
-                        'variants': hls_result['variants'],
-                        'files_uploaded': len(hls_uploads.get('files', []))
-                    }
-                    logger.info(f"HLS generation complete: {len(hls_uploads.get('files', []))} files uploaded")
+                    # Upload HLS files under the content hash so relative playlist references stay valid
+                    hls_prefix = f"{self.derived_prefix(content_hash, folder)}/hls_{self.video_quality}"
+                    try:
+                        hls_uploads = self._upload_hls_files(hls_dir, hls_prefix)
+                    except Exception as e:
+                        logger.warning(f"HLS upload failed: {e}")
+                        hls_uploads = None
+                        result['hls'] = {'success': False, 'error': f'HLS upload failed: {e}'}
+                    
+                    if hls_uploads:
+                        result['hls'] = {
+                            'master_playlist': hls_uploads.get('master_playlist'),
+                            'variants': hls_result['variants'],
+                            'files_uploaded': len(hls_uploads.get('files', []))
+                        }
+                        logger.info(f"HLS generation complete: {len(hls_uploads.get('files', []))} files uploaded")
+                        if on_rendition:
+                            on_rendition('hls', result['hls'])
                 else:
                     logger.warning(f"HLS generation failed: {hls_result.get('error')}")
                     result['hls'] = {'success': False, 'error': hls_result.get('error')}
             
+            # Record renditions under the content hash so duplicate uploads finish instantly
+            if not (should_generate_hls and result.get('hls', {}).get('success') is False):
+                try:
+                    self.put_derived_artifact(content_hash, manifest_name, result, folder)
+                except Exception as e:
+                    logger.warning(f"Failed to store derived artifact manifest for {content_hash}: {e}")
+            
             return result
             
         except Exception as e:
@@ -709,29 +1143,37 @@ class FileManager:
         else:
             return ['360p']
     
-    def _upload_hls_files(self, hls_dir: Path, folder: str, company_id: int) -> Dict:
-        """Upload all HLS files to storage"""
+    def _upload_hls_files(self, hls_dir: Path, hls_prefix: str) -> Dict:
+        """
+        Upload an HLS ladder keeping relative names (playlists reference segments by name)
+        
+        Segments go up in parallel first; variant playlists and then the master
+        playlist are uploaded only after every segment is stored, so a partially
+        uploaded ladder is never reachable from a playlist.
+        
+        Args:
+            hls_dir: Local directory produced by HLSGenerator
+            hls_prefix: Storage prefix for this ladder
+            
+        Returns:
+            Dictionary with uploaded files and master playlist URI/path
+        """
+        def object_path(local_path: Path) -> str:
+            return f"{hls_prefix}/{local_path.relative_to(hls_dir).as_posix()}"
+        
+        local_files = [p for p in hls_dir.rglob('*') if p.is_file()]
+        segments = [p for p in local_files if p.suffix != '.m3u8']
+        playlists = [p for p in local_files if p.suffix == '.m3u8' and p.name != 'master.m3u8']
+        masters = [p for p in local_files if p.name == 'master.m3u8']
+        
         uploaded_files = []
-        master_playlist_url = None
+        for batch in (segments, playlists, masters):
+            if batch:
+                uploaded_files += self.backend.upload_files([(str(p), object_path(p)) for p in batch])
         
-        # Create HLS subfolder
-        hls_folder = f"{folder}/hls" if folder else "hls"
-        
-        # Upload all files in HLS directory
-        for file_path in hls_dir.rglob('*'):
-            if file_path.is_file():
-                with open(file_path, 'rb') as f:
-                    upload_result = self.backend.save_file(
-                        f,
-                        file_path.name,
-                        hls_folder,
-                        company_id
-                    )
-                    uploaded_files.append(upload_result)
-                    
-                    # Track master playlist
-                    if file_path.name == 'master.m3u8':
-                        master_playlist_url = upload_result.get('gcs_uri') or upload_result.get('file_path')
+        master_playlist_url = None
+        if masters:
+            master_playlist_url = uploaded_files[-1].get('gcs_uri') or uploaded_files[-1].get('file_path')
         
         return {
             'files': uploaded_files,
@@ -755,3 +1197,29 @@ def create_file_manager(company_storage_type: str = 'gcs',
         }
     
     return FileManager(company_storage_type, company_storage_config)
+
+_default_file_manager: Optional[FileManager] = None
+_default_file_manager_lock = threading.Lock()
+
+def get_default_file_manager() -> FileManager:
+    """
+    Process-wide FileManager for the application's default storage.
+
+    Resolves the same bucket as the web app (ENVIRONMENT-based GCS bucket) so
+    services and workers read and write where the routes do, and falls back
+    to local storage (LOCAL_STORAGE_PATH) when STORAGE_TYPE=local or the GCS
+    client cannot be created.
+    """
+    global _default_file_manager
+    with _default_file_manager_lock:
+        if _default_file_manager is None:
+            local_config = {'base_path': os.getenv('LOCAL_STORAGE_PATH', 'uploads')}
+            if os.getenv('STORAGE_TYPE', 'gcs') == 'local':
+                _default_file_manager = FileManager('local', local_config)
+            else:
+                try:
+                    _default_file_manager = create_file_manager()
+                except Exception as e:
+                    logger.warning(f"GCS unavailable, using local storage: {e}")
+                    _default_file_manager = FileManager('local', local_config)
+        return _default_file_manager
@@ -169,8 +169,14 @@ class S3Manager:
         Delete file from S3
         
         Args:
-            s3_key: S3 object key
+            s3_key: S3 object key (or relative path in local storage)
         """
+        if not self.use_s3:
+            local_path = os.path.join(self.local_storage_path, s3_key)
+            if os.path.exists(local_path):
+                os.remove(local_path)
+            return
+        
         try:
             self.s3_client.delete_object(
                 Bucket=self.bucket_name,
@@ -0,0 +1,127 @@
+"""
+File: signed_url_cache.py
+Purpose: Reuse GCS V4 signed URLs across requests and workers
+Main functionality: SignedUrlCache keyed by (blob, method, expiry), batched lookup and signing
+                    for list pages, get_signed_url_cache
+Dependencies: google-cloud-storage, src.utils.cache_store
+"""
+
+import os
+import time
+import logging
+from datetime import timedelta
+from typing import List
+
+from src.utils.cache_store import CacheStore, get_cache_store
+
+logger = logging.getLogger(__name__)
+
+
+class SignedUrlCache:
+    """
+    Cache of signed URLs.
+
+    A URL is cached until only safety_margin seconds of its lifetime remain,
+    so every URL handed out is valid for at least that long. Entries are keyed
+    by bucket/blob, HTTP method and requested expiry (URLs requested with
+    different lifetimes never substitute for each other). With CACHE_REDIS_URL
+    set the cache is shared by all web workers.
+
+    Attributes:
+        cache: Underlying CacheStore ('signed_urls' namespace)
+        safety_margin: Minimum remaining lifetime of a returned URL in seconds
+            (SIGNED_URL_SAFETY_MARGIN_SECONDS)
+    """
+
+    def __init__(self, cache: CacheStore = None, safety_margin: int = None):
+        self.cache = cache or get_cache_store('signed_urls')
+        self.safety_margin = safety_margin if safety_margin is not None else \
+            int(os.getenv('SIGNED_URL_SAFETY_MARGIN_SECONDS', '300'))
+
+    @staticmethod
+    def _key(blob, method: str, expires_in: int) -> str:
+        return f"{method}:{expires_in}:{blob.bucket.name}/{blob.name}"
+
+    def get_url(self, blob, expires_in: int = 3600, method: str = 'GET') -> str:
+        """
+        Signed URL for one blob.
+
+        Args:
+            blob: google.cloud.storage Blob
+            expires_in: Requested URL lifetime in seconds
+            method: HTTP method the URL is signed for
+
+        Returns:
+            Signed URL valid for at least safety_margin seconds
+        """
+        return self.get_urls([blob], expires_in, method)[0]
+
+    def get_urls(self, blobs: List, expires_in: int = 3600, method: str = 'GET') -> List[str]:
+        """
+        Signed URLs for a page of blobs.
+
+        Cached URLs are fetched in one lookup, only the misses are signed and
+        the new URLs are written back in one batch.
+
+        Args:
+            blobs: google.cloud.storage Blobs
+            expires_in: Requested URL lifetime in seconds
+            method: HTTP method the URLs are signed for
+
+        Returns:
+            Signed URLs in the order of blobs
+
+        Raises:
+            Exception: Signing errors from google-cloud-storage
+        """
+        keys = [self._key(blob, method, expires_in) for blob in blobs]
+        ttl = expires_in - self.safety_margin
+        if ttl < 60:
+            # Too short-lived to be worth caching; still sign each object once
+            fresh = {}
+            for blob, key in zip(blobs, keys):
+                if key not in fresh:
+                    fresh[key] = self._sign(blob, expires_in, method)
+            return [fresh[key] for key in keys]
+
+        cached = self.cache.get_many(list(dict.fromkeys(keys)))
+        now = time.time()
+
+        urls = []
+        signed = {}
+        for blob, key in zip(blobs, keys):
+            if key in signed:
+                # Repeated object in this page, already re-signed above
+                urls.append(signed[key]['url'])
+                continue
+            entry = cached.get(key)
+            if entry and entry['expires_at'] - now > self.safety_margin:
+                urls.append(entry['url'])
+                continue
+            entry = {'url': self._sign(blob, expires_in, method), 'expires_at': now + expires_in}
+            signed[key] = entry
+            urls.append(entry['url'])
+
+        if signed:
+            self.cache.set_many(signed, ttl)
+            logger.debug(f"Signed {len(signed)} URLs ({len(blobs) - len(signed)} served from cache)")
+        return urls
+
+    @staticmethod
+    def _sign(blob, expires_in: int, method: str) -> str:
+        return blob.generate_signed_url(
+            version="v4",
+            expiration=timedelta(seconds=expires_in),
+            method=method
+        )
+
+
+_signed_url_cache = None
+
+
+def get_signed_url_cache() -> SignedUrlCache:
+    """Return the process-wide SignedUrlCache."""
+    global _signed_url_cache
+    if _signed_url_cache is None:
+        _signed_url_cache = SignedUrlCache()
+    return _signed_url_cache
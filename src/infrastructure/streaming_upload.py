@@ -0,0 +1,292 @@
+"""
+File: streaming_upload.py
+Purpose: Stream multipart uploads straight into storage with bounded memory
+Main functionality: StreamingUpload sinks (local file, GCS resumable session),
+                    incremental multipart parsing that pipes file parts into a sink
+Dependencies: werkzeug (sansio multipart decoder), google-cloud-storage (GCS sink only)
+"""
+
+import os
+import hashlib
+import logging
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the request stream per iteration
+UPLOAD_READ_SIZE = int(os.getenv('UPLOAD_READ_SIZE_KB', '1024')) * 1024
+
+# Bytes per resumable upload request to GCS (must be a multiple of 256 KB)
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE_MB', '8')) * 1024 * 1024
+
+# Upper bound for a non-file form field kept in memory
+MAX_FORM_FIELD_SIZE = 1024 * 1024
+
+
+class UploadRejectedError(Exception):
+    """Upload was refused (disallowed file type, missing field, ...)"""
+
+
+class UploadTooLargeError(UploadRejectedError):
+    """Upload exceeded the configured maximum size"""
+
+
+class StreamingUpload:
+    """
+    Write-only sink for one uploaded file.
+
+    Subclasses implement _write/_commit/_abort. This base class hashes the
+    data (SHA-256) and enforces the size limit as bytes arrive, so callers
+    never need the whole file in memory or on local disk.
+
+    Attributes:
+        result: Storage result dict (same keys as StorageBackend.save_file)
+        max_size: Maximum accepted bytes (None for no limit)
+        bytes_written: Bytes received so far
+    """
+
+    def __init__(self, result: Dict[str, Any], max_size: Optional[int] = None):
+        self.result = dict(result)
+        self.max_size = max_size
+        self.bytes_written = 0
+        self._sha256 = hashlib.sha256()
+        self._finished = False
+
+    def write(self, data: bytes) -> None:
+        """
+        Append data to the upload.
+
+        Args:
+            data: Next bytes of the file
+
+        Raises:
+            UploadTooLargeError: If max_size is exceeded
+        """
+        if not data:
+            return
+        self.bytes_written += len(data)
+        if self.max_size is not None and self.bytes_written > self.max_size:
+            raise UploadTooLargeError(f"Upload exceeds maximum size of {self.max_size} bytes")
+        self._sha256.update(data)
+        self._write(data)
+
+    def commit(self) -> Dict[str, Any]:
+        """
+        Finish the upload and make the object visible.
+
+        Returns:
+            Storage result dict including file_size and file_hash (SHA-256 hex)
+        """
+        self._commit()
+        self._finished = True
+        self.result['file_size'] = self.bytes_written
+        self.result['file_hash'] = self._sha256.hexdigest()
+        return self.result
+
+    def abort(self) -> None:
+        """Discard a partially written upload (no-op after commit)."""
+        if self._finished:
+            return
+        self._finished = True
+        try:
+            self._abort()
+        except Exception as e:
+            logger.warning(f"Failed to abort upload {self.result.get('file_path')}: {e}")
+
+    def discard(self) -> None:
+        """Delete a committed upload whose request failed afterwards."""
+        if not self._finished:
+            self.abort()
+            return
+        try:
+            self._delete()
+        except Exception as e:
+            logger.warning(f"Failed to delete upload {self.result.get('file_path')}: {e}")
+
+    def copy_from(self, file_obj: BinaryIO, read_size: int = UPLOAD_READ_SIZE) -> Dict[str, Any]:
+        """
+        Stream a file object into the upload and commit it.
+
+        Args:
+            file_obj: Readable binary file object
+            read_size: Bytes per read
+
+        Returns:
+            Storage result dict
+        """
+        try:
+            for data in iter(lambda: file_obj.read(read_size), b''):
+                self.write(data)
+            return self.commit()
+        except Exception:
+            self.abort()
+            raise
+
+    def _write(self, data: bytes) -> None:
+        raise NotImplementedError
+
+    def _commit(self) -> None:
+        raise NotImplementedError
+
+    def _abort(self) -> None:
+        raise NotImplementedError
+
+    def _delete(self) -> None:
+        raise NotImplementedError
+
+
+class LocalStreamingUpload(StreamingUpload):
+    """Writes to '<path>.part' and renames it into place on commit."""
+
+    def __init__(self, final_path: Path, result: Dict[str, Any], max_size: Optional[int] = None):
+        super().__init__(result, max_size)
+        self.final_path = Path(final_path)
+        self.final_path.parent.mkdir(parents=True, exist_ok=True)
+        self._part_path = self.final_path.with_name(self.final_path.name + '.part')
+        self._file = open(self._part_path, 'wb')
+
+    def _write(self, data: bytes) -> None:
+        self._file.write(data)
+
+    def _commit(self) -> None:
+        self._file.close()
+        os.replace(self._part_path, self.final_path)
+
+    def _abort(self) -> None:
+        self._file.close()
+        if self._part_path.exists():
+            self._part_path.unlink()
+
+    def _delete(self) -> None:
+        if self.final_path.exists():
+            self.final_path.unlink()
+
+
+class GCSStreamingUpload(StreamingUpload):
+    """
+    Pipes data into a GCS resumable upload session.
+
+    The session is opened lazily by the blob writer on the first full chunk;
+    at most chunk_size bytes are buffered locally at any time.
+    """
+
+    def __init__(self, blob, result: Dict[str, Any], max_size: Optional[int] = None,
+                 chunk_size: int = UPLOAD_CHUNK_SIZE):
+        super().__init__(result, max_size)
+        self.blob = blob
+        self._writer = blob.open('wb', chunk_size=chunk_size, ignore_flush=True,
+                                 content_type=blob.content_type)
+
+    def _write(self, data: bytes) -> None:
+        self._writer.write(data)
+
+    def _commit(self) -> None:
+        self._writer.close()
+
+    def _abort(self) -> None:
+        # An unfinished resumable session never creates an object and
+        # expires on the GCS side. BlobWriter has no public abort (close()
+        # would finalize the object), so drop it and let its buffer be freed.
+        self._writer = None
+
+    def _delete(self) -> None:
+        self.blob.delete()
+
+
+def stream_multipart_upload(
+    stream: BinaryIO,
+    boundary: str,
+    open_upload: Callable[[str, str, Optional[str]], Optional[StreamingUpload]],
+    read_size: int = UPLOAD_READ_SIZE
+) -> Tuple[Dict[str, str], Dict[str, Dict[str, Any]]]:
+    """
+    Parse a multipart/form-data body incrementally and stream file parts into storage.
+
+    Only one read buffer and the sink's own chunk buffer are held in memory,
+    independent of the upload size.
+
+    Args:
+        stream: Raw request body stream (request.stream; request.form/files must not be accessed)
+        boundary: Multipart boundary from the Content-Type header
+        open_upload: Called as open_upload(field_name, filename, content_type) for each
+                     file part; returns a StreamingUpload, or None to discard the part
+        read_size: Bytes read from the stream per iteration
+
+    Returns:
+        Tuple of (form fields, committed uploads by field name). Each upload result
+        also carries 'content_type' from the part headers.
+
+    Raises:
+        UploadRejectedError: Raised by open_upload, or for an oversized form field or
+                             a repeated file field name
+        UploadTooLargeError: If a sink's size limit is exceeded
+
+    On any error, uploads already committed for this body are deleted again.
+    """
+    decoder = MultipartDecoder(boundary.encode('latin-1'), max_form_memory_size=MAX_FORM_FIELD_SIZE)
+    form: Dict[str, str] = {}
+    files: Dict[str, Dict[str, Any]] = {}
+    committed: List[StreamingUpload] = []
+
+    current_field: Optional[Field] = None
+    field_data = bytearray()
+    current_upload: Optional[StreamingUpload] = None
+    current_file: Optional[File] = None
+    in_file = False
+
+    try:
+        while True:
+            data = stream.read(read_size)
+            decoder.receive_data(data or None)
+
+            event = decoder.next_event()
+            while not isinstance(event, (NeedData, Epilogue)):
+                if isinstance(event, Field):
+                    current_field = event
+                    field_data = bytearray()
+                    in_file = False
+                elif isinstance(event, File):
+                    if event.name in files:
+                        raise UploadRejectedError(f"File field '{event.name}' was sent more than once")
+                    current_file = event
+                    current_upload = open_upload(
+                        event.name, event.filename, event.headers.get('Content-Type')
+                    )
+                    in_file = True
+                elif isinstance(event, Data):
+                    if in_file:
+                        if current_upload is not None:
+                            current_upload.write(event.data)
+                        if not event.more_data:
+                            if current_upload is not None:
+                                result = current_upload.commit()
+                                committed.append(current_upload)
+                                result['content_type'] = current_file.headers.get('Content-Type')
+                                files[current_file.name] = result
+                            current_upload = None
+                            current_file = None
+                    else:
+                        field_data.extend(event.data)
+                        if len(field_data) > MAX_FORM_FIELD_SIZE:
+                            raise UploadRejectedError(f"Form field '{current_field.name}' is too large")
+                        if not event.more_data:
+                            form[current_field.name] = field_data.decode('utf-8', errors='replace')
+                            current_field = None
+                event = decoder.next_event()
+
+            if isinstance(event, Epilogue) or not data:
+                break
+        if current_upload is not None:
+            # Body ended in the middle of a file part (client disconnected)
+            raise UploadRejectedError('Upload was truncated before the file part completed')
+    except Exception:
+        if current_upload is not None:
+            current_upload.abort()
+        for upload in committed:
+            upload.discard()
+        raise
+
+    return form, files
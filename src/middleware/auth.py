@@ -10,7 +10,6 @@ from functools import wraps
 from flask import session, request, redirect, url_for, current_app, g, render_template, jsonify
 from flask_login import LoginManager, current_user, login_user, logout_user
 from itsdangerous import URLSafeTimedSerializer
-from sqlalchemy import func
 import secrets
 
 from src.models.models import db, Company, User, UserSession
@@ -184,34 +183,17 @@ class CompanyManager:
     @staticmethod
     def get_company_stats(company_id: int) -> Dict[str, Any]:
         """企業統計情報取得"""
-        from src.models.models import UploadedFile, Manual
+        from src.services.company_stats_service import company_stats_service
         
         company = Company.query.get(company_id)
         if not company:
             return {}
         
-        # Calculate storage usage for this company
-        total_storage_bytes = db.session.query(
-            func.sum(UploadedFile.file_size)
-        ).filter(
-            UploadedFile.company_id == company_id
-        ).scalar() or 0
-        storage_used_mb = round(total_storage_bytes / (1024 ** 2), 2)
+        stats = dict(company_stats_service.get_company_summary(company_id))
         
-        stats = {
-            'users_count': User.query.filter_by(company_id=company_id, is_active=True).count(),
-            'files_count': UploadedFile.query.filter_by(company_id=company_id).count(),
-            'manuals_count': Manual.query.filter_by(company_id=company_id).count(),
-            'storage_used_mb': storage_used_mb,
-            'last_activity': None
-        }
-        
-        # 最新活動日時
-        last_manual = Manual.query.filter_by(company_id=company_id).order_by(
-            Manual.created_at.desc()
-        ).first()
-        if last_manual:
-            stats['last_activity'] = last_manual.created_at
+        # 最新活動日時（キャッシュ上はISO文字列）
+        if stats.get('last_activity'):
+            stats['last_activity'] = datetime.fromisoformat(stats['last_activity'])
         
         return stats
     
@@ -316,7 +298,7 @@ def log_activity(action_type, action_detail=None, resource_type=None, resource_i
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            from src.models.models import ActivityLog
+            from src.services.activity_log_writer import activity_log_writer
             import json
             
             start_time = datetime.utcnow()
@@ -353,7 +335,9 @@ def log_activity(action_type, action_detail=None, resource_type=None, resource_i
                         'duration_ms': int((datetime.utcnow() - start_time).total_seconds() * 1000)
                     }
                     
-                    activity = ActivityLog(
+                    # Buffered and written in batches by a background thread,
+                    # so the request's own session/transaction is not touched
+                    activity_log_writer.enqueue(
                         user_id=user_id,
                         company_id=company_id,
                         action_type=action_type,
@@ -364,9 +348,6 @@ def log_activity(action_type, action_detail=None, resource_type=None, resource_i
                         result_status=result_status,
                         error_message=error_msg
                     )
-                    
-                    db.session.add(activity)
-                    db.session.commit()
                 
                 except Exception as log_error:
                     print(f"Failed to log activity: {log_error}")
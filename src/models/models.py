@@ -7,6 +7,7 @@ from datetime import datetime, timezone, timedelta
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+import os
 import json
 
 db = SQLAlchemy()
@@ -176,6 +177,9 @@ class UploadedFile(db.Model):
     # ファイルメタデータ（JSON形式）
     file_metadata = db.Column(db.Text)  # 動画の長さ、解像度など
     
+    # 内容のSHA256（同一内容のファイルは ContentBlob の同じオブジェクトを参照）
+    content_hash = db.Column(db.String(64), index=True)
+    
     def get_metadata(self):
         """メタデータをJSONから取得"""
         if self.file_metadata:
@@ -186,6 +190,32 @@ class UploadedFile(db.Model):
         """メタデータをJSONで保存"""
         self.file_metadata = json.dumps(metadata_dict, ensure_ascii=False)
 
+class ContentBlob(db.Model):
+    """
+    Content-addressed storage object shared by UploadedFile rows with the same SHA-256.
+    Scoped per company so deduplication never reveals other tenants' files.
+    """
+    __tablename__ = 'content_blobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False)
+    
+    file_path = db.Column(db.String(500), nullable=False)
+    file_size = db.Column(db.BigInteger)
+    mime_type = db.Column(db.String(100))
+    storage_type = db.Column(db.String(20))
+    
+    # Number of uploads that resolved to this object
+    ref_count = db.Column(db.Integer, default=1)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_referenced_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('company_id', 'sha256', name='uq_content_blob_company_hash'),
+    )
+
 class Manual(db.Model):
     """生成されたマニュアル"""
     __tablename__ = 'manuals'
@@ -553,7 +583,35 @@ class ReferenceChunk(db.Model):
     elasticsearch_doc_id = db.Column(db.String(100))
     chunk_metadata = db.Column(db.Text)
     
+    # Embedding persisted with the chunk so the search index can be rebuilt
+    # without calling the embedding model (see src/utils/embedding_codec.py)
+    text_hash = db.Column(db.String(64))  # SHA-256 of chunk_text the embedding was computed from
+    embedding = db.Column(db.LargeBinary)
+    embedding_dtype = db.Column(db.String(10))  # 'float16' or 'int8'
+    embedding_scale = db.Column(db.Float)  # int8 only
+    embedding_model = db.Column(db.String(100))
+    
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('idx_reference_chunks_material', 'material_id', 'chunk_index'),
+    )
+    
+    def set_embedding(self, values, model=None, dtype=None):
+        """Encode and store an embedding computed from the current chunk_text"""
+        from src.utils.embedding_codec import encode_embedding, text_hash
+        dtype = dtype or os.getenv('RAG_EMBEDDING_STORAGE_DTYPE', 'float16')
+        self.embedding, self.embedding_scale = encode_embedding(values, dtype)
+        self.embedding_dtype = dtype
+        self.embedding_model = model
+        self.text_hash = text_hash(self.chunk_text)
+    
+    def get_embedding(self):
+        """Decoded embedding, or None if none is stored"""
+        if self.embedding is None:
+            return None
+        from src.utils.embedding_codec import decode_embedding
+        return decode_embedding(self.embedding, self.embedding_dtype, self.embedding_scale)
 
 
 class ActivityLog(db.Model):
@@ -581,6 +639,7 @@ class ActivityLog(db.Model):
     __table_args__ = (
         db.Index('idx_user_action_date', 'user_id', 'action_type', 'created_at'),
         db.Index('idx_company_date', 'company_id', 'created_at'),
+        db.Index('idx_activity_created', 'created_at'),
     )
     
     def to_dict(self):
@@ -603,6 +662,122 @@ class ActivityLog(db.Model):
         }
 
 
+class ActivityLogArchive(db.Model):
+    """
+    Activity logs moved out of activity_logs by the retention job.
+    Same columns as ActivityLog, without foreign keys so archived rows
+    never block user or company deletion.
+    """
+    __tablename__ = 'activity_logs_archive'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer)
+    company_id = db.Column(db.Integer)
+    
+    action_type = db.Column(db.String(50), nullable=False)
+    action_detail = db.Column(db.String(255))
+    resource_type = db.Column(db.String(50))
+    resource_id = db.Column(db.Integer)
+    
+    request_metadata = db.Column(db.Text)
+    
+    result_status = db.Column(db.String(20))
+    error_message = db.Column(db.Text)
+    
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('idx_archive_company_date', 'company_id', 'created_at'),
+        db.Index('idx_archive_created', 'created_at'),
+    )
+
+
+class UploadSession(db.Model):
+    """
+    Resumable chunked upload session.
+    Chunks are stored as separate storage objects under chunk_prefix and
+    composed into the final object on completion.
+    """
+    __tablename__ = 'upload_sessions'
+    
+    id = db.Column(db.String(36), primary_key=True)  # UUID
+    
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    
+    original_filename = db.Column(db.String(255), nullable=False)
+    file_type = db.Column(db.String(50), nullable=False, default='video')
+    mime_type = db.Column(db.String(100))
+    
+    total_size = db.Column(db.BigInteger, nullable=False)
+    chunk_size = db.Column(db.Integer, nullable=False)
+    total_chunks = db.Column(db.Integer, nullable=False)
+    
+    # Storage folder of the final object and prefix of the chunk objects
+    folder = db.Column(db.String(500), nullable=False)
+    chunk_prefix = db.Column(db.String(500), nullable=False)
+    
+    # active, finalizing, completed, aborted, expired
+    status = db.Column(db.String(20), nullable=False, default='active')
+    uploaded_file_id = db.Column(db.Integer, db.ForeignKey('uploaded_files.id'), nullable=True)
+    error_message = db.Column(db.Text)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    
+    chunks = db.relationship('UploadSessionChunk', backref='session', lazy='dynamic',
+                             cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        db.Index('idx_upload_session_status_expires', 'status', 'expires_at'),
+    )
+    
+    def chunk_path(self, chunk_index):
+        """Storage path of one chunk object"""
+        return f"{self.chunk_prefix}/chunk_{chunk_index:06d}"
+    
+    def expected_chunk_size(self, chunk_index):
+        """Byte size a chunk must have (the last chunk may be shorter)"""
+        if chunk_index == self.total_chunks - 1:
+            return self.total_size - self.chunk_size * (self.total_chunks - 1)
+        return self.chunk_size
+    
+    def to_dict(self):
+        return {
+            'session_id': self.id,
+            'original_filename': self.original_filename,
+            'file_type': self.file_type,
+            'total_size': self.total_size,
+            'chunk_size': self.chunk_size,
+            'total_chunks': self.total_chunks,
+            'status': self.status,
+            'uploaded_file_id': self.uploaded_file_id,
+            'error_message': self.error_message,
+            'created_at': utc_to_jst_isoformat(self.created_at),
+            'expires_at': utc_to_jst_isoformat(self.expires_at)
+        }
+
+
+class UploadSessionChunk(db.Model):
+    """
+    A chunk received for an UploadSession (one row per chunk index).
+    """
+    __tablename__ = 'upload_session_chunks'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.String(36), db.ForeignKey('upload_sessions.id', ondelete='CASCADE'), nullable=False)
+    chunk_index = db.Column(db.Integer, nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('session_id', 'chunk_index', name='uq_upload_chunk_index'),
+    )
+
+
 class ManualTranslation(db.Model):
     """
     Translated versions of manuals
@@ -776,25 +951,33 @@ class Media(db.Model):
     
     # Relationships
     source_media = db.relationship('Media', remote_side=[id], backref='derived_media', uselist=False)
+    # Normalized copy of tags for indexed filtering (kept in sync by set_tags)
+    tag_rows = db.relationship('MediaTag', backref='media', cascade='all, delete-orphan')
     
     # Indexes for performance
+    # PostgreSQL also has pg_trgm GIN indexes on title/description/filename for
+    # ILIKE search (scripts/migrate_add_media_search_indexes.py)
     __table_args__ = (
         db.Index('idx_media_company_type', 'company_id', 'media_type'),
         db.Index('idx_media_company_active', 'company_id', 'is_active'),
         db.Index('idx_media_created', 'created_at'),
     )
     
+    @staticmethod
+    def parse_tags(raw):
+        """Parse stored tags: JSON array or legacy comma-separated string"""
+        if not raw:
+            return []
+        try:
+            # Try parsing as JSON array first (PostgreSQL with JSON type)
+            return json.loads(raw)
+        except (json.JSONDecodeError, TypeError):
+            # Fall back to comma-separated string (SQLite or TEXT field)
+            return [t.strip() for t in raw.split(',') if t.strip()]
+    
     def to_dict(self):
         """Convert to dictionary for API response"""
-        # Parse tags: comma-separated string or JSON array
-        tags_list = []
-        if self.tags:
-            try:
-                # Try parsing as JSON array first (PostgreSQL with JSON type)
-                tags_list = json.loads(self.tags)
-            except (json.JSONDecodeError, TypeError):
-                # Fall back to comma-separated string (SQLite or TEXT field)
-                tags_list = [t.strip() for t in self.tags.split(',') if t.strip()]
+        tags_list = self.parse_tags(self.tags)
         
         # Parse metadata: JSON string or dict
         def parse_json_field(field_value):
@@ -850,11 +1033,19 @@ class Media(db.Model):
         db.session.commit()
     
     def set_tags(self, tags_list):
-        """Set tags from list"""
-        if isinstance(tags_list, list):
-            self.tags = json.dumps(tags_list)
-        else:
-            self.tags = json.dumps([])
+        """Set tags from list (JSON column and media_tags rows)"""
+        if not isinstance(tags_list, list):
+            tags_list = []
+        self.tags = json.dumps(tags_list)
+        
+        wanted = list(dict.fromkeys(str(t).strip() for t in tags_list if str(t).strip()))
+        existing = {row.tag: row for row in self.tag_rows}
+        for tag, row in existing.items():
+            if tag not in wanted:
+                self.tag_rows.remove(row)
+        for tag in wanted:
+            if tag not in existing:
+                self.tag_rows.append(MediaTag(company_id=self.company_id, tag=tag))
     
     def get_tags(self):
         """Get tags as list"""
@@ -896,3 +1087,23 @@ class Media(db.Model):
             except:
                 return {}
         return {}
+
+
+class MediaTag(db.Model):
+    """
+    One row per (media, tag), so tag filters use an index instead of
+    scanning the JSON tags column. company_id is denormalized from media
+    to keep lookups within one tenant's index range.
+    """
+    __tablename__ = 'media_tags'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    media_id = db.Column(db.Integer, db.ForeignKey('media.id', ondelete='CASCADE'), nullable=False)
+    company_id = db.Column(db.Integer, db.ForeignKey('companies.id'), nullable=False)
+    tag = db.Column(db.String(255), nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('media_id', 'tag', name='uq_media_tag'),
+        # Covers "media of company X with tag Y" as an index-only scan
+        db.Index('idx_media_tags_company_tag', 'company_id', 'tag', 'media_id'),
+    )
@@ -0,0 +1,230 @@
+"""
+File: activity_log_service.py
+Purpose: Activity log export streaming and retention (archive) management
+Main functionality: Filter parsing, CSV/NDJSON streaming with server-side cursors, archive job
+Dependencies: SQLAlchemy, models
+"""
+
+import os
+import csv
+import json
+import logging
+from io import StringIO
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Iterator, Optional, List
+
+from sqlalchemy import select, insert, delete, literal
+
+from src.models.models import db, ActivityLog, ActivityLogArchive
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = (
+    'id', 'created_at', 'user_id', 'company_id', 'action_type',
+    'action_detail', 'resource_type', 'resource_id', 'result_status', 'error_message'
+)
+
+CSV_HEADER = [
+    'ID', 'Timestamp', 'User ID', 'Company ID', 'Action Type',
+    'Action Detail', 'Resource Type', 'Resource ID', 'Result Status', 'Error Message'
+]
+
+# Columns copied verbatim from activity_logs into activity_logs_archive
+_ARCHIVE_COLUMNS = (
+    'id', 'user_id', 'company_id', 'action_type', 'action_detail', 'resource_type',
+    'resource_id', 'request_metadata', 'result_status', 'error_message', 'created_at'
+)
+
+
+def _parse_datetime(value: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    # created_at is stored as naive UTC
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_activity_log_filters(args) -> Dict[str, Any]:
+    """
+    Parse activity log filter query parameters.
+
+    Args:
+        args: Request args (company_id, user_id, action_type, result_status,
+              start_date, end_date in ISO format)
+
+    Returns:
+        Dict of normalized filter values (missing filters are None)
+    """
+    return {
+        'company_id': args.get('company_id', type=int),
+        'user_id': args.get('user_id', type=int),
+        'action_type': (args.get('action_type') or '').strip() or None,
+        'result_status': (args.get('result_status') or '').strip() or None,
+        'start_date': _parse_datetime((args.get('start_date') or '').strip()),
+        'end_date': _parse_datetime((args.get('end_date') or '').strip()),
+    }
+
+
+def build_activity_log_criteria(model, filters: Dict[str, Any]) -> List:
+    """
+    Build WHERE criteria for ActivityLog or ActivityLogArchive.
+
+    Args:
+        model: ActivityLog or ActivityLogArchive
+        filters: Output of parse_activity_log_filters
+
+    Returns:
+        List of SQLAlchemy boolean expressions
+    """
+    criteria = []
+    if filters.get('company_id'):
+        criteria.append(model.company_id == filters['company_id'])
+    if filters.get('user_id'):
+        criteria.append(model.user_id == filters['user_id'])
+    if filters.get('action_type'):
+        criteria.append(model.action_type == filters['action_type'])
+    if filters.get('result_status'):
+        criteria.append(model.result_status == filters['result_status'])
+    if filters.get('start_date'):
+        criteria.append(model.created_at >= filters['start_date'])
+    if filters.get('end_date'):
+        criteria.append(model.created_at <= filters['end_date'])
+    return criteria
+
+
+def _iter_rows(model, filters: Dict[str, Any], limit: Optional[int], batch_size: int):
+    """Yield export rows using a server-side cursor (yield_per)."""
+    columns = [getattr(model, name) for name in EXPORT_COLUMNS]
+    stmt = select(*columns).where(
+        *build_activity_log_criteria(model, filters)
+    ).order_by(model.created_at.desc())
+    if limit:
+        stmt = stmt.limit(limit)
+
+    result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def stream_activity_logs(filters: Dict[str, Any], fmt: str = 'csv', limit: Optional[int] = None,
+                         include_archive: bool = False) -> Iterator[str]:
+    """
+    Stream activity logs as CSV or NDJSON text chunks.
+
+    Rows are fetched in batches through a server-side cursor, so memory use
+    does not grow with the number of exported rows.
+
+    Args:
+        filters: Output of parse_activity_log_filters
+        fmt: 'csv' or 'ndjson'
+        limit: Maximum number of rows (None or 0 for no limit)
+        include_archive: Also export rows from activity_logs_archive
+
+    Yields:
+        Text chunks ready to be written to the response
+    """
+    batch_size = int(os.getenv('ACTIVITY_LOG_EXPORT_BATCH_SIZE', '1000'))
+    remaining = limit if limit and limit > 0 else None
+
+    if fmt == 'csv':
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_HEADER)
+        yield buffer.getvalue()
+
+    models = [ActivityLog, ActivityLogArchive] if include_archive else [ActivityLog]
+    for model in models:
+        if remaining is not None and remaining <= 0:
+            break
+
+        for partition in _iter_rows(model, filters, remaining, batch_size):
+            if remaining is not None:
+                partition = partition[:remaining]
+                remaining -= len(partition)
+
+            if fmt == 'csv':
+                buffer = StringIO()
+                writer = csv.writer(buffer)
+                for row in partition:
+                    writer.writerow([
+                        row.id,
+                        row.created_at.isoformat() if row.created_at else '',
+                        row.user_id or '',
+                        row.company_id or '',
+                        row.action_type or '',
+                        row.action_detail or '',
+                        row.resource_type or '',
+                        row.resource_id or '',
+                        row.result_status or '',
+                        row.error_message or ''
+                    ])
+                yield buffer.getvalue()
+            else:
+                lines = []
+                for row in partition:
+                    record = dict(row._mapping)
+                    record['created_at'] = row.created_at.isoformat() if row.created_at else None
+                    lines.append(json.dumps(record, ensure_ascii=False))
+                yield '\n'.join(lines) + '\n'
+
+            if remaining is not None and remaining <= 0:
+                break
+
+
+def archive_old_activity_logs(retention_days: Optional[int] = None,
+                              batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Move activity logs older than the retention window into activity_logs_archive.
+
+    Each batch is copied and deleted in its own short transaction so the hot
+    table is never locked for long.
+
+    Args:
+        retention_days: Days kept in activity_logs (ACTIVITY_LOG_RETENTION_DAYS, default 90)
+        batch_size: Rows moved per transaction (ACTIVITY_LOG_ARCHIVE_BATCH_SIZE, default 5000)
+
+    Returns:
+        Dict with cutoff and archived row count
+    """
+    if retention_days is None:
+        retention_days = int(os.getenv('ACTIVITY_LOG_RETENTION_DAYS', '90'))
+    if batch_size is None:
+        batch_size = int(os.getenv('ACTIVITY_LOG_ARCHIVE_BATCH_SIZE', '5000'))
+
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    source_columns = [getattr(ActivityLog, name) for name in _ARCHIVE_COLUMNS]
+    archived = 0
+
+    while True:
+        with db.engine.begin() as connection:
+            ids = connection.execute(
+                select(ActivityLog.id)
+                .where(ActivityLog.created_at < cutoff)
+                .order_by(ActivityLog.id)
+                .limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                break
+
+            archived_at = datetime.utcnow()
+            connection.execute(
+                insert(ActivityLogArchive).from_select(
+                    list(_ARCHIVE_COLUMNS) + ['archived_at'],
+                    select(*source_columns, literal(archived_at, type_=ActivityLogArchive.archived_at.type))
+                    .where(ActivityLog.id.in_(ids))
+                )
+            )
+            connection.execute(delete(ActivityLog).where(ActivityLog.id.in_(ids)))
+
+        archived += len(ids)
+        logger.info(f"Archived {len(ids)} activity logs (total {archived}, cutoff {cutoff.isoformat()})")
+
+    return {'cutoff': cutoff.isoformat(), 'archived': archived}
@@ -0,0 +1,231 @@
+"""
+File: activity_log_writer.py
+Purpose: Buffered activity logging that keeps INSERTs off the request path
+Main functionality: ActivityLogWriter (bounded queue, background batch writer, drop counter)
+Dependencies: SQLAlchemy, models
+"""
+
+import os
+import queue
+import atexit
+import logging
+import time
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy.exc import OperationalError
+
+from src.models.models import db, ActivityLog
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityLogWriter:
+    """
+    Collects activity log rows in memory and writes them in multi-row INSERTs.
+
+    Main responsibilities:
+    - Accept activity events from request handlers without touching the
+      request's SQLAlchemy session or transaction
+    - Flush batches from a daemon thread using its own engine connection
+    - Drop (and count) events when the bounded queue is full instead of
+      blocking requests
+    - Drain the queue on interpreter shutdown
+
+    The writer thread is started lazily per process, so forked gunicorn
+    workers each get their own thread.
+
+    Attributes:
+        max_queue_size: Maximum number of buffered events (ACTIVITY_LOG_QUEUE_SIZE)
+        batch_size: Maximum rows per INSERT (ACTIVITY_LOG_BATCH_SIZE)
+        flush_interval: Seconds to wait for a batch to fill (ACTIVITY_LOG_FLUSH_INTERVAL)
+        enabled: When False, events are written synchronously (ACTIVITY_LOG_ASYNC)
+        lock_retries: Retries of a batch that hit a locked SQLite database (ACTIVITY_LOG_LOCK_RETRIES)
+    """
+
+    def __init__(self):
+        self.max_queue_size = int(os.getenv('ACTIVITY_LOG_QUEUE_SIZE', '10000'))
+        self.batch_size = int(os.getenv('ACTIVITY_LOG_BATCH_SIZE', '200'))
+        self.flush_interval = float(os.getenv('ACTIVITY_LOG_FLUSH_INTERVAL', '1.0'))
+        self.enabled = os.getenv('ACTIVITY_LOG_ASYNC', 'true').lower() == 'true'
+        self.lock_retries = int(os.getenv('ACTIVITY_LOG_LOCK_RETRIES', '5'))
+
+        self._queue = queue.Queue(maxsize=self.max_queue_size)
+        self._app = None
+        self._thread = None
+        self._thread_pid = None
+        self._stop_event = threading.Event()
+        self._start_lock = threading.Lock()
+        self._atexit_registered = False
+
+        # Counters are updated from request threads and the writer thread
+        self._stats_lock = threading.Lock()
+        self.dropped_count = 0
+        self.written_count = 0
+        self.failed_count = 0
+
+    def init_app(self, app) -> None:
+        """
+        Bind the writer to a Flask app and register the shutdown flush.
+
+        Args:
+            app: Flask application whose SQLAlchemy engine receives the rows
+        """
+        self._app = app
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    def enqueue(self, **fields) -> bool:
+        """
+        Buffer one activity event.
+
+        Args:
+            **fields: ActivityLog column values (user_id, company_id, action_type, ...)
+
+        Returns:
+            True if the event was accepted, False if it was dropped
+        """
+        fields.setdefault('created_at', datetime.utcnow())
+
+        if self._app is None:
+            try:
+                from flask import current_app
+                self.init_app(current_app._get_current_object())
+            except RuntimeError:
+                logger.warning("ActivityLogWriter used outside of an app context; event dropped")
+                self._count_dropped()
+                return False
+
+        if not self.enabled:
+            return self._write_batch([fields])
+
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(fields)
+            return True
+        except queue.Full:
+            dropped = self._count_dropped()
+            if dropped % 1000 == 1:
+                logger.warning(f"Activity log queue full, dropped {dropped} events so far")
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get writer counters for health and monitoring endpoints.
+
+        Returns:
+            Dict with queued, written, dropped, failed and async flag
+        """
+        with self._stats_lock:
+            return {
+                'async': self.enabled,
+                'queued': self._queue.qsize(),
+                'written': self.written_count,
+                'dropped': self.dropped_count,
+                'failed': self.failed_count
+            }
+
+    def flush(self) -> None:
+        """
+        Write every buffered event synchronously.
+        """
+        while True:
+            batch = self._drain(self.batch_size)
+            if not batch:
+                return
+            self._write_batch(batch)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """
+        Stop the writer thread and flush remaining events.
+
+        Args:
+            timeout: Seconds to wait for the writer thread to exit
+        """
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._thread_pid == os.getpid():
+            thread.join(timeout)
+        if self._app is not None:
+            self.flush()
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
+    def _count_dropped(self) -> int:
+        with self._stats_lock:
+            self.dropped_count += 1
+            return self.dropped_count
+
+    def _ensure_thread(self) -> None:
+        pid = os.getpid()
+        if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread_pid == pid and self._thread.is_alive():
+                return
+            if self._thread_pid is not None and self._thread_pid != pid:
+                # Forked child: the parent's buffered events belong to the parent
+                self._queue = queue.Queue(maxsize=self.max_queue_size)
+            self._stop_event = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='activity-log-writer', daemon=True)
+            self._thread_pid = pid
+            self._thread.start()
+
+    def _drain(self, limit: int, first_timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        batch = []
+        try:
+            if first_timeout is None:
+                batch.append(self._queue.get_nowait())
+            else:
+                batch.append(self._queue.get(timeout=first_timeout))
+        except queue.Empty:
+            return batch
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            batch = self._drain(self.batch_size, first_timeout=self.flush_interval)
+            if batch:
+                self._write_batch(batch)
+
+    def _write_batch(self, rows: List[Dict[str, Any]]) -> bool:
+        """
+        Insert rows with one executemany on a dedicated connection.
+
+        On SQLite the connection fails with "database is locked" while a
+        request holds a write transaction; the batch is retried with
+        exponential backoff before its rows are counted as failed.
+        """
+        attempt = 0
+        while True:
+            try:
+                with self._app.app_context():
+                    with db.engine.begin() as connection:
+                        connection.execute(ActivityLog.__table__.insert(), rows)
+                with self._stats_lock:
+                    self.written_count += len(rows)
+                return True
+            except OperationalError as e:
+                if 'database is locked' in str(e) and attempt < self.lock_retries:
+                    time.sleep(0.05 * 2 ** attempt)
+                    attempt += 1
+                    continue
+                error = e
+            except Exception as e:
+                error = e
+            with self._stats_lock:
+                self.failed_count += len(rows)
+            logger.error(f"Failed to write {len(rows)} activity log rows: {error}")
+            return False
+
+
+activity_log_writer = ActivityLogWriter()
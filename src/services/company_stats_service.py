@@ -0,0 +1,289 @@
+"""
+File: company_stats_service.py
+Purpose: Per-company statistics for dashboards and media library
+Main functionality: Aggregate count queries, joined recent-activity query, TTL cache with write invalidation
+Dependencies: SQLAlchemy, models, cache_store
+"""
+
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import select, func, case, or_
+
+from src.models.models import (
+    db, User, Manual, ManualTemplate, ReferenceMaterial, ManualPDF,
+    ManualTranslation, UploadedFile, Media, ActivityLog
+)
+from src.utils.cache_store import get_cache_store, register_commit_invalidator
+
+logger = logging.getLogger(__name__)
+
+# Models whose inserts/updates/deletes change a company's statistics
+_TRACKED_MODELS = (User, Manual, ManualTemplate, ReferenceMaterial, UploadedFile, Media)
+# Tracked models that belong to a company through their manual
+_MANUAL_CHILD_MODELS = (ManualPDF, ManualTranslation)
+
+_PENDING_KEY = 'company_stats_dirty_companies'
+
+
+def _count(model, *criteria):
+    """Build a scalar COUNT subquery for use inside a single aggregate SELECT."""
+    return select(func.count(model.id)).where(*criteria).scalar_subquery()
+
+
+class CompanyStatsService:
+    """
+    Computes company statistics with one aggregate query per view.
+
+    Main responsibilities:
+    - Dashboard counters (users, manuals, templates, daily activity)
+    - Storage/usage summary used by CompanyManager
+    - Media library counters and total size
+    - Recent activity with usernames resolved by a single JOIN
+
+    Results are cached per company for a short TTL and dropped whenever a
+    committed transaction touches a tracked model of that company.
+
+    Attributes:
+        cache: CacheStore holding computed statistics
+        ttl: Cache lifetime in seconds (COMPANY_STATS_CACHE_TTL)
+    """
+
+    def __init__(self):
+        self.cache = get_cache_store('company_stats')
+        self.ttl = int(os.getenv('COMPANY_STATS_CACHE_TTL', '30'))
+
+    # ------------------------------------------------------------------
+    # Cache helpers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _keys(company_id: int) -> List[str]:
+        return [f"dashboard:{company_id}", f"summary:{company_id}", f"media:{company_id}"]
+
+    def invalidate(self, company_id: int) -> None:
+        """
+        Drop every cached statistic for a company.
+
+        Args:
+            company_id: Company whose statistics changed
+        """
+        self.cache.delete(*self._keys(company_id))
+
+    def _cached(self, key: str, compute):
+        if self.ttl > 0:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        value = compute()
+        if self.ttl > 0:
+            self.cache.set(key, value, self.ttl)
+        return value
+
+    # ------------------------------------------------------------------
+    # Statistics
+    # ------------------------------------------------------------------
+
+    def get_dashboard_stats(self, company_id: int) -> Dict[str, int]:
+        """
+        Get company dashboard counters.
+
+        Args:
+            company_id: Company ID (tenant isolation)
+
+        Returns:
+            Dict with total_users, active_users, total_manuals, total_templates,
+            manuals_today, materials_today, pdfs_today, translations_today
+        """
+        return self._cached(f"dashboard:{company_id}", lambda: self._compute_dashboard_stats(company_id))
+
+    def _compute_dashboard_stats(self, company_id: int) -> Dict[str, int]:
+        now = datetime.utcnow()
+        today_start = datetime.combine(now.date(), datetime.min.time())
+        active_since = now - timedelta(days=30)
+
+        pdfs_today = select(func.count(ManualPDF.id)).join(
+            Manual, Manual.id == ManualPDF.manual_id
+        ).where(
+            Manual.company_id == company_id,
+            ManualPDF.created_at >= today_start
+        ).scalar_subquery()
+
+        translations_today = select(func.count(ManualTranslation.id)).join(
+            Manual, Manual.id == ManualTranslation.manual_id
+        ).where(
+            Manual.company_id == company_id,
+            ManualTranslation.created_at >= today_start
+        ).scalar_subquery()
+
+        stmt = select(
+            _count(User, User.company_id == company_id, User.is_active == True).label('total_users'),
+            _count(
+                User,
+                User.company_id == company_id,
+                User.is_active == True,
+                User.last_login >= active_since
+            ).label('active_users'),
+            _count(Manual, Manual.company_id == company_id).label('total_manuals'),
+            _count(
+                ManualTemplate,
+                or_(ManualTemplate.company_id == company_id, ManualTemplate.company_id == None),
+                ManualTemplate.is_active == True
+            ).label('total_templates'),
+            _count(
+                Manual,
+                Manual.company_id == company_id,
+                Manual.created_at >= today_start
+            ).label('manuals_today'),
+            _count(
+                ReferenceMaterial,
+                ReferenceMaterial.company_id == company_id,
+                ReferenceMaterial.uploaded_at >= today_start
+            ).label('materials_today'),
+            pdfs_today.label('pdfs_today'),
+            translations_today.label('translations_today'),
+        )
+
+        row = db.session.execute(stmt).one()
+        return {key: int(value or 0) for key, value in row._mapping.items()}
+
+    def get_company_summary(self, company_id: int) -> Dict[str, Any]:
+        """
+        Get storage and usage summary for a company.
+
+        Args:
+            company_id: Company ID (tenant isolation)
+
+        Returns:
+            Dict with users_count, files_count, manuals_count, storage_used_mb,
+            last_activity (ISO string or None)
+        """
+        return self._cached(f"summary:{company_id}", lambda: self._compute_company_summary(company_id))
+
+    def _compute_company_summary(self, company_id: int) -> Dict[str, Any]:
+        stmt = select(
+            _count(User, User.company_id == company_id, User.is_active == True).label('users_count'),
+            _count(UploadedFile, UploadedFile.company_id == company_id).label('files_count'),
+            _count(Manual, Manual.company_id == company_id).label('manuals_count'),
+            select(func.coalesce(func.sum(UploadedFile.file_size), 0)).where(
+                UploadedFile.company_id == company_id
+            ).scalar_subquery().label('storage_bytes'),
+            select(func.max(Manual.created_at)).where(
+                Manual.company_id == company_id
+            ).scalar_subquery().label('last_activity'),
+        )
+
+        row = db.session.execute(stmt).one()
+        last_activity = row.last_activity
+        return {
+            'users_count': int(row.users_count or 0),
+            'files_count': int(row.files_count or 0),
+            'manuals_count': int(row.manuals_count or 0),
+            'storage_used_mb': round(int(row.storage_bytes or 0) / (1024 ** 2), 2),
+            'last_activity': last_activity.isoformat() if last_activity else None
+        }
+
+    def get_media_stats(self, company_id: int) -> Dict[str, Any]:
+        """
+        Get media library counters for a company.
+
+        Args:
+            company_id: Company ID (tenant isolation)
+
+        Returns:
+            Dict with total_media, images, videos, total_size_mb
+        """
+        return self._cached(f"media:{company_id}", lambda: self._compute_media_stats(company_id))
+
+    def _compute_media_stats(self, company_id: int) -> Dict[str, Any]:
+        stmt = select(
+            func.count(Media.id).label('total_media'),
+            func.coalesce(func.sum(case((Media.media_type == 'image', 1), else_=0)), 0).label('images'),
+            func.coalesce(func.sum(case((Media.media_type == 'video', 1), else_=0)), 0).label('videos'),
+            func.coalesce(func.sum(Media.file_size), 0).label('total_size_bytes'),
+        ).where(
+            Media.company_id == company_id,
+            Media.is_active == True
+        )
+
+        row = db.session.execute(stmt).one()
+        return {
+            'total_media': int(row.total_media or 0),
+            'images': int(row.images or 0),
+            'videos': int(row.videos or 0),
+            'total_size_mb': round(int(row.total_size_bytes or 0) / (1024 * 1024), 2)
+        }
+
+    def get_recent_activity(self, company_id: int, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Get recent activity with usernames resolved in the same query.
+
+        Activity rows are written on almost every request, so this list is only
+        cached for the TTL and is not invalidated by new log rows.
+
+        Args:
+            company_id: Company ID (tenant isolation)
+            limit: Maximum number of entries
+
+        Returns:
+            List of activity dicts ordered newest first
+        """
+        return self._cached(
+            f"activity:{company_id}:{limit}",
+            lambda: self._compute_recent_activity(company_id, limit)
+        )
+
+    def _compute_recent_activity(self, company_id: int, limit: int) -> List[Dict[str, Any]]:
+        stmt = select(
+            ActivityLog.id,
+            ActivityLog.user_id,
+            User.username,
+            ActivityLog.action_type,
+            ActivityLog.action_detail,
+            ActivityLog.resource_type,
+            ActivityLog.created_at,
+        ).outerjoin(
+            User, User.id == ActivityLog.user_id
+        ).where(
+            ActivityLog.company_id == company_id
+        ).order_by(
+            ActivityLog.created_at.desc()
+        ).limit(limit)
+
+        return [
+            {
+                'id': row.id,
+                'user_id': row.user_id,
+                'username': row.username if row.username else 'System',
+                'action_type': row.action_type,
+                'action_detail': row.action_detail or '',
+                'resource_type': row.resource_type or '',
+                'created_at': row.created_at.isoformat() if row.created_at else None
+            }
+            for row in db.session.execute(stmt)
+        ]
+
+
+company_stats_service = CompanyStatsService()
+
+
+# ----------------------------------------------------------------------
+# Write invalidation
+# ----------------------------------------------------------------------
+
+def _collect_company_id(session, obj) -> Optional[int]:
+    if isinstance(obj, _TRACKED_MODELS):
+        return getattr(obj, 'company_id', None)
+    if isinstance(obj, _MANUAL_CHILD_MODELS) and obj.manual_id is not None:
+        manual = session.identity_map.get(session.identity_key(Manual, obj.manual_id))
+        if manual is not None:
+            return manual.company_id
+        return session.connection().scalar(select(Manual.company_id).where(Manual.id == obj.manual_id))
+    return None
+
+
+register_commit_invalidator(
+    _TRACKED_MODELS + _MANUAL_CHILD_MODELS, _PENDING_KEY, company_stats_service.invalidate, _collect_company_id
+)
@@ -0,0 +1,186 @@
+"""
+File: content_store_service.py
+Purpose: Content-hash deduplication of uploaded files
+Main functionality: Resolve a freshly stored upload to a shared content-addressed object,
+                    moving first copies to their content path and dropping duplicates;
+                    reference release that deletes the object with its last reference
+Dependencies: SQLAlchemy, models, FileManager
+"""
+
+import os
+import logging
+from datetime import datetime
+from typing import Any, Dict
+
+from sqlalchemy.exc import IntegrityError
+
+from src.models.models import db, ContentBlob
+from src.infrastructure.file_manager import FileManager
+
+logger = logging.getLogger(__name__)
+
+
+class ContentStoreService:
+    """
+    Content-addressed storage for uploads.
+
+    An upload is first written under a unique name while its SHA-256 is
+    computed. deduplicate() then either:
+    - moves it to company_{id}/content/<sha[:2]>/<sha><ext> and registers
+      a ContentBlob (first copy), or
+    - deletes it and returns the existing object's path (duplicate)
+
+    ContentBlob.ref_count counts the uploads resolved to the object; code
+    that drops an upload's object calls release() instead of deleting it,
+    and the object is removed with its last reference.
+
+    The optimized MP4/HLS manifest of save_video_with_optimization is keyed
+    by the same hash (FileManager.get_derived_artifact/put_derived_artifact).
+    Transcoding-queue renditions and Gemini analysis results are not keyed
+    by content yet and are still produced per upload.
+
+    Attributes:
+        enabled: Deduplication switch (UPLOAD_DEDUP_ENABLED)
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv('UPLOAD_DEDUP_ENABLED', 'true').lower() == 'true'
+
+    @staticmethod
+    def content_path(company_id: int, sha256: str, extension: str) -> str:
+        """
+        Content-addressed storage path.
+
+        Args:
+            company_id: Owning company
+            sha256: Hex SHA-256 of the content
+            extension: File extension including the dot (may be empty)
+
+        Returns:
+            Storage path
+        """
+        return f"company_{company_id}/content/{sha256[:2]}/{sha256}{extension.lower()}"
+
+    def deduplicate(self, file_manager: FileManager, company_id: int, file_info: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Resolve a stored upload to its shared content object.
+
+        Args:
+            file_manager: FileManager that stored the upload
+            company_id: Owning company
+            file_info: Result of save_file/open_upload_stream().commit() (needs file_hash)
+
+        Returns:
+            file_info with file_path/filename/gcs_uri pointing at the shared object,
+            plus 'deduplicated' (True if an existing object was reused)
+        """
+        sha256 = file_info.get('file_hash')
+        if not self.enabled or not sha256 or not company_id:
+            return dict(file_info, deduplicated=False)
+
+        existing = ContentBlob.query.filter_by(company_id=company_id, sha256=sha256).first()
+        if existing and file_manager.file_exists(existing.file_path):
+            return self._reuse(file_manager, existing, file_info)
+
+        extension = os.path.splitext(file_info.get('filename') or '')[1]
+        target_path = self.content_path(company_id, sha256, extension)
+        if file_manager.move_file(file_info['file_path'], target_path):
+            stored_path = target_path
+        else:
+            # Keep the unique name; the blob row still enables later deduplication
+            stored_path = file_info['file_path']
+
+        try:
+            if existing:
+                # Row exists but its object is gone: adopt the new copy
+                existing.file_path = stored_path
+                existing.file_size = file_info.get('file_size')
+                existing.ref_count = (existing.ref_count or 0) + 1
+                existing.last_referenced_at = datetime.utcnow()
+            else:
+                db.session.add(ContentBlob(
+                    company_id=company_id,
+                    sha256=sha256,
+                    file_path=stored_path,
+                    file_size=file_info.get('file_size'),
+                    mime_type=file_info.get('content_type'),
+                    storage_type=file_info.get('storage_type')
+                ))
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent upload of the same content registered first
+            db.session.rollback()
+            winner = ContentBlob.query.filter_by(company_id=company_id, sha256=sha256).first()
+            return self._reuse(file_manager, winner, dict(file_info, file_path=stored_path))
+
+        logger.info(f"Stored new content {sha256[:12]} for company {company_id}: {stored_path}")
+        return self._with_path(file_manager, file_info, stored_path, deduplicated=False)
+
+    def release(self, file_manager: FileManager, company_id: int, file_path: str) -> bool:
+        """
+        Drop one reference to a content object.
+
+        The object and its ContentBlob row are deleted when the last
+        reference is released.
+
+        Args:
+            file_manager: FileManager holding the object
+            company_id: Owning company
+            file_path: Storage path recorded for the upload
+
+        Returns:
+            False if the path is not a content object (the caller deletes it itself)
+        """
+        blob = ContentBlob.query.filter_by(company_id=company_id, file_path=file_path).first()
+        if not blob:
+            return False
+
+        blob_id = blob.id
+        ContentBlob.query.filter(ContentBlob.id == blob_id, ContentBlob.ref_count > 0).update(
+            {ContentBlob.ref_count: ContentBlob.ref_count - 1}, synchronize_session=False
+        )
+        # Conditional delete: a concurrent deduplicate() that re-referenced the
+        # object in between keeps the row (and object) alive
+        deleted = ContentBlob.query.filter(ContentBlob.id == blob_id, ContentBlob.ref_count <= 0).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+        db.session.expire(blob)
+
+        if deleted:
+            file_manager.delete_file(file_path)
+            logger.info(f"Released last reference to {file_path}; object deleted")
+        return True
+
+    def _reuse(self, file_manager: FileManager, blob: ContentBlob, file_info: Dict[str, Any]) -> Dict[str, Any]:
+        # Atomic increment; a row removed by a concurrent release() makes this
+        # copy the new shared object instead
+        referenced = ContentBlob.query.filter_by(id=blob.id).update({
+            ContentBlob.ref_count: ContentBlob.ref_count + 1,
+            ContentBlob.last_referenced_at: datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+        if not referenced:
+            db.session.expunge(blob)
+            return self.deduplicate(file_manager, blob.company_id, file_info)
+
+        if file_info['file_path'] != blob.file_path:
+            file_manager.delete_file(file_info['file_path'])
+        logger.info(f"Duplicate upload of {blob.sha256[:12]} resolved to {blob.file_path}")
+        return self._with_path(file_manager, file_info, blob.file_path, deduplicated=True)
+
+    @staticmethod
+    def _with_path(file_manager: FileManager, file_info: Dict[str, Any], path: str,
+                   deduplicated: bool) -> Dict[str, Any]:
+        result = dict(file_info)
+        result['file_path'] = path
+        result['filename'] = os.path.basename(path)
+        result['deduplicated'] = deduplicated
+        if result.get('storage_type') == 'gcs':
+            result['gcs_uri'] = file_manager.get_storage_uri(path)
+        elif 'full_path' in result:
+            result['full_path'] = file_manager.get_storage_uri(path)
+        return result
+
+
+content_store_service = ContentStoreService()
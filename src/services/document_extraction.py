@@ -0,0 +1,250 @@
+"""
+File: document_extraction.py
+Purpose: Parallel text extraction for reference materials
+Main functionality: PDF page-range sharding across a process pool with a PyPDF2 fast path for
+                    clean text layers and per-page pdfplumber/PyPDF2 fallback; per-sheet XLSX
+                    extraction; pages/sec metrics
+Dependencies: PyPDF2, pdfplumber, openpyxl, concurrent.futures
+
+Kept free of application imports so pool workers (spawned on Windows) start quickly.
+"""
+
+import os
+import re
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import PyPDF2
+import pdfplumber
+from openpyxl import load_workbook
+
+logger = logging.getLogger(__name__)
+
+# Control characters other than tab/newline/carriage return signal a broken text layer
+_CONTROL_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_LATIN_LETTERS = re.compile(r'[A-Za-z]')
+
+ProgressCallback = Callable[[int, int, float], None]
+
+
+def is_clean_text_layer(text: Optional[str]) -> bool:
+    """
+    Heuristic: can PyPDF2's text for a page be used as is?
+
+    Rejects empty/very short pages, unmapped glyphs ((cid:N), U+FFFD),
+    control characters, one-glyph-per-line output (vertical or scattered
+    layout) and Latin text with missing word spaces. Those pages go through
+    pdfplumber's layout analysis instead.
+    """
+    if not text or len(text.strip()) < 20:
+        return False
+    if '(cid:' in text or '\ufffd' in text or _CONTROL_CHARS.search(text):
+        return False
+
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines or sum(len(line.strip()) for line in lines) / len(lines) < 3:
+        return False
+
+    latin = len(_LATIN_LETTERS.findall(text))
+    if latin > len(text) * 0.5 and text.count(' ') < len(text) * 0.05:
+        return False
+
+    return True
+
+
+def extract_pdf_page_range(file_path: str, start: int, end: int, fast_path: bool = True) -> List[Dict[str, Any]]:
+    """
+    Extract pages start..end (1-based, inclusive) of a PDF
+
+    Runs inside a pool worker. Each page is handled on its own: PyPDF2 text
+    if the fast path accepts it, otherwise pdfplumber, otherwise PyPDF2's
+    text as a last resort, so one bad page never discards the others.
+
+    Returns:
+        List of {'page', 'text', 'method'}; method is 'pypdf2_fast',
+        'pdfplumber', 'pypdf2_fallback' or 'failed'
+    """
+    results = []
+    with open(file_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        plumber = None
+        try:
+            for page_num in range(start, end + 1):
+                quick_text = None
+                try:
+                    quick_text = reader.pages[page_num - 1].extract_text()
+                except Exception:
+                    pass
+
+                if fast_path and is_clean_text_layer(quick_text):
+                    results.append({'page': page_num, 'text': quick_text, 'method': 'pypdf2_fast'})
+                    continue
+
+                try:
+                    if plumber is None:
+                        plumber = pdfplumber.open(file_path)
+                    text = plumber.pages[page_num - 1].extract_text()
+                    results.append({'page': page_num, 'text': text or '', 'method': 'pdfplumber'})
+                    # Drop cached layout objects; long shards otherwise grow without bound
+                    plumber.pages[page_num - 1].flush_cache()
+                except Exception as e:
+                    logger.warning(f"pdfplumber failed on page {page_num}, using PyPDF2: {e}")
+                    results.append({
+                        'page': page_num,
+                        'text': quick_text or '',
+                        'method': 'pypdf2_fallback' if quick_text else 'failed'
+                    })
+        finally:
+            if plumber is not None:
+                plumber.close()
+    return results
+
+
+def extract_xlsx_sheet(file_path: str, sheet_name: str) -> str:
+    """Rows of one worksheet as ' | '-joined lines (read-only streaming mode)"""
+    workbook = load_workbook(file_path, data_only=True, read_only=True)
+    try:
+        lines = []
+        for row in workbook[sheet_name].iter_rows(values_only=True):
+            row_text = ' | '.join(str(cell) if cell is not None else '' for cell in row)
+            if row_text.strip():
+                lines.append(row_text)
+        return '\n'.join(lines)
+    finally:
+        workbook.close()
+
+
+class ParallelExtractor:
+    """
+    Shards extraction work across a process pool
+
+    Falls back to in-process extraction when the document is small, when
+    only one worker is configured, or when the current process may not
+    fork children (daemonic pool workers, e.g. Celery prefork).
+
+    Attributes:
+        workers: Pool size (RAG_EXTRACT_WORKERS, default: CPU count)
+        shard_pages: Pages per PDF shard (RAG_EXTRACT_SHARD_PAGES)
+        fast_path: Use PyPDF2 text for clean pages (RAG_PDF_FAST_PATH)
+    """
+
+    def __init__(self, workers: int = None, shard_pages: int = None, fast_path: bool = None):
+        self.workers = workers or int(os.getenv('RAG_EXTRACT_WORKERS', '0')) or os.cpu_count() or 1
+        self.shard_pages = shard_pages or int(os.getenv('RAG_EXTRACT_SHARD_PAGES', '25'))
+        self.fast_path = fast_path if fast_path is not None else \
+            os.getenv('RAG_PDF_FAST_PATH', 'true').lower() == 'true'
+
+    def _can_use_pool(self, task_count: int) -> bool:
+        return self.workers > 1 and task_count > 1 and not multiprocessing.current_process().daemon
+
+    def extract_pdf(self, file_path: str, on_progress: ProgressCallback = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Extract every page of a PDF
+
+        Args:
+            file_path: Local PDF path
+            on_progress: Called with (pages_done, total_pages, pages_per_sec) as shards finish
+
+        Returns:
+            Tuple of (pages in page order, metrics)
+        """
+        started = time.perf_counter()
+        with open(file_path, 'rb') as f:
+            total_pages = len(PyPDF2.PdfReader(f).pages)
+
+        shards = [
+            (start, min(start + self.shard_pages - 1, total_pages))
+            for start in range(1, total_pages + 1, self.shard_pages)
+        ]
+
+        pages: List[Dict[str, Any]] = []
+
+        def record(shard_pages):
+            pages.extend(shard_pages)
+            if on_progress:
+                elapsed = time.perf_counter() - started
+                on_progress(len(pages), total_pages, len(pages) / elapsed if elapsed > 0 else 0.0)
+
+        pending = list(shards)
+        workers_used = 1
+        if self._can_use_pool(len(shards)):
+            workers_used = min(self.workers, len(shards))
+            try:
+                with ProcessPoolExecutor(max_workers=workers_used) as pool:
+                    futures = {
+                        pool.submit(extract_pdf_page_range, file_path, start, end, self.fast_path): (start, end)
+                        for start, end in shards
+                    }
+                    for future in as_completed(futures):
+                        try:
+                            shard_result = future.result()
+                        except Exception as e:
+                            logger.warning(f"Shard {futures[future]} failed in pool, retrying in-process: {e}")
+                            continue
+                        pending.remove(futures[future])
+                        record(shard_result)
+            except Exception as e:
+                logger.warning(f"Process pool unavailable, extracting in-process: {e}")
+
+        # Small documents, no pool, or shards whose worker died
+        for start, end in pending:
+            record(extract_pdf_page_range(file_path, start, end, self.fast_path))
+
+        pages.sort(key=lambda page: page['page'])
+        elapsed = time.perf_counter() - started
+
+        methods: Dict[str, int] = {}
+        for page in pages:
+            methods[page['method']] = methods.get(page['method'], 0) + 1
+
+        metrics = {
+            'pages': total_pages,
+            'method': 'parallel' if workers_used > 1 else 'sequential',
+            'page_methods': methods,
+            'workers': workers_used,
+            'elapsed_seconds': round(elapsed, 2),
+            'pages_per_sec': round(total_pages / elapsed, 2) if elapsed > 0 else None
+        }
+        return pages, metrics
+
+    def extract_xlsx(self, file_path: str) -> Tuple[List[Tuple[str, str]], Dict[str, Any]]:
+        """
+        Extract every worksheet, one sheet per pool task
+
+        Returns:
+            Tuple of ([(sheet_name, text)] in workbook order, metrics)
+        """
+        started = time.perf_counter()
+        workbook = load_workbook(file_path, read_only=True)
+        sheet_names = list(workbook.sheetnames)
+        workbook.close()
+
+        texts: Dict[str, str] = {}
+        workers_used = 1
+        if self._can_use_pool(len(sheet_names)):
+            workers_used = min(self.workers, len(sheet_names))
+            try:
+                with ProcessPoolExecutor(max_workers=workers_used) as pool:
+                    futures = {pool.submit(extract_xlsx_sheet, file_path, name): name for name in sheet_names}
+                    for future in as_completed(futures):
+                        try:
+                            texts[futures[future]] = future.result()
+                        except Exception as e:
+                            logger.warning(f"Sheet {futures[future]} failed in pool, retrying in-process: {e}")
+            except Exception as e:
+                logger.warning(f"Process pool unavailable, extracting in-process: {e}")
+
+        for name in sheet_names:
+            if name not in texts:
+                texts[name] = extract_xlsx_sheet(file_path, name)
+
+        elapsed = time.perf_counter() - started
+        metrics = {
+            'sheets': len(sheet_names),
+            'workers': workers_used,
+            'elapsed_seconds': round(elapsed, 2)
+        }
+        return [(name, texts[name]) for name in sheet_names], metrics
@@ -5,23 +5,34 @@ Main functionality: Index management, vector search, hybrid search with company
 Dependencies: elasticsearch, typing
 """
 
-from elasticsearch import Elasticsearch, NotFoundError
-from typing import List, Dict, Any, Optional
+from elasticsearch import Elasticsearch, NotFoundError, helpers
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple, Union
 import os
 import json
 
+from src.services.es_index_layout import IndexLayoutManager
+from src.services.retrieval_backend import RetrievalBackend, reciprocal_rank_fusion
 
-class ElasticSearchService:
+
+class ElasticSearchService(RetrievalBackend):
     """
     ElasticSearch service for RAG system
     
     Features:
     - Vector similarity search using dense_vector
     - Hybrid search (vector + BM25 keyword)
-    - Company data isolation via company_id filtering
+    - Company data isolation via company_id filtering, with documents
+      routed by company_id so a tenant's queries hit a single shard
+    - Soft-deleted materials are filtered out of searches while their
+      documents are removed by a background delete_by_query task
+    - index_name is an alias over a versioned index, so the index can be
+      rebuilt from stored embeddings and swapped in without downtime;
+      large tenants live in dedicated indices (see IndexLayoutManager)
     """
     
-    def __init__(self):
+    name = 'elasticsearch'
+    
+    def __init__(self, index_name: str = 'reference_chunks'):
         self.es_url = os.getenv('ELASTICSEARCH_URL', 'http://localhost:9200')
         self.es_username = os.getenv('ELASTICSEARCH_USERNAME', '')
         self.es_password = os.getenv('ELASTICSEARCH_PASSWORD', '')
@@ -36,73 +47,132 @@ class ElasticSearchService:
         else:
             self.client = Elasticsearch([self.es_url])
         
-        self.index_name = 'reference_chunks'
+        self.index_name = index_name  # Shared alias; large tenants get their own (see layout)
         self.embedding_dimension = 768  # Vertex AI text-embedding-004
+        self.bulk_chunk_size = int(os.getenv('RAG_BULK_CHUNK_SIZE', '500'))
+        self.layout = IndexLayoutManager(self.client, self.index_name, self.embedding_dimension)
+        
+        # kNN / hybrid search tuning
+        self.num_candidates = int(os.getenv('RAG_KNN_NUM_CANDIDATES', '100'))
+        self.hybrid_fusion = os.getenv('RAG_HYBRID_FUSION', 'client')  # client | server
+        self.rrf_rank_constant = int(os.getenv('RAG_RRF_RANK_CONSTANT', '60'))
+        self.rrf_window_size = int(os.getenv('RAG_RRF_WINDOW_SIZE', '50'))
+        
+        # Background deletes: delete_by_query slices ('auto' = one per shard)
+        self.delete_slices = os.getenv('RAG_DELETE_SLICES', 'auto')
+    
+    def index_for_company(self, company_id: int) -> str:
+        """Alias holding company_id's chunks (shared alias or the tenant's dedicated alias)"""
+        return self.layout.alias_for(company_id)
     
     def create_index(self) -> bool:
         """
-        Create ElasticSearch index for reference chunks
+        Create the shared reference chunk index behind the index_name alias if neither exists
         
-        Index structure:
-        - chunk_id: Integer (reference_chunks.id)
-        - material_id: Integer
-        - company_id: Integer (for tenant isolation)
-        - chunk_text: Text (analyzed)
-        - chunk_index: Integer
-        - embedding: Dense vector (768 dimensions)
-        - metadata: Object (page number, section, etc.)
-        - created_at: Date
+        Returns:
+            True if the index (or alias) exists afterwards
         """
         try:
             if self.client.indices.exists(index=self.index_name):
                 print(f"Index '{self.index_name}' already exists")
                 return True
             
-            index_mapping = {
-                "settings": {
-                    "number_of_shards": 1,
-                    "number_of_replicas": 1,
-                    "analysis": {
-                        "analyzer": {
-                            "default": {
-                                "type": "standard"
-                            }
-                        }
-                    }
-                },
-                "mappings": {
-                    "properties": {
-                        "chunk_id": {"type": "integer"},
-                        "material_id": {"type": "integer"},
-                        "company_id": {"type": "integer"},
-                        "chunk_text": {
-                            "type": "text",
-                            "analyzer": "standard",
-                            "fields": {
-                                "keyword": {"type": "keyword"}
-                            }
-                        },
-                        "chunk_index": {"type": "integer"},
-                        "embedding": {
-                            "type": "dense_vector",
-                            "dims": self.embedding_dimension,
-                            "index": True,
-                            "similarity": "cosine"
-                        },
-                        "metadata": {"type": "object", "enabled": True},
-                        "created_at": {"type": "date"}
-                    }
-                }
-            }
-            
-            self.client.indices.create(index=self.index_name, body=index_mapping)
-            print(f"Created index '{self.index_name}'")
+            versioned_name = self.layout.create_index()
+            self.layout.swap({self.index_name: versioned_name})
+            print(f"Created index '{versioned_name}' with alias '{self.index_name}'")
             return True
         
         except Exception as e:
             print(f"Failed to create index: {e}")
             return False
     
+    def create_versioned_index(self, bulk_load: bool = False, company_id: Optional[int] = None) -> str:
+        """
+        Create a new, empty index with the current mapping version
+        
+        Args:
+            bulk_load: Disable refresh and replicas while the index is filled;
+                swap_aliases restores them before the index goes live
+            company_id: Create a dedicated index for this tenant instead of a shared one
+        
+        Returns:
+            Name of the created index
+        """
+        return self.layout.create_index(company_id=company_id, bulk_load=bulk_load)
+    
+    def alias_targets(self, alias: str = None) -> List[str]:
+        """Concrete indices currently behind alias (default: index_name)"""
+        return self.layout.alias_targets(alias or self.index_name)
+    
+    def swap_aliases(self, targets: Dict[str, str], delete_old: bool = False) -> Dict[str, List[str]]:
+        """
+        Bring freshly loaded indices live and point their aliases at them in one atomic action
+        
+        Args:
+            targets: alias -> fully loaded index
+            delete_old: Delete the previous indices after the swap
+        
+        Returns:
+            alias -> indices it pointed to before
+        """
+        for new_index in targets.values():
+            self.layout.finalize_index(new_index)
+        
+        previous = self.layout.swap(targets)
+        
+        if delete_old:
+            for alias, old_indices in previous.items():
+                for old_index in old_indices:
+                    if old_index != alias:
+                        self.client.indices.delete(index=old_index, ignore_unavailable=True)
+        return previous
+    
+    def swap_alias(self, new_index: str, delete_old: bool = False) -> List[str]:
+        """Point index_name at new_index (see swap_aliases); returns the previous indices"""
+        return self.swap_aliases({self.index_name: new_index}, delete_old=delete_old)[self.index_name]
+    
+    def bulk_index_chunks(self, documents: Iterable[Dict[str, Any]],
+                          index: Union[str, Callable[[int], str], None] = None) -> Dict[str, int]:
+        """
+        Stream chunk documents into an index with the bulk API
+        
+        Documents are consumed lazily, so callers can pass a generator over
+        the database without holding every embedding in memory. Each
+        document is routed by its company_id.
+        
+        Args:
+            documents: Documents from build_chunk_document
+            index: Target index, or a function company_id -> index
+                (default: the company's alias)
+        
+        Returns:
+            Dict with indexed and failed counts
+        """
+        resolve = index if callable(index) else (lambda company_id: index or self.index_for_company(company_id))
+        actions = (
+            {
+                "_op_type": "index",
+                "_index": resolve(doc['company_id']),
+                "_id": f"chunk_{doc['chunk_id']}",
+                "_routing": self.layout.routing(doc['company_id']),
+                "_source": doc
+            }
+            for doc in documents
+        )
+        
+        indexed = 0
+        failed = 0
+        for ok, item in helpers.streaming_bulk(
+            self.client, actions, chunk_size=self.bulk_chunk_size,
+            raise_on_error=False, max_retries=3
+        ):
+            if ok:
+                indexed += 1
+            else:
+                failed += 1
+                print(f"Bulk index failed: {item}")
+        return {'indexed': indexed, 'failed': failed}
+    
     def index_chunk(self, chunk_id: int, material_id: int, company_id: int,
                    chunk_text: str, chunk_index: int, embedding: List[float],
                    metadata: Optional[Dict[str, Any]] = None) -> str:
@@ -122,20 +192,14 @@ class ElasticSearchService:
             ElasticSearch document ID
         """
         try:
-            doc = {
-                "chunk_id": chunk_id,
-                "material_id": material_id,
-                "company_id": company_id,
-                "chunk_text": chunk_text,
-                "chunk_index": chunk_index,
-                "embedding": embedding,
-                "metadata": metadata or {},
-                "created_at": None  # Will be set by ElasticSearch
-            }
+            doc = self.build_chunk_document(
+                chunk_id, material_id, company_id, chunk_text, chunk_index, embedding, metadata
+            )
             
             response = self.client.index(
-                index=self.index_name,
+                index=self.index_for_company(company_id),
                 id=f"chunk_{chunk_id}",
+                routing=self.layout.routing(company_id),
                 document=doc
             )
             
@@ -144,8 +208,106 @@ class ElasticSearchService:
         except Exception as e:
             raise Exception(f"Failed to index chunk: {str(e)}")
     
+    def bulk_update_chunks(self, updates: Dict[int, Dict[str, Any]], company_id: int,
+                           index: str = None) -> Dict[str, int]:
+        """
+        Partially update documents (e.g. chunk_index/metadata) without resending embeddings
+        
+        Args:
+            updates: chunk_id -> fields to overwrite
+            company_id: Owner of the chunks (routing)
+            index: Target index (default: the company's alias)
+        
+        Returns:
+            Dict with updated and failed counts
+        """
+        index = index or self.index_for_company(company_id)
+        routing = self.layout.routing(company_id)
+        actions = (
+            {"_op_type": "update", "_index": index, "_id": f"chunk_{chunk_id}", "_routing": routing, "doc": fields}
+            for chunk_id, fields in updates.items()
+        )
+        updated = 0
+        failed = 0
+        for ok, item in helpers.streaming_bulk(
+            self.client, actions, chunk_size=self.bulk_chunk_size, raise_on_error=False
+        ):
+            if ok:
+                updated += 1
+            else:
+                failed += 1
+                print(f"Bulk update failed: {item}")
+        return {'updated': updated, 'failed': failed}
+    
+    def bulk_delete_chunks(self, chunk_ids: List[int], company_id: int, index: str = None) -> int:
+        """
+        Delete documents by chunk id with the bulk API (no delete_by_query scan)
+        
+        Args:
+            chunk_ids: ReferenceChunk ids
+            company_id: Owner of the chunks (routing)
+            index: Target index (default: the company's alias)
+        
+        Returns:
+            Number of deleted documents (already missing documents are not counted)
+        """
+        index = index or self.index_for_company(company_id)
+        routing = self.layout.routing(company_id)
+        actions = (
+            {"_op_type": "delete", "_index": index, "_id": f"chunk_{chunk_id}", "_routing": routing}
+            for chunk_id in chunk_ids
+        )
+        deleted = 0
+        for ok, item in helpers.streaming_bulk(
+            self.client, actions, chunk_size=self.bulk_chunk_size,
+            raise_on_error=False, raise_on_exception=False
+        ):
+            if ok:
+                deleted += 1
+        return deleted
+    
+    def _company_filter(self, company_id: int,
+                        exclude_material_ids: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+        """Filter clauses restricting a query to one tenant's chunks, minus soft-deleted materials"""
+        clauses = [{"term": {"company_id": company_id}}]
+        if exclude_material_ids:
+            clauses.append({"bool": {"must_not": [{"terms": {"material_id": list(exclude_material_ids)}}]}})
+        return clauses
+    
+    def _knn_clause(self, query_embedding: List[float], company_id: int, k: int,
+                    num_candidates: Optional[int] = None,
+                    exclude_material_ids: Optional[Sequence[int]] = None) -> Dict[str, Any]:
+        """
+        kNN clause with the tenant filter applied inside the HNSW search
+        
+        A filter inside knn is evaluated during graph traversal, so all
+        num_candidates are spent on the tenant's own vectors (a filter
+        outside knn would cut the k results afterwards).
+        """
+        num_candidates = num_candidates or self.num_candidates
+        return {
+            "field": "embedding",
+            "query_vector": query_embedding,
+            "k": k,
+            "num_candidates": min(max(num_candidates, k), 10000),
+            "filter": self._company_filter(company_id, exclude_material_ids)
+        }
+    
+    @staticmethod
+    def _hit_to_result(hit: Dict[str, Any], score: float) -> Dict[str, Any]:
+        return {
+            'chunk_id': hit['_source']['chunk_id'],
+            'material_id': hit['_source']['material_id'],
+            'chunk_text': hit['_source']['chunk_text'],
+            'chunk_index': hit['_source']['chunk_index'],
+            'metadata': hit['_source'].get('metadata', {}),
+            'score': score
+        }
+    
     def vector_search(self, query_embedding: List[float], company_id: int,
-                     top_k: int = 10, min_score: float = 0.7) -> List[Dict[str, Any]]:
+                     top_k: int = 10, min_score: float = 0.7,
+                     num_candidates: Optional[int] = None,
+                     exclude_material_ids: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
         """
         Perform vector similarity search
         
@@ -154,120 +316,141 @@ class ElasticSearchService:
             company_id: Company ID for filtering
             top_k: Number of results to return
             min_score: Minimum similarity score (0-1)
+            num_candidates: HNSW candidates per shard (default: RAG_KNN_NUM_CANDIDATES)
+            exclude_material_ids: Soft-deleted materials whose documents may still be indexed
         
         Returns:
             List of matching chunks with scores
         """
         try:
             query = {
-                "knn": {
-                    "field": "embedding",
-                    "query_vector": query_embedding,
-                    "k": top_k,
-                    "num_candidates": top_k * 10,
-                    "filter": {
-                        "term": {"company_id": company_id}
-                    }
-                },
+                "knn": self._knn_clause(query_embedding, company_id, top_k, num_candidates, exclude_material_ids),
                 "_source": ["chunk_id", "material_id", "chunk_text", "chunk_index", "metadata"]
             }
             
             response = self.client.search(
-                index=self.index_name,
+                index=self.index_for_company(company_id),
+                routing=self.layout.routing(company_id),
                 body=query,
                 size=top_k
             )
             
-            results = []
-            for hit in response['hits']['hits']:
-                score = hit['_score']
-                if score >= min_score:
-                    results.append({
-                        'chunk_id': hit['_source']['chunk_id'],
-                        'material_id': hit['_source']['material_id'],
-                        'chunk_text': hit['_source']['chunk_text'],
-                        'chunk_index': hit['_source']['chunk_index'],
-                        'metadata': hit['_source'].get('metadata', {}),
-                        'score': score
-                    })
-            
-            return results
+            return [
+                self._hit_to_result(hit, hit['_score'])
+                for hit in response['hits']['hits']
+                if hit['_score'] >= min_score
+            ]
         
         except Exception as e:
             raise Exception(f"Vector search failed: {str(e)}")
     
     def hybrid_search(self, query_text: str, query_embedding: List[float],
                      company_id: int, top_k: int = 10,
-                     vector_weight: float = 0.7) -> List[Dict[str, Any]]:
+                     vector_weight: float = 0.5, num_candidates: Optional[int] = None,
+                     fusion: Optional[str] = None,
+                     exclude_material_ids: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
         """
-        Hybrid search combining vector similarity and BM25 keyword search
+        Hybrid search fusing BM25 keyword and kNN vector rankings with reciprocal rank fusion
+        
+        Both retrievers are restricted to the tenant (the kNN one through its
+        pre-filter). Rankings are fused instead of raw scores, so BM25 and
+        cosine scales never need to be balanced:
+        score = sum(weight / (rank_constant + rank)) over the lists a chunk appears in.
         
         Args:
             query_text: Query text for keyword search
             query_embedding: Query vector for semantic search
             company_id: Company ID for filtering
             top_k: Number of results to return
-            vector_weight: Weight for vector score (0-1), keyword weight = 1 - vector_weight
+            vector_weight: Share of the vector ranking in the fusion (0-1, 0.5 = plain RRF);
+                ignored by server-side fusion
+            num_candidates: HNSW candidates per shard (default: RAG_KNN_NUM_CANDIDATES)
+            fusion: 'client' (msearch + fusion here, any license) or 'server'
+                (rrf retriever, ElasticSearch 8.16+ with a license that includes RRF);
+                default: RAG_HYBRID_FUSION
+            exclude_material_ids: Soft-deleted materials whose documents may still be indexed
         
         Returns:
-            List of matching chunks with combined scores
+            List of matching chunks with RRF scores, best first
         """
         try:
-            keyword_weight = 1.0 - vector_weight
+            fusion = fusion or self.hybrid_fusion
+            window = max(self.rrf_window_size, top_k)
+            index = self.index_for_company(company_id)
+            routing = self.layout.routing(company_id)
+            source = ["chunk_id", "material_id", "chunk_text", "chunk_index", "metadata"]
+            keyword_query = {
+                "bool": {
+                    "filter": self._company_filter(company_id, exclude_material_ids),
+                    "must": [
+                        {"match": {"chunk_text": query_text}}
+                    ]
+                }
+            }
+            knn = self._knn_clause(query_embedding, company_id, window, num_candidates, exclude_material_ids)
             
-            query = {
-                "query": {
-                    "bool": {
-                        "must": [
-                            {"term": {"company_id": company_id}}
-                        ],
-                        "should": [
-                            {
-                                "multi_match": {
-                                    "query": query_text,
-                                    "fields": ["chunk_text"],
-                                    "type": "best_fields",
-                                    "boost": keyword_weight
-                                }
+            if fusion == 'server':
+                response = self.client.search(
+                    index=index,
+                    routing=routing,
+                    body={
+                        "retriever": {
+                            "rrf": {
+                                "retrievers": [
+                                    {"standard": {"query": keyword_query}},
+                                    {"knn": knn}
+                                ],
+                                "rank_constant": self.rrf_rank_constant,
+                                "rank_window_size": window
                             }
-                        ]
+                        },
+                        "_source": source,
+                        "size": top_k
                     }
-                },
-                "knn": {
-                    "field": "embedding",
-                    "query_vector": query_embedding,
-                    "k": top_k,
-                    "num_candidates": top_k * 10,
-                    "boost": vector_weight
-                },
-                "_source": ["chunk_id", "material_id", "chunk_text", "chunk_index", "metadata"],
-                "size": top_k
-            }
+                )
+                return [self._hit_to_result(hit, hit['_score']) for hit in response['hits']['hits']]
             
-            response = self.client.search(
-                index=self.index_name,
-                body=query
-            )
+            header = {"index": index, "routing": routing}
+            response = self.client.msearch(searches=[
+                header, {"query": keyword_query, "_source": source, "size": window},
+                header, {"knn": knn, "_source": source, "size": window}
+            ])
             
-            results = []
-            for hit in response['hits']['hits']:
-                results.append({
-                    'chunk_id': hit['_source']['chunk_id'],
-                    'material_id': hit['_source']['material_id'],
-                    'chunk_text': hit['_source']['chunk_text'],
-                    'chunk_index': hit['_source']['chunk_index'],
-                    'metadata': hit['_source'].get('metadata', {}),
-                    'score': hit['_score']
-                })
+            rankings = []
+            for result in response['responses']:
+                if 'error' in result:
+                    raise Exception(result['error'])
+                rankings.append([(hit['_source']['chunk_id'], hit) for hit in result['hits']['hits']])
             
-            return results
+            fused = reciprocal_rank_fusion(
+                rankings, (1.0 - vector_weight, vector_weight), self.rrf_rank_constant, top_k
+            )
+            return [self._hit_to_result(hit, score) for hit, score in fused]
         
         except Exception as e:
             raise Exception(f"Hybrid search failed: {str(e)}")
     
+    @staticmethod
+    def _material_query(material_id: int, company_id: int,
+                        keep_chunk_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+        """Query matching a material's documents (optionally all but keep_chunk_ids)"""
+        query = {
+            "bool": {
+                "must": [
+                    {"term": {"material_id": material_id}},
+                    {"term": {"company_id": company_id}}
+                ]
+            }
+        }
+        if keep_chunk_ids is not None:
+            query["bool"]["must_not"] = [{"terms": {"chunk_id": keep_chunk_ids}}]
+        return {"query": query}
+    
     def delete_material_chunks(self, material_id: int, company_id: int) -> int:
         """
-        Delete all chunks for a material
+        Delete all chunks for a material and wait for the deletion
+        
+        Request paths should use start_delete_material_chunks instead.
         
         Args:
             material_id: Material ID
@@ -277,20 +460,10 @@ class ElasticSearchService:
             Number of deleted documents
         """
         try:
-            query = {
-                "query": {
-                    "bool": {
-                        "must": [
-                            {"term": {"material_id": material_id}},
-                            {"term": {"company_id": company_id}}
-                        ]
-                    }
-                }
-            }
-            
             response = self.client.delete_by_query(
-                index=self.index_name,
-                body=query
+                index=self.index_for_company(company_id),
+                routing=self.layout.routing(company_id),
+                body=self._material_query(material_id, company_id)
             )
             
             return response.get('deleted', 0)
@@ -300,6 +473,115 @@ class ElasticSearchService:
         except Exception as e:
             raise Exception(f"Failed to delete chunks: {str(e)}")
     
+    def delete_stale_material_chunks(self, material_id: int, company_id: int,
+                                     keep_chunk_ids: List[int]) -> int:
+        """
+        Delete a material's documents whose chunk_id is not in keep_chunk_ids
+        
+        Args:
+            material_id: Material ID
+            company_id: Company ID (for safety)
+            keep_chunk_ids: Current ReferenceChunk ids of the material
+        
+        Returns:
+            Number of deleted documents
+        """
+        try:
+            response = self.client.delete_by_query(
+                index=self.index_for_company(company_id),
+                routing=self.layout.routing(company_id),
+                body=self._material_query(material_id, company_id, keep_chunk_ids),
+                conflicts='proceed'
+            )
+            
+            return response.get('deleted', 0)
+        
+        except NotFoundError:
+            return 0
+        except Exception as e:
+            raise Exception(f"Failed to delete stale chunks: {str(e)}")
+    
+    def start_delete_material_chunks(self, material_id: int, company_id: int,
+                                     keep_chunk_ids: Optional[List[int]] = None) -> Optional[str]:
+        """
+        Start a sliced delete_by_query for a material's documents and return immediately
+        
+        ElasticSearch runs the deletion as a task (sliced per shard, no
+        refresh); poll it with delete_task_status.
+        
+        Args:
+            material_id: Material ID
+            company_id: Company ID (for safety)
+            keep_chunk_ids: Keep these chunk ids (default: delete all of the material's documents)
+        
+        Returns:
+            ElasticSearch task id, or None if the index does not exist
+        """
+        try:
+            response = self.client.delete_by_query(
+                index=self.index_for_company(company_id),
+                routing=self.layout.routing(company_id),
+                body=self._material_query(material_id, company_id, keep_chunk_ids),
+                conflicts='proceed',
+                slices=self.delete_slices,
+                wait_for_completion=False
+            )
+            return response['task']
+        
+        except NotFoundError:
+            return None
+        except Exception as e:
+            raise Exception(f"Failed to start chunk deletion: {str(e)}")
+    
+    def delete_task_status(self, task_id: str) -> Dict[str, Any]:
+        """
+        Progress of a delete_by_query task started by start_delete_material_chunks
+        
+        Args:
+            task_id: ElasticSearch task id ("node:number")
+        
+        Returns:
+            Dict with completed, deleted, total, failures (count) and error
+        """
+        try:
+            response = self.client.tasks.get(task_id=task_id)
+        except NotFoundError:
+            # Finished and no longer recorded
+            return {'completed': True, 'deleted': 0, 'total': 0, 'failures': 0, 'error': None}
+        
+        status = response.get('response') or response.get('task', {}).get('status', {})
+        error = response.get('error')
+        return {
+            'completed': bool(response.get('completed')),
+            'deleted': status.get('deleted', 0),
+            'total': status.get('total', 0),
+            'failures': len(status.get('failures', [])) + (1 if error else 0),
+            'error': error
+        }
+    
+    def iter_company_documents(self, company_id: int) -> Iterator[Tuple[int, int]]:
+        """
+        Scroll through every document of a company
+        
+        Args:
+            company_id: Company ID
+        
+        Yields:
+            (chunk_id, material_id)
+        """
+        try:
+            for hit in helpers.scan(
+                self.client,
+                index=self.index_for_company(company_id),
+                routing=self.layout.routing(company_id),
+                query={"query": {"bool": {"filter": self._company_filter(company_id)}},
+                       "_source": ["chunk_id", "material_id"]},
+                size=self.bulk_chunk_size
+            ):
+                yield hit['_source']['chunk_id'], hit['_source']['material_id']
+        except NotFoundError:
+            return
+    
     def get_material_chunk_count(self, material_id: int, company_id: int) -> int:
         """
         Get number of indexed chunks for a material
@@ -324,7 +606,8 @@ class ElasticSearchService:
             }
             
             response = self.client.count(
-                index=self.index_name,
+                index=self.index_for_company(company_id),
+                routing=self.layout.routing(company_id),
                 body=query
             )
             
@@ -0,0 +1,277 @@
+"""
+File: es_index_layout.py
+Purpose: Physical layout of the RAG ElasticSearch indices
+Main functionality: Versioned index mappings (int8-quantized HNSW vectors), custom routing by
+                    company_id on the shared index, dedicated per-tenant indices above a size
+                    threshold, alias resolution and atomic alias swaps
+Dependencies: elasticsearch
+"""
+
+import os
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from elasticsearch import NotFoundError
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever index_body changes; stored in each index's _meta.
+# v1: single shard, float32 HNSW, no routing (original reference_chunks index)
+# v2: routed shared index + dedicated tenant indices, quantized vectors
+MAPPING_VERSION = 2
+
+
+class IndexLayoutManager:
+    """
+    Decides which index a company's chunks live in and how indices are built
+
+    Layout:
+    - <alias>                      shared index, documents routed by company_id
+                                   (_routing required), so a tenant's reads and
+                                   writes touch a single shard
+    - <alias>_c<company_id>        dedicated index for tenants with more than
+                                   dedicated_threshold chunks
+
+    Both names are aliases over versioned indices
+    (<alias>[_c<id>]_v<MAPPING_VERSION>_<timestamp>), so a new layout or
+    mapping is built next to the live one and swapped in atomically.
+
+    Dedicated aliases are looked up from the cluster and cached for
+    cache_seconds; a tenant moved to its own index by a rebuild is picked
+    up by other processes within that time.
+
+    Attributes:
+        alias: Shared alias name
+        shards / replicas: Shared index shape (RAG_INDEX_SHARDS, RAG_INDEX_REPLICAS)
+        dedicated_shards: Shards per tenant index (RAG_DEDICATED_INDEX_SHARDS)
+        vector_index_type: dense_vector index_options.type (RAG_VECTOR_INDEX_TYPE,
+            'int8_hnsw' needs ElasticSearch 8.12+, use 'hnsw' on older clusters)
+        dedicated_threshold: Chunk count above which a tenant gets its own
+            index on the next rebuild (RAG_DEDICATED_INDEX_THRESHOLD)
+    """
+
+    def __init__(self, client, alias: str, embedding_dimension: int):
+        self.client = client
+        self.alias = alias
+        self.embedding_dimension = embedding_dimension
+        self.shards = int(os.getenv('RAG_INDEX_SHARDS', '3'))
+        self.replicas = int(os.getenv('RAG_INDEX_REPLICAS', '1'))
+        self.dedicated_shards = int(os.getenv('RAG_DEDICATED_INDEX_SHARDS', '1'))
+        self.vector_index_type = os.getenv('RAG_VECTOR_INDEX_TYPE', 'int8_hnsw')
+        self.dedicated_threshold = int(os.getenv('RAG_DEDICATED_INDEX_THRESHOLD', '200000'))
+        self.cache_seconds = float(os.getenv('RAG_LAYOUT_CACHE_SECONDS', '30'))
+
+        self._dedicated: Optional[Set[int]] = None
+        self._dedicated_loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Tenant resolution
+    # ------------------------------------------------------------------
+
+    def tenant_alias(self, company_id: int) -> str:
+        return f"{self.alias}_c{company_id}"
+
+    @staticmethod
+    def routing(company_id: int) -> str:
+        return str(company_id)
+
+    def dedicated_companies(self) -> Set[int]:
+        """Company ids that currently have a dedicated index alias"""
+        with self._lock:
+            if self._dedicated is not None and time.monotonic() - self._dedicated_loaded_at < self.cache_seconds:
+                return self._dedicated
+
+            prefix = f"{self.alias}_c"
+            companies = set()
+            try:
+                aliases = self.client.indices.get_alias(name=f"{prefix}*")
+                for index_aliases in aliases.values():
+                    for name in index_aliases.get('aliases', {}):
+                        suffix = name[len(prefix):]
+                        if name.startswith(prefix) and suffix.isdigit():
+                            companies.add(int(suffix))
+            except NotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Failed to load dedicated index aliases: {e}")
+                if self._dedicated is not None:
+                    return self._dedicated
+
+            self._dedicated = companies
+            self._dedicated_loaded_at = time.monotonic()
+            return companies
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._dedicated = None
+
+    def alias_for(self, company_id: int) -> str:
+        """Alias holding company_id's documents"""
+        if company_id in self.dedicated_companies():
+            return self.tenant_alias(company_id)
+        return self.alias
+
+    # ------------------------------------------------------------------
+    # Index construction
+    # ------------------------------------------------------------------
+
+    def index_body(self, dedicated: bool = False, bulk_load: bool = False) -> Dict[str, Any]:
+        """
+        Settings and mappings for a reference chunk index
+
+        Index structure:
+        - chunk_id: Integer (reference_chunks.id)
+        - material_id: Integer
+        - company_id: Integer (for tenant isolation)
+        - chunk_text: Text (analyzed)
+        - chunk_index: Integer
+        - embedding: Dense vector (768 dimensions, quantized HNSW)
+        - metadata: Object (page number, section, etc.)
+        - created_at: Date
+
+        Args:
+            dedicated: Single-tenant index (no required routing)
+            bulk_load: Disable refresh and replicas until finalize_index
+        """
+        settings = {
+            "number_of_shards": self.dedicated_shards if dedicated else self.shards,
+            "number_of_replicas": 0 if bulk_load else self.replicas,
+            "analysis": {
+                "analyzer": {
+                    "default": {
+                        "type": "standard"
+                    }
+                }
+            }
+        }
+        if bulk_load:
+            settings["refresh_interval"] = "-1"
+
+        mappings = {
+            "_meta": {
+                "mapping_version": MAPPING_VERSION,
+                "layout": "dedicated" if dedicated else "shared"
+            },
+            "properties": {
+                "chunk_id": {"type": "integer"},
+                "material_id": {"type": "integer"},
+                "company_id": {"type": "integer"},
+                "chunk_text": {
+                    "type": "text",
+                    "analyzer": "standard",
+                    "fields": {
+                        "keyword": {"type": "keyword"}
+                    }
+                },
+                "chunk_index": {"type": "integer"},
+                "embedding": {
+                    "type": "dense_vector",
+                    "dims": self.embedding_dimension,
+                    "index": True,
+                    "similarity": "cosine",
+                    "index_options": {"type": self.vector_index_type}
+                },
+                "metadata": {"type": "object", "enabled": True},
+                "created_at": {"type": "date"}
+            }
+        }
+        if not dedicated:
+            mappings["_routing"] = {"required": True}
+
+        return {"settings": settings, "mappings": mappings}
+
+    def create_index(self, company_id: Optional[int] = None, bulk_load: bool = False) -> str:
+        """
+        Create a new versioned index (not yet behind any alias)
+
+        Args:
+            company_id: Create a dedicated index for this tenant
+            bulk_load: See index_body
+
+        Returns:
+            Name of the created index
+        """
+        base = self.tenant_alias(company_id) if company_id is not None else self.alias
+        name = f"{base}_v{MAPPING_VERSION}_{datetime.utcnow().strftime('%Y%m%d%H%M%S%f')}"
+        self.client.indices.create(
+            index=name,
+            body=self.index_body(dedicated=company_id is not None, bulk_load=bulk_load)
+        )
+        return name
+
+    def finalize_index(self, name: str) -> None:
+        """Restore live refresh/replica settings after a bulk load and refresh"""
+        self.client.indices.put_settings(index=name, body={
+            "index": {
+                "refresh_interval": None,
+                "number_of_replicas": self.replicas
+            }
+        })
+        self.client.indices.refresh(index=name)
+
+    # ------------------------------------------------------------------
+    # Aliases
+    # ------------------------------------------------------------------
+
+    def alias_targets(self, alias: str) -> List[str]:
+        """Indices behind alias (the name itself for a legacy concrete index)"""
+        if self.client.indices.exists_alias(name=alias):
+            return list(self.client.indices.get_alias(name=alias).keys())
+        if self.client.indices.exists(index=alias):
+            return [alias]
+        return []
+
+    def swap(self, targets: Dict[str, Optional[str]]) -> Dict[str, List[str]]:
+        """
+        Point several aliases at new indices in one atomic update
+
+        A legacy concrete index carrying an alias's name is removed in the
+        same action (an alias cannot coexist with an index of that name).
+
+        Args:
+            targets: alias -> new index (None removes the alias)
+
+        Returns:
+            alias -> indices it pointed to before
+        """
+        actions = []
+        previous = {}
+        for alias, new_index in targets.items():
+            old_indices = [name for name in self.alias_targets(alias) if name != new_index]
+            previous[alias] = old_indices
+            if new_index:
+                actions.append({"add": {"index": new_index, "alias": alias}})
+            for old_index in old_indices:
+                if old_index == alias:
+                    actions.append({"remove_index": {"index": old_index}})
+                else:
+                    actions.append({"remove": {"index": old_index, "alias": alias}})
+
+        if actions:
+            self.client.indices.update_aliases(body={"actions": actions})
+        self.invalidate()
+        return previous
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Aliases of the layout with their indices, mapping versions and document counts"""
+        aliases = [self.alias] + [self.tenant_alias(cid) for cid in sorted(self.dedicated_companies())]
+        rows = []
+        for alias in aliases:
+            for index in self.alias_targets(alias):
+                mapping = self.client.indices.get_mapping(index=index)[index]['mappings']
+                count = self.client.count(index=index).get('count', 0)
+                rows.append({
+                    'alias': alias,
+                    'index': index,
+                    'mapping_version': mapping.get('_meta', {}).get('mapping_version', 1),
+                    'documents': count
+                })
+        return rows
+
+    def needs_migration(self) -> bool:
+        """True if any live index was built with an older mapping version"""
+        return any(row['mapping_version'] != MAPPING_VERSION for row in self.status())
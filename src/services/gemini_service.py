@@ -32,6 +32,9 @@ logger = logging.getLogger(__name__)
 class GeminiUnifiedService:
     """Gemini 2.5 Pro統合サービス"""
     
+    # Embedding model handle shared by all instances (see generate_embedding)
+    _embedding_model = None
+    
     def __init__(self, project_id: str = None):
         """
         初期化
@@ -1472,11 +1475,11 @@ identify_key_frames関数を呼び出して、以下を含む構造化データ
             Embedding vector (768-dim)
         """
         try:
-            from vertexai.language_models import TextEmbeddingModel
-            
-            # Use text-embedding-004 model
-            model = TextEmbeddingModel.from_pretrained('text-embedding-004')
-            embeddings = model.get_embeddings([text])
+            # Loaded once per process; from_pretrained is a metadata round trip
+            if GeminiUnifiedService._embedding_model is None:
+                from vertexai.language_models import TextEmbeddingModel
+                GeminiUnifiedService._embedding_model = TextEmbeddingModel.from_pretrained('text-embedding-004')
+            embeddings = GeminiUnifiedService._embedding_model.get_embeddings([text])
             
             if embeddings and len(embeddings) > 0:
                 return embeddings[0].values
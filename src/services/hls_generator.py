@@ -55,6 +55,9 @@ class HLSGenerator:
         """
         self.ffmpeg_path = ffmpeg_path
         self.segment_duration = segment_duration
+        # Decode once and encode every rendition in one ffmpeg process
+        self.single_pass = os.getenv('HLS_SINGLE_PASS', 'true').lower() == 'true'
+        self.x264_preset = os.getenv('HLS_X264_PRESET', 'medium')
         self._check_ffmpeg_availability()
     
     def _check_ffmpeg_availability(self) -> bool:
@@ -79,7 +82,8 @@ class HLSGenerator:
         input_path: str,
         output_dir: str,
         quality_levels: Optional[List[str]] = None,
-        base_filename: str = 'video'
+        base_filename: str = 'video',
+        single_pass: Optional[bool] = None
     ) -> Dict:
         """
         Generate HLS streams with multiple quality levels
@@ -95,10 +99,15 @@ class HLSGenerator:
             output_dir: Directory to save HLS files
             quality_levels: List of quality levels to generate (default: ['360p', '720p'])
             base_filename: Base name for output files (default: 'video')
+            single_pass: Encode all levels from one decode (default: HLS_SINGLE_PASS);
+                falls back to one ffmpeg run per level if the single pass fails
             
         Returns:
             Dictionary with generation results
         """
+        if single_pass is None:
+            single_pass = self.single_pass
+        
         if not os.path.exists(input_path):
             return {
                 'success': False,
@@ -124,21 +133,29 @@ class HLSGenerator:
         logger.info(f"Generating HLS streams: {input_path} -> {output_dir}")
         logger.info(f"Quality levels: {quality_levels}")
         
-        # Generate each quality level
         generated_variants = []
-        
-        for quality in quality_levels:
-            result = self._generate_quality_variant(
+        if single_pass and len(quality_levels) > 1:
+            generated_variants = self._generate_variants_single_pass(
                 input_path,
                 output_dir,
-                quality,
+                quality_levels,
                 base_filename
             )
-            
-            if result['success']:
-                generated_variants.append(result)
-            else:
-                logger.error(f"Failed to generate {quality} variant: {result.get('error')}")
+        
+        # Generate each quality level (also the fallback when the single pass fails)
+        if not generated_variants:
+            for quality in quality_levels:
+                result = self._generate_quality_variant(
+                    input_path,
+                    output_dir,
+                    quality,
+                    base_filename
+                )
+                
+                if result['success']:
+                    generated_variants.append(result)
+                else:
+                    logger.error(f"Failed to generate {quality} variant: {result.get('error')}")
         
         if not generated_variants:
             return {
@@ -195,7 +212,7 @@ class HLSGenerator:
             '-b:v', settings['video_bitrate'],
             '-maxrate', settings['video_bitrate'],
             '-bufsize', f"{int(settings['video_bitrate'].rstrip('k')) * 2}k",
-            '-preset', 'medium',
+            '-preset', self.x264_preset,
             '-g', '48',  # GOP size (2 seconds at 24fps)
             '-sc_threshold', '0',  # Disable scene change detection
             '-c:a', 'aac',
@@ -259,6 +276,136 @@ class HLSGenerator:
                 'error': str(e)
             }
     
+    def _generate_variants_single_pass(
+        self,
+        input_path: str,
+        output_dir: str,
+        quality_levels: List[str],
+        base_filename: str
+    ) -> List[Dict]:
+        """
+        Generate all HLS variants with a single ffmpeg invocation
+        
+        The source is decoded once and fanned out with a split filter to one
+        scaler/encoder per level. Keyframes are forced at every segment
+        boundary on the shared timeline, so GOPs and segment cuts line up
+        across renditions (clean ABR switching).
+        
+        Output names match _generate_quality_variant:
+        {base_filename}_{quality}.m3u8 and {base_filename}_{quality}_NNN.ts
+        
+        Args:
+            input_path: Input video path
+            output_dir: Output directory
+            quality_levels: Validated quality levels
+            base_filename: Base filename
+            
+        Returns:
+            List of variant result dicts (empty on failure)
+        """
+        count = len(quality_levels)
+        has_audio = self._has_audio(input_path)
+        
+        split_outputs = ''.join(f'[v{i}]' for i in range(count))
+        filters = [f"[0:v]split={count}{split_outputs}"]
+        for i, quality in enumerate(quality_levels):
+            filters.append(f"[v{i}]scale={self.QUALITY_LEVELS[quality]['resolution']}[v{i}out]")
+        
+        cmd = [
+            self.ffmpeg_path,
+            '-i', input_path,
+            '-filter_complex', ';'.join(filters)
+        ]
+        
+        stream_map = []
+        for i, quality in enumerate(quality_levels):
+            settings = self.QUALITY_LEVELS[quality]
+            video_bitrate = settings['video_bitrate']
+            cmd += [
+                '-map', f'[v{i}out]',
+                f'-b:v:{i}', video_bitrate,
+                f'-maxrate:v:{i}', video_bitrate,
+                f'-bufsize:v:{i}', f"{int(video_bitrate.rstrip('k')) * 2}k"
+            ]
+            if has_audio:
+                cmd += ['-map', '0:a:0', f'-b:a:{i}', settings['audio_bitrate']]
+                stream_map.append(f'v:{i},a:{i},name:{quality}')
+            else:
+                stream_map.append(f'v:{i},name:{quality}')
+        
+        cmd += [
+            '-c:v', 'libx264',
+            '-preset', self.x264_preset,
+            '-sc_threshold', '0',  # Disable scene change detection
+            '-force_key_frames', f'expr:gte(t,n_forced*{self.segment_duration})'
+        ]
+        if has_audio:
+            cmd += ['-c:a', 'aac', '-ar', '48000']
+        
+        cmd += [
+            '-f', 'hls',
+            '-hls_time', str(self.segment_duration),
+            '-hls_list_size', '0',  # Keep all segments in playlist
+            '-hls_segment_filename', str(Path(output_dir) / f"{base_filename}_%v_%03d.ts"),
+            '-hls_flags', 'independent_segments',
+            '-var_stream_map', ' '.join(stream_map),
+            str(Path(output_dir) / f"{base_filename}_%v.m3u8")
+        ]
+        
+        logger.info(f"Generating {', '.join(quality_levels)} variants in a single pass...")
+        logger.debug(f"Command: {' '.join(cmd)}")
+        
+        try:
+            result = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                timeout=600 * count  # Same budget as the per-variant path
+            )
+        except subprocess.TimeoutExpired:
+            logger.error("Single-pass HLS generation timed out")
+            return []
+        except Exception as e:
+            logger.error(f"Error in single-pass HLS generation: {e}")
+            return []
+        
+        if result.returncode != 0:
+            logger.error(f"FFmpeg error in single-pass HLS generation: {result.stderr}")
+            return []
+        
+        variants = []
+        for quality in quality_levels:
+            settings = self.QUALITY_LEVELS[quality]
+            segment_files = list(Path(output_dir).glob(f"{base_filename}_{quality}_*.ts"))
+            variants.append({
+                'success': True,
+                'quality': quality,
+                'playlist': f"{base_filename}_{quality}.m3u8",
+                'resolution': settings['resolution'],
+                'video_bitrate': settings['video_bitrate'],
+                'audio_bitrate': settings['audio_bitrate'],
+                'segments': len(segment_files),
+                'bandwidth': self._calculate_bandwidth(settings['video_bitrate'], settings['audio_bitrate'])
+            })
+        
+        logger.info(f"Single-pass HLS generated: {[(v['quality'], v['segments']) for v in variants]}")
+        return variants
+    
+    def _has_audio(self, input_path: str) -> bool:
+        """Check whether the input has an audio stream (FFprobe)"""
+        try:
+            result = subprocess.run(
+                ['ffprobe', '-v', 'quiet', '-select_streams', 'a',
+                 '-show_entries', 'stream=index', '-of', 'csv=p=0', input_path],
+                capture_output=True,
+                text=True,
+                timeout=10
+            )
+            return result.returncode == 0 and bool(result.stdout.strip())
+        except Exception as e:
+            logger.warning(f"Audio probe failed, assuming audio present: {e}")
+            return True
+    
     def _calculate_bandwidth(self, video_bitrate: str, audio_bitrate: str) -> int:
         """
         Calculate total bandwidth in bits per second
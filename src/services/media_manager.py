@@ -8,7 +8,7 @@ Dependencies: Google Cloud Storage, FileManager, PIL/OpenCV for image processing
 import os
 import json
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional, Dict, List, Tuple
 from werkzeug.utils import secure_filename
 from google.cloud import storage
@@ -18,7 +18,7 @@ import numpy as np
 from PIL import Image
 import io
 
-from src.models.models import db, Media, Company, User
+from src.models.models import db, Media, MediaTag, Company, User
 from src.infrastructure.file_manager import FileManager
 
 logger = logging.getLogger(__name__)
@@ -318,30 +318,7 @@ class MediaManager:
             Dict with items, total, page info
         """
         try:
-            # Base query with tenant isolation
-            query = Media.query.filter_by(
-                company_id=company_id,
-                is_active=True
-            )
-            
-            # Apply filters
-            if media_type:
-                query = query.filter_by(media_type=media_type)
-            
-            if search_query:
-                search_pattern = f"%{search_query}%"
-                query = query.filter(
-                    db.or_(
-                        Media.title.ilike(search_pattern),
-                        Media.description.ilike(search_pattern),
-                        Media.filename.ilike(search_pattern)
-                    )
-                )
-            
-            if tags:
-                # Filter by tags (stored as JSON array)
-                for tag in tags:
-                    query = query.filter(Media.tags.contains(f'"{tag}"'))
+            query = self.build_media_query(company_id, media_type, tags, search_query)
             
             # Apply sorting
             sort_column = getattr(Media, sort_by, Media.created_at)
@@ -356,12 +333,10 @@ class MediaManager:
             # Convert to dict
             items = [media.to_dict() for media in pagination.items]
             
-            # Generate signed URLs for each media
-            for item in items:
-                try:
-                    item['signed_url'] = self.get_signed_url(item['gcs_uri'])
-                except:
-                    item['signed_url'] = None
+            # Generate signed URLs for the whole page in one batch
+            signed_urls = self.get_signed_urls([item['gcs_uri'] for item in items])
+            for item, signed_url in zip(items, signed_urls):
+                item['signed_url'] = signed_url
             
             return {
                 'items': items,
@@ -377,6 +352,58 @@ class MediaManager:
             logger.error(f"Failed to get media list: {str(e)}")
             return {'items': [], 'total': 0, 'page': 1, 'per_page': per_page}
     
+    def build_media_query(
+        self,
+        company_id: int,
+        media_type: str = None,
+        tags: List[str] = None,
+        search_query: str = None
+    ):
+        """
+        Filtered media query used by get_media_list (unsorted, unpaginated)
+        
+        Tag filters go through media_tags (idx_media_tags_company_tag); the
+        ILIKE search is served by pg_trgm indexes on PostgreSQL.
+        
+        Args:
+            company_id: Company ID (tenant isolation)
+            media_type: Filter by media type
+            tags: Media must carry all of these tags
+            search_query: Substring of title/description/filename
+            
+        Returns:
+            SQLAlchemy query
+        """
+        # Base query with tenant isolation
+        query = Media.query.filter_by(
+            company_id=company_id,
+            is_active=True
+        )
+        
+        # Apply filters
+        if media_type:
+            query = query.filter_by(media_type=media_type)
+        
+        if search_query:
+            search_pattern = f"%{search_query}%"
+            query = query.filter(
+                db.or_(
+                    Media.title.ilike(search_pattern),
+                    Media.description.ilike(search_pattern),
+                    Media.filename.ilike(search_pattern)
+                )
+            )
+        
+        if tags:
+            for tag in tags:
+                tagged = db.session.query(MediaTag.media_id).filter(
+                    MediaTag.company_id == company_id,
+                    MediaTag.tag == tag.strip()
+                )
+                query = query.filter(Media.id.in_(tagged))
+        
+        return query
+    
     def get_media_by_id(self, media_id: int, company_id: int) -> Optional[Media]:
         """
         Get media by ID with tenant isolation check
@@ -435,36 +462,63 @@ class MediaManager:
         Returns:
             Signed URL string, None if failed
         """
-        try:
-            if not self.storage_client:
-                logger.warning("GCS client not initialized")
-                return gcs_uri
+        return self.get_signed_urls([gcs_uri], expiration)[0]
+    
+    def get_signed_urls(self, gcs_uris: List[str], expiration: int = 3600) -> List[Optional[str]]:
+        """
+        Generate signed URLs for a page of GCS files
+        
+        URLs come from the shared signed URL cache while they have enough
+        lifetime left; only the misses are signed.
+        
+        Args:
+            gcs_uris: GCS URIs (gs://bucket/path)
+            expiration: URL expiration in seconds
             
+        Returns:
+            Signed URLs in input order (the URI itself when it cannot be signed)
+        """
+        from src.infrastructure.signed_url_cache import get_signed_url_cache
+        
+        if not self.storage_client:
+            logger.warning("GCS client not initialized")
+            return list(gcs_uris)
+        
+        urls = list(gcs_uris)
+        blobs = []
+        positions = []
+        for index, gcs_uri in enumerate(gcs_uris):
             # Parse GCS URI
-            if not gcs_uri.startswith('gs://'):
-                return gcs_uri
-            
+            if not gcs_uri or not gcs_uri.startswith('gs://'):
+                continue
             parts = gcs_uri.replace('gs://', '').split('/', 1)
             if len(parts) != 2:
-                return gcs_uri
-            
+                continue
             bucket_name, blob_path = parts
-            
-            bucket = self.storage_client.bucket(bucket_name)
-            blob = bucket.blob(blob_path)
-            
-            # Generate signed URL
-            url = blob.generate_signed_url(
-                version="v4",
-                expiration=timedelta(seconds=expiration),
-                method="GET"
-            )
-            
-            return url
-            
+            blobs.append(self.storage_client.bucket(bucket_name).blob(blob_path))
+            positions.append(index)
+        
+        if not blobs:
+            return urls
+        
+        cache = get_signed_url_cache()
+        try:
+            signed = cache.get_urls(blobs, expiration, method="GET")
         except Exception as e:
-            logger.error(f"Failed to generate signed URL: {str(e)}")
-            return gcs_uri
+            # Sign one by one so a single bad object does not leave the whole page unsigned
+            logger.warning(f"Batch URL signing failed, signing individually: {str(e)}")
+            signed = []
+            for blob in blobs:
+                try:
+                    signed.append(cache.get_urls([blob], expiration, method="GET")[0])
+                except Exception as e:
+                    logger.error(f"Failed to generate signed URL for {blob.name}: {str(e)}")
+                    signed.append(None)
+        
+        for index, url in zip(positions, signed):
+            if url:
+                urls[index] = url
+        return urls
     
     def _extract_image_metadata(self, file_obj) -> Dict:
         """Extract image metadata using PIL"""
@@ -547,7 +601,7 @@ class MediaManager:
             if 'alt_text' in data:
                 media.alt_text = data['alt_text']
             if 'tags' in data:
-                media.tags = data['tags']
+                media.set_tags(data['tags'])
             
             db.session.commit()
             
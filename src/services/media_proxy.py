@@ -0,0 +1,305 @@
+"""
+File: media_proxy.py
+Purpose: Same-origin streaming proxy for media stored in GCS
+Main functionality: Chunked pass-through with Range / If-None-Match support over a pooled
+                    HTTP session, bounded on-disk LRU cache of recently proxied objects
+Dependencies: requests, Flask (send_file, Response)
+"""
+
+import os
+import json
+import uuid
+import hashlib
+import logging
+import time
+import tempfile
+import threading
+from typing import Callable, Dict, Optional
+
+import requests
+from flask import Response, request, send_file
+
+logger = logging.getLogger(__name__)
+
+# Upstream headers forwarded to the client
+_PASSTHROUGH_HEADERS = ('Content-Length', 'Content-Range', 'ETag', 'Last-Modified', 'Accept-Ranges')
+
+
+class MediaProxyCache:
+    """
+    Bounded on-disk cache of proxied objects.
+
+    Each object is stored as <sha256(key)>.bin with a .json sidecar holding
+    its ETag and content type. Writes go to a temp file and are moved into
+    place with os.replace, so concurrent web workers never see partial
+    files. Hits refresh the file mtime, and eviction removes the least
+    recently used files once the directory exceeds max_bytes.
+
+    Attributes:
+        directory: Cache directory (MEDIA_PROXY_CACHE_DIR)
+        max_bytes: Total cache size limit (MEDIA_PROXY_CACHE_MAX_MB)
+        max_object_bytes: Objects larger than this are streamed but not cached
+            (MEDIA_PROXY_CACHE_MAX_OBJECT_MB)
+    """
+
+    # Temp files untouched this long belong to a writer that died mid-stream
+    PART_MAX_AGE = 3600
+
+    def __init__(self, directory: str = None, max_bytes: int = None, max_object_bytes: int = None):
+        self.directory = directory or os.getenv(
+            'MEDIA_PROXY_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'media_proxy_cache')
+        )
+        self.max_bytes = max_bytes if max_bytes is not None else \
+            int(os.getenv('MEDIA_PROXY_CACHE_MAX_MB', '1024')) * 1024 * 1024
+        self.max_object_bytes = max_object_bytes if max_object_bytes is not None else \
+            int(os.getenv('MEDIA_PROXY_CACHE_MAX_OBJECT_MB', '64')) * 1024 * 1024
+        self._evict_lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _paths(self, key: str):
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, digest)
+        return f"{base}.bin", f"{base}.json"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a cached object.
+
+        Returns:
+            Dict with path, etag and content_type, or None on a miss
+        """
+        data_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            os.utime(data_path)
+        except (OSError, ValueError):
+            return None
+        meta['path'] = data_path
+        return meta
+
+    def open_writer(self, key: str, etag: Optional[str], content_type: str) -> 'MediaProxyCacheWriter':
+        """Start writing an object; commit() publishes it, abort() discards it."""
+        return MediaProxyCacheWriter(self, key, etag, content_type)
+
+    def evict(self) -> None:
+        """
+        Remove least recently used objects until the cache fits max_bytes.
+
+        The same pass sweeps leftovers of crashed or killed writers: *.part
+        temp files older than PART_MAX_AGE and .json sidecars whose .bin is gone.
+        """
+        if not self._evict_lock.acquire(blocking=False):
+            return
+        try:
+            entries = []
+            sidecars = []
+            names = set()
+            total = 0
+            cutoff = time.time() - self.PART_MAX_AGE
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    names.add(entry.name)
+                    if entry.name.endswith('.json'):
+                        sidecars.append(entry.path)
+                        continue
+                    if not entry.name.endswith(('.bin', '.part')):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    if entry.name.endswith('.part'):
+                        if stat.st_mtime < cutoff:
+                            self._remove(entry.path)
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+            for path in sidecars:
+                if os.path.basename(path)[:-5] + '.bin' not in names:
+                    self._remove(path)
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+            for _, size, path in entries:
+                self._remove(path)
+                self._remove(path[:-4] + '.json')
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        finally:
+            self._evict_lock.release()
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class MediaProxyCacheWriter:
+    """Streams one object into the cache while it is being proxied."""
+
+    def __init__(self, cache: MediaProxyCache, key: str, etag: Optional[str], content_type: str):
+        self.cache = cache
+        self.key = key
+        self.meta = {'etag': etag, 'content_type': content_type}
+        self.data_path, self.meta_path = cache._paths(key)
+        self._tmp_path = f"{self.data_path}.{uuid.uuid4().hex}.part"
+        self._file = open(self._tmp_path, 'wb')
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+
+    def commit(self) -> None:
+        self._file.close()
+        tmp_meta = f"{self.meta_path}.{uuid.uuid4().hex}.part"
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+        # Data first: a sidecar only ever points at a complete file
+        os.replace(self._tmp_path, self.data_path)
+        os.replace(tmp_meta, self.meta_path)
+        self.cache.evict()
+
+    def abort(self) -> None:
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+
+class MediaProxy:
+    """
+    Serves GCS objects through the application without buffering them.
+
+    - Cached objects are served from disk with send_file (Range, If-None-Match)
+    - Misses are streamed from GCS over a pooled requests.Session; Range and
+      If-None-Match are forwarded upstream
+    - Full (non-Range) responses up to max_object_bytes are written to the
+      cache while they stream, so repeated loads stay local
+
+    Attributes:
+        cache: MediaProxyCache
+        chunk_size: Bytes per streamed chunk
+    """
+
+    def __init__(self, cache: MediaProxyCache = None, chunk_size: int = 256 * 1024):
+        self._cache = cache
+        self.chunk_size = chunk_size
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def cache(self) -> MediaProxyCache:
+        if self._cache is None:
+            self._cache = MediaProxyCache()
+        return self._cache
+
+    @property
+    def session(self) -> requests.Session:
+        """Shared HTTP session (keep-alive connections to storage.googleapis.com)"""
+        with self._session_lock:
+            if self._session is None:
+                pool_size = int(os.getenv('MEDIA_PROXY_POOL_SIZE', '32'))
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._session = session
+            return self._session
+
+    def serve(self, cache_key: str, sign_url: Callable[[], Optional[str]], mimetype: str,
+              extra_headers: Dict[str, str] = None, max_age: int = 3600) -> Response:
+        """
+        Build the proxy response for the current request.
+
+        Args:
+            cache_key: Stable identifier of the object (e.g. its gs:// URI)
+            sign_url: Returns a signed URL; only called on a cache miss
+            mimetype: Content type to serve
+            extra_headers: Headers added to every response (CORS)
+            max_age: Browser cache lifetime in seconds
+
+        Returns:
+            Flask Response (200, 206, 304 or 416)
+        """
+        extra_headers = extra_headers or {}
+
+        cached = self.cache.get(cache_key)
+        if cached:
+            response = send_file(
+                cached['path'],
+                mimetype=cached.get('content_type') or mimetype,
+                conditional=True,
+                etag=(cached.get('etag') or '').strip('"') or True,
+                max_age=max_age
+            )
+            response.headers.update(extra_headers)
+            return response
+
+        signed_url = sign_url()
+        if not signed_url:
+            raise RuntimeError('Failed to generate signed URL')
+
+        upstream_headers = {}
+        for name in ('Range', 'If-None-Match', 'If-Range'):
+            if request.headers.get(name):
+                upstream_headers[name] = request.headers[name]
+
+        upstream = self.session.get(signed_url, headers=upstream_headers, stream=True, timeout=(5, 60))
+
+        if upstream.status_code in (304, 416):
+            upstream.close()
+            response = Response(status=upstream.status_code)
+            for name in ('ETag', 'Content-Range'):
+                if name in upstream.headers:
+                    response.headers[name] = upstream.headers[name]
+            response.headers.update(extra_headers)
+            return response
+
+        if upstream.status_code not in (200, 206):
+            upstream.close()
+            raise RuntimeError(f'Storage returned HTTP {upstream.status_code}')
+
+        writer = None
+        content_length = int(upstream.headers.get('Content-Length') or 0)
+        if upstream.status_code == 200 and 0 < content_length <= self.cache.max_object_bytes:
+            try:
+                writer = self.cache.open_writer(cache_key, upstream.headers.get('ETag'), mimetype)
+            except OSError as e:
+                logger.warning(f"Media proxy cache unavailable: {e}")
+
+        def generate():
+            received = 0
+            try:
+                for chunk in upstream.iter_content(chunk_size=self.chunk_size):
+                    received += len(chunk)
+                    if writer:
+                        writer.write(chunk)
+                    yield chunk
+                if writer:
+                    if received == content_length:
+                        writer.commit()
+                    else:
+                        writer.abort()
+            except BaseException:
+                # Includes GeneratorExit when the client disconnects mid-stream
+                if writer:
+                    writer.abort()
+                raise
+            finally:
+                upstream.close()
+
+        response = Response(generate(), status=upstream.status_code, mimetype=mimetype, direct_passthrough=True)
+        for name in _PASSTHROUGH_HEADERS:
+            if name in upstream.headers:
+                response.headers[name] = upstream.headers[name]
+        response.headers.setdefault('Accept-Ranges', 'bytes')
+        response.headers['Cache-Control'] = f'public, max-age={max_age}'
+        response.headers.update(extra_headers)
+        return response
+
+
+media_proxy = MediaProxy()
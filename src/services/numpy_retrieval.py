@@ -0,0 +1,562 @@
+"""
+File: numpy_retrieval.py
+Purpose: Embedded retrieval backend (no search cluster) for development, tests and small installs
+Main functionality: Per-company snapshots with a memory-mapped float16 embedding matrix (blocked
+                    matrix-multiply top-k) and a CSR inverted index for BM25, RRF hybrid search;
+                    snapshots are rebuilt from ReferenceChunk when a company's chunks change
+Dependencies: numpy, SQLAlchemy models, embedding_codec, cache_store (commit invalidation)
+"""
+
+import os
+import re
+import json
+import time
+import shutil
+import logging
+import tempfile
+import threading
+import unicodedata
+from array import array
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.models.models import db, ReferenceMaterial, ReferenceChunk
+from src.services.retrieval_backend import RetrievalBackend, reciprocal_rank_fusion
+from src.utils.cache_store import register_commit_invalidator
+from src.utils.embedding_codec import decode_embedding
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+# Latin/digit words, katakana runs, single hiragana/kanji (close to ElasticSearch's standard analyzer)
+_TOKEN_PATTERN = re.compile(r'[0-9a-z]+|[\u30a0-\u30ff]+|[\u3040-\u309f\u3400-\u9fff\uf900-\ufaff]')
+
+_PENDING_KEY = 'numpy_retrieval_dirty_companies'
+
+# (chunk_id, material_id, chunk_index, text, metadata, embedding)
+SnapshotRow = Tuple[int, int, int, str, Dict[str, Any], Any]
+
+
+def tokenize(text: str) -> List[str]:
+    """BM25 terms of a text (NFKC-folded, lowercased)"""
+    return _TOKEN_PATTERN.findall(unicodedata.normalize('NFKC', text or '').lower())
+
+
+class SnapshotBuilder:
+    """
+    Writes one company snapshot directory from streamed rows
+
+    Vectors go straight into a memory-mapped .npy file, postings are
+    collected in compact arrays and sorted into CSR form at the end, so
+    memory stays well below the size of the embedding matrix.
+    """
+
+    def __init__(self, path: str, count: int, dims: int):
+        os.makedirs(path)
+        self.path = path
+        self.count = count
+        self.vectors = np.lib.format.open_memmap(
+            os.path.join(path, 'vectors.npy'), mode='w+', dtype=np.float16, shape=(count, dims)
+        )
+        self.chunk_ids = np.zeros(count, dtype=np.int64)
+        self.material_ids = np.zeros(count, dtype=np.int64)
+        self.chunk_indexes = np.zeros(count, dtype=np.int32)
+        self.doc_len = np.zeros(count, dtype=np.int32)
+        self.record_offsets = np.zeros(count + 1, dtype=np.int64)
+        self.vocab: Dict[str, int] = {}
+        self._records = open(os.path.join(path, 'records.bin'), 'wb')
+        self._post_terms = array('i')
+        self._post_docs = array('i')
+        self._post_tf = array('H')
+        self.size = 0
+
+    def add(self, chunk_id: int, material_id: int, chunk_index: int, text: str,
+            metadata: Dict[str, Any], embedding) -> None:
+        row = self.size
+        if row >= self.count:
+            raise ValueError(f"Snapshot holds {self.count} rows")
+
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        self.vectors[row] = vector / norm if norm > 0 else vector
+        self.chunk_ids[row] = chunk_id
+        self.material_ids[row] = material_id
+        self.chunk_indexes[row] = chunk_index
+
+        terms = Counter(tokenize(text))
+        self.doc_len[row] = sum(terms.values())
+        for term, tf in terms.items():
+            self._post_terms.append(self.vocab.setdefault(term, len(self.vocab)))
+            self._post_docs.append(row)
+            self._post_tf.append(min(tf, 65535))
+
+        record = json.dumps({'t': text, 'm': metadata or {}}, ensure_ascii=False).encode('utf-8')
+        self._records.write(record)
+        self.record_offsets[row + 1] = self.record_offsets[row] + len(record)
+        self.size += 1
+
+    def finish(self, source_time: float) -> None:
+        """Write postings and manifest (rows may be fewer than count)"""
+        rows = self.size
+        self._records.close()
+        self.vectors.flush()
+        del self.vectors
+
+        terms = np.frombuffer(self._post_terms, dtype=np.int32)
+        order = np.argsort(terms, kind='stable')
+        indptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(self.vocab)), out=indptr[1:])
+
+        arrays = {
+            'chunk_ids': self.chunk_ids[:rows],
+            'material_ids': self.material_ids[:rows],
+            'chunk_indexes': self.chunk_indexes[:rows],
+            'doc_len': self.doc_len[:rows],
+            'record_offsets': self.record_offsets[:rows + 1],
+            'postings_indptr': indptr,
+            'postings_docs': np.frombuffer(self._post_docs, dtype=np.int32)[order],
+            'postings_tf': np.frombuffer(self._post_tf, dtype=np.uint16)[order]
+        }
+        for name, values in arrays.items():
+            np.save(os.path.join(self.path, f'{name}.npy'), values)
+        with open(os.path.join(self.path, 'vocab.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.vocab, f, ensure_ascii=False)
+        with open(os.path.join(self.path, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'format': SNAPSHOT_FORMAT,
+                'rows': rows,
+                'avg_doc_len': float(self.doc_len[:rows].mean()) if rows else 0.0,
+                'source_time': source_time,
+                'built_at': time.time()
+            }, f)
+
+
+class CompanySnapshot:
+    """
+    Read-only, memory-mapped search structures of one company
+
+    numpy has no fast float16 matrix product, so scoring converts blocks
+    to float32 and that conversion dominates. Snapshots whose float32
+    matrix fits in resident_bytes are converted once on load and kept in
+    memory instead.
+    """
+
+    def __init__(self, path: str, resident_bytes: int = 0):
+        with open(os.path.join(path, 'manifest.json'), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        self.path = path
+        self.rows = manifest['rows']
+        self.avg_doc_len = manifest['avg_doc_len'] or 1.0
+        self.source_time = manifest['source_time']
+
+        def load(name):
+            return np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+
+        self.vectors = load('vectors')[:self.rows]
+        self.resident = self.vectors.size * 4 <= resident_bytes
+        if self.resident:
+            self.vectors = np.asarray(self.vectors, dtype=np.float32)
+        self.chunk_ids = load('chunk_ids')
+        self.material_ids = load('material_ids')
+        self.chunk_indexes = load('chunk_indexes')
+        self.doc_len = load('doc_len')
+        self.record_offsets = load('record_offsets')
+        self.postings_indptr = load('postings_indptr')
+        self.postings_docs = load('postings_docs')
+        self.postings_tf = load('postings_tf')
+        with open(os.path.join(path, 'vocab.json'), 'r', encoding='utf-8') as f:
+            self.vocab = json.load(f)
+        records_path = os.path.join(path, 'records.bin')
+        self.records = np.memmap(records_path, dtype=np.uint8, mode='r') \
+            if os.path.getsize(records_path) else np.zeros(0, dtype=np.uint8)
+
+    def record(self, row: int) -> Dict[str, Any]:
+        data = json.loads(bytes(self.records[self.record_offsets[row]:self.record_offsets[row + 1]]))
+        return {'text': data['t'], 'metadata': data['m']}
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        if len(scores) > k:
+            return np.argpartition(-scores, k - 1)[:k]
+        return np.arange(len(scores))
+
+    def vector_top_k(self, query_embedding, k: int, block_rows: int = 4096) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact cosine top-k by blocked matrix multiplication
+
+        Blocks keep the float32 working set at block_rows x dims however
+        large the matrix is.
+
+        Returns:
+            Tuple of (row indices, cosine similarities), best first
+        """
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        best_rows = np.zeros(0, dtype=np.int64)
+        best_scores = np.zeros(0, dtype=np.float32)
+        for start in range(0, self.rows, block_rows):
+            scores = np.asarray(self.vectors[start:start + block_rows], dtype=np.float32) @ query
+            top = self._top(scores, k)
+            best_rows = np.concatenate([best_rows, top + start])
+            best_scores = np.concatenate([best_scores, scores[top]])
+            keep = self._top(best_scores, k)
+            best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+        order = np.argsort(-best_scores, kind='stable')
+        return best_rows[order], best_scores[order]
+
+    def bm25_top_k(self, query_text: str, k: int, k1: float = 1.2, b: float = 0.75) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        BM25 top-k over the inverted index
+
+        Returns:
+            Tuple of (row indices, BM25 scores), best first; only rows matching a term
+        """
+        term_ids = {self.vocab[term] for term in tokenize(query_text) if term in self.vocab}
+        if not term_ids or not self.rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        scores = np.zeros(self.rows, dtype=np.float32)
+        for term_id in term_ids:
+            start, end = self.postings_indptr[term_id], self.postings_indptr[term_id + 1]
+            docs = self.postings_docs[start:end]
+            tf = self.postings_tf[start:end].astype(np.float32)
+            df = end - start
+            idf = np.log(1.0 + (self.rows - df + 0.5) / (df + 0.5))
+            norm = k1 * (1.0 - b + b * self.doc_len[docs] / self.avg_doc_len)
+            scores[docs] += idf * tf * (k1 + 1.0) / (tf + norm)
+
+        matched = np.flatnonzero(scores)
+        top = matched[self._top(scores[matched], k)]
+        order = np.argsort(-scores[top], kind='stable')
+        return top[order], scores[top[order]]
+
+
+class NumpyRetrievalBackend(RetrievalBackend):
+    """
+    Retrieval without a search cluster
+
+    ReferenceChunk (text + stored embedding) stays the source of truth.
+    Each company gets a snapshot directory under RAG_NUMPY_INDEX_DIR that
+    is rebuilt lazily on the first search after the company's chunks
+    changed: writes only drop a STALE marker, committed ReferenceMaterial
+    changes do the same through session hooks. Snapshots are published by
+    renaming, and every process memory-maps the current one, so processes
+    on the same host share the page cache.
+
+    Vector search is exact (num_candidates is ignored). Suited to tenants
+    of up to a few hundred thousand chunks; see
+    scripts/benchmark_numpy_retrieval.py.
+
+    Attributes:
+        directory: Snapshot root (RAG_NUMPY_INDEX_DIR)
+        block_rows: Rows multiplied per block (RAG_NUMPY_BLOCK_ROWS)
+        resident_bytes: Keep float32 vectors in memory for snapshots up to this
+            size (RAG_NUMPY_RESIDENT_MB per company and process)
+    """
+
+    name = 'numpy'
+
+    def __init__(self, directory: str = None):
+        self.directory = directory or os.getenv(
+            'RAG_NUMPY_INDEX_DIR', os.path.join(tempfile.gettempdir(), 'rag_numpy_index')
+        )
+        self.block_rows = int(os.getenv('RAG_NUMPY_BLOCK_ROWS', '4096'))
+        self.resident_bytes = int(os.getenv('RAG_NUMPY_RESIDENT_MB', '128')) * 1024 * 1024
+        self.rrf_rank_constant = int(os.getenv('RAG_RRF_RANK_CONSTANT', '60'))
+        self.rrf_window_size = int(os.getenv('RAG_RRF_WINDOW_SIZE', '50'))
+        self.embedding_dimension = 768
+        self._snapshots: Dict[int, Tuple[str, CompanySnapshot]] = {}
+        self._build_locks: Dict[int, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def _company_dir(self, company_id: int) -> str:
+        return os.path.join(self.directory, f"company_{company_id}")
+
+    def _current_version(self, company_id: int) -> Optional[str]:
+        try:
+            with open(os.path.join(self._company_dir(company_id), 'CURRENT'), 'r') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _stale_since(self, company_id: int) -> float:
+        try:
+            return os.path.getmtime(os.path.join(self._company_dir(company_id), 'STALE'))
+        except FileNotFoundError:
+            return 0.0
+
+    def invalidate(self, company_id: int) -> None:
+        """Mark a company's snapshot as outdated (rebuilt on the next search)"""
+        company_dir = self._company_dir(company_id)
+        os.makedirs(company_dir, exist_ok=True)
+        with open(os.path.join(company_dir, 'STALE'), 'w') as f:
+            f.write(str(time.time()))
+
+    def _rows_from_database(self, company_id: int) -> Tuple[Iterator[SnapshotRow], int]:
+        query = db.session.query(
+            ReferenceChunk.id, ReferenceChunk.material_id, ReferenceChunk.chunk_index,
+            ReferenceChunk.chunk_text, ReferenceChunk.chunk_metadata,
+            ReferenceChunk.embedding, ReferenceChunk.embedding_dtype, ReferenceChunk.embedding_scale
+        ).join(
+            ReferenceMaterial, ReferenceMaterial.id == ReferenceChunk.material_id
+        ).filter(
+            ReferenceMaterial.company_id == company_id,
+            ReferenceMaterial.is_active.is_(True),
+            ReferenceMaterial.processing_status == 'completed',
+            ReferenceChunk.embedding.isnot(None)
+        )
+        count = query.count()
+
+        def rows():
+            last_id = 0
+            while True:
+                batch = query.filter(ReferenceChunk.id > last_id).order_by(ReferenceChunk.id).limit(1000).all()
+                if not batch:
+                    return
+                for row in batch:
+                    try:
+                        metadata = json.loads(row.chunk_metadata) if row.chunk_metadata else {}
+                    except (TypeError, ValueError):
+                        metadata = {}
+                    yield (row.id, row.material_id, row.chunk_index, row.chunk_text, metadata,
+                           decode_embedding(row.embedding, row.embedding_dtype, row.embedding_scale))
+                last_id = batch[-1].id
+
+        return rows(), count
+
+    def build_company(self, company_id: int, rows: Iterable[SnapshotRow] = None, count: int = None) -> str:
+        """
+        Build and publish a new snapshot for a company
+
+        Args:
+            company_id: Company to build
+            rows: Rows to index (default: the company's chunks from the database)
+            count: Number of rows (required with rows)
+
+        Returns:
+            Published version name
+        """
+        source_time = time.time()
+        if rows is None:
+            rows, count = self._rows_from_database(company_id)
+
+        company_dir = self._company_dir(company_id)
+        os.makedirs(company_dir, exist_ok=True)
+        version = f"v{int(source_time * 1000)}_{os.getpid()}"
+        staging = os.path.join(company_dir, f"{version}.tmp")
+        try:
+            builder = SnapshotBuilder(staging, count, self.embedding_dimension)
+            for row in rows:
+                builder.add(*row)
+            builder.finish(source_time)
+            os.rename(staging, os.path.join(company_dir, version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        pointer = os.path.join(company_dir, f"CURRENT.{os.getpid()}")
+        with open(pointer, 'w') as f:
+            f.write(version)
+        os.replace(pointer, os.path.join(company_dir, 'CURRENT'))
+
+        # Older versions: open memmaps in other processes stay valid after unlink
+        for name in os.listdir(company_dir):
+            if name.startswith('v') and name != version and not name.endswith('.tmp'):
+                shutil.rmtree(os.path.join(company_dir, name), ignore_errors=True)
+
+        logger.info(f"Built retrieval snapshot {version} for company {company_id} ({builder.size} chunks)")
+        return version
+
+    def snapshot(self, company_id: int) -> Optional[CompanySnapshot]:
+        """Up-to-date snapshot of a company, rebuilding it if chunks changed since it was built"""
+        stale_since = self._stale_since(company_id)
+        version = self._current_version(company_id)
+        cached = self._snapshots.get(company_id)
+        if cached and cached[0] == version and cached[1].source_time >= stale_since:
+            return cached[1]
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(company_id, threading.Lock())
+        with build_lock:
+            version = self._current_version(company_id)
+            snapshot = None
+            if version:
+                try:
+                    snapshot = CompanySnapshot(os.path.join(self._company_dir(company_id), version), self.resident_bytes)
+                except (FileNotFoundError, ValueError) as e:
+                    logger.warning(f"Retrieval snapshot {version} of company {company_id} unreadable: {e}")
+            if snapshot is None or snapshot.source_time < self._stale_since(company_id):
+                version = self.build_company(company_id)
+                snapshot = CompanySnapshot(os.path.join(self._company_dir(company_id), version), self.resident_bytes)
+            self._snapshots[company_id] = (version, snapshot)
+            return snapshot
+
+    def rebuild_all(self) -> Dict[str, Any]:
+        """Build fresh snapshots for every company with searchable chunks"""
+        started = time.perf_counter()
+        company_ids = [row[0] for row in db.session.query(ReferenceMaterial.company_id).filter(
+            ReferenceMaterial.is_active.is_(True)
+        ).distinct()]
+        indexed = 0
+        for company_id in company_ids:
+            self.build_company(company_id)
+            indexed += self.snapshot(company_id).rows
+        return {
+            'new_index': self.directory,
+            'tenant_indices': {},
+            'promoted': [],
+            'old_indices': [],
+            'indexed': indexed,
+            'failed': 0,
+            'skipped': 0,
+            'elapsed_seconds': round(time.perf_counter() - started, 1)
+        }
+
+    # ------------------------------------------------------------------
+    # RetrievalBackend: writes (the database is the source of truth)
+    # ------------------------------------------------------------------
+
+    def create_index(self) -> bool:
+        os.makedirs(self.directory, exist_ok=True)
+        return True
+
+    def index_for_company(self, company_id: int) -> str:
+        return f"numpy:company_{company_id}"
+
+    def bulk_index_chunks(self, documents: Iterable[Dict[str, Any]],
+                          index: Union[str, Callable[[int], str], None] = None) -> Dict[str, int]:
+        companies = set()
+        indexed = 0
+        for doc in documents:
+            companies.add(doc['company_id'])
+            indexed += 1
+        for company_id in companies:
+            self.invalidate(company_id)
+        return {'indexed': indexed, 'failed': 0}
+
+    def bulk_update_chunks(self, updates: Dict[int, Dict[str, Any]], company_id: int,
+                           index: str = None) -> Dict[str, int]:
+        self.invalidate(company_id)
+        return {'updated': len(updates), 'failed': 0}
+
+    def bulk_delete_chunks(self, chunk_ids: List[int], company_id: int, index: str = None) -> int:
+        self.invalidate(company_id)
+        return len(chunk_ids)
+
+    def delete_material_chunks(self, material_id: int, company_id: int) -> int:
+        self.invalidate(company_id)
+        return 0
+
+    def delete_stale_material_chunks(self, material_id: int, company_id: int,
+                                     keep_chunk_ids: List[int]) -> int:
+        self.invalidate(company_id)
+        return 0
+
+    def start_delete_material_chunks(self, material_id: int, company_id: int,
+                                     keep_chunk_ids: Optional[List[int]] = None) -> Optional[str]:
+        # The next snapshot is read from the database, so invalidating completes the delete
+        self.invalidate(company_id)
+        return None
+
+    def delete_task_status(self, task_id: str) -> Dict[str, Any]:
+        return {'completed': True, 'deleted': 0, 'total': 0, 'failures': 0, 'error': None}
+
+    def iter_company_documents(self, company_id: int) -> Iterator[Tuple[int, int]]:
+        snapshot = self.snapshot(company_id)
+        if snapshot is None:
+            return
+        for chunk_id, material_id in zip(snapshot.chunk_ids.tolist(), snapshot.material_ids.tolist()):
+            yield chunk_id, material_id
+
+    # ------------------------------------------------------------------
+    # RetrievalBackend: reads
+    # ------------------------------------------------------------------
+
+    def get_material_chunk_count(self, material_id: int, company_id: int) -> int:
+        snapshot = self.snapshot(company_id)
+        return int(np.count_nonzero(snapshot.material_ids == material_id)) if snapshot else 0
+
+    @staticmethod
+    def _result(snapshot: CompanySnapshot, row: int, score: float) -> Dict[str, Any]:
+        record = snapshot.record(row)
+        return {
+            'chunk_id': int(snapshot.chunk_ids[row]),
+            'material_id': int(snapshot.material_ids[row]),
+            'chunk_text': record['text'],
+            'chunk_index': int(snapshot.chunk_indexes[row]),
+            'metadata': record['metadata'],
+            'score': float(score)
+        }
+
+    @staticmethod
+    def _excluded_rows(snapshot: CompanySnapshot, exclude_material_ids: Optional[Sequence[int]]) -> Optional[np.ndarray]:
+        """Boolean mask of rows belonging to soft-deleted materials (None if there are none)"""
+        if not exclude_material_ids:
+            return None
+        mask = np.isin(snapshot.material_ids, np.asarray(list(exclude_material_ids), dtype=np.int64))
+        return mask if mask.any() else None
+
+    def vector_search(self, query_embedding: List[float], company_id: int,
+                      top_k: int = 10, min_score: float = 0.7,
+                      num_candidates: Optional[int] = None,
+                      exclude_material_ids: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+        snapshot = self.snapshot(company_id)
+        if snapshot is None or not snapshot.rows:
+            return []
+        excluded = self._excluded_rows(snapshot, exclude_material_ids)
+        # Fetching as many extra rows as are excluded keeps the top-k exact
+        extra = int(excluded.sum()) if excluded is not None else 0
+        rows, similarities = snapshot.vector_top_k(query_embedding, top_k + extra, self.block_rows)
+        results = []
+        for row, similarity in zip(rows, similarities):
+            score = (1.0 + float(similarity)) / 2.0
+            if score >= min_score and (excluded is None or not excluded[row]):
+                results.append(self._result(snapshot, int(row), score))
+        return results[:top_k]
+
+    def hybrid_search(self, query_text: str, query_embedding: List[float],
+                      company_id: int, top_k: int = 10,
+                      vector_weight: float = 0.5, num_candidates: Optional[int] = None,
+                      fusion: Optional[str] = None,
+                      exclude_material_ids: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+        snapshot = self.snapshot(company_id)
+        if snapshot is None or not snapshot.rows:
+            return []
+        excluded = self._excluded_rows(snapshot, exclude_material_ids)
+        extra = int(excluded.sum()) if excluded is not None else 0
+        window = max(self.rrf_window_size, top_k)
+        keyword_rows, _ = snapshot.bm25_top_k(query_text, window + extra)
+        vector_rows, _ = snapshot.vector_top_k(query_embedding, window + extra, self.block_rows)
+        if excluded is not None:
+            keyword_rows = [row for row in keyword_rows if not excluded[row]][:window]
+            vector_rows = [row for row in vector_rows if not excluded[row]][:window]
+        fused = reciprocal_rank_fusion(
+            [[(int(row), int(row)) for row in keyword_rows], [(int(row), int(row)) for row in vector_rows]],
+            (1.0 - vector_weight, vector_weight), self.rrf_rank_constant, top_k
+        )
+        return [self._result(snapshot, row, score) for row, score in fused]
+
+    def health_check(self) -> bool:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            return os.access(self.directory, os.W_OK)
+        except OSError as e:
+            logger.error(f"Retrieval snapshot directory unavailable: {e}")
+            return False
+
+
+numpy_retrieval_backend = NumpyRetrievalBackend()
+
+# Mark snapshots stale once a transaction writing reference materials commits
+register_commit_invalidator(ReferenceMaterial, _PENDING_KEY, numpy_retrieval_backend.invalidate)
@@ -0,0 +1,547 @@
+"""
+File: rag_index_service.py
+Purpose: Rebuild RAG search documents from chunks stored in the database
+Main functionality: Stream ReferenceChunk rows (text + persisted embedding) into the retrieval
+                    backend; per-material reindex and full rebuild with alias swap; soft-delete
+                    bookkeeping and orphan reconciliation between ReferenceChunk and the index
+Dependencies: SQLAlchemy models, retrieval backend (ElasticSearch service)
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.models.models import db, ReferenceMaterial, ReferenceChunk
+from src.services.retrieval_backend import get_retrieval_backend
+from src.utils.embedding_codec import decode_embedding
+
+logger = logging.getLogger(__name__)
+
+
+class MissingEmbeddingsError(Exception):
+    """Chunks without a stored embedding (run scripts/migrate_add_chunk_embeddings.py)"""
+
+
+class RagIndexService:
+    """
+    Reindexing without model calls.
+
+    Embeddings are persisted on ReferenceChunk when a material is processed,
+    so documents can be regenerated from the database alone:
+    - sync_material_chunks: apply a (re)processed chunk list as a diff
+    - reindex_material: overwrite one material's documents in place
+    - rebuild_index: load every active material into new versioned indices
+      (shared + per large tenant) and swap the aliases to them (searches keep
+      hitting the old indices until then)
+    - sweep_orphans: delete documents without an active chunk row and
+      reindex materials with missing documents
+
+    A deleted (is_active=False) material keeps elasticsearch_indexed=True
+    until its documents are confirmed gone; until then searches exclude it
+    (pending_purge_material_ids).
+
+    Attributes:
+        batch_size: Rows fetched per database round trip
+    """
+
+    def __init__(self, batch_size: int = 500):
+        self.batch_size = batch_size
+
+    def _chunk_query(self, material_ids: Optional[List[int]] = None, min_chunk_id: int = 0, *columns):
+        # Plain column rows: nothing is added to the session identity map
+        query = db.session.query(*(columns or (ReferenceChunk.id,))).join(
+            ReferenceMaterial, ReferenceMaterial.id == ReferenceChunk.material_id
+        ).filter(
+            ReferenceMaterial.is_active.is_(True),
+            ReferenceChunk.id > min_chunk_id
+        )
+        if material_ids is not None:
+            query = query.filter(ReferenceChunk.material_id.in_(material_ids))
+        else:
+            query = query.filter(ReferenceMaterial.processing_status == 'completed')
+        return query
+
+    def count_missing_embeddings(self, material_ids: Optional[List[int]] = None) -> int:
+        """Number of chunks that cannot be indexed without re-embedding"""
+        return self._chunk_query(material_ids).filter(ReferenceChunk.embedding.is_(None)).count()
+
+    def iter_documents(self, material_ids: Optional[List[int]] = None,
+                       min_chunk_id: int = 0, stats: Dict[str, int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield ElasticSearch documents for stored chunks in id order
+
+        Keyset pagination keeps memory flat regardless of table size.
+
+        Args:
+            material_ids: Restrict to these materials (default: all completed, active materials)
+            min_chunk_id: Only chunks with a larger id
+            stats: Optional dict updated with 'max_chunk_id' and 'skipped'
+        """
+        backend = get_retrieval_backend()
+        stats = stats if stats is not None else {}
+        stats.setdefault('skipped', 0)
+        last_id = min_chunk_id
+        while True:
+            rows = self._chunk_query(
+                material_ids, last_id,
+                ReferenceChunk.id, ReferenceChunk.material_id, ReferenceMaterial.company_id,
+                ReferenceChunk.chunk_index, ReferenceChunk.chunk_text, ReferenceChunk.chunk_metadata,
+                ReferenceChunk.embedding, ReferenceChunk.embedding_dtype, ReferenceChunk.embedding_scale
+            ).order_by(ReferenceChunk.id).limit(self.batch_size).all()
+            if not rows:
+                break
+
+            for row in rows:
+                if row.embedding is None:
+                    stats['skipped'] += 1
+                    continue
+                yield backend.build_chunk_document(
+                    chunk_id=row.id,
+                    material_id=row.material_id,
+                    company_id=row.company_id,
+                    chunk_text=row.chunk_text,
+                    chunk_index=row.chunk_index,
+                    embedding=decode_embedding(row.embedding, row.embedding_dtype, row.embedding_scale),
+                    metadata=_parse_metadata(row.chunk_metadata)
+                )
+
+            last_id = rows[-1].id
+            stats['max_chunk_id'] = last_id
+
+    def sync_material_chunks(self, material: ReferenceMaterial, chunks: List[Dict[str, Any]],
+                             model: str = None) -> Dict[str, int]:
+        """
+        Replace a material's chunk set by diffing on text hash
+
+        Stored chunks whose text hash reappears are kept with their embedding
+        (only chunk_index/metadata are updated if they moved); new texts are
+        inserted and indexed; chunks that disappeared are deleted from the
+        database and the index in bulk.
+
+        Args:
+            material: ReferenceMaterial being processed
+            chunks: RAGProcessor.process_material chunks ('text', 'text_hash',
+                'chunk_index', 'metadata', 'embedding' or None when reusable)
+            model: Embedding model name recorded on new rows
+
+        Returns:
+            Dict with added, reused, updated, removed and indexed counts
+
+        Raises:
+            MissingEmbeddingsError: A chunk has neither a new nor a stored embedding
+        """
+        existing = ReferenceChunk.query.filter_by(material_id=material.id).order_by(ReferenceChunk.chunk_index).all()
+
+        pool: Dict[str, List[ReferenceChunk]] = {}
+        stored_embeddings = {}
+        for row in existing:
+            if row.embedding is None or not row.text_hash:
+                continue
+            pool.setdefault(row.text_hash, []).append(row)
+            stored_embeddings.setdefault(row.text_hash, row)
+
+        added: List[ReferenceChunk] = []
+        moved: List[ReferenceChunk] = []
+        kept_ids = set()
+        for chunk in chunks:
+            candidates = pool.get(chunk['text_hash'])
+            if candidates:
+                row = candidates.pop(0)
+                kept_ids.add(row.id)
+                if row.chunk_index != chunk['chunk_index'] or _parse_metadata(row.chunk_metadata) != chunk['metadata']:
+                    row.chunk_index = chunk['chunk_index']
+                    row.chunk_metadata = json.dumps(chunk['metadata'], ensure_ascii=False)
+                    moved.append(row)
+                continue
+
+            row = ReferenceChunk(
+                material_id=material.id,
+                chunk_index=chunk['chunk_index'],
+                chunk_text=chunk['text'],
+                chunk_metadata=json.dumps(chunk['metadata'], ensure_ascii=False)
+            )
+            if chunk.get('embedding') is not None:
+                row.set_embedding(chunk['embedding'], model=model)
+            elif chunk['text_hash'] in stored_embeddings:
+                # Same text appears more often than before: copy the stored vector
+                source = stored_embeddings[chunk['text_hash']]
+                row.embedding = source.embedding
+                row.embedding_dtype = source.embedding_dtype
+                row.embedding_scale = source.embedding_scale
+                row.embedding_model = source.embedding_model
+                row.text_hash = source.text_hash
+            else:
+                raise MissingEmbeddingsError(f"Chunk {chunk['chunk_index']} of material {material.id} has no embedding")
+            added.append(row)
+
+        removed_ids = [row.id for row in existing if row.id not in kept_ids]
+        if removed_ids:
+            ReferenceChunk.query.filter(ReferenceChunk.id.in_(removed_ids)).delete(synchronize_session=False)
+        db.session.add_all(added)
+        db.session.flush()
+        for row in added:
+            row.elasticsearch_doc_id = f"chunk_{row.id}"
+        # Only an incremental run that indexes everything successfully may skip
+        # unchanged chunks next time; the caller sets this back to True
+        was_indexed = material.elasticsearch_indexed
+        material.elasticsearch_indexed = False
+        db.session.commit()
+
+        backend = get_retrieval_backend()
+        backend.create_index()
+        if was_indexed:
+            to_index = added
+            if moved:
+                backend.bulk_update_chunks({
+                    row.id: {'chunk_index': row.chunk_index, 'metadata': _parse_metadata(row.chunk_metadata)}
+                    for row in moved
+                }, company_id=material.company_id)
+            if removed_ids:
+                backend.bulk_delete_chunks(removed_ids, company_id=material.company_id)
+        else:
+            # Never (fully) indexed: write every chunk; stale documents go by query
+            to_index = ReferenceChunk.query.filter_by(material_id=material.id).all()
+            backend.delete_stale_material_chunks(
+                material.id, material.company_id, [row.id for row in to_index]
+            )
+
+        result = backend.bulk_index_chunks(
+            backend.build_chunk_document(
+                chunk_id=row.id,
+                material_id=material.id,
+                company_id=material.company_id,
+                chunk_text=row.chunk_text,
+                chunk_index=row.chunk_index,
+                embedding=row.get_embedding(),
+                metadata=_parse_metadata(row.chunk_metadata)
+            )
+            for row in to_index
+        )
+
+        stats = {
+            'added': len(added),
+            'reused': len(kept_ids),
+            'updated': len(moved),
+            'removed': len(removed_ids),
+            'indexed': result['indexed'],
+            'failed': result['failed']
+        }
+        logger.info(f"Synced chunks of material {material.id}: {stats}")
+        return stats
+
+    def reindex_material(self, material_id: int) -> Dict[str, Any]:
+        """
+        Rewrite one material's documents from stored chunks
+
+        Documents are overwritten by id first and stale ones removed after
+        (by a background delete task), so the material stays searchable
+        throughout.
+
+        Returns:
+            Dict with indexed and failed counts and delete_task (None if
+            nothing is left to wait for)
+
+        Raises:
+            MissingEmbeddingsError: Some chunks have no stored embedding
+        """
+        material = db.session.get(ReferenceMaterial, material_id)
+        if not material:
+            raise Exception(f"Material {material_id} not found")
+        company_id = material.company_id
+
+        chunk_ids = [row.id for row in db.session.query(ReferenceChunk.id).filter_by(material_id=material_id)]
+        if not chunk_ids:
+            raise Exception("No chunks found for this material")
+
+        missing = self.count_missing_embeddings([material_id])
+        if missing:
+            raise MissingEmbeddingsError(f"{missing} chunks of material {material_id} have no stored embedding")
+
+        backend = get_retrieval_backend()
+        backend.create_index()
+        result = backend.bulk_index_chunks(self.iter_documents([material_id]))
+        # Stale documents go in the background; poll delete_task with delete_task_status
+        result['delete_task'] = backend.start_delete_material_chunks(material_id, company_id, keep_chunk_ids=chunk_ids)
+
+        ReferenceChunk.query.filter(ReferenceChunk.id.in_(chunk_ids)).update(
+            {ReferenceChunk.elasticsearch_doc_id: db.literal('chunk_') + db.cast(ReferenceChunk.id, db.String)},
+            synchronize_session=False
+        )
+        material = db.session.get(ReferenceMaterial, material_id)
+        material.elasticsearch_indexed = True
+        material.elasticsearch_index_name = backend.index_for_company(company_id)
+        db.session.commit()
+
+        logger.info(f"Reindexed material {material_id}: {result}")
+        return result
+
+    def pending_purge_material_ids(self, company_id: int) -> List[int]:
+        """
+        Deleted materials of a company whose documents may still be in the index
+
+        Searches pass these as exclude_material_ids. Materials deleted while
+        being processed are included because their sync may still write
+        documents.
+        """
+        rows = db.session.query(ReferenceMaterial.id).filter(
+            ReferenceMaterial.company_id == company_id,
+            ReferenceMaterial.is_active.is_(False),
+            db.or_(
+                ReferenceMaterial.elasticsearch_indexed.is_(True),
+                ReferenceMaterial.processing_status.in_(('pending', 'processing'))
+            )
+        )
+        return [row.id for row in rows]
+
+    def mark_purged(self, material_ids: List[int]) -> int:
+        """
+        Record that deleted materials have no documents left (stops excluding them)
+
+        Materials that were reactivated in the meantime are left alone.
+
+        Returns:
+            Number of materials updated
+        """
+        if not material_ids:
+            return 0
+        updated = ReferenceMaterial.query.filter(
+            ReferenceMaterial.id.in_(material_ids),
+            ReferenceMaterial.is_active.is_(False)
+        ).update({ReferenceMaterial.elasticsearch_indexed: False}, synchronize_session=False)
+        db.session.commit()
+        return updated
+
+    def _company_ids(self) -> List[int]:
+        return [row[0] for row in db.session.query(ReferenceMaterial.company_id).distinct()]
+
+    def sweep_orphans(self, company_ids: Optional[List[int]] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Reconcile the search index with ReferenceChunk, one company at a time
+
+        1. Scroll the company's documents and check their chunk ids against
+           the database in batches; documents whose chunk row is gone or whose
+           material is deleted or belongs to another company are deleted by id.
+        2. Completed, active materials with fewer documents than stored chunks
+           are reindexed from their stored embeddings.
+        3. Deleted materials whose documents are all gone are marked purged.
+
+        The index is read before the database, so chunks written during the
+        sweep are never mistaken for orphans.
+
+        Args:
+            company_ids: Companies to sweep (default: every company with materials)
+            dry_run: Only count, change nothing
+
+        Returns:
+            Dict with companies, scanned, orphaned, deleted, reindexed, purged and errors
+        """
+        backend = get_retrieval_backend()
+        stats = {'companies': 0, 'scanned': 0, 'orphaned': 0, 'deleted': 0,
+                 'reindexed': 0, 'purged': 0, 'errors': 0}
+        for company_id in company_ids if company_ids is not None else self._company_ids():
+            stats['companies'] += 1
+            try:
+                self._sweep_company(backend, company_id, dry_run, stats)
+            except Exception as e:
+                db.session.rollback()
+                stats['errors'] += 1
+                logger.error(f"Orphan sweep failed for company {company_id}: {e}")
+        logger.info(f"RAG orphan sweep: {stats}")
+        return stats
+
+    def _sweep_company(self, backend, company_id: int, dry_run: bool, stats: Dict[str, Any]) -> None:
+        # Deleted before the scan starts, so every document of theirs seen below is an orphan
+        pending = self.pending_purge_material_ids(company_id)
+
+        indexed_counts: Dict[int, int] = {}
+        orphan_ids: List[int] = []
+
+        def check(batch: List[Tuple[int, int]]) -> None:
+            valid = {row.id for row in db.session.query(ReferenceChunk.id).join(
+                ReferenceMaterial, ReferenceMaterial.id == ReferenceChunk.material_id
+            ).filter(
+                ReferenceChunk.id.in_([chunk_id for chunk_id, _ in batch]),
+                ReferenceMaterial.company_id == company_id,
+                ReferenceMaterial.is_active.is_(True)
+            )}
+            for chunk_id, material_id in batch:
+                if chunk_id in valid:
+                    indexed_counts[material_id] = indexed_counts.get(material_id, 0) + 1
+                else:
+                    orphan_ids.append(chunk_id)
+
+        batch: List[Tuple[int, int]] = []
+        for document in backend.iter_company_documents(company_id):
+            stats['scanned'] += 1
+            batch.append(document)
+            if len(batch) >= self.batch_size:
+                check(batch)
+                batch = []
+        if batch:
+            check(batch)
+        db.session.rollback()  # End the read transaction before the (possibly long) writes
+
+        stats['orphaned'] += len(orphan_ids)
+        if dry_run:
+            return
+
+        deleted = 0
+        for start in range(0, len(orphan_ids), self.batch_size):
+            deleted += backend.bulk_delete_chunks(orphan_ids[start:start + self.batch_size], company_id=company_id)
+        stats['deleted'] += deleted
+        if orphan_ids:
+            logger.info(f"Deleted {deleted}/{len(orphan_ids)} orphaned documents of company {company_id}")
+
+        stored_counts = dict(db.session.query(ReferenceChunk.material_id, db.func.count(ReferenceChunk.id)).join(
+            ReferenceMaterial, ReferenceMaterial.id == ReferenceChunk.material_id
+        ).filter(
+            ReferenceMaterial.company_id == company_id,
+            ReferenceMaterial.is_active.is_(True),
+            ReferenceMaterial.processing_status == 'completed',
+            ReferenceChunk.embedding.isnot(None)
+        ).group_by(ReferenceChunk.material_id).all())
+        db.session.rollback()
+        for material_id, stored in stored_counts.items():
+            if indexed_counts.get(material_id, 0) < stored:
+                try:
+                    self.reindex_material(material_id)
+                    stats['reindexed'] += 1
+                except Exception as e:
+                    db.session.rollback()
+                    stats['errors'] += 1
+                    logger.warning(f"Orphan sweep could not reindex material {material_id}: {e}")
+
+        # Orphans the bulk delete missed stay in the exclusion list until the next sweep
+        if deleted >= len(orphan_ids):
+            stats['purged'] += self.mark_purged(pending)
+
+    def company_chunk_counts(self) -> Dict[int, int]:
+        """Indexable chunks per company (sizes the dedicated-index decision)"""
+        rows = self._chunk_query(None, 0, ReferenceMaterial.company_id, db.func.count(ReferenceChunk.id)) \
+            .group_by(ReferenceMaterial.company_id).all()
+        return {company_id: count for company_id, count in rows}
+
+    def plan_layout(self) -> Dict[str, Any]:
+        """
+        Layout the next rebuild would produce
+
+        Tenants keep a dedicated index once they have one; others get one
+        when their chunk count reaches the layout's dedicated_threshold.
+
+        Returns:
+            Dict with company_counts, dedicated (sorted company ids) and promoted
+            (tenants that move out of the shared index)
+        """
+        from src.services.elasticsearch_service import elasticsearch_service
+
+        layout = elasticsearch_service.layout
+        counts = self.company_chunk_counts()
+        current = layout.dedicated_companies()
+        dedicated = current | {cid for cid, count in counts.items() if count >= layout.dedicated_threshold}
+        return {
+            'company_counts': counts,
+            'dedicated': sorted(dedicated),
+            'promoted': sorted(dedicated - current)
+        }
+
+    def rebuild_index(self, delete_old: bool = False, allow_missing: bool = False) -> Dict[str, Any]:
+        """
+        Rebuild the RAG indices from the database and swap every alias at once
+
+        Builds a new shared index (current mapping version, routed by
+        company_id) plus a dedicated index per large tenant (see plan_layout),
+        then points all aliases at them in one atomic update. This is also
+        the migration path for mapping or layout changes: searches keep
+        using the old indices until the swap. With the NumPy backend every
+        company snapshot is rebuilt instead.
+
+        Chunks created while the bulk load runs are picked up by a catch-up
+        pass before the swap. Materials deleted during the load may leave
+        documents behind in the new index; searches exclude them and the
+        next sweep_orphans run removes them. Other processes notice a
+        newly promoted tenant within the layout's cache_seconds, so run
+        promotions when that tenant is not uploading.
+
+        Args:
+            delete_old: Delete the previous indices after the swap
+            allow_missing: Swap even if some chunks have no stored embedding
+                (they will be missing from the new index)
+
+        Returns:
+            Dict with new_index, tenant_indices, old_indices, indexed, failed,
+            skipped, elapsed_seconds
+
+        Raises:
+            MissingEmbeddingsError: Chunks without embeddings and allow_missing is False
+        """
+        backend = get_retrieval_backend()
+        if backend.name != 'elasticsearch':
+            return backend.rebuild_all()
+
+        from src.services.elasticsearch_service import elasticsearch_service
+
+        started_at = datetime.utcnow()
+        layout = elasticsearch_service.layout
+
+        missing = self.count_missing_embeddings()
+        if missing and not allow_missing:
+            raise MissingEmbeddingsError(f"{missing} chunks have no stored embedding")
+
+        plan = self.plan_layout()
+        created: List[str] = []
+        try:
+            new_index = elasticsearch_service.create_versioned_index(bulk_load=True)
+            created.append(new_index)
+            tenant_indices = {}
+            for company_id in plan['dedicated']:
+                tenant_indices[company_id] = elasticsearch_service.create_versioned_index(
+                    bulk_load=True, company_id=company_id
+                )
+                created.append(tenant_indices[company_id])
+            logger.info(f"Rebuilding RAG index into {new_index} (+{len(tenant_indices)} tenant indices)")
+
+            def target(company_id: int) -> str:
+                return tenant_indices.get(company_id, new_index)
+
+            stats = {'max_chunk_id': 0}
+            result = elasticsearch_service.bulk_index_chunks(self.iter_documents(stats=stats), index=target)
+
+            # Catch-up: chunks committed during the bulk load
+            catch_up = elasticsearch_service.bulk_index_chunks(
+                self.iter_documents(min_chunk_id=stats['max_chunk_id'], stats=stats), index=target
+            )
+            result['indexed'] += catch_up['indexed']
+            result['failed'] += catch_up['failed']
+
+            if result['failed']:
+                raise Exception(f"{result['failed']} documents failed to index")
+
+            aliases = {elasticsearch_service.index_name: new_index}
+            aliases.update({layout.tenant_alias(cid): index for cid, index in tenant_indices.items()})
+            previous = elasticsearch_service.swap_aliases(aliases, delete_old=delete_old)
+        except Exception:
+            for index in created:
+                elasticsearch_service.client.indices.delete(index=index, ignore_unavailable=True)
+            raise
+
+        result.update({
+            'new_index': new_index,
+            'tenant_indices': tenant_indices,
+            'promoted': plan['promoted'],
+            'old_indices': sorted({index for indices in previous.values() for index in indices}),
+            'skipped': stats.get('skipped', 0),
+            'elapsed_seconds': round((datetime.utcnow() - started_at).total_seconds(), 1)
+        })
+        logger.info(f"RAG index rebuilt: {result}")
+        return result
+
+
+def _parse_metadata(raw: Optional[str]) -> Dict[str, Any]:
+    try:
+        return json.loads(raw) if raw else {}
+    except (TypeError, ValueError):
+        return {}
+
+
+rag_index_service = RagIndexService()
@@ -2,7 +2,7 @@
 File: rag_processor.py
 Purpose: RAG processing pipeline for reference materials
 Main functionality: Text extraction, chunking, metadata extraction, embedding generation
-Dependencies: PyPDF2, pdfplumber, python-docx, openpyxl, google.genai
+Dependencies: document_extraction (PyPDF2, pdfplumber, openpyxl), python-docx, google.genai
 """
 
 import os
@@ -11,17 +11,20 @@ import tempfile
 from typing import List, Dict, Any, Optional, Tuple
 import json
 
-# Text extraction libraries
-import PyPDF2
-import pdfplumber
+# Text extraction libraries (PDF/XLSX via src.services.document_extraction)
 from docx import Document
-from openpyxl import load_workbook
 
 # Google Gemini for embeddings and metadata
 from google import genai
 from google.genai import types
 
 from src.infrastructure.s3_manager import s3_manager
+from src.services.document_extraction import ParallelExtractor, ProgressCallback
+from src.utils.embedding_codec import text_hash
+from src.utils.text_chunker import SentenceChunker, get_token_counter, token_batches
+
+# Section headers emitted by the extractors ("[Page 12]", "[Sheet: BOM]")
+SECTION_MARKER = re.compile(r'^\[(?:Page (\d+)|Sheet: ([^\]\n]+))\]\n', re.MULTILINE)
 
 
 class RAGProcessor:
@@ -48,55 +51,46 @@ class RAGProcessor:
             location=self.location
         )
         
-        # Chunking configuration
-        self.chunk_size = 1000  # Target tokens per chunk
-        self.chunk_overlap = 50  # Overlap tokens
+        # Page/sheet-sharded extraction (process pool)
+        self.extractor = ParallelExtractor()
+        
+        # Embedding model (recorded on stored chunk embeddings)
+        self.embedding_model = 'text-embedding-004'
+        
+        # Embedding request limits (text-embedding-004: 2048 tokens per input,
+        # 250 inputs and 20k tokens per request; the batch token budget keeps
+        # a margin for estimation error)
+        self.embed_max_input_tokens = int(os.getenv('RAG_EMBED_MAX_INPUT_TOKENS', '2048'))
+        self.embed_batch_size = int(os.getenv('RAG_EMBED_BATCH_SIZE', '250'))
+        self.embed_batch_tokens = int(os.getenv('RAG_EMBED_BATCH_TOKENS', '18000'))
+        
+        # Chunking configuration (tokens as counted by self.count_tokens)
+        self.count_tokens = get_token_counter()
+        self.chunk_size = min(int(os.getenv('RAG_CHUNK_TOKENS', '1000')), self.embed_max_input_tokens)
+        self.chunk_overlap = int(os.getenv('RAG_CHUNK_OVERLAP_TOKENS', '50'))
     
-    def extract_text_from_pdf(self, file_path: str) -> Tuple[str, Dict[str, Any]]:
+    def extract_text_from_pdf(self, file_path: str, on_progress: ProgressCallback = None) -> Tuple[str, Dict[str, Any]]:
         """
         Extract text from PDF file
         
-        Uses pdfplumber for better text extraction quality
-        Falls back to PyPDF2 if pdfplumber fails
+        Pages are extracted in parallel shards (see ParallelExtractor). Pages
+        with a clean text layer use PyPDF2 directly; others use pdfplumber,
+        falling back to PyPDF2 for that page only if pdfplumber fails.
         
         Args:
             file_path: Local path to PDF file
+            on_progress: Called with (pages_done, total_pages, pages_per_sec)
         
         Returns:
             Tuple of (extracted_text, metadata)
         """
         try:
-            text_parts = []
-            metadata = {'pages': 0, 'method': 'pdfplumber'}
+            pages, metadata = self.extractor.extract_pdf(file_path, on_progress=on_progress)
             
-            # Try pdfplumber first (better quality)
-            with pdfplumber.open(file_path) as pdf:
-                metadata['pages'] = len(pdf.pages)
-                
-                for page_num, page in enumerate(pdf.pages, 1):
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_parts.append(f"[Page {page_num}]\n{page_text}")
-            
-            if text_parts:
-                return '\n\n'.join(text_parts), metadata
-        
-        except Exception as e:
-            print(f"pdfplumber failed, trying PyPDF2: {e}")
-        
-        # Fallback to PyPDF2
-        try:
-            text_parts = []
-            metadata = {'pages': 0, 'method': 'PyPDF2'}
-            
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                metadata['pages'] = len(pdf_reader.pages)
-                
-                for page_num, page in enumerate(pdf_reader.pages, 1):
-                    page_text = page.extract_text()
-                    if page_text:
-                        text_parts.append(f"[Page {page_num}]\n{page_text}")
+            text_parts = [
+                f"[Page {page['page']}]\n{page['text']}"
+                for page in pages if page['text'] and page['text'].strip()
+            ]
             
             return '\n\n'.join(text_parts), metadata
         
@@ -154,42 +148,33 @@ class RAGProcessor:
             Tuple of (extracted_text, metadata)
         """
         try:
-            workbook = load_workbook(file_path, data_only=True)
-            
-            text_parts = []
-            metadata = {'sheets': len(workbook.sheetnames)}
+            sheets, metadata = self.extractor.extract_xlsx(file_path)
             
-            for sheet_name in workbook.sheetnames:
-                sheet = workbook[sheet_name]
-                
-                sheet_text = [f"[Sheet: {sheet_name}]"]
-                
-                for row in sheet.iter_rows(values_only=True):
-                    row_text = ' | '.join(str(cell) if cell is not None else '' for cell in row)
-                    if row_text.strip():
-                        sheet_text.append(row_text)
-                
-                if len(sheet_text) > 1:
-                    text_parts.append('\n'.join(sheet_text))
+            text_parts = [
+                f"[Sheet: {sheet_name}]\n{sheet_text}"
+                for sheet_name, sheet_text in sheets if sheet_text.strip()
+            ]
             
             return '\n\n'.join(text_parts), metadata
         
         except Exception as e:
             raise Exception(f"Failed to extract XLSX text: {str(e)}")
     
-    def extract_text(self, file_path: str, file_type: str) -> Tuple[str, Dict[str, Any]]:
+    def extract_text(self, file_path: str, file_type: str,
+                     on_progress: ProgressCallback = None) -> Tuple[str, Dict[str, Any]]:
         """
         Extract text from file based on type
         
         Args:
             file_path: Local path to file
             file_type: File type (pdf, docx, xlsx, csv)
+            on_progress: PDF page progress callback (pages_done, total_pages, pages_per_sec)
         
         Returns:
             Tuple of (extracted_text, metadata)
         """
         if file_type == 'pdf':
-            return self.extract_text_from_pdf(file_path)
+            return self.extract_text_from_pdf(file_path, on_progress=on_progress)
         elif file_type == 'docx':
             return self.extract_text_from_docx(file_path)
         elif file_type == 'xlsx':
@@ -282,69 +267,79 @@ Format your response as JSON:
     
     def chunk_text(self, text: str, chunk_size: int = None, overlap: int = None) -> List[Dict[str, Any]]:
         """
-        Split text into chunks with overlap
+        Split text into chunks of whole sentences
         
-        Strategy:
-        1. Split by paragraphs (double newlines)
-        2. Combine paragraphs until reaching target chunk size
-        3. Add overlap from previous chunk
+        Strategy (see SentenceChunker):
+        1. Split at sentence ends (。！？!? and ". ") and blank lines in one pass
+        2. Pack sentences until the next one would exceed the token budget
+        3. Start the next chunk with the previous chunk's trailing sentences
+           that fit in the overlap budget
+        
+        Tokens are counted per script (kanji, kana, Latin, digits) or with a
+        local tokenizer (RAG_TOKEN_COUNTER), so Japanese chunks stay within the
+        embedding model's input limit.
         
         Args:
             text: Text to chunk
-            chunk_size: Target tokens per chunk (default: self.chunk_size)
+            chunk_size: Maximum tokens per chunk (default: self.chunk_size)
             overlap: Overlap tokens (default: self.chunk_overlap)
         
         Returns:
             List of chunks with metadata
         """
-        chunk_size = chunk_size or self.chunk_size
-        overlap = overlap or self.chunk_overlap
+        chunk_size = min(chunk_size or self.chunk_size, self.embed_max_input_tokens)
+        overlap = self.chunk_overlap if overlap is None else overlap
+        
+        return SentenceChunker(chunk_size, overlap, self.count_tokens).chunk(text)
+    
+    def split_sections(self, text: str) -> List[Tuple[Dict[str, Any], str]]:
+        """
+        Split extracted text at page/sheet headers
         
-        # Simple token estimation: 1 token ≈ 4 characters
-        char_per_token = 4
-        target_chars = chunk_size * char_per_token
-        overlap_chars = overlap * char_per_token
+        Args:
+            text: Extracted text
         
-        # Split by paragraphs
-        paragraphs = re.split(r'\n\n+', text)
+        Returns:
+            List of (section metadata, section body); metadata is {'page': n},
+            {'sheet': name} or {} for text without headers
+        """
+        sections = []
+        matches = list(SECTION_MARKER.finditer(text))
         
-        chunks = []
-        current_chunk = []
-        current_length = 0
+        preamble = text[:matches[0].start()] if matches else text
+        if preamble.strip():
+            sections.append(({}, preamble))
         
-        for para in paragraphs:
-            para = para.strip()
-            if not para:
-                continue
-            
-            para_length = len(para)
-            
-            # If adding this paragraph exceeds target, save current chunk
-            if current_length + para_length > target_chars and current_chunk:
-                chunk_text = '\n\n'.join(current_chunk)
-                chunks.append({
-                    'text': chunk_text,
-                    'char_length': len(chunk_text),
-                    'estimated_tokens': len(chunk_text) // char_per_token
-                })
-                
-                # Start new chunk with overlap
-                overlap_text = chunk_text[-overlap_chars:] if len(chunk_text) > overlap_chars else chunk_text
-                current_chunk = [overlap_text, para]
-                current_length = len(overlap_text) + para_length
-            else:
-                current_chunk.append(para)
-                current_length += para_length
-        
-        # Add final chunk
-        if current_chunk:
-            chunk_text = '\n\n'.join(current_chunk)
-            chunks.append({
-                'text': chunk_text,
-                'char_length': len(chunk_text),
-                'estimated_tokens': len(chunk_text) // char_per_token
-            })
+        for i, match in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+            page, sheet = match.group(1), match.group(2)
+            section_meta = {'page': int(page)} if page else {'sheet': sheet}
+            sections.append((section_meta, text[match.end():end]))
         
+        return sections
+    
+    def chunk_sections(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Chunk text section by section (chunks never span a page or sheet)
+        
+        Keeping chunk boundaries inside sections makes them stable across
+        revisions: editing one page only changes that page's chunks, so
+        unchanged chunks keep their text hash and stored embedding. The page
+        or sheet is kept in chunk metadata instead of the chunk text, so
+        renumbered pages do not change the hash either.
+        
+        Args:
+            text: Extracted text
+        
+        Returns:
+            List of chunks (as chunk_text) with 'metadata' and 'text_hash'
+        """
+        chunks = []
+        for section_meta, body in self.split_sections(text):
+            for chunk in self.chunk_text(body):
+                chunk['metadata'] = dict(section_meta)
+                chunk['text_hash'] = text_hash(chunk['text'])
+                chunks.append(chunk)
         return chunks
     
     def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
@@ -360,14 +355,14 @@ Format your response as JSON:
         try:
             embeddings = []
             
-            # Process in batches of 100
-            batch_size = 100
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i + batch_size]
+            # Batches bounded by input count and total tokens
+            token_counts = [self.count_tokens(text) for text in texts]
+            for start, end in token_batches(token_counts, self.embed_batch_size, self.embed_batch_tokens):
+                batch = texts[start:end]
                 
                 # Use Vertex AI embeddings
                 response = self.client.models.embed_content(
-                    model='text-embedding-004',
+                    model=self.embedding_model,
                     contents=batch
                 )
                 
@@ -393,7 +388,8 @@ Format your response as JSON:
         return embeddings[0] if embeddings else []
     
     def process_material(self, material_id: int, company_id: int, file_path_s3: str,
-                        file_type: str, title: str) -> Dict[str, Any]:
+                        file_type: str, title: str, reusable_hashes: Optional[set] = None,
+                        on_progress: ProgressCallback = None) -> Dict[str, Any]:
         """
         Complete RAG processing pipeline
         
@@ -403,11 +399,15 @@ Format your response as JSON:
             file_path_s3: S3 URI
             file_type: File type
             title: Material title
+            reusable_hashes: Text hashes of chunks that already have a stored
+                embedding; those chunks are returned with embedding None
+            on_progress: Extraction progress callback (pages_done, total_pages, pages_per_sec)
         
         Returns:
             Processing results
         """
         temp_file = None
+        reusable_hashes = reusable_hashes or set()
         
         try:
             # Step 1: Download from S3
@@ -418,7 +418,7 @@ Format your response as JSON:
                 s3_manager.download_file(s3_key, temp_file)
             
             # Step 2: Extract text
-            extracted_text, extraction_metadata = self.extract_text(temp_file, file_type)
+            extracted_text, extraction_metadata = self.extract_text(temp_file, file_type, on_progress=on_progress)
             
             if not extracted_text or len(extracted_text) < 10:
                 raise Exception("Insufficient text extracted from file")
@@ -427,25 +427,29 @@ Format your response as JSON:
             gemini_metadata = self.extract_metadata_with_gemini(extracted_text, title)
             
             # Step 4: Chunk text
-            chunks = self.chunk_text(extracted_text)
+            chunks = self.chunk_sections(extracted_text)
             
             if not chunks:
                 raise Exception("No chunks generated from text")
             
-            # Step 5: Generate embeddings
-            chunk_texts = [chunk['text'] for chunk in chunks]
-            embeddings = self.generate_embeddings(chunk_texts)
+            # Step 5: Generate embeddings for new or changed chunk texts only
+            texts_to_embed = list(dict.fromkeys(
+                chunk['text'] for chunk in chunks if chunk['text_hash'] not in reusable_hashes
+            ))
+            embeddings_by_text = dict(zip(texts_to_embed, self.generate_embeddings(texts_to_embed))) \
+                if texts_to_embed else {}
             
             # Combine chunks with embeddings
             processed_chunks = []
-            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+            for i, chunk in enumerate(chunks):
                 processed_chunks.append({
                     'chunk_index': i,
                     'text': chunk['text'],
+                    'text_hash': chunk['text_hash'],
                     'char_length': chunk['char_length'],
                     'estimated_tokens': chunk['estimated_tokens'],
-                    'embedding': embedding,
-                    'metadata': {}
+                    'embedding': embeddings_by_text.get(chunk['text']),
+                    'metadata': chunk['metadata']
                 })
             
             return {
@@ -454,6 +458,7 @@ Format your response as JSON:
                 'extraction_metadata': extraction_metadata,
                 'gemini_metadata': gemini_metadata,
                 'chunk_count': len(processed_chunks),
+                'embedded_count': len(texts_to_embed),
                 'chunks': processed_chunks
             }
         
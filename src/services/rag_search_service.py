@@ -0,0 +1,155 @@
+"""
+File: rag_search_service.py
+Purpose: Cached RAG retrieval for manual generation
+Main functionality: Query-embedding cache (normalized text -> embedding), search-result cache keyed by
+                    company, query and material-set version, version bump when a company's
+                    reference materials change
+Dependencies: cache_store, embedding_codec, RAG processor (embedding client), retrieval backend,
+              RAG index service (soft-deleted materials)
+"""
+
+import os
+import uuid
+import base64
+import hashlib
+import logging
+from typing import Any, Dict, List
+
+from src.models.models import ReferenceMaterial
+from src.services.rag_index_service import rag_index_service
+from src.services.retrieval_backend import get_retrieval_backend
+from src.utils.cache_store import get_cache_store, register_commit_invalidator
+from src.utils.embedding_codec import encode_embedding, decode_embedding
+
+logger = logging.getLogger(__name__)
+
+_PENDING_KEY = 'rag_dirty_companies'
+
+
+class RagSearchService:
+    """
+    Two-level cache in front of query embedding and hybrid search.
+
+    Level 1 maps normalized query text to its embedding (stored as float16),
+    so a repeated query costs no model call; the embedding client stays
+    loaded on the rag_processor singleton. Level 2 maps (company, query,
+    parameters, material-set version) to search results. The version is a
+    token per company that is replaced whenever a transaction that writes
+    one of the company's ReferenceMaterial rows commits, which orphans every
+    cached result of that company at once.
+
+    Without CACHE_REDIS_URL the caches are per process, so version bumps
+    from a Celery worker only reach web processes through the result TTL.
+
+    Deleted materials are excluded from searches until their documents are
+    purged from the index (see RagIndexService.pending_purge_material_ids);
+    the excluded IDs are part of the result key, so cache hits honour them.
+
+    Attributes:
+        embedding_ttl: Query embedding lifetime in seconds (RAG_QUERY_EMBEDDING_CACHE_TTL)
+        result_ttl: Search result lifetime in seconds (RAG_SEARCH_CACHE_TTL, 0 disables)
+    """
+
+    def __init__(self):
+        self.embedding_cache = get_cache_store('rag_query_embeddings')
+        self.result_cache = get_cache_store('rag_search_results')
+        self.version_cache = get_cache_store('rag_material_versions')
+        self.embedding_ttl = int(os.getenv('RAG_QUERY_EMBEDDING_CACHE_TTL', '86400'))
+        self.result_ttl = int(os.getenv('RAG_SEARCH_CACHE_TTL', '300'))
+        # Versions must outlive any cached result that refers to them
+        self.version_ttl = max(self.result_ttl, 1) * 10
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return ' '.join((text or '').split())
+
+    @staticmethod
+    def _digest(*parts: Any) -> str:
+        return hashlib.sha256('\x1f'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+    def embed_query(self, query_text: str) -> List[float]:
+        """
+        Embedding of a search query, from cache when the same text was embedded before
+
+        Args:
+            query_text: Query (whitespace differences are ignored)
+
+        Returns:
+            Embedding vector (768-dim)
+        """
+        # Imported here so that importing this module (for its session hooks) stays cheap
+        from src.services.rag_processor import rag_processor
+
+        text = self._normalize(query_text)
+        key = self._digest(rag_processor.embedding_model, text)
+        if self.embedding_ttl > 0:
+            cached = self.embedding_cache.get(key)
+            if cached is not None:
+                return decode_embedding(base64.b64decode(cached), 'float16')
+
+        embedding = rag_processor.generate_embedding(text)
+        if embedding and self.embedding_ttl > 0:
+            data, _ = encode_embedding(embedding, 'float16')
+            self.embedding_cache.set(key, base64.b64encode(data).decode('ascii'), self.embedding_ttl)
+        return embedding
+
+    def material_set_version(self, company_id: int) -> str:
+        """Current version token of a company's reference material set"""
+        version = self.version_cache.get(str(company_id))
+        if version is None:
+            version = uuid.uuid4().hex
+            self.version_cache.set(str(company_id), version, self.version_ttl)
+        return version
+
+    def invalidate(self, company_id: int) -> None:
+        """
+        Start a new material-set version for a company (cached results become unreachable)
+
+        Args:
+            company_id: Company whose materials changed
+        """
+        self.version_cache.set(str(company_id), uuid.uuid4().hex, self.version_ttl)
+
+    def search(self, company_id: int, query_text: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Hybrid search over a company's reference materials with both cache levels
+
+        Args:
+            company_id: Company ID (tenant isolation)
+            query_text: Search query
+            top_k: Number of results
+
+        Returns:
+            Results of RetrievalBackend.hybrid_search
+        """
+        text = self._normalize(query_text)
+        # Part of the result key, so a cached result never outlives the
+        # exclusion of a material deleted after it was stored (e.g. when the
+        # version bump has not reached this process)
+        exclude_ids = sorted(rag_index_service.pending_purge_material_ids(company_id))
+        key = None
+        if self.result_ttl > 0:
+            key = (f"{company_id}:{self.material_set_version(company_id)}:"
+                   f"{self._digest(text, top_k, exclude_ids)}")
+            cached = self.result_cache.get(key)
+            if cached is not None:
+                logger.info(f"RAG search cache hit for company {company_id}")
+                return cached
+
+        results = get_retrieval_backend().hybrid_search(
+            query_text=text,
+            query_embedding=self.embed_query(text),
+            company_id=company_id,
+            top_k=top_k,
+            exclude_material_ids=exclude_ids
+        )
+
+        if key is not None:
+            self.result_cache.set(key, results, self.result_ttl)
+        return results
+
+
+rag_search_service = RagSearchService()
+
+# Bump material-set versions once a transaction writing reference materials commits
+register_commit_invalidator(ReferenceMaterial, _PENDING_KEY, rag_search_service.invalidate)
@@ -0,0 +1,175 @@
+"""
+File: retrieval_backend.py
+Purpose: Pluggable retrieval backend for RAG chunk search
+Main functionality: RetrievalBackend interface shared by the ElasticSearch and embedded NumPy
+                    backends, reciprocal rank fusion, backend selection (RAG_RETRIEVAL_BACKEND)
+Dependencies: typing, threading
+"""
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+BACKENDS = ('elasticsearch', 'numpy')
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Tuple[Any, Any]]], weights: Sequence[float],
+                           rank_constant: int, top_k: int) -> List[Tuple[Any, float]]:
+    """
+    Fuse ranked lists with weighted reciprocal rank fusion
+
+    score(item) = sum(2 * weight / (rank_constant + rank)) over the lists
+    containing it (the factor 2 makes equal weights of 0.5 match plain RRF).
+
+    Args:
+        rankings: One list per retriever of (key, payload), best first
+        weights: Weight per ranking
+        rank_constant: RRF k
+        top_k: Number of fused results
+
+    Returns:
+        List of (payload, fused score), best first; the payload of the first
+        ranking that contained the key is kept
+    """
+    fused: Dict[Any, List] = {}
+    for weight, ranking in zip(weights, rankings):
+        for rank, (key, payload) in enumerate(ranking, start=1):
+            entry = fused.setdefault(key, [payload, 0.0])
+            entry[1] += 2 * weight / (rank_constant + rank)
+    ranked = sorted(fused.values(), key=lambda entry: entry[1], reverse=True)[:top_k]
+    return [(payload, score) for payload, score in ranked]
+
+
+class RetrievalBackend(ABC):
+    """
+    Storage and search of chunk documents for one deployment
+
+    Writers (RagIndexService, material routes) and readers (RagSearchService)
+    only use these methods, so backends are interchangeable. Search results
+    are dicts with chunk_id, material_id, chunk_text, chunk_index, metadata
+    and score; vector scores are (1 + cosine) / 2 in every backend.
+
+    Deleting a material is a soft delete: searches drop the material through
+    exclude_material_ids at once, and its documents are removed in the
+    background (start_delete_material_chunks / delete_task_status).
+    """
+
+    name = 'base'
+
+    def build_chunk_document(self, chunk_id: int, material_id: int, company_id: int,
+                             chunk_text: str, chunk_index: int, embedding: List[float],
+                             metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Backend document for one chunk"""
+        return {
+            "chunk_id": chunk_id,
+            "material_id": material_id,
+            "company_id": company_id,
+            "chunk_text": chunk_text,
+            "chunk_index": chunk_index,
+            "embedding": embedding,
+            "metadata": metadata or {},
+            "created_at": None  # Will be set by ElasticSearch
+        }
+
+    @abstractmethod
+    def create_index(self) -> bool:
+        """Make sure the backend can accept documents"""
+
+    @abstractmethod
+    def index_for_company(self, company_id: int) -> str:
+        """Name of the index holding a company's chunks (recorded on ReferenceMaterial)"""
+
+    @abstractmethod
+    def bulk_index_chunks(self, documents: Iterable[Dict[str, Any]],
+                          index: Union[str, Callable[[int], str], None] = None) -> Dict[str, int]:
+        """Add or overwrite documents; returns indexed and failed counts"""
+
+    @abstractmethod
+    def bulk_update_chunks(self, updates: Dict[int, Dict[str, Any]], company_id: int,
+                           index: str = None) -> Dict[str, int]:
+        """Patch fields of existing documents; returns updated and failed counts"""
+
+    @abstractmethod
+    def bulk_delete_chunks(self, chunk_ids: List[int], company_id: int, index: str = None) -> int:
+        """Delete documents by chunk id"""
+
+    @abstractmethod
+    def delete_material_chunks(self, material_id: int, company_id: int) -> int:
+        """Delete all documents of a material"""
+
+    @abstractmethod
+    def delete_stale_material_chunks(self, material_id: int, company_id: int,
+                                     keep_chunk_ids: List[int]) -> int:
+        """Delete a material's documents whose chunk_id is not in keep_chunk_ids"""
+
+    @abstractmethod
+    def start_delete_material_chunks(self, material_id: int, company_id: int,
+                                     keep_chunk_ids: Optional[List[int]] = None) -> Optional[str]:
+        """
+        Start deleting a material's documents (all, or those not in keep_chunk_ids) without waiting
+
+        Returns:
+            Task id for delete_task_status, or None if the deletion already finished
+        """
+
+    @abstractmethod
+    def delete_task_status(self, task_id: str) -> Dict[str, Any]:
+        """Progress of a background delete: completed, deleted, total, failures, error"""
+
+    @abstractmethod
+    def iter_company_documents(self, company_id: int) -> Iterator[Tuple[int, int]]:
+        """(chunk_id, material_id) of every document stored for a company"""
+
+    @abstractmethod
+    def get_material_chunk_count(self, material_id: int, company_id: int) -> int:
+        """Number of searchable chunks of a material"""
+
+    @abstractmethod
+    def vector_search(self, query_embedding: List[float], company_id: int,
+                      top_k: int = 10, min_score: float = 0.7,
+                      num_candidates: Optional[int] = None,
+                      exclude_material_ids: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+        """kNN search within a company, skipping soft-deleted materials"""
+
+    @abstractmethod
+    def hybrid_search(self, query_text: str, query_embedding: List[float],
+                      company_id: int, top_k: int = 10,
+                      vector_weight: float = 0.5, num_candidates: Optional[int] = None,
+                      fusion: Optional[str] = None,
+                      exclude_material_ids: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+        """BM25 + kNN search within a company, fused by rank, skipping soft-deleted materials"""
+
+    @abstractmethod
+    def health_check(self) -> bool:
+        """True if the backend can serve searches"""
+
+
+_backend: Optional[RetrievalBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_retrieval_backend() -> RetrievalBackend:
+    """
+    Process-wide retrieval backend selected by RAG_RETRIEVAL_BACKEND
+
+    'elasticsearch' (default) or 'numpy' (embedded, for development and
+    small installs). Only the selected backend's module is imported, so the
+    NumPy backend runs without the elasticsearch package.
+
+    Raises:
+        ValueError: Unknown backend name
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            name = os.getenv('RAG_RETRIEVAL_BACKEND', 'elasticsearch').lower()
+            if name == 'elasticsearch':
+                from src.services.elasticsearch_service import elasticsearch_service
+                _backend = elasticsearch_service
+            elif name == 'numpy':
+                from src.services.numpy_retrieval import numpy_retrieval_backend
+                _backend = numpy_retrieval_backend
+            else:
+                raise ValueError(f"Unknown RAG_RETRIEVAL_BACKEND '{name}' (expected one of {', '.join(BACKENDS)})")
+        return _backend
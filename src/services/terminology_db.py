@@ -4,10 +4,15 @@
 
 import sqlite3
 import json
-from typing import List, Dict, Any, Optional
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 import logging
 
+from src.utils.term_matcher import AhoCorasickMatcher
+
 logger = logging.getLogger(__name__)
 
 class TerminologyDatabase:
@@ -23,14 +28,108 @@ class TerminologyDatabase:
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
+        # 共有コネクション（メソッド呼び出しごとの接続を避ける）
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        
+        # 用語マッチャー（用語変更時に再構築）
+        self._matcher: Optional[AhoCorasickMatcher] = None
+        self._matcher_entries: List[Tuple[str, str, str, int, str]] = []
+        self._matcher_key: Optional[Tuple[int, int]] = None
+        self._terms_version = 0
+        
+        # FTS5が利用できない環境ではLIKE検索にフォールバック
+        self._fts_enabled = False
+        
         # データベースの初期化
         self._initialize_database()
         
         logger.info(f"用語データベースを初期化しました: {self.db_path}")
     
+    @contextmanager
+    def _connection(self):
+        """
+        共有コネクションを取得（with sqlite3.connect と同じく正常終了時にcommit、例外時にrollback）
+        
+        Yields:
+            sqlite3.Connection
+        """
+        with self._lock:
+            if self._conn is None:
+                conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10)
+                # WALモード: 他プロセスの読み取りと書き込みが互いをブロックしない
+                # （プロセス内の呼び出しは共有コネクションと self._lock で直列化される）
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+                # INSERT OR REPLACE による削除でもFTS同期トリガーを発火させる
+                conn.execute('PRAGMA recursive_triggers=ON')
+                self._conn = conn
+            try:
+                yield self._conn
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+    
+    def close(self):
+        """共有コネクションを閉じる"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                self._matcher_key = None
+    
+    def _invalidate_matcher(self):
+        """用語・同義語の変更時にマッチャーを破棄"""
+        self._terms_version += 1
+    
+    def _get_matcher(self, conn: sqlite3.Connection) -> AhoCorasickMatcher:
+        """
+        用語・同義語のAho-Corasickマッチャーを取得（変更がなければ再利用）
+        
+        自プロセスの変更は _terms_version、他コネクションによる変更は
+        PRAGMA data_version で検知する。
+        
+        Args:
+            conn: 共有コネクション
+            
+        Returns:
+            構築済みのマッチャー
+        """
+        data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+        key = (self._terms_version, data_version)
+        if self._matcher is not None and self._matcher_key == key:
+            return self._matcher
+        
+        cursor = conn.cursor()
+        cursor.execute('SELECT term, definition, category, difficulty_level FROM terms ORDER BY id')
+        entries = [
+            (term, definition, category, difficulty, term)
+            for term, definition, category, difficulty in cursor.fetchall()
+        ]
+        # 同義語は正式用語の後に並べる（重複除去で正式用語を優先するため）
+        cursor.execute('''
+            SELECT s.synonym, t.term, t.definition, t.category, t.difficulty_level
+            FROM term_synonyms s
+            JOIN terms t ON s.term_id = t.id
+            ORDER BY s.id
+        ''')
+        entries.extend(
+            (term, definition, category, difficulty, synonym)
+            for synonym, term, definition, category, difficulty in cursor.fetchall()
+        )
+        
+        self._matcher = AhoCorasickMatcher(
+            (found_as, index) for index, (_, _, _, _, found_as) in enumerate(entries)
+        )
+        self._matcher_entries = entries
+        self._matcher_key = key
+        logger.info(f"用語マッチャーを構築しました: {self._matcher.pattern_count}パターン")
+        return self._matcher
+    
     def _initialize_database(self):
         """データベーステーブルの初期化"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             
             # 用語テーブル
@@ -77,9 +176,110 @@ class TerminologyDatabase:
             
             conn.commit()
             
+            # 全文検索インデックス（初期データ投入前にトリガーを作成）
+            self._initialize_search_index(cursor)
+            
             # 初期データの投入
             self._insert_initial_data(cursor)
     
+    def _initialize_search_index(self, cursor):
+        """
+        FTS5全文検索インデックスと同期トリガーの作成
+        
+        terms_fts の rowid は terms.id と一致する。trigramトークナイザーにより
+        日本語の部分文字列（3文字以上）もインデックスで検索できる。
+        
+        Args:
+            cursor: データベースカーソル
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'terms_fts'")
+        exists = cursor.fetchone() is not None
+        
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS terms_fts USING fts5(
+                    term, synonyms, definition,
+                    tokenize = 'trigram'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5(trigram)が利用できないためLIKE検索を使用します: {e}")
+            self._fts_enabled = False
+            return
+        
+        synonyms_expr = "(SELECT GROUP_CONCAT(synonym, ' ') FROM term_synonyms WHERE term_id = {})"
+        
+        # 用語テーブルの同期（usage_frequency の更新では発火しない）
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS terms_fts_ai AFTER INSERT ON terms BEGIN
+                INSERT INTO terms_fts (rowid, term, synonyms, definition)
+                VALUES (new.id, new.term, {synonyms_expr.format('new.id')}, new.definition);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS terms_fts_ad AFTER DELETE ON terms BEGIN
+                DELETE FROM terms_fts WHERE rowid = old.id;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS terms_fts_au AFTER UPDATE OF term, definition ON terms BEGIN
+                DELETE FROM terms_fts WHERE rowid = old.id;
+                INSERT INTO terms_fts (rowid, term, synonyms, definition)
+                VALUES (new.id, new.term, {synonyms_expr.format('new.id')}, new.definition);
+            END
+        ''')
+        
+        # 同義語テーブルの同期
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS term_synonyms_fts_ai AFTER INSERT ON term_synonyms BEGIN
+                UPDATE terms_fts SET synonyms = {synonyms_expr.format('new.term_id')}
+                WHERE rowid = new.term_id;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS term_synonyms_fts_ad AFTER DELETE ON term_synonyms BEGIN
+                UPDATE terms_fts SET synonyms = {synonyms_expr.format('old.term_id')}
+                WHERE rowid = old.term_id;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS term_synonyms_fts_au AFTER UPDATE ON term_synonyms BEGIN
+                UPDATE terms_fts SET synonyms = {synonyms_expr.format('old.term_id')}
+                WHERE rowid = old.term_id;
+                UPDATE terms_fts SET synonyms = {synonyms_expr.format('new.term_id')}
+                WHERE rowid = new.term_id;
+            END
+        ''')
+        
+        self._fts_enabled = True
+        
+        # 既存データベースへの初回作成時は既存の用語を投入
+        if not exists:
+            self._populate_search_index(cursor)
+    
+    def _populate_search_index(self, cursor):
+        """terms_fts を terms / term_synonyms から再構築"""
+        cursor.execute('DELETE FROM terms_fts')
+        cursor.execute('''
+            INSERT INTO terms_fts (rowid, term, synonyms, definition)
+            SELECT t.id, t.term,
+                   (SELECT GROUP_CONCAT(s.synonym, ' ') FROM term_synonyms s WHERE s.term_id = t.id),
+                   t.definition
+            FROM terms t
+        ''')
+    
+    def rebuild_search_index(self):
+        """
+        全文検索インデックスを再構築
+        
+        トリガー導入前に別ツールで直接更新された場合などに使用する。
+        """
+        if not self._fts_enabled:
+            return
+        with self._connection() as conn:
+            self._populate_search_index(conn.cursor())
+        logger.info("用語検索インデックスを再構築しました")
+    
     def _insert_initial_data(self, cursor):
         """初期データの投入"""
         initial_terms = [
@@ -165,7 +365,7 @@ class TerminologyDatabase:
         Returns:
             追加された用語のID
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             
             # 用語を追加
@@ -201,6 +401,7 @@ class TerminologyDatabase:
                     ))
             
             conn.commit()
+            self._invalidate_matcher()
             logger.info(f"用語を追加しました: {term}")
             return term_id
     
@@ -208,20 +409,174 @@ class TerminologyDatabase:
         self, 
         query: str, 
         category: Optional[str] = None,
-        difficulty_level: Optional[int] = None
+        difficulty_level: Optional[int] = None,
+        limit: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
-        用語検索
+        用語検索（FTS5 trigram + bm25 によるランキング）
+        
+        用語・同義語・定義の部分一致で検索し、bm25 スコア（用語 > 同義語 > 定義の重み付け）、
+        使用頻度の順に並べる。3文字未満のクエリは trigram インデックスが使えないため
+        FTSテーブル上のLIKE検索となる。
         
         Args:
             query: 検索クエリ
             category: カテゴリフィルター
             difficulty_level: 難易度フィルター
+            limit: 最大件数（None で全件）
             
         Returns:
             検索結果のリスト
         """
-        with sqlite3.connect(self.db_path) as conn:
+        if not self._fts_enabled:
+            return self._search_terms_like(query, category, difficulty_level, limit)
+        
+        query = (query or '').strip()
+        if len(query) >= 3:
+            hits_sql = '''
+                SELECT rowid AS id, bm25(terms_fts, 10.0, 5.0, 1.0) AS rank
+                FROM terms_fts
+                WHERE terms_fts MATCH ?
+            '''
+            params: List[Any] = [self._fts_phrase(query)]
+        else:
+            like = f'%{self._escape_like(query)}%'
+            hits_sql = '''
+                SELECT rowid AS id, 0 AS rank
+                FROM terms_fts
+                WHERE term LIKE ? ESCAPE '\\' OR synonyms LIKE ? ESCAPE '\\' OR definition LIKE ? ESCAPE '\\'
+            '''
+            params = [like, like, like]
+        
+        sql = f'''
+            WITH hits AS ({hits_sql})
+            SELECT t.*,
+                   (SELECT GROUP_CONCAT(DISTINCT s.synonym) FROM term_synonyms s
+                    WHERE s.term_id = t.id) AS synonyms,
+                   (SELECT GROUP_CONCAT(DISTINCT d.document_name) FROM term_documents d
+                    WHERE d.term_id = t.id) AS documents
+            FROM hits
+            JOIN terms t ON t.id = hits.id
+            WHERE 1 = 1
+        '''
+        
+        # フィルター条件追加
+        if category:
+            sql += ' AND t.category = ?'
+            params.append(category)
+        
+        if difficulty_level:
+            sql += ' AND t.difficulty_level = ?'
+            params.append(difficulty_level)
+        
+        sql += ' ORDER BY hits.rank, t.usage_frequency DESC, t.term'
+        
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return self._rows_to_term_dicts(cursor)
+    
+    def suggest_terms(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        前方一致による用語候補の取得（入力補完用）
+        
+        用語または同義語が prefix で始まるものを、用語での一致・使用頻度・用語の短さの順に返す。
+        
+        Args:
+            prefix: 入力中の文字列
+            limit: 最大件数
+            
+        Returns:
+            候補のリスト（id, term, category, difficulty_level, matched）
+        """
+        prefix = (prefix or '').strip()
+        if not prefix:
+            return []
+        
+        like_prefix = f'{self._escape_like(prefix)}%'
+        like_synonym = f'% {self._escape_like(prefix)}%'
+        
+        if not self._fts_enabled:
+            candidates_sql = '''
+                SELECT t.id, t.term,
+                       (SELECT GROUP_CONCAT(synonym, ' ') FROM term_synonyms WHERE term_id = t.id) AS synonyms
+                FROM terms t
+            '''
+            params: List[Any] = []
+        elif len(prefix) >= 3:
+            # trigramインデックスで部分一致候補を絞り込み、前方一致で確定
+            candidates_sql = '''
+                SELECT rowid AS id, term, synonyms FROM terms_fts
+                WHERE terms_fts MATCH ?
+            '''
+            params = ['{term synonyms} : ' + self._fts_phrase(prefix)]
+        else:
+            candidates_sql = 'SELECT rowid AS id, term, synonyms FROM terms_fts'
+            params = []
+        
+        sql = f'''
+            WITH candidates AS ({candidates_sql})
+            SELECT t.id, t.term, t.category, t.difficulty_level,
+                   c.term LIKE ? ESCAPE '\\' AS term_match
+            FROM candidates c
+            JOIN terms t ON t.id = c.id
+            WHERE c.term LIKE ? ESCAPE '\\' OR (' ' || COALESCE(c.synonyms, '')) LIKE ? ESCAPE '\\'
+            ORDER BY term_match DESC, t.usage_frequency DESC, LENGTH(t.term), t.term
+            LIMIT ?
+        '''
+        params += [like_prefix, like_prefix, like_synonym, limit]
+        
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return [
+                {
+                    'id': term_id,
+                    'term': term,
+                    'category': category,
+                    'difficulty_level': difficulty,
+                    'matched': 'term' if term_match else 'synonym'
+                }
+                for term_id, term, category, difficulty, term_match in cursor.fetchall()
+            ]
+    
+    @staticmethod
+    def _fts_phrase(text: str) -> str:
+        """FTS5 MATCH 用にクエリを1つのフレーズとしてエスケープ"""
+        return '"' + text.replace('"', '""') + '"'
+    
+    @staticmethod
+    def _escape_like(text: str) -> str:
+        """LIKE パターン用のワイルドカードをエスケープ"""
+        return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    
+    @staticmethod
+    def _rows_to_term_dicts(cursor) -> List[Dict[str, Any]]:
+        """検索結果の行を辞書に変換（同義語と文書はリスト化）"""
+        columns = [description[0] for description in cursor.description]
+        results = []
+        for row in cursor.fetchall():
+            term_dict = dict(zip(columns, row))
+            term_dict['synonyms'] = term_dict['synonyms'].split(',') if term_dict['synonyms'] else []
+            term_dict['documents'] = term_dict['documents'].split(',') if term_dict['documents'] else []
+            results.append(term_dict)
+        return results
+    
+    def _search_terms_like(
+        self, 
+        query: str, 
+        category: Optional[str] = None,
+        difficulty_level: Optional[int] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        LIKEによる用語検索（FTS5が利用できない場合のフォールバック）
+        """
+        with self._connection() as conn:
             cursor = conn.cursor()
             
             # ベースクエリ
@@ -247,21 +602,12 @@ class TerminologyDatabase:
             
             sql += ' GROUP BY t.id ORDER BY t.usage_frequency DESC, t.term'
             
-            cursor.execute(sql, params)
-            rows = cursor.fetchall()
-            
-            # 結果を辞書形式に変換
-            columns = [description[0] for description in cursor.description]
-            results = []
-            
-            for row in rows:
-                term_dict = dict(zip(columns, row))
-                # 同義語と文書をリストに変換
-                term_dict['synonyms'] = term_dict['synonyms'].split(',') if term_dict['synonyms'] else []
-                term_dict['documents'] = term_dict['documents'].split(',') if term_dict['documents'] else []
-                results.append(term_dict)
+            if limit:
+                sql += ' LIMIT ?'
+                params.append(limit)
             
-            return results
+            cursor.execute(sql, params)
+            return self._rows_to_term_dicts(cursor)
     
     def get_term_by_id(self, term_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -273,7 +619,7 @@ class TerminologyDatabase:
         Returns:
             用語情報の辞書
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -305,7 +651,7 @@ class TerminologyDatabase:
         Returns:
             カテゴリ情報のリスト
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -334,7 +680,7 @@ class TerminologyDatabase:
         Args:
             term: 用語
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -356,60 +702,38 @@ class TerminologyDatabase:
         Returns:
             見つかった用語のリスト
         """
-        found_terms = []
-        
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # 全用語を取得
-            cursor.execute('SELECT term, definition, category, difficulty_level FROM terms')
-            all_terms = cursor.fetchall()
-            
-            # 同義語も取得
-            cursor.execute('''
-                SELECT s.synonym, t.term, t.definition, t.category, t.difficulty_level
-                FROM term_synonyms s
-                JOIN terms t ON s.term_id = t.id
-            ''')
-            synonyms = cursor.fetchall()
+        with self._connection() as conn:
+            matcher = self._get_matcher(conn)
+            entries = self._matcher_entries
+            
+            # テキストを1回走査して全パターンを照合
+            matched = sorted(matcher.find_all(text))
+            
+            # 使用頻度を一括更新（ヒットした正式用語・同義語ごとに+1）
+            usage_counts = Counter(entries[index][0] for index in matched)
+            if usage_counts:
+                conn.executemany('''
+                    UPDATE terms 
+                    SET usage_frequency = usage_frequency + ?,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE term = ?
+                ''', [(count, term) for term, count in usage_counts.items()])
         
-        # テキスト内での用語検索
-        text_lower = text.lower()
+        # 重複除去（正式用語での一致を同義語より優先）
+        unique_terms = []
+        seen_terms = set()
         
-        # 正式用語の検索
-        for term, definition, category, difficulty in all_terms:
-            if term.lower() in text_lower:
-                found_terms.append({
+        for index in matched:
+            term, definition, category, difficulty, found_as = entries[index]
+            if term not in seen_terms:
+                unique_terms.append({
                     'term': term,
                     'definition': definition,
                     'category': category,
                     'difficulty_level': difficulty,
-                    'found_as': term
-                })
-                # 使用頻度を更新
-                self.update_usage_frequency(term)
-        
-        # 同義語の検索
-        for synonym, original_term, definition, category, difficulty in synonyms:
-            if synonym.lower() in text_lower:
-                found_terms.append({
-                    'term': original_term,
-                    'definition': definition,
-                    'category': category,
-                    'difficulty_level': difficulty,
-                    'found_as': synonym
+                    'found_as': found_as
                 })
-                # 使用頻度を更新
-                self.update_usage_frequency(original_term)
-        
-        # 重複除去
-        unique_terms = []
-        seen_terms = set()
-        
-        for term_info in found_terms:
-            if term_info['term'] not in seen_terms:
-                unique_terms.append(term_info)
-                seen_terms.add(term_info['term'])
+                seen_terms.add(term)
         
         return unique_terms
     
@@ -420,7 +744,7 @@ class TerminologyDatabase:
         Args:
             output_path: 出力ファイルパス
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             
             cursor.execute('''
@@ -0,0 +1,147 @@
+"""
+File: transcoding_service.py
+Purpose: Background transcoding of uploaded videos
+Main functionality: Enqueue transcode jobs on the 'transcoding' Celery queue,
+                    publish each finished rendition into UploadedFile/Media metadata
+Dependencies: SQLAlchemy, models, FileManager, transcoding_tasks
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from src.models.models import db, Media, ProcessingJob, UploadedFile
+from src.infrastructure.file_manager import FileManager, get_default_file_manager
+
+logger = logging.getLogger(__name__)
+
+# resource_type -> (model, metadata getter, metadata setter)
+_RESOURCE_METADATA = {
+    'uploaded_file': (UploadedFile, 'get_metadata', 'set_metadata'),
+    'media': (Media, 'get_video_metadata', 'set_video_metadata'),
+}
+
+
+class TranscodingService:
+    """
+    Runs VideoOptimizer/HLSGenerator outside the upload request.
+
+    The original upload stays the playable source. Each rendition is merged
+    into the resource metadata under 'renditions' in its own transaction as
+    soon as it is stored, and 'transcode' tracks the job state:
+
+        {"transcode": {"job_id": 12, "status": "processing"},
+         "renditions": {"mp4": {...}, "hls": {"master_playlist": "gs://..."}}}
+    """
+
+    @property
+    def file_manager(self) -> FileManager:
+        """The application's shared FileManager (see get_default_file_manager)"""
+        return get_default_file_manager()
+
+    def enqueue(self, company_id: int, user_id: Optional[int], resource_type: str, resource_id: int,
+                file_path: str, original_filename: str, folder: Optional[str] = None) -> ProcessingJob:
+        """
+        Create a video_transcode job and dispatch it to the transcoding queue.
+
+        Args:
+            company_id: Owning company
+            user_id: Requesting user
+            resource_type: 'uploaded_file' or 'media'
+            resource_id: Primary key of the resource
+            file_path: Storage path (or gs:// URI) of the original video
+            original_filename: Filename used for the optimized MP4
+            folder: Target folder for renditions (default: company_{id}/videos)
+
+        Returns:
+            The ProcessingJob (poll it via /api/jobs/<id>)
+        """
+        if resource_type not in _RESOURCE_METADATA:
+            raise ValueError(f'Unsupported resource_type: {resource_type}')
+
+        job = ProcessingJob(
+            job_type='video_transcode',
+            job_status='pending',
+            company_id=company_id,
+            user_id=user_id,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            job_params=json.dumps({
+                'file_path': file_path,
+                'original_filename': original_filename,
+                'folder': folder or f'company_{company_id}/videos'
+            }, ensure_ascii=False)
+        )
+        db.session.add(job)
+        db.session.flush()
+        # Job row and 'queued' state commit together
+        self.set_status(job, 'queued')
+
+        try:
+            from src.workers.transcoding_tasks import transcode_video_task
+            transcode_video_task.delay(job.id)
+        except Exception as e:
+            logger.warning(f"Failed to dispatch transcode job {job.id}: {e}")
+            # The original upload is still usable; the job and resource say why
+            # no renditions will appear (commits together with the status)
+            error = f'Dispatch failed: {e}'
+            job.job_status = 'failed'
+            job.error_message = error
+            job.completed_at = datetime.utcnow()
+            self.set_status(job, 'dispatch_failed', error)
+
+        return job
+
+    def set_status(self, job: ProcessingJob, status: str, error: Optional[str] = None) -> None:
+        """Record the transcode state on the job's resource."""
+        def mutate(metadata):
+            state = {'job_id': job.id, 'status': status}
+            if error:
+                state['error'] = error
+            metadata['transcode'] = state
+        self._update_metadata(job.resource_type, job.resource_id, mutate)
+
+    def record_rendition(self, job: ProcessingJob, name: str, rendition: Dict[str, Any]) -> None:
+        """
+        Publish one finished rendition on the job's resource.
+
+        Args:
+            job: The video_transcode job
+            name: Rendition name ('mp4', 'hls')
+            rendition: Storage details returned by FileManager
+        """
+        def mutate(metadata):
+            renditions = metadata.setdefault('renditions', {})
+            renditions[name] = dict(rendition, completed_at=datetime.utcnow().isoformat())
+        self._update_metadata(job.resource_type, job.resource_id, mutate)
+        logger.info(f"Transcode job {job.id}: {name} rendition ready for "
+                    f"{job.resource_type} {job.resource_id}")
+
+    def _update_metadata(self, resource_type: str, resource_id: int,
+                         mutate: Callable[[Dict[str, Any]], None]) -> None:
+        """
+        Read-modify-write the resource metadata under a row lock and commit.
+
+        Renditions finishing while another request edits the same row cannot
+        overwrite each other's keys. The commit ends the caller's transaction:
+        pending changes in db.session (e.g. the job row in enqueue) are
+        committed with the metadata, and rolled back with it on failure.
+        """
+        model, getter, setter = _RESOURCE_METADATA[resource_type]
+        try:
+            record = db.session.query(model).filter_by(id=resource_id).with_for_update().first()
+            if record is None:
+                logger.warning(f"{resource_type} {resource_id} not found; metadata not updated")
+                db.session.commit()
+                return
+            metadata = getattr(record, getter)()
+            mutate(metadata)
+            getattr(record, setter)(metadata)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+transcoding_service = TranscodingService()
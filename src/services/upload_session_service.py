@@ -0,0 +1,417 @@
+"""
+File: upload_session_service.py
+Purpose: Resumable chunked uploads for large factory videos
+Main functionality: Session creation, chunk storage with checksum verification,
+                    offset queries, storage-side composition and UploadedFile creation
+Dependencies: SQLAlchemy, models, FileManager, streaming_upload
+"""
+
+import os
+import math
+import uuid
+import logging
+from datetime import datetime, timedelta
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from src.models.models import db, UploadSession, UploadSessionChunk, UploadedFile
+from src.infrastructure.file_manager import FileManager, get_default_file_manager
+from src.infrastructure.streaming_upload import UploadRejectedError
+from src.services.content_store_service import content_store_service
+from src.services.transcoding_service import transcoding_service
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'mov', 'avi', 'webm', 'mkv', 'flv', 'wmv', 'mpeg', 'mpg', '3gp'}
+
+
+class UploadSessionError(Exception):
+    """Upload session operation failed; status_code is the HTTP status to return"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class UploadSessionService:
+    """
+    Resumable upload protocol on top of FileManager.
+
+    Protocol:
+    1. create_session: client announces filename and total size, receives
+       session_id, chunk_size and total_chunks
+    2. store_chunk: client PUTs chunks (in any order, in parallel) with
+       their SHA-256; each chunk becomes its own storage object
+    3. get_status: client asks which chunks/offset the server has after a
+       network failure and resumes from there
+    4. finalize: chunks are composed in storage (GCS compose, no data
+       through the web node), the UploadedFile row is created and chunk
+       objects are deleted
+
+    Attributes:
+        default_chunk_size: Chunk size in bytes (UPLOAD_SESSION_CHUNK_SIZE_MB)
+        max_total_size: Maximum upload size in bytes (UPLOAD_MAX_SIZE_GB)
+        session_ttl: Lifetime of an unfinished session (UPLOAD_SESSION_TTL_HOURS)
+        finalize_timeout: Age of a 'finalizing' claim after which it is considered
+                          abandoned (UPLOAD_FINALIZE_TIMEOUT_MINUTES)
+    """
+
+    def __init__(self):
+        self.default_chunk_size = int(os.getenv('UPLOAD_SESSION_CHUNK_SIZE_MB', '16')) * 1024 * 1024
+        self.max_total_size = int(float(os.getenv('UPLOAD_MAX_SIZE_GB', '10')) * 1024 ** 3)
+        self.session_ttl = timedelta(hours=float(os.getenv('UPLOAD_SESSION_TTL_HOURS', '24')))
+        self.finalize_timeout = timedelta(minutes=float(os.getenv('UPLOAD_FINALIZE_TIMEOUT_MINUTES', '60')))
+
+    @property
+    def file_manager(self) -> FileManager:
+        """The application's shared FileManager (see get_default_file_manager)"""
+        return get_default_file_manager()
+
+    def create_session(self, company_id: int, user_id: Optional[int], filename: str, total_size: int,
+                       mime_type: Optional[str] = None, chunk_size: Optional[int] = None) -> UploadSession:
+        """
+        Start a resumable upload.
+
+        Args:
+            company_id: Owning company
+            user_id: Uploading user
+            filename: Original filename
+            total_size: Total file size in bytes
+            mime_type: Content type reported by the client
+            chunk_size: Requested chunk size in bytes (default: UPLOAD_SESSION_CHUNK_SIZE_MB)
+
+        Returns:
+            The new UploadSession
+
+        Raises:
+            UploadSessionError: Invalid filename, size or chunk size
+        """
+        if not filename or '.' not in filename or \
+                filename.rsplit('.', 1)[1].lower() not in ALLOWED_VIDEO_EXTENSIONS:
+            raise UploadSessionError(
+                f"File type not allowed. Allowed types: {', '.join(sorted(ALLOWED_VIDEO_EXTENSIONS))}"
+            )
+        if not total_size or total_size <= 0:
+            raise UploadSessionError('total_size must be a positive integer')
+        if total_size > self.max_total_size:
+            raise UploadSessionError(f'File too large. Maximum size: {self.max_total_size} bytes', 413)
+
+        chunk_size = chunk_size or self.default_chunk_size
+        if chunk_size < 256 * 1024 or chunk_size > 256 * 1024 * 1024:
+            raise UploadSessionError('chunk_size must be between 256 KB and 256 MB')
+
+        session_id = str(uuid.uuid4())
+        upload_session = UploadSession(
+            id=session_id,
+            company_id=company_id,
+            user_id=user_id,
+            original_filename=filename,
+            file_type='video',
+            mime_type=mime_type,
+            total_size=total_size,
+            chunk_size=chunk_size,
+            total_chunks=math.ceil(total_size / chunk_size),
+            folder=f'company_{company_id}/videos',
+            chunk_prefix=f'company_{company_id}/upload_sessions/{session_id}',
+            status='active',
+            expires_at=datetime.utcnow() + self.session_ttl
+        )
+        db.session.add(upload_session)
+        db.session.commit()
+
+        logger.info(f"Upload session created: {session_id} ({total_size} bytes, "
+                    f"{upload_session.total_chunks} chunks of {chunk_size})")
+        return upload_session
+
+    def get_session(self, session_id: str, company_id: int) -> UploadSession:
+        """
+        Load a session owned by the company.
+
+        Raises:
+            UploadSessionError: 404 if not found, 410 if expired
+        """
+        upload_session = UploadSession.query.filter_by(id=session_id, company_id=company_id).first()
+        if not upload_session:
+            raise UploadSessionError('Upload session not found', 404)
+        if upload_session.status == 'active' and upload_session.expires_at < datetime.utcnow():
+            raise UploadSessionError('Upload session expired', 410)
+        return upload_session
+
+    def store_chunk(self, upload_session: UploadSession, chunk_index: int, stream: BinaryIO,
+                    expected_sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Stream one chunk into storage and record it.
+
+        Re-sending a chunk (retry) overwrites the previous copy.
+
+        Args:
+            upload_session: Active session
+            chunk_index: Zero-based chunk index
+            stream: Request body stream
+            expected_sha256: Hex SHA-256 sent by the client (verified when given)
+
+        Returns:
+            Dict with chunk_index, offset, size and sha256
+
+        Raises:
+            UploadSessionError: Wrong state, index, size or checksum
+        """
+        if upload_session.status != 'active':
+            raise UploadSessionError(f'Upload session is {upload_session.status}', 409)
+        if chunk_index < 0 or chunk_index >= upload_session.total_chunks:
+            raise UploadSessionError(f'chunk_index must be between 0 and {upload_session.total_chunks - 1}')
+
+        expected_size = upload_session.expected_chunk_size(chunk_index)
+        chunk_path = upload_session.chunk_path(chunk_index)
+
+        upload = self.file_manager.open_object_stream(chunk_path, max_size=expected_size)
+        try:
+            result = upload.copy_from(stream)
+        except UploadRejectedError as e:
+            raise UploadSessionError(str(e), 413)
+
+        if result['file_size'] != expected_size or \
+                (expected_sha256 and result['file_hash'] != expected_sha256.lower()):
+            self.file_manager.delete_file(chunk_path)
+            if result['file_size'] != expected_size:
+                raise UploadSessionError(
+                    f'Chunk {chunk_index} must be {expected_size} bytes, got {result["file_size"]}'
+                )
+            raise UploadSessionError(f'Checksum mismatch for chunk {chunk_index}', 422)
+
+        if not self._record_chunk(upload_session.id, chunk_index, result['file_size'], result['file_hash']):
+            # The session left 'active' while the chunk was streaming. A running
+            # finalize may be composing this object and deletes it itself.
+            db.session.refresh(upload_session)
+            if upload_session.status != 'finalizing':
+                self.file_manager.delete_file(chunk_path)
+            raise UploadSessionError(f'Upload session is {upload_session.status}', 409)
+
+        return {
+            'chunk_index': chunk_index,
+            'offset': chunk_index * upload_session.chunk_size,
+            'size': result['file_size'],
+            'sha256': result['file_hash']
+        }
+
+    def _record_chunk(self, session_id: str, chunk_index: int, size: int, sha256: str) -> bool:
+        """
+        Insert or update the chunk row if the session is still active.
+
+        The session row is touched with a conditional UPDATE in the same
+        transaction, so the chunk is either committed before a finalize claim
+        (and included in the composition) or rejected after it.
+
+        Returns:
+            False if the session is no longer active (nothing recorded)
+        """
+        values = {'size': size, 'sha256': sha256, 'created_at': datetime.utcnow()}
+        for attempt in range(2):
+            active = UploadSession.query.filter_by(id=session_id, status='active').update(
+                {'updated_at': datetime.utcnow()}
+            )
+            if not active:
+                db.session.rollback()
+                return False
+            updated = UploadSessionChunk.query.filter_by(
+                session_id=session_id, chunk_index=chunk_index
+            ).update(values)
+            if not updated:
+                db.session.add(UploadSessionChunk(session_id=session_id, chunk_index=chunk_index, **values))
+            try:
+                db.session.commit()
+                return True
+            except IntegrityError:
+                # Same chunk retried concurrently: the other request inserted it
+                # first, so the second pass updates its row
+                db.session.rollback()
+                if attempt:
+                    raise
+        return False
+
+    def get_status(self, upload_session: UploadSession) -> Dict[str, Any]:
+        """
+        Report received chunks and the contiguous byte offset.
+
+        Returns:
+            Session dict plus received_chunks, missing_chunks, offset and received_bytes
+        """
+        rows = db.session.query(UploadSessionChunk.chunk_index, UploadSessionChunk.size).filter(
+            UploadSessionChunk.session_id == upload_session.id
+        ).all()
+        received = sorted(index for index, _ in rows)
+        received_set = set(received)
+
+        contiguous = 0
+        while contiguous in received_set:
+            contiguous += 1
+
+        status = upload_session.to_dict()
+        status.update({
+            'received_chunks': received,
+            'missing_chunks': [i for i in range(upload_session.total_chunks) if i not in received_set],
+            'received_bytes': sum(size for _, size in rows),
+            'offset': min(contiguous * upload_session.chunk_size, upload_session.total_size)
+        })
+        return status
+
+    def finalize(self, upload_session: UploadSession, transcode: bool = False) -> UploadedFile:
+        """
+        Compose all chunks into the final object and create the UploadedFile row.
+
+        Args:
+            upload_session: Session with every chunk received
+            transcode: Request transcoding/HLS packaging of the uploaded video
+
+        Returns:
+            The created UploadedFile
+
+        Raises:
+            UploadSessionError: Missing chunks or session not active
+        """
+        # Claim the session so concurrent finalize calls cannot compose twice
+        claimed = UploadSession.query.filter_by(id=upload_session.id, status='active').update(
+            {'status': 'finalizing', 'updated_at': datetime.utcnow()}
+        )
+        db.session.commit()
+        if not claimed:
+            db.session.refresh(upload_session)
+            if upload_session.status == 'completed':
+                return db.session.get(UploadedFile, upload_session.uploaded_file_id)
+            raise UploadSessionError(f'Upload session is {upload_session.status}', 409)
+
+        stored_info = None
+        try:
+            status = self.get_status(upload_session)
+            if status['missing_chunks']:
+                raise UploadSessionError(
+                    f"Missing chunks: {status['missing_chunks'][:20]}", 409
+                )
+
+            chunk_paths = [upload_session.chunk_path(i) for i in range(upload_session.total_chunks)]
+            file_info = self.file_manager.compose_files(
+                chunk_paths, upload_session.original_filename,
+                file_type='video', folder=upload_session.folder
+            )
+            if file_info.get('file_size') != upload_session.total_size:
+                self.file_manager.delete_file(file_info['file_path'])
+                raise UploadSessionError(
+                    f"Composed size {file_info.get('file_size')} does not match {upload_session.total_size}", 500
+                )
+
+            # Composition on GCS happens server-side, so the hash is only known for local storage
+            file_info = content_store_service.deduplicate(
+                self.file_manager, upload_session.company_id, file_info
+            )
+            stored_info = file_info
+            
+            uploaded_file = UploadedFile(
+                original_filename=upload_session.original_filename,
+                stored_filename=file_info['filename'],
+                file_type='video',
+                file_path=file_info['file_path'],
+                file_size=file_info['file_size'],
+                mime_type=upload_session.mime_type,
+                company_id=upload_session.company_id,
+                uploaded_by=upload_session.user_id,
+                content_hash=file_info.get('file_hash')
+            )
+            metadata = {
+                'storage_type': file_info.get('storage_type'),
+                'upload_session_id': upload_session.id,
+                'upload_timestamp': datetime.utcnow().isoformat()
+            }
+            if file_info.get('gcs_uri'):
+                metadata['gcs_uri'] = file_info['gcs_uri']
+            uploaded_file.set_metadata(metadata)
+            db.session.add(uploaded_file)
+            db.session.flush()
+
+            upload_session.status = 'completed'
+            upload_session.uploaded_file_id = uploaded_file.id
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if stored_info and not content_store_service.release(
+                    self.file_manager, upload_session.company_id, stored_info['file_path']):
+                self.file_manager.delete_file(stored_info['file_path'])
+            # Leave the chunks in place so the client can fix the problem and retry
+            UploadSession.query.filter_by(id=upload_session.id).update({
+                'status': 'active', 'error_message': str(e)
+            })
+            db.session.commit()
+            raise
+
+        self._delete_chunk_objects(upload_session, range(upload_session.total_chunks))
+        logger.info(f"Upload session {upload_session.id} finalized as file {uploaded_file.id}: "
+                    f"{file_info['file_path']}")
+
+        if transcode:
+            # Renditions are published into the file metadata by the transcoding worker
+            transcoding_service.enqueue(
+                upload_session.company_id, upload_session.user_id, 'uploaded_file', uploaded_file.id,
+                uploaded_file.file_path, upload_session.original_filename, folder=upload_session.folder
+            )
+        return uploaded_file
+
+    def abort(self, upload_session: UploadSession) -> None:
+        """Cancel an unfinished session and delete its chunks."""
+        if upload_session.status == 'completed':
+            raise UploadSessionError('Upload session already completed', 409)
+        chunk_indexes = [row.chunk_index for row in upload_session.chunks]
+        upload_session.status = 'aborted'
+        db.session.commit()
+        self._delete_chunk_objects(upload_session, chunk_indexes)
+
+    def cleanup_expired_sessions(self, limit: int = 500) -> Dict[str, int]:
+        """
+        Expire abandoned sessions and delete their chunk objects.
+
+        Sessions left in 'finalizing' longer than finalize_timeout (the
+        finalizing process died during composition) are first set back to
+        'active', so the client can retry and expiry applies to them again.
+
+        Args:
+            limit: Maximum sessions processed per run
+
+        Returns:
+            Dict with expired and reset session counts
+        """
+        reset = UploadSession.query.filter(
+            UploadSession.status == 'finalizing',
+            UploadSession.updated_at < datetime.utcnow() - self.finalize_timeout
+        ).update({
+            'status': 'active',
+            'error_message': 'Finalize did not complete; retry the finalize request',
+            'updated_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.session.commit()
+        if reset:
+            logger.warning(f"Reset {reset} upload sessions stuck in finalizing")
+
+        expired = UploadSession.query.filter(
+            UploadSession.status == 'active',
+            UploadSession.expires_at < datetime.utcnow()
+        ).limit(limit).all()
+
+        for upload_session in expired:
+            chunk_indexes = [row.chunk_index for row in upload_session.chunks]
+            upload_session.status = 'expired'
+            db.session.commit()
+            self._delete_chunk_objects(upload_session, chunk_indexes)
+
+        if expired:
+            logger.info(f"Expired {len(expired)} abandoned upload sessions")
+        return {'expired': len(expired), 'reset': reset}
+
+    def _delete_chunk_objects(self, upload_session: UploadSession, chunk_indexes) -> None:
+        failed: List[int] = []
+        for chunk_index in chunk_indexes:
+            if not self.file_manager.delete_file(upload_session.chunk_path(chunk_index)):
+                failed.append(chunk_index)
+        if failed:
+            logger.warning(f"Failed to delete {len(failed)} chunk objects of session {upload_session.id}")
+
+
+upload_session_service = UploadSessionService()
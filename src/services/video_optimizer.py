@@ -6,13 +6,17 @@ Dependencies: FFmpeg
 """
 
 import os
+import time
 import subprocess
 import logging
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Stream copy is allowed while the source bitrate is within this factor of the preset maxrate
+REMUX_BITRATE_TOLERANCE = 1.25
+
 
 class VideoOptimizer:
     """Video compression and optimization service"""
@@ -47,6 +51,10 @@ class VideoOptimizer:
             ffmpeg_path: Path to FFmpeg executable (default: 'ffmpeg' assumes in PATH)
         """
         self.ffmpeg_path = ffmpeg_path
+        # Skip the re-encode when the source already fits the target (stream copy + faststart)
+        self.remux_fast_path = os.getenv('VIDEO_REMUX_FAST_PATH', 'true').lower() == 'true'
+        # Encode seconds per second of footage; refined from actual transcodes, used to estimate time saved
+        self.transcode_speed = float(os.getenv('VIDEO_TRANSCODE_SECONDS_PER_SECOND', '1.0'))
         self._check_ffmpeg_availability()
     
     def _check_ffmpeg_availability(self) -> bool:
@@ -104,6 +112,11 @@ class VideoOptimizer:
                     None
                 )
                 
+                audio_stream = next(
+                    (s for s in data.get('streams', []) if s.get('codec_type') == 'audio'),
+                    None
+                )
+                
                 if video_stream:
                     return {
                         'duration': float(data.get('format', {}).get('duration', 0)),
@@ -111,7 +124,11 @@ class VideoOptimizer:
                         'height': video_stream.get('height'),
                         'codec': video_stream.get('codec_name'),
                         'bitrate': int(data.get('format', {}).get('bit_rate', 0)),
-                        'size': int(data.get('format', {}).get('size', 0))
+                        'size': int(data.get('format', {}).get('size', 0)),
+                        'video_bitrate': int(video_stream.get('bit_rate') or 0),
+                        'pix_fmt': video_stream.get('pix_fmt'),
+                        'fps': self._parse_frame_rate(video_stream.get('avg_frame_rate')),
+                        'audio_codec': audio_stream.get('codec_name') if audio_stream else None
                     }
             
             return None
@@ -137,6 +154,11 @@ class VideoOptimizer:
         - Audio: AAC 128kbps
         - Progressive download: faststart flag enabled
         
+        Sources that already match these settings (see _plan_optimization)
+        are stream-copied instead of re-encoded. The result records the
+        decision ('mode', 'decision_reasons') and, for remuxes, the
+        estimated encode time saved.
+        
         Args:
             input_path: Path to input video file
             output_path: Path to save optimized video
@@ -152,14 +174,27 @@ class VideoOptimizer:
                 'error': f'Input file not found: {input_path}'
             }
         
-        # Get preset or use custom settings
-        settings = self.PRESETS.get(quality, self.PRESETS['720p'])
+        # Get preset or use custom settings (copy so the class presets stay untouched)
+        settings = dict(self.PRESETS.get(quality, self.PRESETS['720p']))
         if custom_settings:
             settings.update(custom_settings)
         
         # Create output directory if needed
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         
+        video_info = self.get_video_info(input_path)
+        mode, reasons = self._plan_optimization(video_info, settings)
+        logger.info(f"Optimization plan for {input_path}: {mode} ({'; '.join(reasons)})")
+        
+        if mode == 'remux':
+            result = self._remux_video(input_path, output_path, video_info)
+            if result['success']:
+                result.update({'quality': quality, 'decision_reasons': reasons})
+                return result
+            logger.warning(f"Remux failed, falling back to re-encode: {result.get('error')}")
+            reasons = reasons + [f"remux failed: {result.get('error', '')[:200]}"]
+            mode = 'transcode'
+        
         # Build FFmpeg command
         cmd = [
             self.ffmpeg_path,
@@ -183,12 +218,14 @@ class VideoOptimizer:
         
         try:
             # Run FFmpeg
+            start = time.monotonic()
             result = subprocess.run(
                 cmd,
                 capture_output=True,
                 text=True,
                 timeout=600  # 10 minutes timeout
             )
+            elapsed = time.monotonic() - start
             
             if result.returncode != 0:
                 logger.error(f"FFmpeg error: {result.stderr}")
@@ -198,15 +235,23 @@ class VideoOptimizer:
                     'command': ' '.join(cmd)
                 }
             
+            # Refine the encode speed used to estimate what the remux path saves
+            duration = (video_info or {}).get('duration') or 0
+            if duration > 0:
+                self.transcode_speed = 0.8 * self.transcode_speed + 0.2 * (elapsed / duration)
+            
             # Calculate compression results
             original_size = os.path.getsize(input_path)
             optimized_size = os.path.getsize(output_path)
             compression_ratio = (1 - optimized_size / original_size) * 100
             
-            logger.info(f"Video optimized successfully: {compression_ratio:.1f}% size reduction")
+            logger.info(f"Video optimized successfully: {compression_ratio:.1f}% size reduction in {elapsed:.1f}s")
             
             return {
                 'success': True,
+                'mode': 'transcode',
+                'decision_reasons': reasons,
+                'elapsed_seconds': round(elapsed, 2),
                 'original_size': original_size,
                 'optimized_size': optimized_size,
                 'compression_ratio': f'{compression_ratio:.1f}%',
@@ -229,6 +274,124 @@ class VideoOptimizer:
                 'error': str(e)
             }
     
+    def _plan_optimization(self, video_info: Optional[Dict], settings: Dict) -> Tuple[str, List[str]]:
+        """
+        Decide between stream copy ('remux') and re-encode ('transcode')
+        
+        Remux only when the source already matches what the re-encode would
+        produce: H.264 yuv420p video no wider than the preset, at most 30fps,
+        bitrate within REMUX_BITRATE_TOLERANCE of the preset maxrate, and
+        AAC audio (or no audio).
+        
+        Args:
+            video_info: Result of get_video_info (None if probing failed)
+            settings: Preset settings (resolution, video_bitrate, ...)
+            
+        Returns:
+            Tuple of (mode, reasons)
+        """
+        if not self.remux_fast_path:
+            return 'transcode', ['remux fast path disabled']
+        if not video_info:
+            return 'transcode', ['probe failed']
+        
+        reasons = []
+        if video_info.get('codec') != 'h264':
+            reasons.append(f"video codec {video_info.get('codec')} is not h264")
+        if video_info.get('pix_fmt') not in ('yuv420p', 'yuvj420p'):
+            reasons.append(f"pixel format {video_info.get('pix_fmt')} is not yuv420p")
+        
+        audio_codec = video_info.get('audio_codec')
+        if audio_codec not in (None, 'aac'):
+            reasons.append(f"audio codec {audio_codec} is not aac")
+        
+        target_width = int(settings['resolution'].split(':')[0])
+        width = video_info.get('width') or 0
+        if not width or width > target_width:
+            reasons.append(f"width {width} exceeds target {target_width}")
+        
+        fps = video_info.get('fps') or 0
+        if fps > 30.5:
+            reasons.append(f"frame rate {fps:.2f} exceeds 30")
+        
+        max_bitrate = int(settings['video_bitrate'].rstrip('k')) * 1000
+        bitrate = video_info.get('video_bitrate') or video_info.get('bitrate') or 0
+        if not bitrate or bitrate > max_bitrate * REMUX_BITRATE_TOLERANCE:
+            reasons.append(f"bitrate {bitrate} exceeds {max_bitrate}")
+        
+        if reasons:
+            return 'transcode', reasons
+        return 'remux', [
+            f"h264/{audio_codec or 'no audio'} {width}x{video_info.get('height')} "
+            f"@{fps:.2f}fps {bitrate // 1000}kbps fits target"
+        ]
+    
+    def _remux_video(self, input_path: str, output_path: str, video_info: Dict) -> Dict:
+        """
+        Stream-copy into MP4 with the moov atom moved to the front
+        
+        Args:
+            input_path: Input video path
+            output_path: Output MP4 path
+            video_info: Result of get_video_info
+            
+        Returns:
+            Dictionary with results (same keys as optimize_video)
+        """
+        cmd = [
+            self.ffmpeg_path,
+            '-i', input_path,
+            '-map', '0:v:0',
+            '-map', '0:a:0?',
+            '-c', 'copy',
+            '-movflags', '+faststart',
+            '-y',
+            output_path
+        ]
+        logger.debug(f"FFmpeg command: {' '.join(cmd)}")
+        
+        try:
+            start = time.monotonic()
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+            elapsed = time.monotonic() - start
+        except subprocess.TimeoutExpired:
+            return {'success': False, 'error': 'Remux timed out'}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+        
+        if result.returncode != 0:
+            return {'success': False, 'error': result.stderr, 'command': ' '.join(cmd)}
+        
+        original_size = os.path.getsize(input_path)
+        optimized_size = os.path.getsize(output_path)
+        compression_ratio = (1 - optimized_size / original_size) * 100
+        estimated_transcode = (video_info.get('duration') or 0) * self.transcode_speed
+        time_saved = max(estimated_transcode - elapsed, 0.0)
+        
+        logger.info(f"Video remuxed in {elapsed:.1f}s (estimated {time_saved:.0f}s saved vs re-encode)")
+        
+        return {
+            'success': True,
+            'mode': 'remux',
+            'elapsed_seconds': round(elapsed, 2),
+            'estimated_time_saved_seconds': round(time_saved, 1),
+            'original_size': original_size,
+            'optimized_size': optimized_size,
+            'compression_ratio': f'{compression_ratio:.1f}%',
+            'original_size_mb': f'{original_size / (1024 * 1024):.2f} MB',
+            'optimized_size_mb': f'{optimized_size / (1024 * 1024):.2f} MB',
+            'output_path': output_path
+        }
+    
+    @staticmethod
+    def _parse_frame_rate(rate: Optional[str]) -> float:
+        """Parse an FFprobe rate such as '30000/1001'"""
+        try:
+            numerator, _, denominator = (rate or '0/1').partition('/')
+            return float(numerator) / float(denominator or 1)
+        except (ValueError, ZeroDivisionError):
+            return 0.0
+    
     def optimize_for_streaming(
         self,
         input_path: str,
@@ -0,0 +1,232 @@
+"""
+File: cache_store.py
+Purpose: Small key-value cache with TTL shared by services that cache derived data
+Main functionality: CacheStore (Redis-backed when configured, in-process fallback), get_cache_store,
+                    commit-time invalidation of cached data when model rows are written
+Dependencies: redis (optional), json, threading, SQLAlchemy session events
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+class CacheStore:
+    """
+    TTL cache used for short-lived derived data (statistics, signed URLs, search results).
+
+    When CACHE_REDIS_URL is set and the redis package is available, entries are
+    stored in Redis so every web worker sees the same values and invalidations.
+    Otherwise a bounded in-process LRU dictionary is used.
+
+    Values must be JSON serializable.
+
+    Attributes:
+        namespace: Key prefix applied to every entry
+        max_local_entries: Upper bound on the in-process fallback size
+    """
+
+    def __init__(self, namespace: str, redis_url: Optional[str] = None,
+                 max_local_entries: int = 10000):
+        self.namespace = namespace
+        self.max_local_entries = max_local_entries
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+
+        redis_url = redis_url if redis_url is not None else os.getenv('CACHE_REDIS_URL', '')
+        if redis_url:
+            try:
+                import redis
+                self._redis = redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+            except Exception as e:
+                logger.warning(f"Redis cache unavailable for '{namespace}', using in-process cache: {e}")
+                self._redis = None
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Return the cached value for key, or None when missing or expired.
+        """
+        full_key = self._key(key)
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(full_key)
+                return json.loads(raw) if raw is not None else None
+            except Exception as e:
+                logger.warning(f"Redis cache get failed for {full_key}: {e}")
+                return None
+
+        with self._lock:
+            entry = self._local.get(full_key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._local[full_key]
+                return None
+            self._local.move_to_end(full_key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        """
+        Store value under key for ttl seconds.
+        """
+        full_key = self._key(key)
+        if self._redis is not None:
+            try:
+                self._redis.set(full_key, json.dumps(value, ensure_ascii=False, default=str), ex=max(1, int(ttl)))
+            except Exception as e:
+                logger.warning(f"Redis cache set failed for {full_key}: {e}")
+            return
+
+        with self._lock:
+            self._local[full_key] = (time.monotonic() + ttl, value)
+            self._local.move_to_end(full_key)
+            while len(self._local) > self.max_local_entries:
+                self._local.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """
+        Return {key: value} for the keys that are cached (one MGET round trip on Redis).
+        """
+        if not keys:
+            return {}
+        if self._redis is not None:
+            try:
+                raws = self._redis.mget([self._key(k) for k in keys])
+                return {k: json.loads(raw) for k, raw in zip(keys, raws) if raw is not None}
+            except Exception as e:
+                logger.warning(f"Redis cache get_many failed for '{self.namespace}': {e}")
+                return {}
+
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set_many(self, values: Dict[str, Any], ttl: int) -> None:
+        """
+        Store several values for ttl seconds (one pipelined round trip on Redis).
+        """
+        if not values:
+            return
+        if self._redis is not None:
+            try:
+                pipe = self._redis.pipeline(transaction=False)
+                for key, value in values.items():
+                    pipe.set(self._key(key), json.dumps(value, ensure_ascii=False, default=str), ex=max(1, int(ttl)))
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Redis cache set_many failed for '{self.namespace}': {e}")
+            return
+
+        for key, value in values.items():
+            self.set(key, value, ttl)
+
+    def delete(self, *keys: str) -> None:
+        """
+        Remove one or more keys.
+        """
+        full_keys = [self._key(k) for k in keys]
+        if not full_keys:
+            return
+        if self._redis is not None:
+            try:
+                self._redis.delete(*full_keys)
+            except Exception as e:
+                logger.warning(f"Redis cache delete failed for {full_keys}: {e}")
+            return
+
+        with self._lock:
+            for full_key in full_keys:
+                self._local.pop(full_key, None)
+
+    def clear(self) -> None:
+        """
+        Drop every in-process entry (Redis entries expire through their TTL).
+        """
+        with self._lock:
+            self._local.clear()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_cache_store(namespace: str) -> CacheStore:
+    """
+    Return the process-wide CacheStore for a namespace.
+
+    Args:
+        namespace: Key prefix identifying the cached data set
+
+    Returns:
+        Shared CacheStore instance
+    """
+    with _stores_lock:
+        store = _stores.get(namespace)
+        if store is None:
+            store = CacheStore(namespace)
+            _stores[namespace] = store
+        return store
+
+
+def _company_id_of(session, obj) -> Optional[int]:
+    return getattr(obj, 'company_id', None)
+
+
+def register_commit_invalidator(model_cls: Union[Type, Tuple[Type, ...]], info_key: str,
+                                callback: Callable[[Any], None],
+                                key_of: Callable[[Any, Any], Any] = _company_id_of) -> None:
+    """
+    Invalidate cached data once a transaction that wrote model rows commits.
+
+    After each flush, the keys of new, changed and deleted model_cls rows are
+    collected in session.info[info_key]; after commit callback is called once
+    per key, and on rollback the keys are discarded. Invalidating only after
+    commit keeps other processes from re-caching the data they replace.
+
+    Args:
+        model_cls: Model class (or tuple of classes) whose writes invalidate
+        info_key: session.info key for the keys of the open transaction (unique per caller)
+        callback: Invalidation called with each key, e.g. a service's invalidate(company_id)
+        key_of: (session, obj) -> key or None; defaults to obj.company_id
+    """
+
+    @event.listens_for(Session, 'after_flush')
+    def _track_dirty(session, flush_context):
+        dirty = session.info.setdefault(info_key, set())
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(obj, model_cls):
+                key = key_of(session, obj)
+                if key is not None:
+                    dirty.add(key)
+
+    @event.listens_for(Session, 'after_commit')
+    def _invalidate_dirty(session):
+        dirty = session.info.pop(info_key, None)
+        if not dirty:
+            return
+        for key in dirty:
+            try:
+                callback(key)
+            except Exception as e:
+                logger.warning(f"Failed to invalidate {info_key} for {key}: {e}")
+
+    @event.listens_for(Session, 'after_rollback')
+    def _discard_dirty(session):
+        session.info.pop(info_key, None)
@@ -0,0 +1,67 @@
+"""
+File: embedding_codec.py
+Purpose: Compact binary encoding of embedding vectors for database storage
+Main functionality: encode_embedding / decode_embedding (float16, or int8 with a per-vector scale),
+                    text_hash for detecting changed chunk text
+Dependencies: numpy, hashlib
+"""
+
+import hashlib
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SUPPORTED_DTYPES = ('float16', 'int8')
+
+
+def encode_embedding(values: Sequence[float], dtype: str = 'float16') -> Tuple[bytes, Optional[float]]:
+    """
+    Encode an embedding vector.
+
+    float16 keeps ~3 significant digits (2 bytes/dim). int8 stores
+    round(v / scale) with scale = max|v| / 127 (1 byte/dim); cosine
+    similarity between decoded vectors stays within ~1e-3 of the original.
+
+    Args:
+        values: Embedding vector
+        dtype: 'float16' or 'int8'
+
+    Returns:
+        Tuple of (little-endian bytes, scale); scale is None for float16
+
+    Raises:
+        ValueError: Unsupported dtype
+    """
+    vector = np.asarray(values, dtype=np.float32)
+    if dtype == 'float16':
+        return vector.astype('<f2').tobytes(), None
+    if dtype == 'int8':
+        peak = float(np.max(np.abs(vector))) if vector.size else 0.0
+        scale = peak / 127.0 if peak > 0 else 1.0
+        quantized = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+        return quantized.tobytes(), scale
+    raise ValueError(f"Unsupported embedding dtype: {dtype}")
+
+
+def decode_embedding(data: bytes, dtype: str, scale: Optional[float] = None) -> List[float]:
+    """
+    Decode a vector produced by encode_embedding.
+
+    Args:
+        data: Encoded bytes
+        dtype: 'float16' or 'int8'
+        scale: Scale stored with int8 vectors
+
+    Returns:
+        Embedding as a list of Python floats (JSON / Elasticsearch ready)
+    """
+    if dtype == 'float16':
+        return np.frombuffer(data, dtype='<f2').astype(np.float32).tolist()
+    if dtype == 'int8':
+        return (np.frombuffer(data, dtype=np.int8).astype(np.float32) * (scale or 1.0)).tolist()
+    raise ValueError(f"Unsupported embedding dtype: {dtype}")
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 of chunk text (hex), used to tell whether a stored embedding is still valid."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
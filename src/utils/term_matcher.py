@@ -0,0 +1,104 @@
+"""
+File: term_matcher.py
+Purpose: Multi-pattern substring matching for terminology extraction
+Main functionality: AhoCorasickMatcher (build once, scan text in a single linear pass)
+Dependencies: collections (standard library only)
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+class AhoCorasickMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of patterns.
+
+    Building is O(total pattern length); matching is O(len(text) + matches),
+    independent of the number of patterns.
+
+    Patterns are matched case-insensitively (both sides are lowercased).
+    Each pattern carries an integer payload, typically its position in the
+    caller's term list, which is what find_all returns.
+
+    Attributes:
+        pattern_count: Number of patterns added to the automaton
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, int]]):
+        """
+        Build the automaton.
+
+        Args:
+            patterns: Iterable of (pattern, payload) pairs; empty patterns are ignored
+        """
+        # Node 0 is the root. Each node has a goto table, a failure link and
+        # the payloads of patterns ending at that node (including via
+        # dictionary suffix links, merged at build time).
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        self.pattern_count = 0
+
+        for pattern, payload in patterns:
+            if not pattern:
+                continue
+            self._add_pattern(pattern.lower(), payload)
+            self.pattern_count += 1
+
+        self._build_failure_links()
+
+    def _add_pattern(self, pattern: str, payload: int) -> None:
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[node][char] = next_node
+            node = next_node
+        self._output[node].append(payload)
+
+    def _build_failure_links(self) -> None:
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            queue.append(child)
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                if self._output[self._fail[child]]:
+                    self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find_all(self, text: str) -> Set[int]:
+        """
+        Return the payloads of every pattern that occurs in text.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Set of payloads of matched patterns
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        found: Set[int] = set()
+        node = 0
+
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+
+        return found
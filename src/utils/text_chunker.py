@@ -0,0 +1,245 @@
+"""
+File: text_chunker.py
+Purpose: Token-budgeted, sentence-aware text chunking for RAG embeddings
+Main functionality: Per-script token estimate (CJK, kana, Latin, digits, symbols), optional local
+                    tokenizer, single-pass sentence segmentation (。！？ and Western punctuation),
+                    greedy chunk packing with whole-sentence overlap, token-budgeted embedding batches
+Dependencies: re (standard library); vertexai tokenizer optional (RAG_TOKEN_COUNTER=vertex)
+"""
+
+import os
+import re
+import math
+import logging
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+TokenCounter = Callable[[str], int]
+
+# Character classes and their token cost. The rates follow how SentencePiece
+# vocabularies of the Gemini family split text: kanji rarely merge, kana
+# merge into short words, Latin words average ~4 characters per token and
+# digits are always single tokens. They are rounded up so that estimates err
+# towards over-counting, which only costs slightly smaller chunks.
+_KANJI = re.compile('[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]')
+_KANA = re.compile('[\u3040-\u30ff\u31f0-\u31ff\uff66-\uff9f]')
+_LATIN_WORD = re.compile('[A-Za-z\u00c0-\u024f]+')
+_DIGIT = re.compile('[0-9\uff10-\uff19]')
+_SPACE = re.compile(r'\s')
+
+KANJI_RATE = 1.0
+KANA_RATE = 0.7
+LATIN_CHAR_RATE = 0.25
+LATIN_WORD_RATE = 0.25
+DIGIT_RATE = 1.0
+OTHER_RATE = 1.0
+
+# Sentence ends: Japanese terminators (with trailing closing brackets), Western
+# terminators followed by whitespace, and blank lines. Single newlines are
+# only used to split sentences that exceed the budget on their own (PDF text
+# wraps lines mid-sentence).
+_SENTENCE_END = re.compile(
+    r'[。！？!?]+[」』）〕】\)"\']*\s*'
+    r'|\.+[\)"\']*(?=\s)\s*'
+    r'|\n[ \t　]*\n\s*'
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of text from its script mix
+
+    Args:
+        text: Any text (Japanese, English or mixed)
+
+    Returns:
+        Estimated token count (at least 1 for non-blank text)
+    """
+    if not text:
+        return 0
+    kanji = len(_KANJI.findall(text))
+    kana = len(_KANA.findall(text))
+    words = _LATIN_WORD.findall(text)
+    latin = sum(len(word) for word in words)
+    digits = len(_DIGIT.findall(text))
+    spaces = len(_SPACE.findall(text))
+    other = len(text) - kanji - kana - latin - digits - spaces
+    tokens = (kanji * KANJI_RATE + kana * KANA_RATE + latin * LATIN_CHAR_RATE
+              + len(words) * LATIN_WORD_RATE + digits * DIGIT_RATE + other * OTHER_RATE)
+    return math.ceil(tokens) if len(text) > spaces else 0
+
+
+def get_token_counter() -> TokenCounter:
+    """
+    Token counter selected by RAG_TOKEN_COUNTER
+
+    'estimate' (default) uses estimate_tokens. 'vertex' counts with the local
+    SentencePiece tokenizer of RAG_TOKENIZER_MODEL from the Vertex AI SDK
+    (downloaded once, no API call per count); if the SDK or model is not
+    available the estimate is used instead.
+
+    Returns:
+        Callable mapping text to a token count
+    """
+    if os.getenv('RAG_TOKEN_COUNTER', 'estimate').lower() != 'vertex':
+        return estimate_tokens
+    model = os.getenv('RAG_TOKENIZER_MODEL', 'gemini-1.5-flash-002')
+    try:
+        from vertexai.preview.tokenization import get_tokenizer_for_model
+        tokenizer = get_tokenizer_for_model(model)
+        tokenizer.count_tokens('warm up')
+    except Exception as e:
+        logger.warning(f"Local tokenizer for {model} unavailable, using the per-script estimate: {e}")
+        return estimate_tokens
+    return lambda text: tokenizer.count_tokens(text).total_tokens if text.strip() else 0
+
+
+def split_sentences(text: str) -> Iterator[Tuple[int, int]]:
+    """
+    Sentence spans of text in one pass
+
+    Spans are contiguous and cover the whole text; each keeps its terminator
+    and the whitespace after it, so text[start:end] of consecutive spans
+    reproduces the original.
+
+    Args:
+        text: Text to segment
+
+    Yields:
+        (start, end) character offsets
+    """
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        if match.end() > start:
+            yield start, match.end()
+            start = match.end()
+    if start < len(text):
+        yield start, len(text)
+
+
+class SentenceChunker:
+    """
+    Packs whole sentences into chunks of at most max_tokens tokens
+
+    Sentences are added in order until the next one would exceed the budget;
+    the chunk is then emitted and the next chunk starts with the trailing
+    sentences of the previous one that fit in overlap_tokens. A sentence that
+    alone exceeds the budget is split at line breaks, and failing that into
+    equal character windows. Each sentence is counted once, so chunking is
+    linear in the text length.
+
+    Attributes:
+        max_tokens: Token budget per chunk
+        overlap_tokens: Token budget for the sentences repeated from the previous chunk
+        count_tokens: Token counter (see get_token_counter)
+    """
+
+    def __init__(self, max_tokens: int, overlap_tokens: int = 0,
+                 count_tokens: Optional[TokenCounter] = None):
+        self.max_tokens = max(1, max_tokens)
+        self.overlap_tokens = max(0, min(overlap_tokens, self.max_tokens // 2))
+        self.count_tokens = count_tokens or estimate_tokens
+
+    def _units(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """(start, end, tokens) of sentences, with oversized ones split to fit the budget"""
+        for start, end in split_sentences(text):
+            tokens = self.count_tokens(text[start:end])
+            if tokens <= self.max_tokens:
+                yield start, end, tokens
+                continue
+            line_start = start
+            while line_start < end:
+                newline = text.find('\n', line_start, end)
+                line_end = end if newline < 0 else newline + 1
+                yield from self._windows(text, line_start, line_end)
+                line_start = line_end
+
+    def _windows(self, text: str, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+        """Split [start, end) into character windows that each fit the budget"""
+        tokens = self.count_tokens(text[start:end])
+        if tokens <= self.max_tokens:
+            yield start, end, tokens
+            return
+        # Window width from the span's own characters-per-token ratio
+        width = max(1, int((end - start) * self.max_tokens / tokens * 0.9))
+        position = start
+        while position < end:
+            stop = min(end, position + width)
+            window_tokens = self.count_tokens(text[position:stop])
+            while window_tokens > self.max_tokens and stop - position > 1:
+                stop = position + (stop - position) // 2
+                window_tokens = self.count_tokens(text[position:stop])
+            yield position, stop, window_tokens
+            position = stop
+
+    def chunk(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Chunk text
+
+        Args:
+            text: Text to chunk
+
+        Returns:
+            List of chunks with 'text', 'char_length', 'estimated_tokens',
+            'start' and 'end' (offsets of the chunk in text, before stripping)
+        """
+        chunks = []
+        current: List[Tuple[int, int, int]] = []
+        current_tokens = 0
+
+        def emit():
+            start, end = current[0][0], current[-1][1]
+            chunk_text = text[start:end].strip()
+            if chunk_text:
+                chunks.append({
+                    'text': chunk_text,
+                    'char_length': len(chunk_text),
+                    'estimated_tokens': current_tokens,
+                    'start': start,
+                    'end': end
+                })
+
+        for unit in self._units(text):
+            if current and current_tokens + unit[2] > self.max_tokens:
+                emit()
+                # Carry whole trailing sentences as overlap
+                carried, carried_tokens = [], 0
+                for previous in reversed(current):
+                    if carried_tokens + previous[2] > self.overlap_tokens:
+                        break
+                    carried.insert(0, previous)
+                    carried_tokens += previous[2]
+                if carried_tokens + unit[2] > self.max_tokens:
+                    carried, carried_tokens = [], 0
+                current, current_tokens = carried, carried_tokens
+            current.append(unit)
+            current_tokens += unit[2]
+
+        if current:
+            emit()
+        return chunks
+
+
+def token_batches(token_counts: Sequence[int], max_items: int, max_tokens: int) -> Iterator[Tuple[int, int]]:
+    """
+    Group consecutive inputs into request batches under item and token limits
+
+    An input larger than max_tokens gets a batch of its own.
+
+    Args:
+        token_counts: Token count per input
+        max_items: Maximum inputs per batch
+        max_tokens: Maximum total tokens per batch
+
+    Yields:
+        (start, end) index ranges
+    """
+    start, total = 0, 0
+    for index, tokens in enumerate(token_counts):
+        if index > start and (index - start >= max_items or total + tokens > max_tokens):
+            yield start, index
+            start, total = index, 0
+        total += tokens
+    if start < len(token_counts):
+        yield start, len(token_counts)
@@ -1,8 +1,9 @@
 """
 File: celery_app.py
 Purpose: Celery configuration for async task processing
-Main functionality: Celery app initialization, Redis connection, task routing
-Dependencies: celery, redis
+Main functionality: Celery app initialization, Redis connection, task routing,
+                    worker app context per process
+Dependencies: celery, redis, worker_app
 """
 
 import os
@@ -35,7 +36,9 @@ def make_celery(app_name='manual_generator'):
         backend=result_backend,
         include=[
             'src.workers.rag_tasks',
-            'src.workers.manual_tasks'  # Add manual tasks module
+            'src.workers.manual_tasks',  # Add manual tasks module
+            'src.workers.maintenance_tasks',
+            'src.workers.transcoding_tasks'
         ]
     )
     
@@ -68,6 +71,8 @@ def make_celery(app_name='manual_generator'):
             Queue('rag_processing', routing_key='rag.#'),
             Queue('pdf_generation', routing_key='pdf.#'),
             Queue('translation', routing_key='translation.#'),
+            # ffmpeg jobs; consume with a dedicated worker (-Q transcoding --concurrency=<CPU cores>)
+            Queue('transcoding', routing_key='transcoding.#'),
         ),
         
         # Task routing
@@ -79,6 +84,42 @@ def make_celery(app_name='manual_generator'):
             'src.workers.rag_tasks.reindex_material_task': {
                 'queue': 'rag_processing',
                 'routing_key': 'rag.reindex'
+            },
+            'src.workers.rag_tasks.rebuild_index_task': {
+                'queue': 'rag_processing',
+                'routing_key': 'rag.rebuild_index'
+            },
+            'src.workers.rag_tasks.purge_material_vectors_task': {
+                'queue': 'rag_processing',
+                'routing_key': 'rag.purge'
+            },
+            'src.workers.rag_tasks.poll_index_delete_task': {
+                'queue': 'rag_processing',
+                'routing_key': 'rag.purge'
+            },
+            'src.workers.rag_tasks.sweep_rag_orphans_task': {
+                'queue': 'rag_processing',
+                'routing_key': 'rag.sweep'
+            },
+            'src.workers.transcoding_tasks.transcode_video_task': {
+                'queue': 'transcoding',
+                'routing_key': 'transcoding.video'
+            }
+        },
+        
+        # Periodic tasks (run with: celery -A src.workers.celery_app beat)
+        beat_schedule={
+            'archive-activity-logs-daily': {
+                'task': 'src.workers.maintenance_tasks.archive_activity_logs_task',
+                'schedule': float(os.getenv('ACTIVITY_LOG_ARCHIVE_INTERVAL_SECONDS', '86400'))
+            },
+            'cleanup-upload-sessions-hourly': {
+                'task': 'src.workers.maintenance_tasks.cleanup_upload_sessions_task',
+                'schedule': 3600.0
+            },
+            'sweep-rag-orphans': {
+                'task': 'src.workers.rag_tasks.sweep_rag_orphans_task',
+                'schedule': float(os.getenv('RAG_ORPHAN_SWEEP_INTERVAL_SECONDS', '21600'))
             }
         },
         
@@ -106,19 +147,26 @@ def ping_task(self):
 
 
 # Setup Flask app context for all Celery tasks
-from celery.signals import task_prerun, task_postrun
+# Workers use the lightweight worker app (config, database, models), not the web app
+from celery.signals import task_prerun, task_postrun, worker_process_init
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """Push the worker app context once when a pool process starts"""
+    from src.workers.worker_app import push_worker_app_context
+    push_worker_app_context()
+
 
 @task_prerun.connect
 def setup_app_context(sender=None, **kwargs):
-    """Push Flask app context before task execution"""
-    from src.core.app import app
-    app.app_context().push()
+    """Ensure the process-wide app context (solo/threads pools have no process init)"""
+    from src.workers.worker_app import push_worker_app_context
+    push_worker_app_context()
 
 
 @task_postrun.connect
 def teardown_app_context(sender=None, **kwargs):
-    """Pop Flask app context after task execution"""
-    from flask import g
+    """Release the task's database session (the app context stays pushed)"""
     from src.models.models import db
     # Cleanup database session
     db.session.remove()
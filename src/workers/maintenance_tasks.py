@@ -0,0 +1,55 @@
+"""
+File: maintenance_tasks.py
+Purpose: Celery tasks for periodic database maintenance
+Main functionality: Activity log retention (move old rows into the archive table),
+                    cleanup of abandoned resumable upload sessions
+Dependencies: celery, activity_log_service, upload_session_service
+"""
+
+from src.workers.celery_app import celery
+from src.workers.worker_app import worker_app_context
+from src.services.activity_log_service import archive_old_activity_logs
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(name='src.workers.maintenance_tasks.archive_activity_logs_task')
+def archive_activity_logs_task(retention_days=None, batch_size=None):
+    """
+    Move activity logs older than the retention window into activity_logs_archive
+    
+    Args:
+        retention_days: Days kept in activity_logs (default: ACTIVITY_LOG_RETENTION_DAYS)
+        batch_size: Rows moved per transaction (default: ACTIVITY_LOG_ARCHIVE_BATCH_SIZE)
+        
+    Returns:
+        Dictionary with cutoff and archived row count
+    """
+    try:
+        with worker_app_context():
+            result = archive_old_activity_logs(retention_days, batch_size)
+        logger.info(f"Activity log archive completed: {result}")
+        return result
+    except Exception as e:
+        logger.error(f"Activity log archive failed: {str(e)}")
+        raise
+
+
+@celery.task(name='src.workers.maintenance_tasks.cleanup_upload_sessions_task')
+def cleanup_upload_sessions_task():
+    """
+    Expire abandoned resumable upload sessions and delete their chunk objects
+    
+    Returns:
+        Dictionary with expired session count
+    """
+    try:
+        from src.services.upload_session_service import upload_session_service
+        with worker_app_context():
+            result = upload_session_service.cleanup_expired_sessions()
+        logger.info(f"Upload session cleanup completed: {result}")
+        return result
+    except Exception as e:
+        logger.error(f"Upload session cleanup failed: {str(e)}")
+        raise
@@ -7,7 +7,6 @@ Dependencies: Celery, GeminiService, RAGProcessor, ElasticSearch
 
 from src.workers.celery_app import celery
 from src.models.models import db, Manual, ProcessingJob, ManualTemplate
-from src.services.gemini_service import GeminiService
 from datetime import datetime
 import logging
 import json
@@ -319,9 +318,11 @@ Analyze the provided video and create a detailed, step-by-step manual following
             "Use the following reference materials to enhance accuracy and include relevant details:\n"
         )
         
-        for idx, material in enumerate(rag_context['reference_materials'], 1):
+        # Results are ordered best first; fused RRF scores carry no meaning for the model
+        references = rag_context['reference_materials']
+        for idx, material in enumerate(references, 1):
             prompt_parts.append(f"\n### Reference {idx}: {material.get('material_title', 'Unknown')}\n")
-            prompt_parts.append(f"Relevance Score: {material.get('relevance_score', 0):.2f}\n")
+            prompt_parts.append(f"Relevance Rank: {idx} of {len(references)}\n")
             prompt_parts.append(f"Content:\n{material.get('chunk_text', '')}\n")
             
             if material.get('metadata'):
@@ -6,8 +6,8 @@ Dependencies: celery, pdf_generator, models
 """
 
 from src.workers.celery_app import celery
+from src.workers.worker_app import worker_app_context
 from src.models.models import db, Manual, ManualPDF, ProcessingJob
-from src.services.pdf_generator import ManualPDFGenerator
 from datetime import datetime
 import logging
 import os
@@ -34,8 +34,7 @@ def generate_pdf_task(self, manual_id, language_code='ja', config=None):
         self.update_state(state='PROGRESS', meta={'current': 0, 'total': 100, 'status': 'Starting PDF generation'})
         
         # Get manual from database
-        from src.core.app import app
-        with app.app_context():
+        with worker_app_context():
             manual = Manual.query.get(manual_id)
             if not manual:
                 raise Exception(f'Manual {manual_id} not found')
@@ -110,6 +109,7 @@ def generate_pdf_task(self, manual_id, language_code='ja', config=None):
             self.update_state(state='PROGRESS', meta={'current': 50, 'total': 100, 'status': 'Generating PDF'})
             
             # Generate PDF
+            from src.services.pdf_generator import ManualPDFGenerator
             pdf_gen = ManualPDFGenerator()
             success = pdf_gen.generate_pdf(manual_data, file_path)
             
@@ -144,8 +144,7 @@ def generate_pdf_task(self, manual_id, language_code='ja', config=None):
         
         # Update PDF record to failed
         try:
-            from src.core.app import app
-            with app.app_context():
+            with worker_app_context():
                 if 'pdf_id' in locals():
                     pdf_record = ManualPDF.query.get(pdf_id)
                     if pdf_record:
@@ -1,18 +1,27 @@
 """
 File: rag_tasks.py
 Purpose: Celery tasks for RAG processing
-Main functionality: Async material processing, ElasticSearch indexing, job tracking
+Main functionality: Async material processing, ElasticSearch indexing, job tracking,
+                    background vector purge of deleted materials, periodic orphan sweep
 Dependencies: celery, SQLAlchemy models, RAG processor, ElasticSearch service
 """
 
 from datetime import datetime
 import traceback
 import json
+import os
 
 from src.workers.celery_app import celery
+from src.workers.worker_app import worker_app_context
 from src.models.models import db, ReferenceMaterial, ReferenceChunk, ProcessingJob
-from src.services.rag_processor import rag_processor
-from src.services.elasticsearch_service import elasticsearch_service
+from src.services.retrieval_backend import get_retrieval_backend
+from src.services.rag_index_service import rag_index_service
+# Registers the session hooks that invalidate cached RAG search results on material changes
+import src.services.rag_search_service  # noqa: F401
+
+# Background index deletes are polled by re-queuing, not by a sleeping worker
+DELETE_POLL_SECONDS = int(os.getenv('RAG_DELETE_POLL_SECONDS', '10'))
+DELETE_MAX_POLLS = int(os.getenv('RAG_DELETE_MAX_POLLS', '360'))
 
 
 @celery.task(bind=True, name='src.workers.rag_tasks.process_material_task')
@@ -25,9 +34,9 @@ def process_material_task(self, material_id: int, job_id: int):
     2. Download and extract text
     3. Generate metadata with Gemini
     4. Chunk text
-    5. Generate embeddings
-    6. Store chunks in database
-    7. Index chunks in ElasticSearch
+    5. Generate embeddings (new or changed chunk texts only)
+    6. Diff against stored chunks: insert added, delete removed
+    7. Index added chunks in ElasticSearch
     8. Update material and job status
     
     Args:
@@ -35,10 +44,10 @@ def process_material_task(self, material_id: int, job_id: int):
         job_id: ProcessingJob.id
     """
     
-    # Import Flask app for context
-    from app import app
+    # Document parsers and the Gemini client load with the first processing task
+    from src.services.rag_processor import rag_processor
     
-    with app.app_context():
+    with worker_app_context():
         try:
             # Step 1: Get material and job
             material = ReferenceMaterial.query.get(material_id)
@@ -63,12 +72,28 @@ def process_material_task(self, material_id: int, job_id: int):
             job.progress = 10
             db.session.commit()
             
+            # Chunks whose text is unchanged keep their stored embedding
+            reusable_hashes = {
+                row.text_hash for row in db.session.query(ReferenceChunk.text_hash).filter(
+                    ReferenceChunk.material_id == material_id,
+                    ReferenceChunk.embedding.isnot(None),
+                    ReferenceChunk.text_hash.isnot(None)
+                )
+            }
+            
+            def report_extraction(pages_done, total_pages, pages_per_sec):
+                job.current_step = f'Extracting text ({pages_done}/{total_pages} pages, {pages_per_sec:.1f} pages/s)'
+                job.progress = 10 + int(20 * pages_done / max(total_pages, 1))
+                db.session.commit()
+            
             result = rag_processor.process_material(
                 material_id=material.id,
                 company_id=material.company_id,
                 file_path_s3=material.file_path,
                 file_type=material.file_type,
-                title=material.title
+                title=material.title,
+                reusable_hashes=reusable_hashes,
+                on_progress=report_extraction
             )
             
             if not result['success']:
@@ -87,66 +112,20 @@ def process_material_task(self, material_id: int, job_id: int):
             }, ensure_ascii=False)
             db.session.commit()
             
-            # Step 4: Store chunks in database
-            job.current_step = 'Creating chunks'
+            # Step 4-5: Store chunks and index them (diff against the stored chunk set)
+            job.current_step = 'Indexing changed chunks'
             job.progress = 50
             material.processing_progress = 50
             db.session.commit()
             
             chunks = result['chunks']
             
-            # Delete existing chunks (if reprocessing)
-            ReferenceChunk.query.filter_by(material_id=material_id).delete()
-            db.session.commit()
-            
-            # Create new chunks
-            for chunk_data in chunks:
-                chunk = ReferenceChunk(
-                    material_id=material_id,
-                    chunk_index=chunk_data['chunk_index'],
-                    chunk_text=chunk_data['text'],
-                    chunk_metadata=json.dumps(chunk_data['metadata'], ensure_ascii=False)
-                )
-                db.session.add(chunk)
-            
-            db.session.commit()
-            
-            # Step 5: Index in ElasticSearch
-            job.current_step = 'Indexing in ElasticSearch'
-            job.progress = 70
-            material.processing_progress = 70
-            db.session.commit()
-            
-            # Ensure ElasticSearch index exists
-            elasticsearch_service.create_index()
-            
-            # Get chunks from database (to get IDs)
-            db_chunks = ReferenceChunk.query.filter_by(
-                material_id=material_id
-            ).order_by(ReferenceChunk.chunk_index).all()
-            
-            # Index each chunk
-            indexed_count = 0
-            for db_chunk, chunk_data in zip(db_chunks, chunks):
-                try:
-                    elasticsearch_service.index_chunk(
-                        chunk_id=db_chunk.id,
-                        material_id=material.id,
-                        company_id=material.company_id,
-                        chunk_text=chunk_data['text'],
-                        chunk_index=chunk_data['chunk_index'],
-                        embedding=chunk_data['embedding'],
-                        metadata=chunk_data['metadata']
-                    )
-                    
-                    # Store ElasticSearch doc ID
-                    db_chunk.elasticsearch_doc_id = f"chunk_{db_chunk.id}"
-                    indexed_count += 1
-                
-                except Exception as e:
-                    print(f"Failed to index chunk {db_chunk.id}: {e}")
-            
-            db.session.commit()
+            sync_result = rag_index_service.sync_material_chunks(
+                material, chunks, model=rag_processor.embedding_model
+            )
+            indexed_count = sync_result['indexed']
+            if sync_result['failed']:
+                raise Exception(f"{sync_result['failed']} chunks failed to index")
             
             # Step 6: Finalize
             job.current_step = 'Finalizing'
@@ -158,7 +137,7 @@ def process_material_task(self, material_id: int, job_id: int):
             material.processing_status = 'completed'
             material.processing_progress = 100
             material.elasticsearch_indexed = True
-            material.elasticsearch_index_name = elasticsearch_service.index_name
+            material.elasticsearch_index_name = get_retrieval_backend().index_for_company(material.company_id)
             material.chunk_count = len(chunks)
             db.session.commit()
             
@@ -170,6 +149,15 @@ def process_material_task(self, material_id: int, job_id: int):
             job.result_data = json.dumps({
                 'chunk_count': len(chunks),
                 'indexed_count': indexed_count,
+                'embedded_count': result['embedded_count'],
+                'extraction': {
+                    key: result['extraction_metadata'].get(key)
+                    for key in ('pages', 'sheets', 'workers', 'elapsed_seconds', 'pages_per_sec', 'page_methods')
+                    if key in result['extraction_metadata']
+                },
+                'added_chunks': sync_result['added'],
+                'reused_chunks': sync_result['reused'],
+                'removed_chunks': sync_result['removed'],
                 'text_length': result['extracted_text_length']
             }, ensure_ascii=False)
             db.session.commit()
@@ -218,41 +206,117 @@ def reindex_material_task(self, material_id: int):
     Reindex material in ElasticSearch
     
     This task only reindexes existing chunks, does not reprocess the file.
-    Useful when ElasticSearch index settings change.
+    Useful when ElasticSearch index settings change. Documents are rebuilt
+    from the embeddings stored on ReferenceChunk (no model calls).
     
     Args:
         material_id: ReferenceMaterial.id
     """
     
-    from app import app
+    with worker_app_context():
+        try:
+            result = rag_index_service.reindex_material(material_id)
+            if result.get('delete_task'):
+                poll_index_delete_task.apply_async(args=[result['delete_task']], countdown=DELETE_POLL_SECONDS)
+            return result
+        
+        except Exception as e:
+            print(f"Reindexing failed for material {material_id}: {e}")
+            raise
+
+
+@celery.task(bind=True, name='src.workers.rag_tasks.purge_material_vectors_task')
+def purge_material_vectors_task(self, material_id: int, company_id: int):
+    """
+    Remove a deleted material's documents from the search index
     
-    with app.app_context():
+    Starts a background delete_by_query and hands it to poll_index_delete_task,
+    so no worker waits on the deletion. Searches already exclude the material
+    (it stays in RagIndexService.pending_purge_material_ids until purged).
+    
+    Args:
+        material_id: ReferenceMaterial.id (already is_active=False)
+        company_id: Owner of the material
+    """
+    
+    with worker_app_context():
         try:
-            material = ReferenceMaterial.query.get(material_id)
-            if not material:
-                raise Exception(f"Material {material_id} not found")
-            
-            # Get existing chunks
-            chunks = ReferenceChunk.query.filter_by(
-                material_id=material_id
-            ).order_by(ReferenceChunk.chunk_index).all()
-            
-            if not chunks:
-                raise Exception("No chunks found for this material")
-            
-            # Delete existing ElasticSearch documents
-            elasticsearch_service.delete_material_chunks(material_id, material.company_id)
+            task_id = get_retrieval_backend().start_delete_material_chunks(material_id, company_id)
+            if task_id is None:
+                rag_index_service.mark_purged([material_id])
+                return {'material_id': material_id, 'completed': True}
             
-            # Ensure index exists
-            elasticsearch_service.create_index()
-            
-            # Reindex chunks
-            # Note: This requires embeddings to be stored somewhere
-            # For now, this is a placeholder - embeddings need to be regenerated
-            raise Exception("Reindexing requires re-running full RAG processing")
+            poll_index_delete_task.apply_async(
+                args=[task_id], kwargs={'purged_material_id': material_id}, countdown=DELETE_POLL_SECONDS
+            )
+            return {'material_id': material_id, 'delete_task': task_id}
         
         except Exception as e:
-            print(f"Reindexing failed for material {material_id}: {e}")
+            print(f"Vector purge failed for material {material_id} (the orphan sweep will retry): {e}")
+            raise
+
+
+@celery.task(bind=True, name='src.workers.rag_tasks.poll_index_delete_task', max_retries=None)
+def poll_index_delete_task(self, task_id: str, purged_material_id: int = None):
+    """
+    Wait for a background index delete by re-queuing itself until it completes
+    
+    Args:
+        task_id: Task id from RetrievalBackend.start_delete_material_chunks
+        purged_material_id: Deleted material to mark purged once the delete succeeded
+    """
+    
+    with worker_app_context():
+        status = get_retrieval_backend().delete_task_status(task_id)
+        if not status['completed']:
+            if self.request.retries >= DELETE_MAX_POLLS:
+                print(f"Index delete {task_id} still running after {DELETE_MAX_POLLS} polls; giving up")
+                return status
+            raise self.retry(countdown=DELETE_POLL_SECONDS)
+        
+        if status['failures']:
+            # Left for the orphan sweep; the material stays excluded from searches
+            print(f"Index delete {task_id} finished with {status['failures']} failures: {status.get('error')}")
+        elif purged_material_id is not None:
+            rag_index_service.mark_purged([purged_material_id])
+        return status
+
+
+@celery.task(bind=True, name='src.workers.rag_tasks.sweep_rag_orphans_task')
+def sweep_rag_orphans_task(self, dry_run: bool = False):
+    """
+    Reconcile ReferenceChunk and the search index (periodic, see celery beat_schedule)
+    
+    Args:
+        dry_run: Only count orphans and missing documents
+    """
+    
+    with worker_app_context():
+        try:
+            return rag_index_service.sweep_orphans(dry_run=dry_run)
+        
+        except Exception as e:
+            print(f"RAG orphan sweep failed: {e}")
+            raise
+
+
+@celery.task(bind=True, name='src.workers.rag_tasks.rebuild_index_task')
+def rebuild_index_task(self, delete_old: bool = False):
+    """
+    Rebuild the whole RAG index from stored chunks and swap the alias
+    
+    Searches keep using the current index until the new one is complete.
+    
+    Args:
+        delete_old: Delete the previous index after the swap
+    """
+    
+    with worker_app_context():
+        try:
+            return rag_index_service.rebuild_index(delete_old=delete_old)
+        
+        except Exception as e:
+            print(f"RAG index rebuild failed: {e}")
             raise
 
 
@@ -264,9 +328,7 @@ def cleanup_failed_jobs():
     Periodic task (should be scheduled with celery beat)
     """
     
-    from app import app
-    
-    with app.app_context():
+    with worker_app_context():
         try:
             from datetime import timedelta
             
@@ -0,0 +1,106 @@
+"""
+File: transcoding_tasks.py
+Purpose: Celery tasks for video transcoding and HLS packaging
+Main functionality: Optimize uploaded videos and generate HLS renditions on the
+                    'transcoding' queue, publishing each rendition as it lands
+Dependencies: celery, transcoding_service, FileManager (VideoOptimizer, HLSGenerator)
+"""
+
+from datetime import datetime
+import json
+import logging
+
+from src.workers.celery_app import celery
+from src.workers.worker_app import worker_app_context
+from src.models.models import db, ProcessingJob
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(bind=True, name='src.workers.transcoding_tasks.transcode_video_task')
+def transcode_video_task(self, job_id: int):
+    """
+    Transcode an uploaded video in the background
+
+    Steps:
+    1. Fetch the original (downloaded from GCS when needed)
+    2. Optimize to MP4 and publish the 'mp4' rendition
+    3. Generate HLS variants and publish the 'hls' rendition
+    4. Mark the job completed (or failed; the original stays playable either way)
+
+    Run on a dedicated worker sized to the node's CPU cores:
+        celery -A src.workers.celery_app:celery worker -Q transcoding --concurrency=$(nproc)
+
+    Args:
+        job_id: ProcessingJob.id (job_type='video_transcode')
+    """
+    from src.services.transcoding_service import transcoding_service
+
+    with worker_app_context():
+        job = ProcessingJob.query.get(job_id)
+        if not job:
+            logger.error(f"Transcode job {job_id} not found")
+            return {'success': False, 'error': 'job not found'}
+
+        try:
+            params = json.loads(job.job_params or '{}')
+            file_manager = transcoding_service.file_manager
+
+            job.job_status = 'processing'
+            job.started_at = datetime.utcnow()
+            job.current_step = 'Fetching original video'
+            job.progress = 5
+            db.session.commit()
+            transcoding_service.set_status(job, 'processing')
+
+            local_path = file_manager.get_local_path(params['file_path'])
+            if not local_path:
+                raise FileNotFoundError(f"Original video not found: {params['file_path']}")
+
+            def on_rendition(name, rendition):
+                transcoding_service.record_rendition(job, name, rendition)
+                job.current_step = f'{name} rendition ready'
+                job.progress = 50 if name == 'mp4' else 95
+                db.session.commit()
+
+            job.current_step = 'Transcoding'
+            job.progress = 10
+            db.session.commit()
+
+            with open(local_path, 'rb') as f:
+                result = file_manager.save_video_with_optimization(
+                    f,
+                    params['original_filename'],
+                    folder=params.get('folder'),
+                    company_id=job.company_id,
+                    on_rendition=on_rendition
+                )
+
+            if not result.get('success'):
+                raise RuntimeError(result.get('error', 'Transcoding failed'))
+
+            job.job_status = 'completed'
+            job.progress = 100
+            job.current_step = 'Completed'
+            job.completed_at = datetime.utcnow()
+            job.result_data = json.dumps(result, ensure_ascii=False, default=str)
+            db.session.commit()
+            transcoding_service.set_status(job, 'completed')
+
+            logger.info(f"Transcode job {job_id} completed")
+            return {'success': True, 'job_id': job_id}
+
+        except Exception as e:
+            error_msg = str(e)
+            logger.error(f"Transcode job {job_id} failed: {error_msg}", exc_info=True)
+            db.session.rollback()
+            try:
+                job = ProcessingJob.query.get(job_id)
+                job.job_status = 'failed'
+                job.error_message = error_msg
+                job.completed_at = datetime.utcnow()
+                db.session.commit()
+                transcoding_service.set_status(job, 'failed', error_msg)
+            except Exception as update_error:
+                logger.error(f"Failed to update transcode job status: {update_error}")
+            raise
@@ -6,8 +6,8 @@ Dependencies: celery, translation_service, models
 """
 
 from src.workers.celery_app import celery
+from src.workers.worker_app import worker_app_context
 from src.models.models import db, Manual, ManualTranslation, ProcessingJob
-from src.services.translation_service import translation_service
 from datetime import datetime, timedelta
 import logging
 import json
@@ -33,8 +33,7 @@ def translate_manual_task(self, manual_id, language_code, source_lang='ja'):
         self.update_state(state='PROGRESS', meta={'current': 0, 'total': 100, 'status': 'Starting translation'})
         
         # Get manual from database
-        from src.core.app import app
-        with app.app_context():
+        with worker_app_context():
             manual = Manual.query.get(manual_id)
             if not manual:
                 raise Exception(f'Manual {manual_id} not found')
@@ -65,6 +64,7 @@ def translate_manual_task(self, manual_id, language_code, source_lang='ja'):
             self.update_state(state='PROGRESS', meta={'current': 20, 'total': 100, 'status': 'Translating title'})
             
             # Translate using Gemini
+            from src.services.translation_service import translation_service
             result = translation_service.translate_manual(
                 title=manual.title,
                 content=manual.content,
@@ -97,8 +97,7 @@ def translate_manual_task(self, manual_id, language_code, source_lang='ja'):
         
         # Update translation record to failed
         try:
-            from src.core.app import app
-            with app.app_context():
+            with worker_app_context():
                 if 'translation_id' in locals():
                     translation = ManualTranslation.query.get(translation_id)
                     if translation:
@@ -195,8 +194,7 @@ def cleanup_old_translations(days=90):
         Number of records deleted
     """
     try:
-        from src.core.app import app
-        with app.app_context():
+        with worker_app_context():
             cutoff_date = datetime.utcnow() - timedelta(days=days)
             
             old_translations = ManualTranslation.query.filter(
@@ -0,0 +1,122 @@
+"""
+File: worker_app.py
+Purpose: Lightweight Flask application for Celery workers
+Main functionality: Worker app factory (configuration, database, models and their cache
+                    invalidation hooks), one app context pushed per worker process, context helper
+                    for tasks and scripts
+Dependencies: Flask, Flask-SQLAlchemy models, python-dotenv
+
+The web application (src.core.app) registers every route and imports the
+Gemini, video and storage clients at import time. Tasks only need the
+database, so workers build this app instead and import services inside the
+tasks that use them.
+"""
+
+import os
+import logging
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from flask import Flask, has_app_context
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+_worker_app: Optional[Flask] = None
+_pushed_pid: Optional[int] = None
+
+
+def _database_uri() -> str:
+    """Database URI resolved the same way as src/core/app.py"""
+    database_path_env = os.getenv('DATABASE_PATH')
+    if database_path_env:
+        db_path = os.path.abspath(database_path_env)
+    elif os.path.exists('/app'):
+        db_path = '/instance/manual_generator.db'
+    else:
+        db_path = os.path.abspath(os.path.join(os.getcwd(), 'instance', 'manual_generator.db'))
+    return os.getenv('DATABASE_URL', f'sqlite:///{db_path}')
+
+
+def _configure_google_cloud_env() -> None:
+    """Credentials path and project ID, set as src/core/app.py sets them for the services"""
+    # The web app discards any inherited value and uses the project's key file
+    project_root = Path(__file__).parent.parent.parent
+    os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = str(project_root / 'gcp-credentials.json')
+
+    project_id = os.getenv('PROJECT_ID') or os.getenv('GOOGLE_CLOUD_PROJECT_ID')
+    if project_id:
+        os.environ['GOOGLE_CLOUD_PROJECT_ID'] = project_id
+        os.environ['PROJECT_ID'] = project_id
+
+
+def create_worker_app() -> Flask:
+    """
+    Create the Flask application used by Celery workers
+
+    Only configuration and the SQLAlchemy extension are set up; no routes,
+    auth, or API clients. Services are imported by the tasks that need them.
+
+    Returns:
+        Flask application bound to the application database
+    """
+    load_dotenv()
+    _configure_google_cloud_env()
+
+    from src.models.models import db
+    # Session hooks that invalidate shared caches when tasks write tracked rows
+    # (the web app registers them through its route imports)
+    import src.services.company_stats_service  # noqa: F401
+    import src.services.rag_search_service  # noqa: F401
+
+    app = Flask('manual_generator_worker')
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
+    app.config['SQLALCHEMY_DATABASE_URI'] = _database_uri()
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def get_worker_app() -> Flask:
+    """Worker application of this process (created on first use)"""
+    global _worker_app
+    if _worker_app is None:
+        _worker_app = create_worker_app()
+    return _worker_app
+
+
+def push_worker_app_context() -> None:
+    """
+    Push the worker app context once per process
+
+    Called when a worker process starts and again before each task; only the
+    first call in a process pushes (forked pool children push their own, and
+    each thread of a threads pool pushes once). The context stays active for
+    the life of the process, so tasks do not pay for a push and pop each.
+    Database sessions are still removed after every task (see
+    celery_app.teardown_app_context).
+    """
+    global _pushed_pid
+    if _pushed_pid == os.getpid() and has_app_context():
+        return
+    get_worker_app().app_context().push()
+    _pushed_pid = os.getpid()
+    logger.info(f"Worker app context pushed in process {_pushed_pid}")
+
+
+@contextmanager
+def worker_app_context() -> Iterator[None]:
+    """
+    App context for task bodies
+
+    Reuses the active context (the worker's process-wide context, or the web
+    app's when a task runs eagerly inside a request); otherwise pushes the
+    worker app for the duration of the block, e.g. for scripts calling tasks
+    directly.
+    """
+    if has_app_context():
+        yield
+        return
+    with get_worker_app().app_context():
+        yield
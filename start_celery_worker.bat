@@ -15,4 +15,4 @@ echo Celery Worker を起動中...
 echo ログ: logs\celery_worker.log
 echo.
 
-celery -A src.workers.celery_app:celery worker --loglevel=info --logfile=logs\celery_worker.log --pool=solo
+celery -A src.workers.celery_app:celery worker -X transcoding --loglevel=info --logfile=logs\celery_worker.log --pool=solo
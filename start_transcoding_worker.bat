@@ -0,0 +1,22 @@
+@echo off
+chcp 65001 >NUL
+echo ================================================
+echo   Transcoding Worker 起動
+echo ================================================
+echo.
+
+cd /d %~dp0
+
+echo 仮想環境をアクティベート中...
+call .venv\Scripts\activate.bat
+
+rem 並列数: TRANSCODE_WORKER_CONCURRENCY（未設定時は CPU コア数）
+if "%TRANSCODE_WORKER_CONCURRENCY%"=="" set TRANSCODE_WORKER_CONCURRENCY=%NUMBER_OF_PROCESSORS%
+
+echo.
+echo Transcoding Worker を起動中... (concurrency=%TRANSCODE_WORKER_CONCURRENCY%)
+echo ログ: logs\celery_transcoding.log
+echo.
+
+rem ffmpeg はサブプロセスで動くため threads プールで CPU コアを使い切れる
+celery -A src.workers.celery_app:celery worker -Q transcoding -n transcoding@%%h --loglevel=info --logfile=logs\celery_transcoding.log --pool=threads --concurrency=%TRANSCODE_WORKER_CONCURRENCY%